@@ -0,0 +1,200 @@
+"""
+Health state kept by a background thread — probes read the cached snapshot.
+
+`GET /health` used to call `test_connection()` on every hit. With NullPool
+that opened a new Postgres connection for each Docker HEALTHCHECK (every 30 s)
+and each load-balancer probe. Now one daemon thread per worker runs the checks
+every HEALTH_CHECK_INTERVAL_S and the endpoints only read the result:
+
+- database — `SELECT 1` on a fresh connection
+- catalog  — POIs loaded + workbook version (mtime / size of each catalog file)
+- ors      — breaker state; with HEALTH_CHECK_ORS also one GET to the ORS base
+             URL (no quota used). Informational: planning falls back to haversine.
+
+Endpoints (app/api/main.py):
+- `/health/live`  — the process answers; no checks (container restart signal)
+- `/health/ready` — 200 only when the startup warm-up (app/api/warmup.py) has
+                    finished, the last snapshot is fresh, the catalog is
+                    loaded and (HEALTH_READY_REQUIRES_DB) the database is up;
+                    503 + reasons otherwise (take the worker out of rotation)
+- `/health`       — the full snapshot, always 200 (old contract + `checks`)
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.infrastructure.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+Check = Callable[[], Dict[str, Any]]
+
+
+def check_database() -> Dict[str, Any]:
+    from app.infrastructure.database.connection import ping
+
+    ping()
+    return {"ok": True}
+
+
+def check_catalog() -> Dict[str, Any]:
+    from app.api.dependencies import get_poi_repository
+    from app.api.serving import CATALOG_WORKBOOKS
+
+    versions = {}
+    for path, _ in CATALOG_WORKBOOKS:
+        try:
+            st = os.stat(path)
+            versions[os.path.basename(path)] = f"{st.st_mtime_ns}-{st.st_size}"
+        except OSError:
+            versions[os.path.basename(path)] = None
+    pois = len(get_poi_repository().get_all())
+    return {"ok": pois > 0, "pois": pois, "version": versions}
+
+
+def check_ors() -> Dict[str, Any]:
+    from app.infrastructure.routing.ors_client import get_ors_client
+
+    client = get_ors_client()
+    out: Dict[str, Any] = {"ok": True, "enabled": client.enabled(), "breaker": client.breaker.state}
+    if client.enabled() and settings.health_check_ors:
+        import httpx
+
+        try:
+            r = httpx.get(client.base_url, timeout=3.0)
+            out["reachable"] = r.status_code < 500
+        except httpx.HTTPError as e:
+            out["reachable"] = False
+            out["error"] = f"{type(e).__name__}: {e}"[:200]
+        out["ok"] = out["reachable"]
+    return out
+
+
+DEFAULT_CHECKS: Dict[str, Check] = {
+    "database": check_database,
+    "catalog": check_catalog,
+    "ors": check_ors,
+}
+
+
+class HealthMonitor:
+    """Runs `checks` every `interval_s` in a daemon thread; serves the last result."""
+
+    def __init__(
+        self,
+        checks: Optional[Dict[str, Check]] = None,
+        interval_s: Optional[float] = None,
+        clock: Callable[[], float] = time.time,
+        warmup: Optional[Callable[[], Optional[str]]] = None,
+    ) -> None:
+        self.checks = dict(DEFAULT_CHECKS if checks is None else checks)
+        # Returns why the worker is still warming up (None = done); see app/api/warmup.py.
+        self.warmup = warmup
+        self.interval_s = float(settings.health_check_interval_s if interval_s is None else interval_s)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_checks(self) -> Dict[str, Any]:
+        results: Dict[str, Dict[str, Any]] = {}
+        for name, check in self.checks.items():
+            started = time.perf_counter()
+            try:
+                result = dict(check())
+            except Exception as e:
+                result = {"ok": False, "error": f"{type(e).__name__}: {e}"[:200]}
+            result["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            results[name] = result
+        snapshot = {"checked_at": self._clock(), "checks": results}
+        with self._lock:
+            self._snapshot = snapshot
+        return snapshot
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_checks()
+            except Exception:
+                logger.exception("Health checks failed")
+            self._stop.wait(self.interval_s)
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="health-monitor", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def snapshot(self) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._snapshot
+
+    def readiness(self) -> Tuple[bool, List[str]]:
+        """(ready, reasons it is not)."""
+        warming = self.warmup() if self.warmup is not None else None
+        snap = self.snapshot()
+        if snap is None:
+            return False, [r for r in (warming, "starting: no health check completed yet") if r]
+        reasons = [warming] if warming else []
+        age = self._clock() - snap["checked_at"]
+        if age > 3 * self.interval_s:
+            reasons.append(f"stale: last check {age:.0f}s ago")
+        checks = snap["checks"]
+        if not checks.get("catalog", {}).get("ok", True):
+            reasons.append("catalog: " + checks["catalog"].get("error", "no POIs loaded"))
+        if settings.health_ready_requires_db and not checks.get("database", {}).get("ok", True):
+            reasons.append("database: " + checks["database"].get("error", "unavailable"))
+        return not reasons, reasons
+
+    def report(self) -> Dict[str, Any]:
+        """`/health` body: status + cached checks (`database` kept for old clients)."""
+        snap = self.snapshot()
+        if snap is None:
+            return {"status": "starting", "database": "unknown", "checks": {}}
+        ready, reasons = self.readiness()
+        db = snap["checks"].get("database", {})
+        return {
+            "status": "ok" if ready and all(c.get("ok") for c in snap["checks"].values()) else "degraded",
+            "database": "connected" if db.get("ok") else f"error: {db.get('error', 'unavailable')[:50]}",
+            "checked_at": datetime.fromtimestamp(snap["checked_at"], timezone.utc).isoformat(),
+            "age_s": round(self._clock() - snap["checked_at"], 1),
+            "ready": ready,
+            "reasons": reasons,
+            "checks": snap["checks"],
+        }
+
+
+_monitor: Optional[HealthMonitor] = None
+_monitor_lock = threading.Lock()
+
+
+def get_health_monitor() -> HealthMonitor:
+    global _monitor
+    with _monitor_lock:
+        if _monitor is None:
+            from app.api.warmup import get_warmup
+
+            _monitor = HealthMonitor(warmup=get_warmup().blocker)
+        return _monitor
+
+
+def _forget_monitor_after_fork() -> None:
+    # The checker thread does not survive fork; each worker starts its own.
+    global _monitor, _monitor_lock
+    _monitor = None
+    _monitor_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_monitor_after_fork)
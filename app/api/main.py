@@ -1,11 +1,18 @@
 """
 FastAPI application main entry point.
 """
+import time
+
+_import_started = time.perf_counter()
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 
+from app.api.metrics import MetricsMiddleware
 from app.api.routes import plan, payment, content, poi
 from app.infrastructure.config.settings import settings
+from app.infrastructure.metrics import STARTUP_SECONDS
 
 
 app = FastAPI(
@@ -23,12 +30,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Route latency + DB statements per request for GET /metrics
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(plan.router, prefix="/plan", tags=["plan"])
 app.include_router(payment.router, prefix="/payment", tags=["payment"])
 app.include_router(content.router, prefix="/content", tags=["content"])
 app.include_router(poi.router, prefix="/poi", tags=["poi"])
 
+# Cold start: module import (stripe, supabase, reportlab are deferred to first use;
+# per-module breakdown: python scripts/profile_startup.py)
+STARTUP_SECONDS.set(time.perf_counter() - _import_started, phase="import")
+print(f"[STARTUP] app.api.main imported in {STARTUP_SECONDS.value(phase='import'):.2f}s")
+
 
 @app.on_event("startup")
 async def startup_event():
@@ -36,8 +51,42 @@ async def startup_event():
     Application startup tasks:
     1. Reload POI data from Excel
     2. Test database connection (ETAP 2)
+    3. Warm-up (catalogs, indices, synthetic plans) in the background;
+       /health/ready waits for it (app/api/warmup.py)
     """
-    # POI reload
+    started = time.perf_counter()
+    # POI reload — skipped in workers forked from a preloaded master (gunicorn.conf.py):
+    # the catalogs are already in memory, shared copy-on-write.
+    from app.api.serving import catalogs_preloaded
+    if catalogs_preloaded():
+        print("[STARTUP] Catalogs preloaded in master - skipping POI reload")
+    else:
+        _reload_poi_repository()
+
+    # Database connection test (ETAP 2)
+    print("[STARTUP] Testing database connection...")
+    try:
+        from app.infrastructure.database.connection import test_connection
+        if test_connection():
+            print("[STARTUP] Database connection verified")
+        else:
+            print("[STARTUP] Database connection failed (but starting anyway)")
+    except Exception as e:
+        print(f"[STARTUP] Database connection test skipped: {e}")
+
+    # Health snapshot refreshed in the background (/health, /health/ready).
+    from app.api.health import get_health_monitor
+    get_health_monitor().start()
+
+    # Already done when the gunicorn master ran it before forking.
+    from app.api.warmup import get_warmup
+    get_warmup().start()
+
+    STARTUP_SECONDS.set(time.perf_counter() - started, phase="startup")
+    print(f"[STARTUP] Startup hooks finished in {STARTUP_SECONDS.value(phase='startup'):.2f}s")
+
+
+def _reload_poi_repository():
     print("[STARTUP] Starting POI reload...")
     try:
         from app.api.dependencies import get_poi_repository
@@ -50,17 +99,17 @@ async def startup_event():
         print(f"[STARTUP] POI ERROR: {e}")
         import traceback
         traceback.print_exc()
-    
-    # Database connection test (ETAP 2)
-    print("[STARTUP] Testing database connection...")
-    try:
-        from app.infrastructure.database.connection import test_connection
-        if test_connection():
-            print("[STARTUP] Database connection verified")
-        else:
-            print("[STARTUP] Database connection failed (but starting anyway)")
-    except Exception as e:
-        print(f"[STARTUP] Database connection test skipped: {e}")
+
+
+@app.on_event("shutdown")
+def shutdown_event():
+    """Release the pooled ORS connections and the plan job pool, stop the health monitor."""
+    from app.api.health import get_health_monitor
+    from app.infrastructure.routing.ors_client import close_ors_client
+    from app.application.services.plan_jobs import shutdown_plan_jobs
+    get_health_monitor().stop()
+    close_ors_client()
+    shutdown_plan_jobs()
 
 
 @app.get("/health")
@@ -69,34 +118,55 @@ def health_check():
     Health check endpoint for deployment monitoring.
     
     ETAP 2: Includes database connectivity check.
+    Cached snapshot from the background monitor (app/api/health.py) — no DB
+    connection per probe. Always 200; see /health/ready for routing decisions.
     """
-    response = {
-        "status": "ok",
+    from app.api.health import get_health_monitor
+    from app.api.warmup import get_warmup
+    return {
         "service": "travel-planner-api",
         "version": "2.0.0",  # ETAP 2
+        **get_health_monitor().report(),
+        "warmup": get_warmup().state(),
     }
-    
-    # Try database connection (don't fail if DB is down)
-    try:
-        from app.infrastructure.database.connection import test_connection
-        db_ok = test_connection()
-        response["database"] = "connected" if db_ok else "unavailable"
-    except Exception as e:
-        response["database"] = f"error: {str(e)[:50]}"
-    
-    return response
+
+
+@app.get("/health/live")
+def health_live():
+    """Liveness: the process answers. No dependency checks."""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+def health_ready():
+    """Readiness: warm-up done, fresh snapshot, catalog loaded, database up — else 503 + reasons."""
+    from app.api.health import get_health_monitor
+    ready, reasons = get_health_monitor().readiness()
+    if ready:
+        return {"status": "ready"}
+    return JSONResponse(status_code=503, content={"status": "not_ready", "reasons": reasons})
 
 
 @app.post("/admin/reload-poi")
 def admin_reload_poi():
-    """Admin endpoint to manually reload POI data from Excel."""
+    """Admin endpoint to manually reload POI data from Excel.
+
+    Also re-reads the preloaded trail / restaurant snapshots — in this worker
+    only; the others pick changes up after CATALOG_SNAPSHOT_TTL_S.
+    """
     try:
         from app.api.dependencies import get_poi_repository
+        from app.infrastructure.repositories import RestaurantRepository, TrailRepository
         poi_repo = get_poi_repository()
         poi_repo.reload()
+        snapshots = {
+            "trails": TrailRepository.refresh_snapshot(),
+            "restaurants": RestaurantRepository.refresh_snapshot(),
+        }
         return {
             "status": "success",
             "message": "POI Repository reloaded from Excel",
+            "snapshots": snapshots,
             "emoji": "🔄"
         }
     except Exception as e:
@@ -106,6 +176,32 @@ def admin_reload_poi():
         }
 
 
+@app.get("/admin/ors-budget")
+def admin_ors_budget():
+    """ORS quota used / remaining today (UTC), shared by all workers."""
+    from app.infrastructure.routing.ors_client import get_ors_client
+    client = get_ors_client()
+    return {
+        "enabled": client.enabled(),
+        "budget": client.budget_snapshot(),
+        "latency": client.latency_snapshot(),
+    }
+
+
+@app.get("/admin/plan-admission")
+def admin_plan_admission():
+    """Plan generation budget of this worker: cost in use, queue depth, waits, rejections."""
+    from app.application.services.plan_admission import get_plan_admission
+    return get_plan_admission().snapshot()
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    """Prometheus text format: routes, plan stages, caches, ORS/Overpass, DB, PDF (this worker)."""
+    from app.infrastructure.metrics import render_metrics
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @app.get("/")
 def root():
     """Root endpoint with API info."""
@@ -0,0 +1,43 @@
+"""
+Per-request metrics: latency by route template and DB statements per request.
+
+Plain ASGI middleware rather than `@app.middleware("http")`: it does not wrap
+the body, so `/plan/preview/stream` keeps streaming. The route label is the
+matched template (`/plan/{plan_id}`), never the raw path, to keep the series
+count bounded; 404s are `unmatched`.
+"""
+from __future__ import annotations
+
+import time
+
+from app.infrastructure.metrics import HTTP_REQUEST_SECONDS, db_query_scope
+
+
+class MetricsMiddleware:
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = [500]
+
+        async def _send(message) -> None:
+            if message["type"] == "http.response.start":
+                status_code[0] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        with db_query_scope():
+            try:
+                await self.app(scope, receive, _send)
+            finally:
+                route = scope.get("route")
+                HTTP_REQUEST_SECONDS.observe(
+                    time.perf_counter() - started,
+                    method=scope.get("method", ""),
+                    route=getattr(route, "path", None) or "unmatched",
+                    status=str(status_code[0]),
+                )
@@ -6,7 +6,6 @@ from fastapi import APIRouter, HTTPException, status, Request, Depends
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from datetime import datetime, timezone
-import stripe
 
 from app.api.dependencies import get_session, get_current_user, get_owner_id, OwnerIdentity
 from app.infrastructure.database.models import User, PaymentSession, Plan
@@ -15,7 +14,8 @@ from app.infrastructure.payment import (
     validate_webhook_signature,
     handle_checkout_completed,
     handle_checkout_expired,
-    handle_payment_succeeded
+    handle_payment_succeeded,
+    get_stripe,
 )
 
 router = APIRouter()
@@ -132,6 +132,7 @@ async def create_checkout_session(
             detail="Plan already paid for"
         )
     
+    stripe = get_stripe()  # lazy: ~0.5 s import, only on the payment path
     try:
         # Create Stripe Checkout Session (real API call)
         # Use user_id if authenticated, guest_id if guest
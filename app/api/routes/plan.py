@@ -1,11 +1,16 @@
 """
 Plan endpoints - preview, status, get plan.
 """
-from fastapi import APIRouter, HTTPException, status, Depends, Header
-from fastapi.responses import Response
+from fastapi import APIRouter, HTTPException, status, Depends, Header, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel, Field
+from starlette.background import BackgroundTask
+from contextlib import closing
+import json
 import re
+import threading
 import uuid
 
 from app.domain.models.trip_input import TripInput
@@ -27,20 +32,62 @@ from app.api.dependencies import (
 )
 from app.infrastructure.config.settings import settings
 from app.infrastructure.pdf import (
-    build_plan_pdf,
     validate_pdf_render_url,
     verify_x_render_secret,
     render_url_to_pdf,
 )
 from app.infrastructure.database.models import User
+from app.infrastructure.metrics import PDF_RENDER_SECONDS, PLAN_STAGE_SECONDS
+from app.infrastructure.plan_json import PlanPayload, dumps, encode_plan, etag_matches, make_etag
+from app.infrastructure.repositories.plan_job_store import get_plan_job_store
+from app.infrastructure.routing.polyline import GEOMETRY_FORMATS, pack_days_geometry
 from app.application.services.plan_service import PlanService
 from app.application.services.plan_editor import PlanEditor
+from app.application.services.plan_admission import (
+    AdmissionRejected,
+    estimate_cost,
+    get_plan_admission,
+)
+from app.application.services.plan_coalescer import get_plan_coalescer
+from app.application.services.plan_jobs import PlanQueueFull, get_plan_job_queue
+from app.application.services.plan_stream import iter_plan_days
 from app.application.services.edit_helpers import load_pois_for_plan
 
 
 router = APIRouter()
 
 
+def _geometry_format(
+    x_geometry_format: Optional[str] = Header(None, alias="X-Geometry-Format"),
+) -> str:
+    """Transit polyline encoding requested by the client (default: geojson lists)."""
+    fmt = (x_geometry_format or "geojson").strip().lower()
+    if fmt not in GEOMETRY_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported X-Geometry-Format '{x_geometry_format}' "
+                   f"(expected one of: {', '.join(GEOMETRY_FORMATS)})",
+        )
+    return fmt
+
+
+def _plan_response(payload: PlanPayload, fmt: str, if_none_match: Optional[str] = None) -> Response:
+    """
+    Plan JSON from the single serialization pass (plan_json.py) + ETag.
+
+    polyline6: transit `geometry`/`geometry_latlng` → `geometry_polyline6` string
+    (its own body and ETag). If-None-Match on the current ETag → 304, no body.
+    """
+    body, etag = payload.body, payload.etag
+    if fmt == "polyline6":
+        body = dumps(pack_days_geometry(payload.data))
+        etag = make_etag(body)
+    headers = {"ETag": etag}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
 @router.post(
     "/preview",
     response_model=PlanResponse,
@@ -65,6 +112,8 @@ router = APIRouter()
     - Energy system (day 1 = heavy hiking OK, later days lighter)
     - Budget penalties for premium POI (termy)
     - Version #1 auto-saved to database
+    - Identical concurrent requests (double-click, retry) share one generation;
+      each still gets its own plan_id and version #1
     
     **Example Request (Authenticated):**
     ```json
@@ -91,11 +140,23 @@ router = APIRouter()
     ```
     
     **Response:** PlanResponse with 5 days, ~28 POI, 71.4% uniqueness
+
+    **Geometry:** send `X-Geometry-Format: polyline6` to receive each transit
+    route as one `geometry_polyline6` string (encoded polyline, precision 6)
+    instead of the `geometry` / `geometry_latlng` coordinate lists.
+
+    **Async mode:** `?mode=async` (or `Prefer: respond-async`) answers 202 with
+    `{"plan_id", "status": "queued", "status_url"}` at once; the plan is
+    generated by a local worker pool. Poll `GET /plan/{plan_id}/status` for
+    `status` (queued/running/ready/failed) and `days_done` / `days_total`, then
+    fetch `GET /plan/{plan_id}` once it is ready.
     
     **Error Codes:**
     - 400: Invalid trip_input OR missing auth/guest-id
     - 401: Invalid/expired authentication token (if provided)
+    - 429: Plan generation budget full after the queue wait (retry after `Retry-After` seconds)
     - 500: Plan generation failed
+    - 503: Async queue full (retry after `Retry-After` seconds)
     """
 )
 def preview_plan(
@@ -103,7 +164,10 @@ def preview_plan(
     plan_repo: PlanRepository = Depends(get_plan_repository),
     poi_repo: POIRepository = Depends(get_poi_repository),
     version_repo: PlanVersionRepository = Depends(get_version_repository),
-    owner: OwnerIdentity = Depends(get_owner_id)  # ETAP 2: Auth OR guest
+    owner: OwnerIdentity = Depends(get_owner_id),  # ETAP 2: Auth OR guest
+    geometry_format: str = Depends(_geometry_format),
+    mode: Optional[str] = Query(None, description="'async' → 202 + plan_id, poll /status"),
+    prefer: Optional[str] = Header(None),
 ):
     """
     Generate travel plan with authentication or guest support.
@@ -120,39 +184,209 @@ def preview_plan(
     print("[ROUTER] preview_plan() START", flush=True)
     print(f"[ROUTER] Days requested: {trip_input.trip_length.days}", flush=True)
     print("="*80 + "\n", flush=True)
+
+    if _wants_async(mode, prefer):
+        return _enqueue_preview(trip_input, owner)
     
     # Utworz service z POI repository
     plan_service = PlanService(poi_repo)
     
     # Generuj plan z prawdziwego silnika (4.10, 4.11, 4.12)
-    plan = plan_service.generate_plan(trip_input)
+    # Identyczne równoległe requesty (double-click, retry) czekają na jedną
+    # generację; każdy dostaje własny plan_id (plan_coalescer.py).
+    # Generacja w budżecie CPU procesu (plan_admission.py) — za dużo → 429.
+    def _generate(trip: TripInput) -> PlanResponse:
+        ticket = _admission_ticket(trip)
+        try:
+            return plan_service.generate_plan(trip)
+        finally:
+            _release_admission(ticket)
+
+    if settings.plan_preview_coalescing:
+        plan = get_plan_coalescer().generate(trip_input, _generate)
+    else:
+        plan = _generate(trip_input)
     
-    # Zapisz w repository z user_id OR guest_id
-    # FIX (01.07.2026): przekaż trip_input, aby zapisać miasto/grupę/budżet/daty
-    # (wcześniej plan zapisywał się jako "Unknown").
-    plan_repo.save(
-        plan,
-        user_id=owner.user_id,
-        guest_id=owner.guest_id,
-        trip_input=trip_input,
-    )
+    payload = encode_plan(plan)
+    _save_preview(plan, trip_input, owner, plan_repo, version_repo, payload)
     
-    # ETAP 2: Auto-save version #1
+    return _plan_response(payload, geometry_format)
+
+
+def _admission_ticket(trip_input: TripInput):
+    """Wait for plan generation capacity; 429 + Retry-After if none in time."""
+    if settings.plan_admission_budget <= 0:
+        return None
     try:
-        days_json = {
-            "days": [day.dict() for day in plan.days]
-        }
-        version_repo.save_version(
-            plan_id=plan.plan_id,
+        return get_plan_admission().acquire(estimate_cost(trip_input))
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Plan generation busy ({e}) — retry later",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+
+def _release_admission(ticket) -> None:
+    if ticket is not None:
+        get_plan_admission().release(ticket)
+
+
+def _save_preview(
+    plan: PlanResponse,
+    trip_input: TripInput,
+    owner: OwnerIdentity,
+    plan_repo: PlanRepository,
+    version_repo: PlanVersionRepository,
+    payload: Optional[PlanPayload] = None,
+) -> None:
+    """Zapis nowego planu + version #1 (preview i preview/stream).
+
+    payload: JSON już policzony dla odpowiedzi — snapshot dni bez ponownej serializacji.
+    """
+    days_json = (payload or encode_plan(plan)).days_json()
+    with PLAN_STAGE_SECONDS.time(stage="persist"):
+        # Zapisz w repository z user_id OR guest_id
+        # FIX (01.07.2026): przekaż trip_input, aby zapisać miasto/grupę/budżet/daty
+        # (wcześniej plan zapisywał się jako "Unknown").
+        plan_repo.save(
+            plan,
+            user_id=owner.user_id,
+            guest_id=owner.guest_id,
+            trip_input=trip_input,
             days_json=days_json,
-            change_type="generated",
-            change_summary="Initial plan generation (version 1)"
         )
-    except Exception as e:
-        # Log error but don't fail request (version is secondary)
-        print(f"Warning: Failed to save version #1: {e}")
-    
-    return plan
+
+        # ETAP 2: Auto-save version #1
+        try:
+            version_repo.save_version(
+                plan_id=plan.plan_id,
+                days_json=days_json,
+                change_type="generated",
+                change_summary="Initial plan generation (version 1)"
+            )
+        except Exception as e:
+            # Log error but don't fail request (version is secondary)
+            print(f"Warning: Failed to save version #1: {e}")
+
+
+def _stream_frame(event: str, data: Dict[str, Any], sse: bool) -> str:
+    body = json.dumps(data, ensure_ascii=False)
+    if sse:
+        return f"event: {event}\ndata: {body}\n\n"
+    return json.dumps({"event": event, "data": data}, ensure_ascii=False) + "\n"
+
+
+@router.post(
+    "/preview/stream",
+    summary="Generate travel plan, streamed day by day",
+    response_class=StreamingResponse,
+    description="""
+    Same input, auth and persistence as `POST /plan/preview`, but each day is
+    sent as soon as it is assembled instead of after the whole trip.
+
+    **Format:** `Accept: text/event-stream` → Server-Sent Events
+    (`event: <name>` + `data: <json>`); otherwise NDJSON, one
+    `{"event": <name>, "data": <json>}` object per line.
+
+    **Events (in order):**
+    - `day` — one `DayPlan` (+ `days_total`) per day, in day order
+    - `day` with `"revised": true` — a day changed by trip-level passes after it
+      was sent (dates, gap filling — usually most days); replaces the draft
+    - `summary` — the saved plan without `days`: `plan_id`, `warnings`,
+      `preference_coverage`, trip context, `days_total`
+    - `error` — `{"detail": ...}`; generation or saving failed, nothing stored
+
+    `X-Geometry-Format: polyline6` applies to every `day` event.
+
+    **429** (before any event) when the plan generation budget stays full for
+    the queue wait, with `Retry-After`.
+    """
+)
+def preview_plan_stream(
+    trip_input: TripInput,
+    plan_repo: PlanRepository = Depends(get_plan_repository),
+    poi_repo: POIRepository = Depends(get_poi_repository),
+    version_repo: PlanVersionRepository = Depends(get_version_repository),
+    owner: OwnerIdentity = Depends(get_owner_id),
+    geometry_format: str = Depends(_geometry_format),
+    accept: Optional[str] = Header(None),
+):
+    sse = "text/event-stream" in (accept or "").lower()
+    # Admission before the response starts, so "busy" is still a 429.
+    ticket = _admission_ticket(trip_input)
+
+    # The ticket is held until the generation thread ends (iter_plan_days
+    # on_finish), not until the response ends: a client that disconnects
+    # mid-stream no longer frees the budget while its plan still runs.
+    body_started = threading.Event()
+
+    def _events():
+        body_started.set()
+        handed_off = False
+        try:
+            plan = None
+            with closing(iter_plan_days(
+                PlanService(poi_repo), trip_input,
+                on_finish=lambda: _release_admission(ticket),
+            )) as days:
+                handed_off = True
+                for kind, payload in days:
+                    if kind == "plan":
+                        plan = payload
+                        continue
+                    if geometry_format == "polyline6":
+                        payload = pack_days_geometry({"days": [payload]})["days"][0]
+                    yield _stream_frame("day", payload, sse)
+            _save_preview(plan, trip_input, owner, plan_repo, version_repo)
+            summary = jsonable_encoder(plan, exclude={"days"})
+            summary["days_total"] = len(plan.days)
+            yield _stream_frame("summary", summary, sse)
+        except Exception as e:
+            print(f"[ROUTER] preview_plan_stream() failed: {e}")
+            yield _stream_frame("error", {"detail": f"Plan generation failed: {e}"}, sse)
+        finally:
+            if not handed_off:
+                _release_admission(ticket)
+
+    def _release_if_body_never_ran() -> None:
+        # Client gone before the body started → the generator never runs.
+        if not body_started.is_set():
+            _release_admission(ticket)
+
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream" if sse else "application/x-ndjson",
+        # No proxy buffering, or the days arrive together at the end.
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(_release_if_body_never_ran),
+    )
+
+
+def _wants_async(mode: Optional[str], prefer: Optional[str]) -> bool:
+    if mode is not None:
+        return mode.strip().lower() == "async"
+    return bool(prefer) and "respond-async" in prefer.lower()
+
+
+def _enqueue_preview(trip_input: TripInput, owner: OwnerIdentity) -> JSONResponse:
+    """Async preview: queue the job, answer 202 with the plan_id to poll."""
+    try:
+        plan_id = get_plan_job_queue().submit(
+            trip_input, user_id=owner.user_id, guest_id=owner.guest_id,
+        )
+    except PlanQueueFull as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Plan generation queue is full ({e}) — retry later",
+            headers={"Retry-After": "5"},
+        )
+    status_url = f"/plan/{plan_id}/status"
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={"plan_id": plan_id, "status": "queued", "status_url": status_url},
+        headers={"Location": status_url, "Preference-Applied": "respond-async"},
+    )
 
 
 @router.get("/my-plans")
@@ -254,7 +488,8 @@ def render_plan_pdf_from_url(
     """
     verify_x_render_secret(x_render_secret)
     opaque_token = validate_pdf_render_url(body.url)
-    pdf_bytes = render_url_to_pdf(body.url)
+    with PDF_RENDER_SECONDS.time(renderer="playwright"):
+        pdf_bytes = render_url_to_pdf(body.url)
     safe = re.sub(r"[^a-zA-Z0-9]+", "", opaque_token)[:16] or "plan"
     filename = f"plan-{safe}.pdf"
     return Response(
@@ -273,13 +508,18 @@ def get_plan_status(
     Sprawdza status planu (polling endpoint).
 
     Zwraca m.in.:
-    - status: status generowania planu (ready/pending/failed)
+    - status: status generowania planu (ready/pending/failed); plan z
+      `?mode=async` przed zapisem: queued/running/failed + days_done/days_total
     - paid (bool) + payment_status ("paid"/"unpaid"): status płatności
       (01.07.2026 - front feedback: front potrzebuje wiedzieć czy opłacony)
     - is_assigned (bool): czy plan jest przypisany do konta użytkownika
     - city / title / start_date / days_count: kontekst wycieczki
     """
     metadata = plan_repo.get_metadata(plan_id)
+
+    if metadata is None:
+        # Async preview still generating (or failed) — not in the plans table yet.
+        metadata = get_plan_job_store().get(plan_id)
     
     if metadata is None:
         raise HTTPException(
@@ -335,6 +575,8 @@ def get_full_plan(
     plan_id: str,
     plan_repo: PlanRepository = Depends(get_plan_repository),
     owner: Optional[OwnerIdentity] = Depends(get_optional_owner),
+    geometry_format: str = Depends(_geometry_format),
+    if_none_match: Optional[str] = Header(None),
 ):
     """
     Zwraca pelny wygenerowany plan.
@@ -342,6 +584,8 @@ def get_full_plan(
     01.07.2026: Kontrola dostępu (paywall + opcjonalna autentykacja dla planów
     przypisanych do konta). Właściciel zawsze ma dostęp. Zwraca też pola
     city / start_date / title / paid, aby front mógł wyświetlić plan.
+
+    ETag = hash treści; `If-None-Match` z aktualnym ETagiem → 304 bez body.
     """
     plan = plan_repo.get_by_id(plan_id)
 
@@ -353,7 +597,7 @@ def get_full_plan(
 
     _enforce_plan_access(plan_id, plan_repo, owner)
 
-    return plan
+    return _plan_response(encode_plan(plan), geometry_format, if_none_match)
 
 
 @router.get("/{plan_id}/pdf")
@@ -377,8 +621,11 @@ def download_plan_pdf(
 
     _enforce_plan_access(plan_id, plan_repo, owner)
 
+    from app.infrastructure.pdf import build_plan_pdf  # reportlab: loaded on first download
+
     try:
-        pdf_bytes = build_plan_pdf(plan)
+        with PDF_RENDER_SECONDS.time(renderer="reportlab"):
+            pdf_bytes = build_plan_pdf(plan)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -447,7 +694,8 @@ def list_plan_versions(
 def get_plan_version(
     plan_id: str,
     version_number: int,
-    version_repo: PlanVersionRepository = Depends(get_version_repository)
+    version_repo: PlanVersionRepository = Depends(get_version_repository),
+    geometry_format: str = Depends(_geometry_format),
 ):
     """
     Gets full snapshot of a specific version (including days_json).
@@ -466,6 +714,8 @@ def get_plan_version(
                 detail=f"Version {version_number} not found for plan {plan_id}"
             )
         
+        if geometry_format == "polyline6":
+            version["days_json"] = pack_days_geometry(version["days_json"])
         return version
     except HTTPException:
         raise
@@ -654,14 +904,15 @@ def remove_item_from_day(
         # Update plan with edited day
         plan.days[day_number - 1] = updated_day
         
+        # Jedna serializacja: snapshot planu, wersji i odpowiedź (plan_json.py)
+        payload = encode_plan(plan)
+        days_json = payload.days_json()
+
         # Save updated plan
-        plan_repo.save(plan)
+        plan_repo.save(plan, days_json=days_json)
         
         # Save new version
         try:
-            days_json = {
-                "days": [day.dict() for day in plan.days]
-            }
             version_repo.save_version(
                 plan_id=plan.plan_id,
                 days_json=days_json,
@@ -674,7 +925,7 @@ def remove_item_from_day(
         except Exception as e:
             print(f"Warning: Failed to save version: {e}")
         
-        return plan
+        return _plan_response(payload, "geojson")
     
     except HTTPException:
         raise
@@ -793,14 +1044,15 @@ def replace_item_in_day(
         # Update plan with edited day
         plan.days[day_number - 1] = updated_day
         
+        # Jedna serializacja: snapshot planu, wersji i odpowiedź (plan_json.py)
+        payload = encode_plan(plan)
+        days_json = payload.days_json()
+
         # Save updated plan
-        plan_repo.save(plan)
+        plan_repo.save(plan, days_json=days_json)
         
         # Save new version
         try:
-            days_json = {
-                "days": [day.dict() for day in plan.days]
-            }
             version_repo.save_version(
                 plan_id=plan.plan_id,
                 days_json=days_json,
@@ -813,7 +1065,7 @@ def replace_item_in_day(
         except Exception as e:
             print(f"Warning: Failed to save version: {e}")
         
-        return plan
+        return _plan_response(payload, "geojson")
     
     except HTTPException:
         raise
@@ -960,14 +1212,15 @@ def regenerate_time_range_in_day(
         # Update day in plan
         plan.days[day_number - 1] = updated_day
         
+        # Jedna serializacja: snapshot planu, wersji i odpowiedź (plan_json.py)
+        payload = encode_plan(plan)
+        days_json = payload.days_json()
+
         # Save updated plan
-        plan_repo.save(plan)
+        plan_repo.save(plan, days_json=days_json)
         
         # Save version
         try:
-            days_json = {
-                "days": [day.model_dump() for day in plan.days]
-            }
             pinned_str = ", ".join(request.pinned_items) if request.pinned_items else "none"
             version_repo.save_version(
                 plan_id=plan.plan_id,
@@ -982,7 +1235,7 @@ def regenerate_time_range_in_day(
         except Exception as e:
             print(f"Warning: Failed to save version: {e}")
         
-        return plan
+        return _plan_response(payload, "geojson")
     
     except HTTPException:
         raise
@@ -0,0 +1,91 @@
+"""
+Production serving — catalogs preloaded once, shared by forked workers.
+
+One uvicorn process runs plan generation (CPU-bound, GIL) on one core. In
+production gunicorn (`gunicorn.conf.py`, preload_app) imports the app in a
+master process, `preload_catalogs()` fills every catalog and derived index
+there, `freeze_heap()` moves those objects out of the GC's reach, and the
+workers are forked from it. Each worker starts with the catalogs already in
+memory, and the pages stay shared copy-on-write until a worker writes to them.
+
+Per-process resources are not inherited: the DB engine, the ORS client and the
+plan job pool drop their parent state in the child (`os.register_at_fork` in
+their modules). The SQLite stores (routes, ORS budget, Overpass tiles, jobs)
+reopen by pid, so ORS counters stay shared through the ledger file.
+"""
+from __future__ import annotations
+
+import gc
+import logging
+import os
+import time
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+# Workbooks read on the request path: (path, sheet) as the loaders read them.
+CATALOG_WORKBOOKS = (
+    (os.path.join("data", "zakopane.xlsx"), 0),
+    (os.path.join("data", "multi_city_attractions.xlsx"), "All Cities"),
+)
+
+_preloaded = False
+
+
+def catalogs_preloaded() -> bool:
+    """True in the master after `preload_catalogs()` and in workers forked from it."""
+    return _preloaded
+
+
+def preload_catalogs() -> Dict[str, Any]:
+    """Load POI workbooks, trail / restaurant tables and routing indices. Returns stats."""
+    global _preloaded
+    from app.api.dependencies import get_poi_repository
+    from app.infrastructure.repositories import RestaurantRepository, TrailRepository
+    from app.infrastructure.repositories.catalog_cache import (
+        cached_workbooks,
+        read_workbook,
+        validate_workbook_once,
+    )
+    from app.infrastructure.routing.osm_graph import get_offline_router
+    from app.infrastructure.routing.poi_matrix import get_poi_matrices
+
+    started = time.perf_counter()
+    stats: Dict[str, Any] = {}
+
+    for path, sheet in CATALOG_WORKBOOKS:
+        if not os.path.exists(path):
+            logger.warning("Preload: missing catalog %s", path)
+            continue
+        validate_workbook_once(path, sheet_name=sheet)
+        read_workbook(path, sheet_name=sheet)
+    stats["workbooks"] = cached_workbooks()
+
+    stats["pois"] = len(get_poi_repository().get_all())
+
+    for name, repo in (("trails", TrailRepository), ("restaurants", RestaurantRepository)):
+        try:
+            stats[name] = repo.preload()
+        except Exception as e:
+            # No database at build time → workers query per request as before.
+            logger.warning("Preload: %s table not loaded (%s)", name, e)
+            stats[name] = None
+
+    matrices = get_poi_matrices()
+    stats["poi_matrices"] = len(matrices.matrices) if matrices else 0
+    stats["osm_router"] = get_offline_router() is not None
+
+    stats["seconds"] = round(time.perf_counter() - started, 2)
+    _preloaded = True
+    logger.info("Catalogs preloaded: %s", stats)
+    return stats
+
+
+def freeze_heap() -> None:
+    """Collect once, then exempt every live object from GC before forking.
+
+    Without this the first collection in each worker touches the header of
+    every preloaded object and un-shares most of the catalog pages.
+    """
+    gc.collect()
+    gc.freeze()
@@ -0,0 +1,163 @@
+"""
+Startup warm-up — the first preview no longer pays for the cold process.
+
+`startup_event` used to load only `zakopane.xlsx`; the first plan for any other
+city then parsed the multi-city workbook, loaded trails / restaurants from the
+database, compiled regexes and ran hundreds of functions for the first time.
+The warm-up does that work before the worker is reported ready:
+
+1. catalogs — `preload_catalogs()` (workbooks, POIs, trails, restaurants,
+               POI matrices, offline OSM graph); skipped when already preloaded
+2. indices  — admission pool size of every catalog city and cluster
+3. plans    — one synthetic plan per WARMUP_PLAN_CITIES entry (a region type
+               each) through `PlanService.generate_plan`, with ORS switched off
+               for this thread only and nothing persisted
+
+Under gunicorn (`gunicorn.conf.py`) the master runs it before forking, so every
+worker starts warm; with plain uvicorn `startup_event` runs it in a background
+thread and `/health/ready` answers 503 ("warmup: ...") until it finishes.
+A failed step is logged and reported but does not keep the worker out of
+rotation — it only means the first matching request is slower.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.infrastructure.config.settings import settings
+from app.infrastructure.metrics import STARTUP_SECONDS
+
+logger = logging.getLogger(__name__)
+
+Step = Callable[[], Any]
+
+
+def warm_catalogs() -> Dict[str, Any]:
+    from app.api.serving import catalogs_preloaded, preload_catalogs
+
+    if catalogs_preloaded():
+        return {"skipped": "preloaded"}
+    return preload_catalogs()
+
+
+def warm_indices() -> Dict[str, Any]:
+    from app.application.services.plan_admission import preload_pool_sizes
+
+    return {"pool_sizes": preload_pool_sizes()}
+
+
+def synthetic_trip(city: str, days: int) -> Dict[str, Any]:
+    """TripInput payload for a warm-up plan (a typical couple, car, mid budget)."""
+    from app.domain.config.destination_clusters import DestinationClusters
+
+    return {
+        "location": {
+            "city": city,
+            "country": "Poland",
+            "is_cluster": city in DestinationClusters.ALL_CLUSTERS,
+        },
+        "group": {"type": "couples", "size": 2, "crowd_tolerance": 1},
+        "trip_length": {"days": days, "start_date": (date.today() + timedelta(days=30)).isoformat()},
+        "daily_time_window": {"start": "09:00", "end": "19:00"},
+        "budget": {"level": 2},
+        "transport_modes": ["car"],
+        "travel_style": "balanced",
+    }
+
+
+def warm_plan(city: str, days: int) -> Dict[str, Any]:
+    from app.api.dependencies import get_poi_repository
+    from app.application.services.plan_service import PlanService
+    from app.domain.models.trip_input import TripInput
+    from app.infrastructure.routing.ors_client import ors_offline
+    from app.infrastructure.routing.provider import route_session
+
+    trip = TripInput(**synthetic_trip(city, days))
+    with ors_offline(), route_session():
+        plan = PlanService(get_poi_repository()).generate_plan(trip)
+    return {"days": len(plan.days)}
+
+
+def default_steps() -> List[Tuple[str, Step]]:
+    days = max(1, int(settings.warmup_plan_days))
+    steps: List[Tuple[str, Step]] = [("catalogs", warm_catalogs), ("indices", warm_indices)]
+    for city in settings.warmup_plan_cities:
+        steps.append((f"plan:{city}", lambda city=city: warm_plan(city, days)))
+    return steps
+
+
+class Warmup:
+    """Runs the warm-up steps once; `blocker()` is the readiness gate."""
+
+    def __init__(self, steps: Optional[List[Tuple[str, Step]]] = None, enabled: Optional[bool] = None) -> None:
+        self._steps = steps
+        self.enabled = settings.warmup_enabled if enabled is None else enabled
+        self._lock = threading.Lock()
+        self._status = "pending" if self.enabled else "disabled"
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self._seconds: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def run(self) -> Dict[str, Any]:
+        """Run every step now (idempotent: a finished warm-up is not repeated)."""
+        with self._lock:
+            first = self._status == "pending"
+            if first:
+                self._status = "running"
+        if not first:
+            return self.state()
+        started = time.perf_counter()
+        for name, step in self._steps if self._steps is not None else default_steps():
+            step_started = time.perf_counter()
+            try:
+                result: Dict[str, Any] = {"ok": True, "result": step()}
+            except Exception as e:
+                logger.exception("Warm-up step %s failed", name)
+                result = {"ok": False, "error": f"{type(e).__name__}: {e}"[:200]}
+            result["seconds"] = round(time.perf_counter() - step_started, 2)
+            print(f"[WARMUP] {name}: {'ok' if result['ok'] else result['error']} in {result['seconds']:.2f}s")
+            with self._lock:
+                self._results[name] = result
+        self._seconds = round(time.perf_counter() - started, 2)
+        STARTUP_SECONDS.set(self._seconds, phase="warmup")
+        print(f"[WARMUP] finished in {self._seconds:.2f}s")
+        with self._lock:
+            self._status = "done"
+        return self.state()
+
+    def start(self) -> None:
+        """`run()` in a daemon thread (uvicorn: the event loop keeps serving probes)."""
+        with self._lock:
+            if self._status != "pending" or self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self.run, name="warmup", daemon=True)
+        self._thread.start()
+
+    def blocker(self) -> Optional[str]:
+        """Reason `/health/ready` must wait, or None."""
+        with self._lock:
+            if self._status in ("pending", "running"):
+                done = len(self._results)
+                return f"warmup: {self._status} ({done} steps done)"
+        return None
+
+    def state(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"status": self._status, "seconds": self._seconds, "steps": dict(self._results)}
+
+
+_warmup: Optional[Warmup] = None
+_warmup_lock = threading.Lock()
+
+
+def get_warmup() -> Warmup:
+    # Not reset at fork: a warm-up finished in the gunicorn master is
+    # inherited by the workers together with the warmed caches.
+    global _warmup
+    with _warmup_lock:
+        if _warmup is None:
+            _warmup = Warmup()
+        return _warmup
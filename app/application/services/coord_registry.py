@@ -0,0 +1,286 @@
+"""Request-scoped coordinate registry for timeline labels (POI / restaurant → lat,lng).
+
+`generate_plan` used to rebuild a `{name: poi}` map from the pool for every
+day and then re-merge it with the day's items in ~30 places; every miss fell
+through to a linear scan that re-folded every key. The registry is built once
+per plan from the pool and indexes it by POI id and by folded name; the
+items the plan creates (attractions, meal restaurants) are registered into
+that same registry, so no pass pays O(pool) for a copy or an id map.
+
+It is a plain `dict` subclass (name → entry) so every existing
+`poi_coords.get(name)` / `poi_coords[name] = {...}` caller keeps working.
+The active plan's registry lives in a ContextVar (`plan_coords`), so item
+producers call `register_created` without threading the map through.
+"""
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Iterator, Mapping, Optional, Tuple, TypeVar
+
+from app.domain.models.plan import ItemType
+from app.domain.planner.name_matching import fold_polish
+
+# Fuzzy containment match only for labels long enough not to collide
+# ("Rynek" ⊂ every market square) — FIX #279.
+_FUZZY_MIN_LEN = 8
+
+_MEAL_TYPES = (ItemType.LUNCH_BREAK.value, ItemType.DINNER_BREAK.value)
+
+_T = TypeVar("_T")
+
+
+def fold_place_label(name: Any) -> str:
+    """FIX #279: diacritic-insensitive place match (Ostrów / Ostrow)."""
+    return fold_polish(str(name or "").strip())
+
+
+def poi_lat_lng(poi_dict: Dict[str, Any]):
+    """FIX #199: unified coords — multi_city uses lowercase, Zakopane Excel uses Lat/Lng."""
+    lat = poi_dict.get("lat")
+    if lat is None or lat == 0.0:
+        lat = poi_dict.get("Lat")
+    lng = poi_dict.get("lng")
+    if lng is None or lng == 0.0:
+        lng = poi_dict.get("Lng")
+    return lat, lng
+
+
+def _has_coords(entry: Any) -> bool:
+    return isinstance(entry, dict) and poi_lat_lng(entry)[0] is not None
+
+
+def _item_type(item: Any) -> str:
+    t = getattr(item, "type", None)
+    if hasattr(t, "value"):
+        return str(t.value)
+    return str(t or "")
+
+
+class CoordRegistry(dict):
+    """Name → coords entry, with O(1) lookups by POI id and by folded name."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__()
+        # folded label → keys sharing it, in insertion order (tuples: copy-cheap)
+        self._folded: Dict[str, Tuple[str, ...]] = {}
+        self._key_fold: Dict[str, str] = {}
+        # POI id → pool row (with or without coords), filled by from_pois
+        self._pool_by_id: Dict[Any, Dict[str, Any]] = {}
+        self._fuzzy_cache: Dict[Tuple[str, bool], Optional[str]] = {}
+        self.update(*args, **kwargs)
+
+    # ------------------------------------------------------------------
+    # dict mutation — keep the indices in step
+    # ------------------------------------------------------------------
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key not in self:
+            folded = fold_place_label(key)
+            self._key_fold[key] = folded
+            self._folded[folded] = self._folded.get(folded, ()) + (key,)
+            self._fuzzy_cache.clear()
+        elif _has_coords(self.get(key)) != _has_coords(value):
+            self._fuzzy_cache.clear()
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key: str) -> None:
+        super().__delitem__(key)
+        folded = self._key_fold.pop(key, None)
+        if folded is not None:
+            rest = tuple(k for k in self._folded.get(folded, ()) if k != key)
+            if rest:
+                self._folded[folded] = rest
+            else:
+                self._folded.pop(folded, None)
+        self._fuzzy_cache.clear()
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        for k, v in dict(*args, **kwargs).items():
+            self[k] = v
+
+    def setdefault(self, key: str, default: Any = None) -> Any:
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def pop(self, key: str, *default: Any) -> Any:
+        if key in self:
+            value = self[key]
+            del self[key]
+            return value
+        if default:
+            return default[0]
+        raise KeyError(key)
+
+    def popitem(self) -> Tuple[str, Any]:
+        key = next(reversed(self))
+        return key, self.pop(key)
+
+    def clear(self) -> None:
+        super().clear()
+        self._folded.clear()
+        self._key_fold.clear()
+        self._fuzzy_cache.clear()
+
+    def __ior__(self, other: Any) -> "CoordRegistry":
+        self.update(other)
+        return self
+
+    # ------------------------------------------------------------------
+    # construction
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_pois(cls, pois: Iterable[Dict[str, Any]]) -> "CoordRegistry":
+        """Pool entries with coords, keyed by name (later rows win, as before).
+
+        Each entry is a copy of the POI with normalized `lat` / `lng`; every
+        row with an id is also reachable through `by_id` / `pois_by_id`.
+        """
+        reg = cls()
+        for p in pois:
+            pid = p.get("id")
+            if pid:
+                reg._pool_by_id[pid] = p
+            name = p.get("name")
+            lat, lng = poi_lat_lng(p)
+            if name and lat is not None and lng is not None:
+                reg[name] = {**p, "lat": lat, "lng": lng}
+        return reg
+
+    def register_attractions(self, items: Iterable[Any]) -> None:
+        """Attraction item coords, only where the pool has none."""
+        for it in items:
+            if _item_type(it) == ItemType.ATTRACTION.value:
+                self._register_attraction(it)
+
+    def _register_attraction(self, it: Any) -> None:
+        nm = getattr(it, "name", "") or ""
+        lat = getattr(it, "lat", None)
+        lng = getattr(it, "lng", None)
+        if nm and lat is not None and lng is not None:
+            if not _has_coords(self.get(nm) or {}):
+                self[nm] = {"lat": lat, "lng": lng, "name": nm}
+
+    def register_items(self, items: Iterable[Any]) -> None:
+        """Attraction coords (only where the pool has none) + primary meal restaurant."""
+        for it in items:
+            tv = _item_type(it)
+            if tv == ItemType.ATTRACTION.value:
+                self._register_attraction(it)
+            elif tv in _MEAL_TYPES:
+                # FIX #251: restaurant coords for meal-aware transit routing
+                for sug in (getattr(it, "suggestions", None) or [])[:1]:
+                    rn = (getattr(sug, "name", None) or "").strip()
+                    rlat = getattr(sug, "lat", None)
+                    rlng = getattr(sug, "lng", None)
+                    if rn and rlat is not None and rlng is not None:
+                        self[rn] = {
+                            "name": rn,
+                            "lat": float(rlat),
+                            "lng": float(rlng),
+                            "id": getattr(sug, "id", "") or f"rest_{rn}",
+                        }
+
+    # ------------------------------------------------------------------
+    # lookups
+    # ------------------------------------------------------------------
+
+    @property
+    def pois_by_id(self) -> Mapping[Any, Dict[str, Any]]:
+        """Read-only `{poi["id"]: poi}` of the pool (later rows win)."""
+        return MappingProxyType(self._pool_by_id)
+
+    def by_id(self, poi_id: Any) -> Optional[Dict[str, Any]]:
+        """Pool row with this POI id, coords or not."""
+        return self._pool_by_id.get(poi_id)
+
+    def match_key(self, label: str, *, with_coords: bool = False) -> Optional[str]:
+        """Key for a label: folded-exact first, else first long containment match."""
+        folded = fold_place_label(label)
+        for k in self._folded.get(folded, ()):
+            if not with_coords or _has_coords(self.get(k)):
+                return k
+        ck = (folded, with_coords)
+        if ck in self._fuzzy_cache:
+            return self._fuzzy_cache[ck]
+        hit: Optional[str] = None
+        if len(folded) >= _FUZZY_MIN_LEN:
+            for k, kf in self._key_fold.items():
+                if len(kf) < _FUZZY_MIN_LEN or not (folded in kf or kf in folded):
+                    continue
+                if with_coords and not _has_coords(self.get(k)):
+                    continue
+                hit = k
+                break
+        self._fuzzy_cache[ck] = hit
+        return hit
+
+
+def match_place(
+    coord_map: Dict[str, Any], label: str, *, with_coords: bool = False,
+) -> Optional[dict]:
+    """Case/diacritic-insensitive (then containment) entry for a timeline label.
+
+    Indexed when `coord_map` is a CoordRegistry; plain dicts (tests, editors)
+    get the original linear scan with identical precedence.
+    """
+    if isinstance(coord_map, CoordRegistry):
+        key = coord_map.match_key(label, with_coords=with_coords)
+        return coord_map.get(key) if key is not None else None
+    folded = fold_place_label(label)
+    fuzzy: Optional[dict] = None
+    for k, v in coord_map.items():
+        if with_coords and not _has_coords(v):
+            continue
+        kf = fold_place_label(k)
+        if kf == folded:
+            return v
+        if (
+            fuzzy is None
+            and min(len(folded), len(kf)) >= _FUZZY_MIN_LEN
+            and (folded in kf or kf in folded)
+        ):
+            fuzzy = v
+    return fuzzy
+
+
+def registry_of(coord_map: Optional[Dict[str, Any]]) -> CoordRegistry:
+    """The map itself when already a registry, else an indexed copy."""
+    if isinstance(coord_map, CoordRegistry):
+        return coord_map
+    return CoordRegistry(coord_map or {})
+
+
+_plan_registry: ContextVar[Optional[CoordRegistry]] = ContextVar(
+    "plan_coords", default=None,
+)
+
+
+@contextmanager
+def plan_coords() -> Iterator[None]:
+    """Scope for one plan's registry; also usable as a decorator (`generate_plan`)."""
+    token = _plan_registry.set(None)
+    try:
+        yield
+    finally:
+        _plan_registry.reset(token)
+
+
+def activate_plan_coords(reg: CoordRegistry) -> CoordRegistry:
+    """Make `reg` the registry `register_created` writes to for this plan."""
+    _plan_registry.set(reg)
+    return reg
+
+
+def register_created(items: _T) -> _T:
+    """Register freshly built attractions / meal restaurants; returns `items`.
+
+    No-op outside a plan (editor, unit tests call the producers directly).
+    """
+    reg = _plan_registry.get()
+    if reg is not None:
+        reg.register_items(items)  # type: ignore[arg-type]
+    return items
@@ -0,0 +1,241 @@
+"""
+CPU-cost-aware admission control for plan generation.
+
+`generate_plan` is CPU-bound and nothing bounded how many ran at once: a burst
+of 7-day cluster trips made every request in the process slow together. Each
+request now gets an estimated cost from its TripInput,
+
+    cost = days × (POI pool / REFERENCE_POOL) × (CLUSTER_FACTOR if cluster)
+
+with the POI pool counted in the multi-city catalog the same way the loader
+filters it (City or Hub). It is admitted only while the running requests fit
+the per-process budget (PLAN_ADMISSION_BUDGET). Otherwise it waits in a FIFO
+queue, so a large trip is not starved by small ones, for at most
+PLAN_ADMISSION_MAX_WAIT_S. Past that, or when PLAN_ADMISSION_MAX_QUEUE requests
+are already waiting, it is rejected with `AdmissionRejected` (→ 429 +
+Retry-After). A request costing more than the whole budget runs alone.
+
+Retry-After is the estimated time to drain the running and queued cost, from a
+moving average of wall seconds per cost unit. Queue depth, cost in use,
+waits and rejections are in `snapshot()` (GET /admin/plan-admission).
+"""
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Callable, Deque, Dict, Iterator, Optional, Tuple
+
+from app.domain.config.destination_clusters import DestinationClusters
+from app.domain.models.trip_input import TripInput
+from app.infrastructure.config.settings import settings
+from app.infrastructure.metrics import REGISTRY, LatencyHistogram, histogram_samples
+
+# ~ Kraków / Wrocław / Warszawa in multi_city_attractions.xlsx (City or Hub).
+REFERENCE_POOL = 80
+# Hub routing and inter-city transit on top of the bigger pool.
+CLUSTER_FACTOR = 1.5
+MIN_POOL_FACTOR = 0.25
+
+_MULTI_CITY_XLSX = "data/multi_city_attractions.xlsx"
+# Waits are shorter than ORS calls: 10 ms .. 30 s.
+_WAIT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class AdmissionRejected(Exception):
+    """Plan generation budget full — retry after `retry_after` seconds."""
+
+    def __init__(self, reason: str, retry_after: int) -> None:
+        super().__init__(reason)
+        self.retry_after = retry_after
+
+
+@lru_cache(maxsize=256)
+def _pool_size(cities: Tuple[str, ...]) -> Optional[int]:
+    """POI rows for these cities in the multi-city catalog (None if unknown)."""
+    from app.domain.planner.city_copy import normalize_city_name
+    from app.infrastructure.repositories.catalog_cache import read_workbook
+
+    try:
+        df = read_workbook(_MULTI_CITY_XLSX, sheet_name="All Cities")
+    except Exception:
+        return None
+    wanted = {normalize_city_name(c) for c in cities}
+    match = df["City"].astype(str).map(normalize_city_name).isin(wanted)
+    if "Hub" in df.columns:
+        match |= df["Hub"].astype(str).map(normalize_city_name).isin(wanted)
+    return int(match.sum()) or None
+
+
+def preload_pool_sizes() -> int:
+    """Count the pool of every catalog city and cluster now (startup warm-up)."""
+    from app.infrastructure.repositories.catalog_cache import read_workbook
+
+    df = read_workbook(_MULTI_CITY_XLSX, sheet_name="All Cities")
+    keys = {(str(c),) for c in df["City"].dropna().unique()}
+    keys |= {tuple(c["cities"]) for c in DestinationClusters.ALL_CLUSTERS.values()}
+    for cities in keys:
+        _pool_size(cities)
+    return len(keys)
+
+
+def estimate_cost(trip_input: TripInput) -> float:
+    """Relative CPU cost of `generate_plan(trip_input)`; 1.0 ≈ one day in Kraków."""
+    city = trip_input.location.city
+    cluster = DestinationClusters.get_cluster(city)
+    is_cluster = bool(trip_input.location.is_cluster or city in DestinationClusters.ALL_CLUSTERS)
+    # Cluster cities load the whole cluster (soft cluster), so count all of it.
+    cities = tuple(cluster["cities"]) if cluster else (city,)
+    pool = _pool_size(cities)
+    pool_factor = max(MIN_POOL_FACTOR, pool / REFERENCE_POOL) if pool else 1.0
+    return round(
+        trip_input.trip_length.days * pool_factor * (CLUSTER_FACTOR if is_cluster else 1.0), 3
+    )
+
+
+class _Ticket:
+    __slots__ = ("cost", "admitted_at", "released")
+
+    def __init__(self, cost: float) -> None:
+        self.cost = cost
+        self.admitted_at = 0.0
+        self.released = False
+
+
+class PlanAdmission:
+    """Per-process CPU budget for plan generation with a bounded FIFO queue."""
+
+    def __init__(
+        self,
+        budget: float,
+        max_wait_s: float,
+        max_queue: int,
+        clock: Callable[[], float] = time.monotonic,
+        seconds_per_unit: float = 1.0,
+    ) -> None:
+        self.budget = float(budget)
+        self.max_wait_s = float(max_wait_s)
+        self.max_queue = int(max_queue)
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._queue: Deque[_Ticket] = deque()
+        self._in_use = 0.0
+        self._running = 0
+        self._seconds_per_unit = seconds_per_unit
+        self.admitted = 0
+        self.rejected = 0
+        self.wait_seconds = LatencyHistogram(_WAIT_BUCKETS)
+
+    def acquire(self, cost: float) -> _Ticket:
+        """Block until `cost` fits the budget; `AdmissionRejected` if it does not in time."""
+        ticket = _Ticket(min(float(cost), self.budget))
+        started = self._clock()
+        with self._cond:
+            if len(self._queue) >= self.max_queue:
+                self.rejected += 1
+                raise AdmissionRejected(
+                    f"{len(self._queue)} plan requests already waiting", self._retry_after()
+                )
+            self._queue.append(ticket)
+            deadline = started + self.max_wait_s
+            while not (self._queue[0] is ticket and self._in_use + ticket.cost <= self.budget):
+                remaining = deadline - self._clock()
+                if remaining <= 0:
+                    self._queue.remove(ticket)
+                    self.rejected += 1
+                    self._cond.notify_all()  # the next in line may fit now
+                    raise AdmissionRejected(
+                        f"no plan capacity within {self.max_wait_s:g}s", self._retry_after()
+                    )
+                self._cond.wait(remaining)
+            self._queue.popleft()
+            self._in_use += ticket.cost
+            self._running += 1
+            self.admitted += 1
+            ticket.admitted_at = self._clock()
+            self._cond.notify_all()
+        self.wait_seconds.observe(ticket.admitted_at - started)
+        return ticket
+
+    def release(self, ticket: _Ticket) -> None:
+        """Return the ticket's cost to the budget (idempotent)."""
+        with self._cond:
+            if ticket.released:
+                return
+            ticket.released = True
+            self._in_use = max(0.0, self._in_use - ticket.cost)
+            self._running -= 1
+            if ticket.cost > 0:
+                per_unit = (self._clock() - ticket.admitted_at) / ticket.cost
+                self._seconds_per_unit += 0.2 * (per_unit - self._seconds_per_unit)
+            self._cond.notify_all()
+
+    @contextmanager
+    def admit(self, trip_input: TripInput) -> Iterator[_Ticket]:
+        ticket = self.acquire(estimate_cost(trip_input))
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def _retry_after(self) -> int:
+        # Called under the lock: time to drain running + queued cost at the observed rate.
+        pending = self._in_use + sum(t.cost for t in self._queue)
+        seconds = self._seconds_per_unit * pending / max(self.budget, 1e-9)
+        return int(min(60, max(1, math.ceil(seconds))))
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._cond:
+            state = {
+                "budget": self.budget,
+                "in_use": round(self._in_use, 3),
+                "running": self._running,
+                "queue_depth": len(self._queue),
+                "queued_cost": round(sum(t.cost for t in self._queue), 3),
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "seconds_per_unit": round(self._seconds_per_unit, 3),
+            }
+        state["wait_seconds"] = self.wait_seconds.snapshot()
+        return state
+
+
+_admission: Optional[PlanAdmission] = None
+_admission_lock = threading.Lock()
+
+
+def get_plan_admission() -> PlanAdmission:
+    global _admission
+    with _admission_lock:
+        if _admission is None:
+            _admission = PlanAdmission(
+                budget=settings.plan_admission_budget,
+                max_wait_s=settings.plan_admission_max_wait_s,
+                max_queue=settings.plan_admission_max_queue,
+            )
+        return _admission
+
+
+def _collect_metrics():
+    if _admission is None:
+        return
+    snap = _admission.snapshot()
+    for name, kind, help, key in (
+        ("plan_admission_budget", "gauge", "Per-process plan cost budget", "budget"),
+        ("plan_admission_in_use", "gauge", "Cost of plans being generated", "in_use"),
+        ("plan_admission_running", "gauge", "Plans being generated", "running"),
+        ("plan_admission_queue_depth", "gauge", "Plan requests waiting for budget", "queue_depth"),
+        ("plan_admission_admitted_total", "counter", "Plan requests admitted", "admitted"),
+        ("plan_admission_rejected_total", "counter", "Plan requests rejected (429)", "rejected"),
+    ):
+        yield name, kind, help, [(name, {}, snap[key])]
+    yield (
+        "plan_admission_wait_seconds", "histogram", "Queue wait before admission",
+        histogram_samples("plan_admission_wait_seconds", snap["wait_seconds"]),
+    )
+
+
+REGISTRY.register_collector(_collect_metrics)
@@ -5,6 +5,7 @@ import math
 from typing import Any, List, Sequence, Tuple
 
 from app.domain.models.plan import ItemType
+from app.domain.planner.name_matching import fold_polish
 
 
 def _type_val(item: Any) -> str:
@@ -152,10 +153,7 @@ def audit_large_idle_gaps(items: Sequence[Any], *, max_gap_min: int = 90) -> Lis
 
 
 def _norm_name(s: str) -> str:
-    s = (s or "").lower()
-    for a, b in (("ł", "l"), ("ó", "o"), ("ś", "s"), ("ź", "z"), ("ż", "z"), ("ę", "e"), ("ą", "a"), ("ć", "c"), ("ń", "n")):
-        s = s.replace(a, b)
-    return s
+    return fold_polish(s)
 
 
 def _attr_names_set(items: Sequence[Any]) -> set[str]:
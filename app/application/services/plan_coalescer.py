@@ -0,0 +1,106 @@
+"""
+Single-flight coalescing of identical `POST /plan/preview` requests.
+
+Double-clicks and frontend retries send the same trip several times within a
+few seconds, and each copy used to run the whole pipeline. Requests are keyed
+on the canonical TripInput hash (validated model, defaults filled in, keys
+sorted): while a generation for a key is in flight, identical requests wait
+for its result instead of starting their own.
+
+Only the generation is shared. Every caller gets its own deep copy of the plan
+under a fresh plan_id, then saves it with its own owner and version #1, so two
+tabs never end up editing the same plan. A failed generation is re-raised to
+everyone who waited on it; the next request for the key starts over.
+
+Coalescing is per process (one dict behind a lock): with several gunicorn
+workers, identical requests that land on different workers still run twice.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import uuid
+from typing import Callable, Dict, Optional
+
+from app.domain.models.plan import PlanResponse
+from app.domain.models.trip_input import TripInput
+from app.infrastructure.metrics import CACHE_LOOKUPS
+
+
+def trip_key(trip_input: TripInput) -> str:
+    """sha256 of the canonical TripInput JSON — same trip, same key."""
+    payload = json.dumps(
+        trip_input.model_dump(mode="json"),
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    __slots__ = ("done", "plan", "error", "waiters")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.plan: Optional[PlanResponse] = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class PlanCoalescer:
+    """In-flight generations by trip key; followers wait on the leader's result."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+        self.generated = 0
+        self.coalesced = 0
+
+    def generate(
+        self,
+        trip_input: TripInput,
+        generate: Callable[[TripInput], PlanResponse],
+    ) -> PlanResponse:
+        """`generate(trip_input)`, or the result of an identical call already running."""
+        key = trip_key(trip_input)
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.generated += 1
+            else:
+                flight.waiters += 1
+                self.coalesced += 1
+        CACHE_LOOKUPS.inc(cache="plan", result="miss" if leader else "hit")
+
+        if leader:
+            try:
+                flight.plan = generate(trip_input)
+            except BaseException as e:
+                flight.error = e
+                raise
+            finally:
+                with self._lock:
+                    del self._flights[key]
+                flight.done.set()
+            return flight.plan
+
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        # Own copy under a new plan_id: saved and edited independently of the leader's.
+        return flight.plan.model_copy(update={"plan_id": str(uuid.uuid4())}, deep=True)
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._flights)
+
+
+_coalescer = PlanCoalescer()
+
+
+def get_plan_coalescer() -> PlanCoalescer:
+    return _coalescer
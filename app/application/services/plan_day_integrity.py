@@ -3,6 +3,7 @@ from __future__ import annotations
 
 from typing import Any, Dict, List, Optional
 
+from app.application.services.coord_registry import register_created
 from app.domain.models.plan import ItemType, RestaurantSuggestion
 from app.domain.planner.engine import _meal_restaurant_geo_ok, _tiered_nearby_restaurants
 from app.domain.planner.time_utils import minutes_to_time, time_to_minutes
@@ -213,7 +214,7 @@ def ensure_meal_suggestions(
             f"[FIX #237/#255] Filled {meal_type} suggestions near "
             f"{getattr(prev, 'name', '?')}: {[s.name for s in suggestions]}"
         )
-    return out
+    return register_created(out)
 
 
 def assert_transit_endpoints_match_pois(
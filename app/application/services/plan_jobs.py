@@ -0,0 +1,234 @@
+"""
+Async plan generation — bounded local process pool.
+
+`POST /plan/preview?mode=async` enqueues the trip here and answers with the
+plan_id right away; a pool process runs `PlanService.generate_plan` with that
+plan_id, reports days completed to the job store and saves the plan plus
+version #1 exactly like the synchronous preview. The client polls
+`GET /plan/{plan_id}/status` (queued → running → ready | failed).
+
+Pool processes are started with "spawn": forking a uvicorn worker that already
+holds threads and DB connections is not safe. Each pool process loads the POI
+catalog once and keeps it for every later job.
+
+While a job is queued or running, the queue that submitted it refreshes its
+heartbeat in the job store (daemon thread, every PLAN_JOB_HEARTBEAT_S). If the
+worker dies with its pool, the heartbeat stops and the store marks the job
+failed after PLAN_JOB_STALE_S instead of reporting "running" until the TTL.
+"""
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import threading
+import uuid
+from concurrent.futures import CancelledError, Executor, Future, ProcessPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Set
+
+from app.domain.models.trip_input import TripInput
+from app.infrastructure.config.settings import settings
+from app.infrastructure.metrics import REGISTRY
+from app.infrastructure.repositories import PlanRepository, PlanVersionRepository, POIRepository
+from app.infrastructure.repositories.plan_job_store import get_plan_job_store
+
+logger = logging.getLogger(__name__)
+
+
+class PlanQueueFull(Exception):
+    """Too many plan jobs queued or running (PLAN_JOB_MAX_PENDING)."""
+
+
+@lru_cache()
+def _poi_repository() -> POIRepository:
+    # Same catalog as app.api.dependencies.get_poi_repository, once per pool process.
+    return POIRepository(os.path.join("data", "zakopane.xlsx"))
+
+
+def _save_plan(plan, trip_input: TripInput, user_id: Optional[str], guest_id: Optional[str]) -> None:
+    from app.infrastructure.database.connection import SessionLocal
+    from app.infrastructure.plan_json import encode_plan
+
+    days_json = encode_plan(plan).days_json()  # one serialization for both rows
+    db = SessionLocal()
+    try:
+        PlanRepository(db).save(
+            plan,
+            user_id=uuid.UUID(user_id) if user_id else None,
+            guest_id=guest_id,
+            trip_input=trip_input,
+            days_json=days_json,
+        )
+        try:
+            PlanVersionRepository(db).save_version(
+                plan_id=plan.plan_id,
+                days_json=days_json,
+                change_type="generated",
+                change_summary="Initial plan generation (version 1)",
+            )
+        except Exception as e:
+            # Version is secondary — same as the synchronous preview.
+            print(f"Warning: Failed to save version #1: {e}")
+    finally:
+        db.close()
+
+
+def run_plan_job(
+    plan_id: str,
+    trip_payload: Dict[str, Any],
+    user_id: Optional[str] = None,
+    guest_id: Optional[str] = None,
+) -> None:
+    """Pool process entry point: generate, save, record the outcome."""
+    from app.application.services.plan_service import PlanService
+
+    store = get_plan_job_store()
+    store.start(plan_id)
+    try:
+        trip_input = TripInput.model_validate(trip_payload)
+        plan = PlanService(_poi_repository()).generate_plan(
+            trip_input,
+            plan_id=plan_id,
+            on_day=lambda day, total: store.progress(plan_id, day.day, total),
+        )
+        _save_plan(plan, trip_input, user_id, guest_id)
+    except Exception as e:
+        logger.exception("Plan job %s failed", plan_id)
+        store.fail(plan_id, f"{type(e).__name__}: {e}")
+        return
+    store.progress(plan_id, len(plan.days), len(plan.days))
+    store.finish(plan_id)
+
+
+def _process_pool(workers: int) -> Executor:
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+class PlanJobQueue:
+    """Submits plan jobs to a lazily started pool of `plan_job_workers` processes."""
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        executor_factory: Callable[[int], Executor] = _process_pool,
+        job: Callable[..., None] = run_plan_job,
+    ) -> None:
+        self.workers = max(1, workers if workers is not None else settings.plan_job_workers)
+        self.max_pending = max_pending if max_pending is not None else settings.plan_job_max_pending
+        self._executor_factory = executor_factory
+        self._job = job
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._inflight: Set[str] = set()
+        self._stop = threading.Event()
+        self._heartbeat: Optional[threading.Thread] = None
+
+    def submit(self, trip_input: TripInput, user_id: Optional[Any] = None, guest_id: Optional[str] = None) -> str:
+        """Queue generation of `trip_input`; returns the future plan_id."""
+        store = get_plan_job_store()
+        plan_id = str(uuid.uuid4())
+        with self._lock:
+            # Counted in the shared store, so the bound holds across uvicorn workers.
+            if store.pending() >= self.max_pending:
+                raise PlanQueueFull(f"{self.max_pending} plan jobs already pending")
+            store.create(plan_id)
+            try:
+                # A pool whose process died is broken for good — start a new one.
+                if self._executor is None or getattr(self._executor, "_broken", False):
+                    self._executor = self._executor_factory(self.workers)
+                future = self._executor.submit(
+                    self._job,
+                    plan_id,
+                    trip_input.model_dump(mode="json"),
+                    str(user_id) if user_id else None,
+                    guest_id,
+                )
+            except Exception as e:
+                store.fail(plan_id, f"{type(e).__name__}: {e}")
+                raise
+            self._inflight.add(plan_id)
+            self._start_heartbeat()
+        future.add_done_callback(lambda f: self._on_done(plan_id, f))
+        return plan_id
+
+    def _start_heartbeat(self) -> None:
+        # Called under self._lock.
+        if self._heartbeat is None or not self._heartbeat.is_alive():
+            self._stop.clear()
+            self._heartbeat = threading.Thread(
+                target=self._beat, name="plan-job-heartbeat", daemon=True,
+            )
+            self._heartbeat.start()
+
+    def _beat(self) -> None:
+        while not self._stop.wait(settings.plan_job_heartbeat_s):
+            with self._lock:
+                ids = list(self._inflight)
+            try:
+                get_plan_job_store().heartbeat(ids)
+            except Exception:
+                logger.exception("Plan job heartbeat failed")
+
+    def _on_done(self, plan_id: str, future: Future) -> None:
+        with self._lock:
+            self._inflight.discard(plan_id)
+        # The job records its own failures; this catches a pool process that
+        # died and jobs dropped by shutdown.
+        exc = CancelledError() if future.cancelled() else future.exception()
+        if exc is None:
+            return
+        logger.error("Plan job %s lost: %r", plan_id, exc)
+        get_plan_job_store().fail(plan_id, f"{type(exc).__name__}: {exc}")
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+        self._stop.set()  # after a waiting shutdown: its jobs keep their heartbeat
+
+
+_queue: Optional[PlanJobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def _forget_queue_after_fork() -> None:
+    # The pool's manager thread and pipes belong to the parent process.
+    global _queue, _queue_lock
+    _queue = None
+    _queue_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_queue_after_fork)
+
+
+def get_plan_job_queue() -> PlanJobQueue:
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = PlanJobQueue()
+    return _queue
+
+
+def shutdown_plan_jobs(wait: bool = False) -> None:
+    global _queue
+    with _queue_lock:
+        queue, _queue = _queue, None
+    if queue is not None:
+        queue.shutdown(wait=wait)
+
+
+def _collect_metrics():
+    # Jobs run in pool processes with their own registries; only the shared job
+    # store is visible from the web worker.
+    yield (
+        "plan_jobs_pending", "gauge", "Async plan jobs queued or running (all workers)",
+        [("plan_jobs_pending", {}, get_plan_job_store().pending())],
+    )
+
+
+REGISTRY.register_collector(_collect_metrics)
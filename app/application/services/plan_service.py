@@ -4,7 +4,8 @@ Plan Service - generowanie planów podróży.
 """
 import uuid
 import math
-from typing import List, Dict, Any, Optional
+import zlib
+from typing import Callable, List, Dict, Any, Optional, Tuple
 
 
 # ============================================================================
@@ -131,9 +132,26 @@ from app.domain.models.plan import (
     ParkingType,  # Dodano dla parking_type
 )
 from app.application.services.trip_mapper import trip_input_to_engine_params
+from app.application.services.coord_registry import (
+    CoordRegistry,
+    activate_plan_coords,
+    fold_place_label as _fold_place_label,
+    match_place,
+    plan_coords,
+    poi_lat_lng as _poi_lat_lng,
+    register_created,
+    registry_of,
+)
 from app.domain.planner.engine import build_day, plan_multiple_days, travel_time_minutes, is_open, haversine_distance, get_transport_mode
 from app.domain.planner.time_utils import time_to_minutes, minutes_to_time
+from app.domain.planner.name_matching import MarkerMatcher
+from app.application.services.timeline_fingerprint import (
+    repair_round,
+    repair_round_stats,
+    repair_rounds,
+)
 from app.infrastructure.repositories import POIRepository, TrailRepository, RestaurantRepository  # ETAP 3 Phase 2
+from app.infrastructure.metrics import PLAN_STAGE_SECONDS, StageClock
 from app.infrastructure.storage import build_poi_image_url, build_restaurant_image_url  # 11.03.2026 - Supabase Storage
 from app.domain.router import detect_trip_type, TripType  # ETAP 3 Phase 2
 
@@ -142,32 +160,10 @@ from app.domain.planner.quality_checker import validate_day_quality, check_poi_q
 from app.domain.planner.explainability import explain_poi_selection
 
 
-def _poi_lat_lng(poi_dict: Dict[str, Any]):
-    """FIX #199: unified coords — multi_city uses lowercase, Zakopane Excel uses Lat/Lng."""
-    lat = poi_dict.get("lat")
-    if lat is None or lat == 0.0:
-        lat = poi_dict.get("Lat")
-    lng = poi_dict.get("lng")
-    if lng is None or lng == 0.0:
-        lng = poi_dict.get("Lng")
-    return lat, lng
-
-
-def _fold_place_label(name: Any) -> str:
-    """FIX #279: diacritic-insensitive place match (Ostrów / Ostrow)."""
-    s = str(name or "").strip().lower()
-    for a, b in (
-        ("ł", "l"), ("ó", "o"), ("ś", "s"), ("ź", "z"), ("ż", "z"),
-        ("ę", "e"), ("ą", "a"), ("ć", "c"), ("ń", "n"),
-    ):
-        s = s.replace(a, b)
-    return s
-
-
-_BIG_CITY_RYNEK_MARKERS = (
+_BIG_CITY_RYNEK_MARKERS = MarkerMatcher((
     "rynek we wroclawiu", "rynek glowny", "stary rynek",
     "rynek w katowicach", "rynek katowic",
-)
+))
 
 
 def _satellite_market_square_cap(name: Any) -> Optional[int]:
@@ -175,7 +171,7 @@ def _satellite_market_square_cap(name: Any) -> Optional[int]:
     folded = _fold_place_label(name)
     if "rynek" not in folded:
         return None
-    if any(marker in folded for marker in _BIG_CITY_RYNEK_MARKERS):
+    if _BIG_CITY_RYNEK_MARKERS.matches(folded):
         return None
     return 75
 
@@ -197,15 +193,15 @@ def _last_attraction_name(items: list) -> str:
     return ""
 
 
+_CAR_GAP_POLISH_CITIES = MarkerMatcher((
+    "wrocław", "wroclaw", "warszawa", "warsaw", "kraków", "krakow",
+    "poznań", "poznan", "katowice",
+))
+
+
 def _city_needs_car_gap_polish(city: str) -> bool:
     """FIX #257/#258/#271/#272/#273: WRO + WAW + KRK + Poznań + Katowice."""
-    c = (city or "").lower()
-    return any(
-        k in c for k in (
-            "wrocław", "wroclaw", "warszawa", "warsaw", "kraków", "krakow",
-            "poznań", "poznan", "katowice",
-        )
-    )
+    return _CAR_GAP_POLISH_CITIES.matches(city)
 
 
 # FIX #271: Ojców NP cluster — name match even when Excel coords are in Kraków.
@@ -218,14 +214,16 @@ _OJCOW_DEFAULT_COORDS = (50.2103, 19.8294)
 _WIELICZKA_NAME_MARKERS = ("wieliczka", "wieliczce", "kopalnia soli", "bochnia")
 
 
+_OJCOW_MATCHER = MarkerMatcher(_OJCOW_NAME_MARKERS)
+_WIELICZKA_MATCHER = MarkerMatcher(_WIELICZKA_NAME_MARKERS)
+
+
 def _is_ojcow_stop_name(name: str) -> bool:
-    nm = (name or "").lower()
-    return any(k in nm for k in _OJCOW_NAME_MARKERS)
+    return _OJCOW_MATCHER.matches(name)
 
 
 def _is_wieliczka_stop_name(name: str) -> bool:
-    nm = (name or "").lower()
-    return any(k in nm for k in _WIELICZKA_NAME_MARKERS)
+    return _WIELICZKA_MATCHER.matches(name)
 
 
 # FIX #272: Poznań day-trips — Gniezno / Kórnik stay local (no lunch ping-pong).
@@ -277,57 +275,60 @@ _NEAR_SATELLITE_NAME_MARKERS = (
 )
 
 
+_ZABRZE_MATCHER = MarkerMatcher(_ZABRZE_NAME_MARKERS)
+_GLIWICE_MATCHER = MarkerMatcher(_GLIWICE_NAME_MARKERS)
+_WOJSLAWICE_MATCHER = MarkerMatcher(_WOJSLAWICE_NAME_MARKERS)
+_OLAWA_MATCHER = MarkerMatcher(_OLAWA_NAME_MARKERS)
+_NEAR_SATELLITE_MATCHER = MarkerMatcher(_NEAR_SATELLITE_NAME_MARKERS)
+_ZABKOWICE_MATCHER = MarkerMatcher(_ZABKOWICE_NAME_MARKERS)
+_BRZEG_MATCHER = MarkerMatcher(_BRZEG_NAME_MARKERS)
+# Wider than _ZABKOWICE_NAME_MARKERS: region grouping wants every Kotlina stem.
+_ZABKOWICE_REGION_MATCHER = MarkerMatcher((
+    "ząbkowic", "zabkowic", "frankenstein",
+    "krzywa wieża", "krzywa wieza",
+))
+_SATELLITE_KIND_MATCHERS = (
+    ("olawa", _OLAWA_MATCHER),
+    ("wojslawice", _WOJSLAWICE_MATCHER),
+    ("zabkowice", _ZABKOWICE_REGION_MATCHER),
+    ("brzeg", _BRZEG_MATCHER),
+    ("near", _NEAR_SATELLITE_MATCHER),
+)
+
+
 def _is_zabrze_stop_name(name: str) -> bool:
-    nm = (name or "").lower()
-    return any(k in nm for k in _ZABRZE_NAME_MARKERS)
+    return _ZABRZE_MATCHER.matches(name)
 
 
 def _is_gliwice_stop_name(name: str) -> bool:
-    nm = (name or "").lower()
-    return any(k in nm for k in _GLIWICE_NAME_MARKERS)
+    return _GLIWICE_MATCHER.matches(name)
 
 
 def _is_wojslawice_stop_name(name: str) -> bool:
-    nm = (name or "").lower()
-    return any(k in nm for k in _WOJSLAWICE_NAME_MARKERS)
+    return _WOJSLAWICE_MATCHER.matches(name)
 
 
 def _is_olawa_stop_name(name: str) -> bool:
-    nm = (name or "").lower()
-    return any(k in nm for k in _OLAWA_NAME_MARKERS)
+    return _OLAWA_MATCHER.matches(name)
 
 
 def _is_near_satellite_stop_name(name: str) -> bool:
-    nm = (name or "").lower()
-    return any(k in nm for k in _NEAR_SATELLITE_NAME_MARKERS)
+    return _NEAR_SATELLITE_MATCHER.matches(name)
 
 
 def _is_zabkowice_stop_name(name: str) -> bool:
-    nm = (name or "").lower()
-    return any(k in nm for k in _ZABKOWICE_NAME_MARKERS)
+    return _ZABKOWICE_MATCHER.matches(name)
 
 
 def _is_brzeg_stop_name(name: str) -> bool:
-    nm = (name or "").lower()
-    return any(k in nm for k in _BRZEG_NAME_MARKERS)
+    return _BRZEG_MATCHER.matches(name)
 
 
 def _timeline_satellite_kind(name: str) -> Optional[str]:
     """FIX #281: which Wrocław day-trip region a stop belongs to, if any."""
-    nm = (name or "").lower()
-    if _is_olawa_stop_name(nm):
-        return "olawa"
-    if _is_wojslawice_stop_name(nm):
-        return "wojslawice"
-    if any(k in nm for k in (
-        "ząbkowic", "zabkowic", "frankenstein",
-        "krzywa wieża", "krzywa wieza",
-    )):
-        return "zabkowice"
-    if _is_brzeg_stop_name(nm):
-        return "brzeg"
-    if _is_near_satellite_stop_name(nm):
-        return "near"
+    for kind, matcher in _SATELLITE_KIND_MATCHERS:
+        if matcher.matches(name):
+            return kind
     return None
 
 
@@ -344,14 +345,16 @@ def _day_items_satellite_kind(items: list) -> Optional[str]:
     return max(counts, key=counts.get)
 
 
+_GNIEZNO_MATCHER = MarkerMatcher(_GNIEZNO_NAME_MARKERS)
+_KORNIK_MATCHER = MarkerMatcher(_KORNIK_NAME_MARKERS)
+
+
 def _is_gniezno_stop_name(name: str) -> bool:
-    nm = (name or "").lower()
-    return any(k in nm for k in _GNIEZNO_NAME_MARKERS)
+    return _GNIEZNO_MATCHER.matches(name)
 
 
 def _is_kornik_stop_name(name: str) -> bool:
-    nm = (name or "").lower()
-    return any(k in nm for k in _KORNIK_NAME_MARKERS)
+    return _KORNIK_MATCHER.matches(name)
 
 
 # FIX #261: origin for the "day_start → first POI" leg when no hotel is given.
@@ -1148,7 +1151,9 @@ def _restaurant_dict_to_suggestion(r: Dict[str, Any], meal_type: str) -> Restaur
     """Convert engine/RestaurantDB dict to API RestaurantSuggestion (FIX #218)."""
     if isinstance(r, str):
         return RestaurantSuggestion(
-            id=f"generic_{meal_type}_{hash(r) & 0xFFFF}",
+            # FIX #284: crc32, not hash() — str hashes are salted per process,
+            # so the same plan got different suggestion ids on every worker.
+            id=f"generic_{meal_type}_{zlib.crc32(r.encode('utf-8')) & 0xFFFF}",
             name=r,
             lat=0.0,
             lng=0.0,
@@ -1446,12 +1451,21 @@ class PlanService:
         self.poi_repo = poi_repository
 
     @staticmethod
-    def _attach_route_metadata(transit_item, from_poi: dict, to_poi: dict, context: dict):
-        """FIX #220/#237: attach route duration + geometry (ORS → cache → road estimate)."""
+    def _attach_route_metadata(
+        transit_item, from_poi: dict, to_poi: dict, context: dict,
+        *, with_geometry: bool = True,
+    ):
+        """FIX #220/#237: attach route duration + geometry (ORS → cache → road estimate).
+
+        `with_geometry=False`: timing only (matrix prefetch / estimate) — the
+        rendered polyline is resolved later by `_finalize_transit_geometry`.
+        """
         try:
             from app.infrastructure.routing import get_travel_route
 
-            route = get_travel_route(from_poi, to_poi, context)
+            route = get_travel_route(
+                from_poi, to_poi, context, with_geometry=with_geometry,
+            )
             extras = route.to_transit_extras()
             # FIX #239: never expose raw haversine on driving legs (client JSON audit).
             if extras.get("routing_source") == "haversine" and (
@@ -1502,30 +1516,42 @@ class PlanService:
           2. Hotel / city-label endpoints have no POI coords at all — we still
              guarantee a non-null ``routing_source`` derived from the transit mode.
         """
-        # Merge poi_coords with coords carried by the day's own attraction items.
-        coord_map: Dict[str, dict] = dict(poi_coords or {})
-        for it in items:
-            if _item_type_value(it) != ItemType.ATTRACTION.value:
-                continue
-            nm = getattr(it, "name", "") or ""
-            lat = getattr(it, "lat", None)
-            lng = getattr(it, "lng", None)
-            if nm and lat is not None and lng is not None:
-                existing = coord_map.get(nm) or {}
-                if _poi_lat_lng(existing)[0] is None:
-                    coord_map[nm] = {"lat": lat, "lng": lng, "name": nm}
+        # Coords carried by the day's own attraction items join the plan registry.
+        coord_map = registry_of(poi_coords)
+        coord_map.register_attractions(items)
+
+        def _leg(it) -> Optional[Tuple[dict, dict]]:
+            fp = coord_map.get(getattr(it, "from_location", "") or "")
+            tp = coord_map.get(getattr(it, "to_location", "") or "")
+            if (
+                fp and tp
+                and _poi_lat_lng(fp)[0] is not None
+                and _poi_lat_lng(tp)[0] is not None
+            ):
+                return fp, tp
+            return None
+
+        # Batched timing: one ORS Matrix call per day (per profile batch)
+        # instead of a Directions call per leg; polylines come at finalize.
+        legs = [
+            _leg(it) for it in items
+            if _item_type_value(it) == ItemType.TRANSIT.value
+        ]
+        try:
+            from app.infrastructure.routing import prefetch_route_durations
+
+            prefetch_route_durations([lg for lg in legs if lg], context)
+        except Exception:
+            pass
 
         out = []
         for it in items:
             if _item_type_value(it) == ItemType.TRANSIT.value:
-                fp = coord_map.get(getattr(it, "from_location", "") or "")
-                tp = coord_map.get(getattr(it, "to_location", "") or "")
-                if (
-                    fp and tp
-                    and _poi_lat_lng(fp)[0] is not None
-                    and _poi_lat_lng(tp)[0] is not None
-                ):
-                    it = self._attach_route_metadata(it, fp, tp, context)
+                leg = _leg(it)
+                if leg:
+                    it = self._attach_route_metadata(
+                        it, leg[0], leg[1], context, with_geometry=False,
+                    )
                 # FIX #238: guarantee a non-null routing_source on every transit.
                 if not getattr(it, "routing_source", None):
                     mode_str = str(getattr(it, "mode", "") or "").lower()
@@ -2147,9 +2173,20 @@ class PlanService:
 
         return days_mut, warnings
 
-    def generate_plan(self, trip_input: TripInput) -> PlanResponse:
+    @repair_rounds()  # per-request repair-round memo (ContextVar)
+    @plan_coords()  # per-request coord registry (ContextVar)
+    def generate_plan(
+        self,
+        trip_input: TripInput,
+        *,
+        plan_id: Optional[str] = None,
+        on_day: Optional[Callable[[DayPlan, int], None]] = None,
+    ) -> PlanResponse:
         """
         Główna metoda generująca pełny plan podróży.
+
+        plan_id: id nadany z góry (async job — klient zna go przed planem).
+        on_day(day_plan, days_total): wołane po złożeniu każdego dnia (postęp).
         
         Flow:
         1. TripInput → engine params (context, user, dates)
@@ -2163,6 +2200,9 @@ class PlanService:
         print("\n" + "🔴"*50, flush=True)
         print("🔴 TEST #Problem11: generate_plan() CALLED", flush=True)
         print("🔴"*50 + "\n", flush=True)
+
+        # Stage timings for /metrics: load → engine → post_process (route carved out).
+        _stages = StageClock(PLAN_STAGE_SECONDS)
         
         # Konwersja TripInput → engine params
         params = trip_input_to_engine_params(trip_input)
@@ -2474,11 +2514,13 @@ class PlanService:
         _hub_cluster_mode = is_cluster or context.get("soft_cluster", False)
         _hub_cluster_cities = cities_to_load if is_cluster else context.get("cluster_cities") or []
         
+        _stages.lap("load")
+
         # Fallback: If no data loaded, return empty plan
         if not all_pois_dict:
             print("[ROUTER] ERROR: No data sources available - returning empty plan")
             return PlanResponse(
-                plan_id=str(uuid.uuid4()),
+                plan_id=plan_id or str(uuid.uuid4()),
                 version=1,
                 days=[],
                 **_trip_context_fields(trip_input),
@@ -2582,6 +2624,10 @@ class PlanService:
         _zone_pools = None
         _zone_fallbacks = None
         contexts: list = []
+        # FIX #283: set for 1-day trips too — every 1-day hub-mode trip
+        # (Karkonosze, Trójmiasto, Katowice) read it in the day loop before it
+        # was ever assigned (UnboundLocalError).
+        _day_hub_cities: list = []
         
         if num_days > 1:
             # Multi-day plan: Use plan_multiple_days with cross-day tracking
@@ -2945,7 +2991,6 @@ class PlanService:
             _zone_pools, _zone_fallbacks, _day_geo_regions = _build_zone_pools(all_pois_dict, num_days)
             # FIX #208: cluster trips use hub-city day pools (base city first), not A/B/C
             # zone slicing — Karkonosze zones mixed all towns and expanded too early.
-            _day_hub_cities: list = []
             if _hub_cluster_mode:
                 from app.domain.planner.city_copy import build_cluster_hub_day_pools
                 _zone_pools, _zone_fallbacks, _day_hub_cities = build_cluster_hub_day_pools(
@@ -3041,6 +3086,8 @@ class PlanService:
             # Wrap in list for uniform processing
             engine_results = [engine_result]
         
+        _stages.lap("engine")
+
         # Process each day's engine result
         days = []
 
@@ -3058,6 +3105,10 @@ class PlanService:
         
         print(f"[GENERATE_PLAN] Processing {len(engine_results)} engine results")
         
+        # One coordinate registry per plan: attractions and meal restaurants
+        # are registered where they are built (`register_created`), so the
+        # passes below read it as-is instead of re-merging the day's items.
+        _plan_coords = activate_plan_coords(CoordRegistry.from_pois(all_pois_dict))
         for day_num, engine_result in enumerate(engine_results):
             # HOTFIX #10.5: Debug logging - track POI IDs from engine
             engine_poi_ids = []
@@ -3085,7 +3136,8 @@ class PlanService:
             # FIX #220: optimize attraction order (ORS Matrix / haversine TSP)
             try:
                 from app.infrastructure.routing.day_optimizer import optimize_day_attraction_order
-                engine_result = optimize_day_attraction_order(engine_result, day_context)
+                with _stages.measure("route"):
+                    engine_result = optimize_day_attraction_order(engine_result, day_context)
             except Exception as _opt_exc:
                 print(f"[FIX #220] Day order optimize skipped: {_opt_exc}")
 
@@ -3253,7 +3305,7 @@ class PlanService:
                         )
             except Exception as _sup_exc:
                 print(f"[FIX #221] POI supplement skipped: {_sup_exc}")
-            _poi_lookup_cap = {p.get("id"): p for p in all_pois_dict if p.get("id")}
+            _poi_lookup_cap = _plan_coords.pois_by_id
             day_items = self._strip_out_of_season_attractions(
                 day_items, dates[day_num], _poi_lookup_cap,
             )
@@ -3423,10 +3475,7 @@ class PlanService:
             # Previously ran BEFORE healing, so transit "to"/"from" could reference POIs that were
             # subsequently removed by day-end enforcement or _remove_timeline_overlaps.
             # Also removes orphaned transits (no following attraction) — see _update_transit_destinations.
-            _poi_coord_map = {
-                p.get("name"): p for p in all_pois_dict
-                if p.get("name") and p.get("lat") and p.get("lng")
-            }
+            _poi_coord_map = _plan_coords
             day_items = self._ensure_transits_between_attractions(
                 day_items, _poi_coord_map, day_context,
             )
@@ -3686,9 +3735,11 @@ class PlanService:
             )
             
             days.append(day_plan)
+            if on_day is not None:
+                on_day(day_plan, len(engine_results))
         
         # Generuj plan_id
-        plan_id = str(uuid.uuid4())
+        plan_id = plan_id or str(uuid.uuid4())
         
         # FIX #Problem8 (13.05.2026 - Round 2): Budget overflow warning
         # Check if any day's cost exceeds or approaches daily_limit
@@ -3790,7 +3841,7 @@ class PlanService:
         if travel_style == "adventure":
             _active_n = 0
             _passive_n = 0
-            _lookup219 = {p.get("id"): p for p in all_pois_dict if p.get("id")}
+            _lookup219 = _plan_coords.pois_by_id
             from app.domain.planner.engine import is_museum_heritage_poi
             from app.domain.scoring.profile_poi_rules import is_active_city_poi
             for _dy in days:
@@ -3834,12 +3885,7 @@ class PlanService:
         # POIs that are no longer in the timeline (client: "transit z nieistniejącego POI",
         # "transit do POI którego nie ma w planie"). Re-run the endpoint reconciliation here,
         # the final mutation, so every transit reflects its real neighbours.
-        _final_coord_map: Dict[str, dict] = {}
-        for p in all_pois_dict:
-            name = p.get("name")
-            lat, lng = _poi_lat_lng(p)
-            if name and lat is not None and lng is not None:
-                _final_coord_map[name] = {**p, "lat": lat, "lng": lng}
+        _final_coord_map = _plan_coords
         _finalized_days: List[DayPlan] = []
         _trip_names_so_far: set = set()
         _trip_name_days: Dict[str, int] = {}
@@ -4294,7 +4340,7 @@ class PlanService:
             )
             if _couples_relax246 and all_pois_dict:
                 from app.domain.scoring.preference_coverage import poi_covers_preference_report
-                _poi_by_id246 = {p.get("id"): p for p in all_pois_dict if p.get("id")}
+                _poi_by_id246 = _plan_coords.pois_by_id
                 _has_relax_day = False
                 for _it246 in _fitems:
                     if not _is_timeline_attraction(_it246):
@@ -4364,7 +4410,7 @@ class PlanService:
                     is_strong_nature_coverage_poi,
                     is_strong_relaxation_coverage_poi,
                 )
-                _poi_by_id248 = {p.get("id"): p for p in all_pois_dict if p.get("id")}
+                _poi_by_id248 = _plan_coords.pois_by_id
                 _has_rn_day = False
                 for _it248 in _fitems:
                     if not _is_timeline_attraction(_it248):
@@ -4715,9 +4761,8 @@ class PlanService:
                 _fitems = self._route_meals_into_timeline(
                     _fitems, _final_coord_map, _day_ctx, day_num=day_plan.day,
                 )
-                _cmap_f259 = self._merge_coord_map(_final_coord_map, _fitems)
                 _fitems = [
-                    self._normalize_transit_routing_item(it, _cmap_f259, _day_ctx)
+                    self._normalize_transit_routing_item(it, _final_coord_map, _day_ctx)
                     if _item_type_value(it) == ItemType.TRANSIT.value else it
                     for it in _fitems
                 ]
@@ -4818,7 +4863,7 @@ class PlanService:
                     is_strong_nature_coverage_poi as _is_nat252b,
                     is_strong_relaxation_coverage_poi as _is_rel252b,
                 )
-                _by_id252b = {p.get("id"): p for p in all_pois_dict if p.get("id")}
+                _by_id252b = _plan_coords.pois_by_id
                 for _it252b in _fitems:
                     if not _is_timeline_attraction(_it252b):
                         continue
@@ -4901,9 +4946,8 @@ class PlanService:
                         "has_car": True,
                         "requested_city": context.get("requested_city"),
                     }
-                    _cmap_w = self._merge_coord_map(_final_coord_map, _items_w)
                     _items_w = self._enforce_car_parking_logistics(
-                        _items_w, _cmap_w, _day_ctx_w, day_num=_dw.day,
+                        _items_w, _final_coord_map, _day_ctx_w, day_num=_dw.day,
                     )
                     _items_w = self._collapse_duplicate_transits(_items_w)
                     _items_w = self._fit_transits_between_stops(
@@ -4911,7 +4955,7 @@ class PlanService:
                     )
                     _items_w = self._remove_timeline_overlaps(_items_w, _dw.day)
                     _items_w = self._enforce_car_parking_logistics(
-                        _items_w, _cmap_w, _day_ctx_w, day_num=_dw.day,
+                        _items_w, _final_coord_map, _day_ctx_w, day_num=_dw.day,
                     )
                     _items_w = self._collapse_duplicate_transits(_items_w)
                     _items_w = self._remove_timeline_overlaps(_items_w, _dw.day)
@@ -5057,7 +5101,6 @@ class PlanService:
             for _d259 in days:
               try:
                 _it259 = list(_d259.items or [])
-                _cm259 = self._merge_coord_map(_final_coord_map, _it259)
                 # Drop legs from/to POIs removed earlier (morning Zajezdnia/Katedra ghosts).
                 _it259 = self._strip_transits_to_unscheduled_destinations(
                     _it259, day_num=_d259.day,
@@ -5071,7 +5114,7 @@ class PlanService:
                     )
                     _it259 = ensure_meal_suggestions(
                         _it259,
-                        _cm259,
+                        _final_coord_map,
                         _day_ctx259,
                         parse_suggestion_fn=_restaurant_dict_to_suggestion,
                         filter_fn=lambda sugs: _filter_meal_suggestions(
@@ -5080,25 +5123,23 @@ class PlanService:
                             target_group=(user or {}).get("target_group"),
                         ),
                     )
-                    _cm259 = self._merge_coord_map(_cm259, _it259)
                 # FIX #260: meal + attraction legs before parking (WAWA missing
                 # Attr→kolacja / Attr→Attr after late reshuffles).
                 _it259 = self._enforce_minimum_lunch_duration(
                     _it259, day_num=_d259.day,
                 )
                 _it259 = self._ensure_leading_transit(
-                    _it259, _cm259, _day_ctx259, day_num=_d259.day,
+                    _it259, _final_coord_map, _day_ctx259, day_num=_d259.day,
                 )
                 _it259 = self._route_meals_into_timeline(
-                    _it259, _cm259, _day_ctx259, day_num=_d259.day,
+                    _it259, _final_coord_map, _day_ctx259, day_num=_d259.day,
                 )
                 _it259 = self._ensure_transits_between_attractions(
-                    _it259, _cm259, _day_ctx259,
+                    _it259, _final_coord_map, _day_ctx259,
                 )
-                _it259 = self._update_transit_destinations(_it259, _cm259)
-                _cm259 = self._merge_coord_map(_cm259, _it259)
+                _it259 = self._update_transit_destinations(_it259, _final_coord_map)
                 _it259 = [
-                    self._normalize_transit_routing_item(it, _cm259, _day_ctx259)
+                    self._normalize_transit_routing_item(it, _final_coord_map, _day_ctx259)
                     if _item_type_value(it) == ItemType.TRANSIT.value else it
                     for it in _it259
                 ]
@@ -5115,7 +5156,7 @@ class PlanService:
                     _it259, day_num=_d259.day, max_pull=180,
                 )
                 _it259 = self._enforce_car_parking_logistics(
-                    _it259, _cm259, _day_ctx259, day_num=_d259.day,
+                    _it259, _final_coord_map, _day_ctx259, day_num=_d259.day,
                 )
                 _it259 = self._collapse_duplicate_transits(_it259)
                 _it259 = self._strip_self_transits(_it259, day_num=_d259.day)
@@ -5133,7 +5174,7 @@ class PlanService:
                     _it259, day_num=_d259.day, max_pull=180,
                 )
                 _it259 = self._enforce_car_parking_logistics(
-                    _it259, _cm259, _day_ctx259, day_num=_d259.day,
+                    _it259, _final_coord_map, _day_ctx259, day_num=_d259.day,
                 )
                 _it259 = self._collapse_duplicate_transits(_it259)
                 _it259 = self._strip_self_transits(_it259, day_num=_d259.day)
@@ -5145,19 +5186,18 @@ class PlanService:
                 _it259 = _push_early_lunch_to_noon(_it259)
                 # Lunch reorder can orphan meal legs — reinject once, then park.
                 _it259 = self._route_meals_into_timeline(
-                    _it259, _cm259, _day_ctx259, day_num=_d259.day,
+                    _it259, _final_coord_map, _day_ctx259, day_num=_d259.day,
                 )
                 _it259 = self._ensure_transits_between_attractions(
-                    _it259, _cm259, _day_ctx259,
+                    _it259, _final_coord_map, _day_ctx259,
                 )
-                _cm259b = self._merge_coord_map(_cm259, _it259)
                 _it259 = [
-                    self._normalize_transit_routing_item(it, _cm259b, _day_ctx259)
+                    self._normalize_transit_routing_item(it, _final_coord_map, _day_ctx259)
                     if _item_type_value(it) == ItemType.TRANSIT.value else it
                     for it in _it259
                 ]
                 _it259 = self._enforce_car_parking_logistics(
-                    _it259, _cm259b, _day_ctx259, day_num=_d259.day,
+                    _it259, _final_coord_map, _day_ctx259, day_num=_d259.day,
                 )
                 _it259 = self._remove_timeline_overlaps(_it259, _d259.day)
                 # FIX #260: overlap heal can drop an attraction and leave its
@@ -5167,12 +5207,11 @@ class PlanService:
                 )
                 _it259 = self._strip_self_transits(_it259, day_num=_d259.day)
                 # Re-inject Attr→Attr / meal legs after orphan strip, then park.
-                _cm259c = self._merge_coord_map(_cm259b, _it259)
                 _it259 = self._ensure_transits_between_attractions(
-                    _it259, _cm259c, _day_ctx259,
+                    _it259, _final_coord_map, _day_ctx259,
                 )
                 _it259 = self._route_meals_into_timeline(
-                    _it259, _cm259c, _day_ctx259, day_num=_d259.day,
+                    _it259, _final_coord_map, _day_ctx259, day_num=_d259.day,
                 )
                 _it259 = self._snap_anonymous_timeline_gaps(
                     _it259, day_num=_d259.day, max_snap=180,
@@ -5184,7 +5223,7 @@ class PlanService:
                     _it259, _day_ctx259, day_num=_d259.day, allow_partial=True,
                 )
                 _it259 = self._enforce_car_parking_logistics(
-                    _it259, _cm259c, _day_ctx259, day_num=_d259.day,
+                    _it259, _final_coord_map, _day_ctx259, day_num=_d259.day,
                 )
                 _it259 = self._remove_timeline_overlaps(_it259, _d259.day)
                 _it259 = self._strip_transits_to_unscheduled_destinations(
@@ -5207,7 +5246,7 @@ class PlanService:
                     )
                     _it259 = ensure_meal_suggestions(
                         _it259,
-                        _cm259c,
+                        _final_coord_map,
                         _day_ctx259,
                         parse_suggestion_fn=_restaurant_dict_to_suggestion,
                         filter_fn=lambda sugs: _filter_meal_suggestions(
@@ -5216,9 +5255,8 @@ class PlanService:
                             target_group=(user or {}).get("target_group"),
                         ),
                     )
-                    _cm259c = self._merge_coord_map(_cm259c, _it259)
                     _it259 = self._route_meals_into_timeline(
-                        _it259, _cm259c, _day_ctx259, day_num=_d259.day,
+                        _it259, _final_coord_map, _day_ctx259, day_num=_d259.day,
                     )
                 # FIX #261: no "arrived, waited 45 min" holes in front of meals.
                 _it259 = self._close_meal_approach_gaps(
@@ -5226,26 +5264,26 @@ class PlanService:
                 )
                 # FIX #261: day_start → first POI must show the real drive.
                 _it259 = self._ensure_leading_transit(
-                    _it259, _cm259c, _day_ctx259, day_num=_d259.day,
+                    _it259, _final_coord_map, _day_ctx259, day_num=_d259.day,
                 )
                 # FIX #261: every hop between two stops needs its own leg, and
                 # each leg must point at the stop it actually leads to.
                 _it259 = self._ensure_stop_to_stop_legs(
-                    _it259, _cm259c, _day_ctx259, day_num=_d259.day,
+                    _it259, _final_coord_map, _day_ctx259, day_num=_d259.day,
                 )
                 _it259 = self._repair_transit_endpoints_late(
-                    _it259, _cm259c, _day_ctx259, day_num=_d259.day,
+                    _it259, _final_coord_map, _day_ctx259, day_num=_d259.day,
                 )
                 # FIX #261: 4 km "walks" in 10 min were mislabelled drives —
                 # re-park the car afterwards so nothing teleports.
                 _it259 = self._fix_unrealistic_transit_modes(
-                    _it259, _cm259c, _day_ctx259, day_num=_d259.day,
+                    _it259, _final_coord_map, _day_ctx259, day_num=_d259.day,
                 )
                 _it259 = self._enforce_car_parking_logistics(
-                    _it259, _cm259c, _day_ctx259, day_num=_d259.day,
+                    _it259, _final_coord_map, _day_ctx259, day_num=_d259.day,
                 )
                 _it259 = self._repair_car_chain(
-                    _it259, _cm259c, _day_ctx259, day_num=_d259.day,
+                    _it259, _final_coord_map, _day_ctx259, day_num=_d259.day,
                 )
                 _it259 = self._collapse_duplicate_transits(_it259)
                 _it259 = self._strip_self_transits(_it259, day_num=_d259.day)
@@ -5270,19 +5308,19 @@ class PlanService:
                 # Second sweep: the timeline only settles after the gap passes,
                 # so re-check that each hop still has a correctly aimed leg.
                 _it259 = self._ensure_stop_to_stop_legs(
-                    _it259, _cm259c, _day_ctx259, day_num=_d259.day,
+                    _it259, _final_coord_map, _day_ctx259, day_num=_d259.day,
                 )
                 _it259 = self._repair_transit_endpoints_late(
-                    _it259, _cm259c, _day_ctx259, day_num=_d259.day,
+                    _it259, _final_coord_map, _day_ctx259, day_num=_d259.day,
                 )
                 _it259 = self._fix_unrealistic_transit_modes(
-                    _it259, _cm259c, _day_ctx259, day_num=_d259.day,
+                    _it259, _final_coord_map, _day_ctx259, day_num=_d259.day,
                 )
                 _it259 = self._enforce_car_parking_logistics(
-                    _it259, _cm259c, _day_ctx259, day_num=_d259.day,
+                    _it259, _final_coord_map, _day_ctx259, day_num=_d259.day,
                 )
                 _it259 = self._repair_car_chain(
-                    _it259, _cm259c, _day_ctx259, day_num=_d259.day,
+                    _it259, _final_coord_map, _day_ctx259, day_num=_d259.day,
                 )
                 _it259 = self._strip_self_transits(_it259, day_num=_d259.day)
                 _it259 = self._name_remaining_holes(
@@ -5295,7 +5333,7 @@ class PlanService:
                     _it259, day_num=_d259.day,
                 )
                 _it259 = self._ensure_stop_to_stop_legs(
-                    _it259, _cm259c, _day_ctx259, day_num=_d259.day,
+                    _it259, _final_coord_map, _day_ctx259, day_num=_d259.day,
                 )
                 _it259 = self._strip_self_transits(_it259, day_num=_d259.day)
                 _it259 = self._remove_timeline_overlaps(_it259, _d259.day)
@@ -5318,13 +5356,13 @@ class PlanService:
                     _it259, _day_ctx259, day_num=_d259.day,
                 )
                 _it259 = self._fix_unrealistic_transit_modes(
-                    _it259, _cm259c, _day_ctx259, day_num=_d259.day,
+                    _it259, _final_coord_map, _day_ctx259, day_num=_d259.day,
                 )
                 _it259 = self._enforce_car_parking_logistics(
-                    _it259, _cm259c, _day_ctx259, day_num=_d259.day,
+                    _it259, _final_coord_map, _day_ctx259, day_num=_d259.day,
                 )
                 _it259 = self._repair_car_chain(
-                    _it259, _cm259c, _day_ctx259, day_num=_d259.day,
+                    _it259, _final_coord_map, _day_ctx259, day_num=_d259.day,
                 )
                 # Moving a leg frees its old slot — close and name what is left.
                 _it259 = self._absorb_small_residual_gaps(
@@ -5338,7 +5376,6 @@ class PlanService:
                 )
                 _it259 = self._remove_timeline_overlaps(_it259, _d259.day)
                 # Stamp geometry / routing_source on legs injected in this pass.
-                _cm259d = self._merge_coord_map(_cm259c, _it259)
                 # Also index attraction item coords under aliases for walk checks.
                 for _ait in _it259:
                     if not _is_timeline_attraction(_ait):
@@ -5346,18 +5383,18 @@ class PlanService:
                     _an = (getattr(_ait, "name", "") or "").strip()
                     _alat, _alng = getattr(_ait, "lat", None), getattr(_ait, "lng", None)
                     if _an and _alat is not None and _alng is not None:
-                        _cm259d.setdefault(_an, {
+                        _final_coord_map.setdefault(_an, {
                             "name": _an, "lat": float(_alat), "lng": float(_alng),
                         })
                 _it259 = self._fix_unrealistic_transit_modes(
-                    _it259, _cm259d, _day_ctx259, day_num=_d259.day,
+                    _it259, _final_coord_map, _day_ctx259, day_num=_d259.day,
                 )
                 _it259 = self._repair_car_chain(
-                    _it259, _cm259d, _day_ctx259, day_num=_d259.day,
+                    _it259, _final_coord_map, _day_ctx259, day_num=_d259.day,
                 )
                 _it259 = self._strip_self_transits(_it259, day_num=_d259.day)
                 _it259 = [
-                    self._normalize_transit_routing_item(it, _cm259d, _day_ctx259)
+                    self._normalize_transit_routing_item(it, _final_coord_map, _day_ctx259)
                     if _item_type_value(it) == ItemType.TRANSIT.value else it
                     for it in _it259
                 ]
@@ -5394,10 +5431,9 @@ class PlanService:
                     from app.application.services.plan_day_integrity import (
                         ensure_meal_suggestions as _ems262,
                     )
-                    _cm262 = self._merge_coord_map(_cm259d, _it259)
                     _it259 = _ems262(
                         _it259,
-                        _cm262,
+                        _final_coord_map,
                         _day_ctx259,
                         parse_suggestion_fn=_restaurant_dict_to_suggestion,
                         filter_fn=lambda sugs: _filter_meal_suggestions(
@@ -5409,27 +5445,26 @@ class PlanService:
                     _it259 = self._dedupe_lunch_dinner_restaurants(
                         _it259, _day_ctx259, day_num=_d259.day,
                     )
-                _cm262b = self._merge_coord_map(_cm259d, _it259)
                 _it259 = self._route_meals_into_timeline(
-                    _it259, _cm262b, _day_ctx259, day_num=_d259.day,
+                    _it259, _final_coord_map, _day_ctx259, day_num=_d259.day,
                 )
                 _it259 = self._ensure_stop_to_stop_legs(
-                    _it259, _cm262b, _day_ctx259, day_num=_d259.day,
+                    _it259, _final_coord_map, _day_ctx259, day_num=_d259.day,
                 )
                 _it259 = self._place_legs_before_their_stops(
                     _it259, day_num=_d259.day,
                 )
                 _it259 = self._repair_transit_endpoints_late(
-                    _it259, _cm262b, _day_ctx259, day_num=_d259.day,
+                    _it259, _final_coord_map, _day_ctx259, day_num=_d259.day,
                 )
                 _it259 = self._fix_unrealistic_transit_modes(
-                    _it259, _cm262b, _day_ctx259, day_num=_d259.day,
+                    _it259, _final_coord_map, _day_ctx259, day_num=_d259.day,
                 )
                 _it259 = self._enforce_car_parking_logistics(
-                    _it259, _cm262b, _day_ctx259, day_num=_d259.day,
+                    _it259, _final_coord_map, _day_ctx259, day_num=_d259.day,
                 )
                 _it259 = self._repair_car_chain(
-                    _it259, _cm262b, _day_ctx259, day_num=_d259.day,
+                    _it259, _final_coord_map, _day_ctx259, day_num=_d259.day,
                 )
                 _it259 = self._relabel_return_to_car_transits(
                     _it259, day_num=_d259.day,
@@ -5457,12 +5492,12 @@ class PlanService:
                     _it259, day_num=_d259.day,
                 )
                 _it259 = [
-                    self._normalize_transit_routing_item(it, _cm262b, _day_ctx259)
+                    self._normalize_transit_routing_item(it, _final_coord_map, _day_ctx259)
                     if _item_type_value(it) == ItemType.TRANSIT.value else it
                     for it in _it259
                 ]
                 _it259 = self._fix_unrealistic_transit_modes(
-                    _it259, _cm262b, _day_ctx259, day_num=_d259.day,
+                    _it259, _final_coord_map, _day_ctx259, day_num=_d259.day,
                 )
                 _it259 = self._remove_timeline_overlaps(_it259, _d259.day)
                 # Absolute last: nothing past day_end, no orphan destinations.
@@ -5473,19 +5508,19 @@ class PlanService:
                     _it259, day_num=_d259.day,
                 )
                 _it259 = self._ensure_stop_to_stop_legs(
-                    _it259, _cm262b, _day_ctx259, day_num=_d259.day,
+                    _it259, _final_coord_map, _day_ctx259, day_num=_d259.day,
                 )
                 _it259 = self._repair_transit_endpoints_late(
-                    _it259, _cm262b, _day_ctx259, day_num=_d259.day,
+                    _it259, _final_coord_map, _day_ctx259, day_num=_d259.day,
                 )
                 _it259 = self._fix_unrealistic_transit_modes(
-                    _it259, _cm262b, _day_ctx259, day_num=_d259.day,
+                    _it259, _final_coord_map, _day_ctx259, day_num=_d259.day,
                 )
                 _it259 = self._enforce_car_parking_logistics(
-                    _it259, _cm262b, _day_ctx259, day_num=_d259.day,
+                    _it259, _final_coord_map, _day_ctx259, day_num=_d259.day,
                 )
                 _it259 = self._repair_car_chain(
-                    _it259, _cm262b, _day_ctx259, day_num=_d259.day,
+                    _it259, _final_coord_map, _day_ctx259, day_num=_d259.day,
                 )
                 _it259 = self._relabel_return_to_car_transits(
                     _it259, day_num=_d259.day,
@@ -5564,7 +5599,6 @@ class PlanService:
                         if _nm261:
                             _trip_seen261.setdefault(_nm261, _d261.day)
                     if _before261 != _after261:
-                        _cm261 = self._merge_coord_map(_final_coord_map, _it261)
                         _it261 = self._strip_misscheduled_evening_attractions(
                             _it261, all_pois_dict, day_num=_d261.day,
                         )
@@ -5572,16 +5606,16 @@ class PlanService:
                             _it261, day_num=_d261.day,
                         )
                         _it261 = self._ensure_stop_to_stop_legs(
-                            _it261, _cm261, _day_ctx259, day_num=_d261.day,
+                            _it261, _final_coord_map, _day_ctx259, day_num=_d261.day,
                         )
                         _it261 = self._repair_transit_endpoints_late(
-                            _it261, _cm261, _day_ctx259, day_num=_d261.day,
+                            _it261, _final_coord_map, _day_ctx259, day_num=_d261.day,
                         )
                         _it261 = self._fix_unrealistic_transit_modes(
-                            _it261, _cm261, _day_ctx259, day_num=_d261.day,
+                            _it261, _final_coord_map, _day_ctx259, day_num=_d261.day,
                         )
                         _it261 = self._repair_car_chain(
-                            _it261, _cm261, _day_ctx259, day_num=_d261.day,
+                            _it261, _final_coord_map, _day_ctx259, day_num=_d261.day,
                         )
                         _it261 = self._strip_self_transits(_it261, day_num=_d261.day)
                         _it261 = self._absorb_small_residual_gaps(
@@ -5614,7 +5648,6 @@ class PlanService:
             _final262: List[DayPlan] = []
             for _d262 in days:
                 _it262 = list(_d262.items or [])
-                _cm_f262 = self._merge_coord_map(_final_coord_map, _it262)
                 _it262 = self._guarantee_dinner_before_day_end(
                     _it262, _day_ctx259, day_num=_d262.day,
                 )
@@ -5626,7 +5659,7 @@ class PlanService:
                         ensure_meal_suggestions as _ems_f262,
                     )
                     _it262 = _ems_f262(
-                        _it262, _cm_f262, _day_ctx259,
+                        _it262, _final_coord_map, _day_ctx259,
                         parse_suggestion_fn=_restaurant_dict_to_suggestion,
                         filter_fn=lambda sugs: _filter_meal_suggestions(
                             sugs,
@@ -5638,10 +5671,10 @@ class PlanService:
                         _it262, _day_ctx259, day_num=_d262.day,
                     )
                 _it262 = self._route_meals_into_timeline(
-                    _it262, _cm_f262, _day_ctx259, day_num=_d262.day,
+                    _it262, _final_coord_map, _day_ctx259, day_num=_d262.day,
                 )
                 _it262 = self._ensure_stop_to_stop_legs(
-                    _it262, _cm_f262, _day_ctx259, day_num=_d262.day,
+                    _it262, _final_coord_map, _day_ctx259, day_num=_d262.day,
                 )
                 _it262 = self._place_legs_before_their_stops(
                     _it262, day_num=_d262.day,
@@ -5655,7 +5688,7 @@ class PlanService:
                         _it262, day_num=_d262.day,
                     )
                     _it262 = self._ensure_stop_to_stop_legs(
-                        _it262, _cm_f262, _day_ctx259, day_num=_d262.day,
+                        _it262, _final_coord_map, _day_ctx259, day_num=_d262.day,
                     )
                     _it262 = self._force_approach_before_destination(
                         _it262, day_num=_d262.day,
@@ -5684,9 +5717,8 @@ class PlanService:
                         day_num=_d262.day, min_attr=3,
                         cross_day_reuse=True,
                     )
-                    _cm_f262 = self._merge_coord_map(_final_coord_map, _it262)
                     _it262 = self._ensure_stop_to_stop_legs(
-                        _it262, _cm_f262, _day_ctx259, day_num=_d262.day,
+                        _it262, _final_coord_map, _day_ctx259, day_num=_d262.day,
                     )
                     # Still sparse — plant a POI into the largest free_time block.
                     if sum(1 for x in _it262 if _is_timeline_attraction(x)) <= 1:
@@ -5697,20 +5729,19 @@ class PlanService:
                                    if _d262.day - 1 < len(contexts) else {}),
                             }, user, day_num=_d262.day,
                         )
-                        _cm_f262 = self._merge_coord_map(_final_coord_map, _it262)
                 _it262 = self._strip_transits_to_unscheduled_destinations(
                     _it262, day_num=_d262.day,
                 )
                 _it262 = self._strip_self_transits(_it262, day_num=_d262.day)
                 _it262 = self._repair_car_chain(
-                    _it262, _cm_f262, _day_ctx259, day_num=_d262.day,
+                    _it262, _final_coord_map, _day_ctx259, day_num=_d262.day,
                 )
                 _it262 = self._fix_unrealistic_transit_modes(
-                    _it262, _cm_f262, _day_ctx259, day_num=_d262.day,
+                    _it262, _final_coord_map, _day_ctx259, day_num=_d262.day,
                 )
                 # Last-word car.from rewrite (parking/meal inject can re-teleport).
                 _it262 = self._repair_car_chain(
-                    _it262, _cm_f262, _day_ctx259, day_num=_d262.day,
+                    _it262, _final_coord_map, _day_ctx259, day_num=_d262.day,
                 )
                 _it262 = self._name_remaining_holes(
                     _it262, _day_ctx259, day_num=_d262.day,
@@ -5722,12 +5753,12 @@ class PlanService:
                     _it262, _day_ctx259, day_num=_d262.day,
                 )
                 _it262 = self._ensure_stop_to_stop_legs(
-                    _it262, _cm_f262, _day_ctx259, day_num=_d262.day,
+                    _it262, _final_coord_map, _day_ctx259, day_num=_d262.day,
                 )
                 # ensure_stop can recreate meal/attraction legs with wrong
                 # car.from after an inject — repair MUST be the last car pass.
                 _it262 = self._repair_car_chain(
-                    _it262, _cm_f262, _day_ctx259, day_num=_d262.day,
+                    _it262, _final_coord_map, _day_ctx259, day_num=_d262.day,
                 )
                 _it262 = self._absorb_small_residual_gaps(
                     _it262, _day_ctx259, day_num=_d262.day,
@@ -5736,13 +5767,13 @@ class PlanService:
                     _it262, _day_ctx259, day_num=_d262.day,
                 )
                 _it262 = [
-                    self._normalize_transit_routing_item(it, _cm_f262, _day_ctx259)
+                    self._normalize_transit_routing_item(it, _final_coord_map, _day_ctx259)
                     if _item_type_value(it) == ItemType.TRANSIT.value else it
                     for it in _it262
                 ]
                 _it262 = self._strip_self_transits(_it262, day_num=_d262.day)
                 _it262 = self._repair_car_chain(
-                    _it262, _cm_f262, _day_ctx259, day_num=_d262.day,
+                    _it262, _final_coord_map, _day_ctx259, day_num=_d262.day,
                 )
                 # FIX #263 Wrocław absolute final polish (also safe for WAWA).
                 if _city_needs_car_gap_polish(
@@ -5753,7 +5784,7 @@ class PlanService:
                     )
                     _it262 = [
                         self._fix_implausible_transit_duration(
-                            it, _cm_f262, _day_ctx259,
+                            it, _final_coord_map, _day_ctx259,
                         )
                         if _item_type_value(it) == ItemType.TRANSIT.value else it
                         for it in _it262
@@ -5812,22 +5843,21 @@ class PlanService:
                                            if _d262.day - 1 < len(contexts) else {}),
                                     }, user, day_num=_d262.day,
                                 )
-                        _cm_f262 = self._merge_coord_map(_final_coord_map, _it262)
                     _it262 = self._ensure_stop_to_stop_legs(
-                        _it262, _cm_f262, _day_ctx259, day_num=_d262.day,
+                        _it262, _final_coord_map, _day_ctx259, day_num=_d262.day,
                     )
                     _it262 = self._repair_car_chain(
-                        _it262, _cm_f262, _day_ctx259, day_num=_d262.day,
+                        _it262, _final_coord_map, _day_ctx259, day_num=_d262.day,
                     )
                     _it262 = self._merge_abutting_free_time_hard(
                         _it262, day_num=_d262.day,
                     )
                     _it262 = self._fix_unrealistic_transit_modes(
-                        _it262, _cm_f262, _day_ctx259, day_num=_d262.day,
+                        _it262, _final_coord_map, _day_ctx259, day_num=_d262.day,
                     )
                     _it262 = [
                         self._normalize_transit_routing_item(
-                            it, _cm_f262, _day_ctx259,
+                            it, _final_coord_map, _day_ctx259,
                         )
                         if _item_type_value(it) == ItemType.TRANSIT.value else it
                         for it in _it262
@@ -5851,10 +5881,10 @@ class PlanService:
                         _it262, day_num=_d262.day,
                     )
                     _it262 = self._ensure_stop_to_stop_legs(
-                        _it262, _cm_f262, _day_ctx259, day_num=_d262.day,
+                        _it262, _final_coord_map, _day_ctx259, day_num=_d262.day,
                     )
                     _it262 = self._repair_car_chain(
-                        _it262, _cm_f262, _day_ctx259, day_num=_d262.day,
+                        _it262, _final_coord_map, _day_ctx259, day_num=_d262.day,
                     )
                     _it262 = self._name_remaining_holes(
                         _it262, _day_ctx259, day_num=_d262.day,
@@ -5883,19 +5913,19 @@ class PlanService:
                     )
                     # Rebuild meal approaches after dinner restaurant changes.
                     _it262 = self._route_meals_into_timeline(
-                        _it262, _cm_f262, _day_ctx259, day_num=_d262.day,
+                        _it262, _final_coord_map, _day_ctx259, day_num=_d262.day,
                     )
                     _it262 = self._strip_transits_to_unscheduled_destinations(
                         _it262, day_num=_d262.day,
                     )
                     _it262 = self._ensure_stop_to_stop_legs(
-                        _it262, _cm_f262, _day_ctx259, day_num=_d262.day,
+                        _it262, _final_coord_map, _day_ctx259, day_num=_d262.day,
                     )
                     _it262 = self._strip_transits_to_unscheduled_destinations(
                         _it262, day_num=_d262.day,
                     )
                     _it262 = self._repair_car_chain(
-                        _it262, _cm_f262, _day_ctx259, day_num=_d262.day,
+                        _it262, _final_coord_map, _day_ctx259, day_num=_d262.day,
                     )
                     _it262 = self._close_meal_approach_gaps(
                         _it262, day_num=_d262.day,
@@ -5921,13 +5951,13 @@ class PlanService:
                         _it262, day_num=_d262.day,
                     )
                     _it262 = self._ensure_stop_to_stop_legs(
-                        _it262, _cm_f262, _day_ctx259, day_num=_d262.day,
+                        _it262, _final_coord_map, _day_ctx259, day_num=_d262.day,
                     )
                     _it262 = self._strip_transits_to_unscheduled_destinations(
                         _it262, day_num=_d262.day,
                     )
                     _it262 = self._repair_car_chain(
-                        _it262, _cm_f262, _day_ctx259, day_num=_d262.day,
+                        _it262, _final_coord_map, _day_ctx259, day_num=_d262.day,
                     )
                     _it262 = self._name_remaining_holes(
                         _it262, _day_ctx259, day_num=_d262.day,
@@ -6002,9 +6032,6 @@ class PlanService:
                                 _it262, day_num=_d262.day,
                             )
                             if sum(1 for x in _it262 if _is_timeline_attraction(x)) > _before:
-                                _cm_f262 = self._merge_coord_map(
-                                    _final_coord_map, _it262,
-                                )
                                 # Drop stale meal approaches that still start
                                 # from the pre-inject stop (Bastion→restaurant
                                 # while Mamuta now sits in between).
@@ -6015,18 +6042,18 @@ class PlanService:
                                     _it262, day_num=_d262.day,
                                 )
                                 _it262 = self._route_meals_into_timeline(
-                                    _it262, _cm_f262, _day_ctx259,
+                                    _it262, _final_coord_map, _day_ctx259,
                                     day_num=_d262.day,
                                 )
                                 _it262 = self._ensure_stop_to_stop_legs(
-                                    _it262, _cm_f262, _day_ctx259,
+                                    _it262, _final_coord_map, _day_ctx259,
                                     day_num=_d262.day,
                                 )
                                 _it262 = self._force_approach_before_destination(
                                     _it262, day_num=_d262.day,
                                 )
                                 _it262 = self._repair_car_chain(
-                                    _it262, _cm_f262, _day_ctx259,
+                                    _it262, _final_coord_map, _day_ctx259,
                                     day_num=_d262.day,
                                 )
                                 _it262 = self._close_meal_approach_gaps(
@@ -6041,23 +6068,22 @@ class PlanService:
                     _it262 = self._strip_self_transits(_it262, day_num=_d262.day)
                     _it262 = [
                         self._normalize_transit_routing_item(
-                            it, _cm_f262, _day_ctx259,
+                            it, _final_coord_map, _day_ctx259,
                         )
                         if _item_type_value(it) == ItemType.TRANSIT.value else it
                         for it in _it262
                     ]
                     _it262 = self._strip_self_transits(_it262, day_num=_d262.day)
                     _it262 = self._remove_timeline_overlaps(_it262, _d262.day)
-                    _cm_f262 = self._merge_coord_map(_final_coord_map, _it262)
                     _it262 = self._route_meals_into_timeline(
-                        _it262, _cm_f262, _day_ctx259, day_num=_d262.day,
+                        _it262, _final_coord_map, _day_ctx259, day_num=_d262.day,
                     )
                     _it262 = self._ensure_stop_to_stop_legs(
-                        _it262, _cm_f262, _day_ctx259, day_num=_d262.day,
+                        _it262, _final_coord_map, _day_ctx259, day_num=_d262.day,
                     )
                     _it262 = self._strip_self_transits(_it262, day_num=_d262.day)
                     _it262 = self._repair_car_chain(
-                        _it262, _cm_f262, _day_ctx259, day_num=_d262.day,
+                        _it262, _final_coord_map, _day_ctx259, day_num=_d262.day,
                     )
                     _it262 = self._close_meal_approach_gaps(
                         _it262, day_num=_d262.day,
@@ -6071,7 +6097,7 @@ class PlanService:
                     _it262 = self._strip_self_transits(_it262, day_num=_d262.day)
                     _it262 = [
                         self._normalize_transit_routing_item(
-                            it, _cm_f262, _day_ctx259,
+                            it, _final_coord_map, _day_ctx259,
                         )
                         if _item_type_value(it) == ItemType.TRANSIT.value else it
                         for it in _it262
@@ -6087,16 +6113,16 @@ class PlanService:
                         _it262, day_num=_d262.day,
                     )
                     _it262 = self._ensure_stop_to_stop_legs(
-                        _it262, _cm_f262, _day_ctx259, day_num=_d262.day,
+                        _it262, _final_coord_map, _day_ctx259, day_num=_d262.day,
                     )
                     _it262 = self._repair_car_chain(
-                        _it262, _cm_f262, _day_ctx259, day_num=_d262.day,
+                        _it262, _final_coord_map, _day_ctx259, day_num=_d262.day,
                     )
                     _it262 = self._retarget_meal_legs_to_prev_stop(
                         _it262, day_num=_d262.day,
                     )
                     _it262 = self._repair_car_chain(
-                        _it262, _cm_f262, _day_ctx259, day_num=_d262.day,
+                        _it262, _final_coord_map, _day_ctx259, day_num=_d262.day,
                     )
                     # Absolute last — ensure_stop can recreate Warzywniak→Warzywniak.
                     _it262 = self._strip_self_transits(_it262, day_num=_d262.day)
@@ -6114,12 +6140,11 @@ class PlanService:
                     _it262 = self._strip_transits_to_unscheduled_destinations(
                         _it262, day_num=_d262.day,
                     )
-                    _cm_f262 = self._merge_coord_map(_final_coord_map, _it262)
                     _it262 = self._clamp_absurd_transit_durations(
-                        _it262, _cm_f262, _day_ctx259, day_num=_d262.day,
+                        _it262, _final_coord_map, _day_ctx259, day_num=_d262.day,
                     )
                     _it262 = self._repair_car_chain(
-                        _it262, _cm_f262, _day_ctx259, day_num=_d262.day,
+                        _it262, _final_coord_map, _day_ctx259, day_num=_d262.day,
                     )
                     _it262 = self._push_lunch_not_before_noon(
                         _it262, day_num=_d262.day,
@@ -6130,31 +6155,30 @@ class PlanService:
                     _it262 = self._force_known_good_poi_coords(
                         _it262, day_num=_d262.day,
                     )
-                    _cm_f262 = self._merge_coord_map(_final_coord_map, _it262)
                     _it262 = self._cap_stretched_attraction_durations(
                         _it262, day_num=_d262.day, user=user,
                     )
                     _it262 = self._route_meals_into_timeline(
-                        _it262, _cm_f262, _day_ctx259, day_num=_d262.day,
+                        _it262, _final_coord_map, _day_ctx259, day_num=_d262.day,
                     )
                     _it262 = self._ensure_stop_to_stop_legs(
-                        _it262, _cm_f262, _day_ctx259, day_num=_d262.day,
+                        _it262, _final_coord_map, _day_ctx259, day_num=_d262.day,
                     )
                     _it262 = self._fix_unrealistic_transit_modes(
-                        _it262, _cm_f262, _day_ctx259, day_num=_d262.day,
+                        _it262, _final_coord_map, _day_ctx259, day_num=_d262.day,
                     )
                     _it262 = [
                         self._fix_implausible_transit_duration(
-                            it, _cm_f262, _day_ctx259,
+                            it, _final_coord_map, _day_ctx259,
                         )
                         if _item_type_value(it) == ItemType.TRANSIT.value else it
                         for it in _it262
                     ]
                     _it262 = self._clamp_absurd_transit_durations(
-                        _it262, _cm_f262, _day_ctx259, day_num=_d262.day,
+                        _it262, _final_coord_map, _day_ctx259, day_num=_d262.day,
                     )
                     _it262 = self._repair_car_chain(
-                        _it262, _cm_f262, _day_ctx259, day_num=_d262.day,
+                        _it262, _final_coord_map, _day_ctx259, day_num=_d262.day,
                     )
                     # Lunch floor first, then slide approaches to touch 12:00
                     # so we never leave a 12–15 min anonymous pre-lunch hole.
@@ -6175,14 +6199,14 @@ class PlanService:
                     )
                     _it262 = [
                         self._normalize_transit_routing_item(
-                            it, _cm_f262, _day_ctx259,
+                            it, _final_coord_map, _day_ctx259,
                         )
                         if _item_type_value(it) == ItemType.TRANSIT.value else it
                         for it in _it262
                     ]
                     _it262 = self._strip_self_transits(_it262, day_num=_d262.day)
                     _it262 = self._fix_unrealistic_transit_modes(
-                        _it262, _cm_f262, _day_ctx259, day_num=_d262.day,
+                        _it262, _final_coord_map, _day_ctx259, day_num=_d262.day,
                     )
                     _it262 = self._merge_abutting_free_time_hard(
                         _it262, day_num=_d262.day,
@@ -6251,15 +6275,14 @@ class PlanService:
                         _it262 = self._strip_wrong_city_attractions(
                             _it262, _day_ctx259, day_num=_d262.day,
                         )
-                        _cm_f262 = self._merge_coord_map(_final_coord_map, _it262)
                         _it262 = self._strip_transits_to_unscheduled_destinations(
                             _it262, day_num=_d262.day,
                         )
                         _it262 = self._ensure_stop_to_stop_legs(
-                            _it262, _cm_f262, _day_ctx259, day_num=_d262.day,
+                            _it262, _final_coord_map, _day_ctx259, day_num=_d262.day,
                         )
                         _it262 = self._repair_car_chain(
-                            _it262, _cm_f262, _day_ctx259, day_num=_d262.day,
+                            _it262, _final_coord_map, _day_ctx259, day_num=_d262.day,
                         )
                         _it262 = self._name_remaining_holes(
                             _it262, _day_ctx259, day_num=_d262.day,
@@ -6291,12 +6314,11 @@ class PlanService:
                         for it in _it262
                     ]
                     if _before278 != _after278:
-                        _cm_f262 = self._merge_coord_map(_final_coord_map, _it262)
                         _it262 = self._ensure_stop_to_stop_legs(
-                            _it262, _cm_f262, _day_ctx259, day_num=_d262.day,
+                            _it262, _final_coord_map, _day_ctx259, day_num=_d262.day,
                         )
                         _it262 = self._repair_car_chain(
-                            _it262, _cm_f262, _day_ctx259, day_num=_d262.day,
+                            _it262, _final_coord_map, _day_ctx259, day_num=_d262.day,
                         )
                 _it262, _note278, _end278 = self._apply_quality_first_early_close(
                     _it262, _day_ctx259, day_num=_d262.day,
@@ -6319,7 +6341,6 @@ class PlanService:
                 _it267 = self._strip_transits_to_unscheduled_destinations(
                     list(_d267.items or []), day_num=_d267.day,
                 )
-                _cm267 = self._merge_coord_map(_final_coord_map, _it267)
                 _ctx267 = {
                     **(context or {}),
                     "requested_city": str(
@@ -6338,7 +6359,6 @@ class PlanService:
                 _it267 = self._force_known_good_poi_coords(
                     _it267, day_num=_d267.day,
                 )
-                _cm267 = self._merge_coord_map(_cm267, _it267)
                 _it267 = self._cap_stretched_attraction_durations(
                     _it267, day_num=_d267.day, user=user,
                 )
@@ -6358,15 +6378,15 @@ class PlanService:
                     _it267, day_num=_d267.day,
                 )
                 _it267 = self._ensure_stop_to_stop_legs(
-                    _it267, _cm267, _ctx267, day_num=_d267.day,
+                    _it267, _final_coord_map, _ctx267, day_num=_d267.day,
                 )
                 # Car repair MUST be after ensure_stop (which recreates legs
                 # with stale from_location — client car-teleport audits).
                 _it267 = self._repair_car_chain(
-                    _it267, _cm267, _ctx267, day_num=_d267.day,
+                    _it267, _final_coord_map, _ctx267, day_num=_d267.day,
                 )
                 _it267 = self._enforce_car_parking_logistics(
-                    _it267, _cm267, _ctx267, day_num=_d267.day,
+                    _it267, _final_coord_map, _ctx267, day_num=_d267.day,
                 )
                 _it267 = self._relabel_return_to_car_transits(
                     _it267, day_num=_d267.day,
@@ -6375,12 +6395,12 @@ class PlanService:
                     _it267, day_num=_d267.day,
                 )
                 _it267 = [
-                    self._fix_implausible_transit_duration(it, _cm267, _ctx267)
+                    self._fix_implausible_transit_duration(it, _final_coord_map, _ctx267)
                     if _item_type_value(it) == ItemType.TRANSIT.value else it
                     for it in _it267
                 ]
                 _it267 = self._clamp_absurd_transit_durations(
-                    _it267, _cm267, _ctx267, day_num=_d267.day,
+                    _it267, _final_coord_map, _ctx267, day_num=_d267.day,
                 )
                 _it267 = self._strip_self_transits(_it267, day_num=_d267.day)
                 _it267 = self._push_lunch_not_before_noon(
@@ -6393,7 +6413,7 @@ class PlanService:
                 )
                 # One more car heal after lunch push can slide approaches.
                 _it267 = self._repair_car_chain(
-                    _it267, _cm267, _ctx267, day_num=_d267.day,
+                    _it267, _final_coord_map, _ctx267, day_num=_d267.day,
                 )
                 _ctx267["date"] = getattr(_d267, "date", None)
                 from app.domain.scoring.profile_poi_rules import (
@@ -6416,7 +6436,7 @@ class PlanService:
                 _ctx267["trip_repeat_keys"] = _keys269
                 _ctx267["trip_attraction_names"] = _names269
                 _it267 = self._seal_city_timeline(
-                    _it267, _cm267, _ctx267, user,
+                    _it267, _final_coord_map, _ctx267, user,
                     day_num=_d267.day, all_pois_dict=all_pois_dict,
                 )
                 _it267, _note267, _ = self._apply_quality_first_early_close(
@@ -6517,7 +6537,6 @@ class PlanService:
                         _it268, day_num=_d268.day,
                     )
                     _it268 = self._strip_self_transits(_it268, day_num=_d268.day)
-                    _cm268 = self._merge_coord_map(_final_coord_map, _it268)
                     _ctx268 = {
                         **(context or {}),
                         "requested_city": str(
@@ -6552,7 +6571,7 @@ class PlanService:
                     _ctx268["trip_repeat_keys"] = _keys268
                     _ctx268["trip_attraction_names"] = _names268
                     _it268 = self._seal_city_timeline(
-                        _it268, _cm268, _ctx268, user,
+                        _it268, _final_coord_map, _ctx268, user,
                         day_num=_d268.day, all_pois_dict=all_pois_dict,
                     )
                     _final268.append(DayPlan(
@@ -6575,7 +6594,6 @@ class PlanService:
                     _it269s = self._strip_transits_to_unscheduled_destinations(
                         list(_d269s.items or []), day_num=_d269s.day,
                     )
-                    _cm269s = self._merge_coord_map(_final_coord_map, _it269s)
                     _ctx269s = {
                         **(context or {}),
                         "day_start": day_start,
@@ -6650,15 +6668,14 @@ class PlanService:
                     _it269s = self._strip_transits_to_unscheduled_destinations(
                         _it269s, day_num=_d269s.day,
                     )
-                    _cm269s = self._merge_coord_map(_final_coord_map, _it269s)
                     _it269s = self._retarget_all_legs_to_prev_stop(
                         _it269s, day_num=_d269s.day,
                     )
                     _it269s = self._ensure_stop_to_stop_legs(
-                        _it269s, _cm269s, _ctx269s, day_num=_d269s.day, min_km=0.08,
+                        _it269s, _final_coord_map, _ctx269s, day_num=_d269s.day, min_km=0.08,
                     )
                     _it269s = self._fix_implausible_transits_shifting(
-                        _it269s, _cm269s, _ctx269s, day_num=_d269s.day,
+                        _it269s, _final_coord_map, _ctx269s, day_num=_d269s.day,
                     )
                     _it269s = self._retarget_all_legs_to_prev_stop(
                         _it269s, day_num=_d269s.day,
@@ -6706,7 +6723,6 @@ class PlanService:
                     _it269f = self._strip_transits_to_unscheduled_destinations(
                         list(_d269f.items or []), day_num=_d269f.day,
                     )
-                    _cm269f = self._merge_coord_map(_final_coord_map, _it269f)
                     _ctx269f = {
                         **(context or {}),
                         "day_start": day_start,
@@ -6760,10 +6776,10 @@ class PlanService:
                         _it269f, day_num=_d269f.day,
                     )
                     _it269f = self._ensure_stop_to_stop_legs(
-                        _it269f, _cm269f, _ctx269f, day_num=_d269f.day, min_km=0.08,
+                        _it269f, _final_coord_map, _ctx269f, day_num=_d269f.day, min_km=0.08,
                     )
                     _it269f = self._fix_implausible_transits_shifting(
-                        _it269f, _cm269f, _ctx269f, day_num=_d269f.day,
+                        _it269f, _final_coord_map, _ctx269f, day_num=_d269f.day,
                     )
                     if all_pois_dict:
                         _it269f = self._strip_misscheduled_morning_preferred_attractions(
@@ -6790,7 +6806,7 @@ class PlanService:
                         day_num=_d269f.day,
                     )
                     _it269f = self._ensure_stop_to_stop_legs(
-                        _it269f, _cm269f, _ctx269f, day_num=_d269f.day, min_km=0.08,
+                        _it269f, _final_coord_map, _ctx269f, day_num=_d269f.day, min_km=0.08,
                     )
                     _it269f = self._retarget_all_legs_to_prev_stop(
                         _it269f, day_num=_d269f.day,
@@ -6822,7 +6838,7 @@ class PlanService:
                         _it269f, day_num=_d269f.day,
                     )
                     _it269f = self._ensure_stop_to_stop_legs(
-                        _it269f, _cm269f, _ctx269f, day_num=_d269f.day, min_km=0.08,
+                        _it269f, _final_coord_map, _ctx269f, day_num=_d269f.day, min_km=0.08,
                     )
                     _it269f = self._retarget_all_legs_to_prev_stop(
                         _it269f, day_num=_d269f.day,
@@ -6860,7 +6876,7 @@ class PlanService:
                         _it269f, day_num=_d269f.day,
                     )
                     _it269f = self._ensure_stop_to_stop_legs(
-                        _it269f, _cm269f, _ctx269f, day_num=_d269f.day, min_km=0.08,
+                        _it269f, _final_coord_map, _ctx269f, day_num=_d269f.day, min_km=0.08,
                     )
                     _it269f = self._retarget_all_legs_to_prev_stop(
                         _it269f, day_num=_d269f.day,
@@ -6900,7 +6916,7 @@ class PlanService:
                         _it269f, day_num=_d269f.day,
                     )
                     _it269f = self._ensure_stop_to_stop_legs(
-                        _it269f, _cm269f, _ctx269f, day_num=_d269f.day, min_km=0.08,
+                        _it269f, _final_coord_map, _ctx269f, day_num=_d269f.day, min_km=0.08,
                     )
                     _it269f = self._retarget_all_legs_to_prev_stop(
                         _it269f, day_num=_d269f.day,
@@ -6914,7 +6930,6 @@ class PlanService:
                     _it269f = self._force_known_good_poi_coords(
                         _it269f, day_num=_d269f.day,
                     )
-                    _cm269f = self._merge_coord_map(_cm269f, _it269f)
                     _it269f = self._pull_daytrip_cluster_to_morning(
                         _it269f, _ctx269f, day_num=_d269f.day,
                     )
@@ -6952,13 +6967,13 @@ class PlanService:
                         _it269f, day_num=_d269f.day,
                     )
                     _it269f = self._ensure_stop_to_stop_legs(
-                        _it269f, _cm269f, _ctx269f, day_num=_d269f.day, min_km=0.08,
+                        _it269f, _final_coord_map, _ctx269f, day_num=_d269f.day, min_km=0.08,
                     )
                     _it269f = self._retarget_all_legs_to_prev_stop(
                         _it269f, day_num=_d269f.day,
                     )
                     _it269f = self._fix_implausible_transits_shifting(
-                        _it269f, _cm269f, _ctx269f, day_num=_d269f.day,
+                        _it269f, _final_coord_map, _ctx269f, day_num=_d269f.day,
                     )
                     _it269f = self._strip_transits_to_unscheduled_destinations(
                         _it269f, day_num=_d269f.day,
@@ -6988,7 +7003,7 @@ class PlanService:
                         _it269f, day_num=_d269f.day,
                     )
                     _it269f = self._ensure_stop_to_stop_legs(
-                        _it269f, _cm269f, _ctx269f, day_num=_d269f.day, min_km=0.08,
+                        _it269f, _final_coord_map, _ctx269f, day_num=_d269f.day, min_km=0.08,
                     )
                     _it269f = self._retarget_all_legs_to_prev_stop(
                         _it269f, day_num=_d269f.day,
@@ -7007,7 +7022,7 @@ class PlanService:
                         _it269f, day_num=_d269f.day,
                     )
                     _it269f = self._ensure_stop_to_stop_legs(
-                        _it269f, _cm269f, _ctx269f, day_num=_d269f.day, min_km=0.08,
+                        _it269f, _final_coord_map, _ctx269f, day_num=_d269f.day, min_km=0.08,
                     )
                     _it269f = self._guarantee_lunch_slot(
                         _it269f, _ctx269f, day_num=_d269f.day,
@@ -7028,7 +7043,7 @@ class PlanService:
                         _it269f, _ctx269f, day_num=_d269f.day,
                     )
                     _it269f = self._ensure_leading_transit(
-                        _it269f, _cm269f, _ctx269f, day_num=_d269f.day,
+                        _it269f, _final_coord_map, _ctx269f, day_num=_d269f.day,
                     )
                     _it269f = self._dedupe_same_destination_approaches(
                         _it269f, day_num=_d269f.day,
@@ -7040,7 +7055,7 @@ class PlanService:
                         _it269f, _ctx269f, day_num=_d269f.day,
                     )
                     _it269f = self._fix_implausible_transits_shifting(
-                        _it269f, _cm269f, _ctx269f, day_num=_d269f.day,
+                        _it269f, _final_coord_map, _ctx269f, day_num=_d269f.day,
                     )
                     _it269f = self._clamp_timeline_to_day_end(
                         _it269f, _ctx269f, day_num=_d269f.day,
@@ -7075,7 +7090,7 @@ class PlanService:
                         _it269f, user, day_num=_d269f.day,
                     )
                     _it269f = self._ensure_leading_transit(
-                        _it269f, _cm269f, _ctx269f, day_num=_d269f.day,
+                        _it269f, _final_coord_map, _ctx269f, day_num=_d269f.day,
                     )
                     _it269f = self._dedupe_same_destination_approaches(
                         _it269f, day_num=_d269f.day,
@@ -7084,7 +7099,7 @@ class PlanService:
                         _it269f, day_num=_d269f.day,
                     )
                     _it269f = self._fix_implausible_transits_shifting(
-                        _it269f, _cm269f, _ctx269f, day_num=_d269f.day,
+                        _it269f, _final_coord_map, _ctx269f, day_num=_d269f.day,
                     )
                     _it269f = self._remove_timeline_overlaps(
                         _it269f, _d269f.day,
@@ -7296,9 +7311,7 @@ class PlanService:
                     day_num=_d280.day,
                     pool=_pool280,
                     user=user,
-                    coord_map=self._merge_coord_map(
-                        _final_coord_map, _items280,
-                    ),
+                    coord_map=_final_coord_map,
                 )
                 _kind280 = _day_items_satellite_kind(_it280)
                 if _kind280:
@@ -7348,39 +7361,50 @@ class PlanService:
 
         # FIX #279: last-word geometry after every late retarget/inject
         # (client WRO json8 day 2: Movie Gate → Ostrów Tumski, ORS off).
-        try:
-            _ctx_geom279 = {
-                **(context or {}),
-                "requested_city": str(
-                    (context or {}).get("requested_city")
-                    or (_ctx_fields or {}).get("requested_city")
-                    or ""
-                ),
-            }
-            _days_geom279: List[DayPlan] = []
-            for _dg279 in days:
-                _itg279 = self._finalize_transit_geometry(
-                    list(_dg279.items or []),
-                    self._merge_coord_map(
-                        _final_coord_map, list(_dg279.items or []),
+        with _stages.measure("route"):
+            try:
+                _ctx_geom279 = {
+                    **(context or {}),
+                    "requested_city": str(
+                        (context or {}).get("requested_city")
+                        or (_ctx_fields or {}).get("requested_city")
+                        or ""
                     ),
-                    _ctx_geom279,
-                )
-                _days_geom279.append(DayPlan(
-                    day=_dg279.day,
-                    title=_dg279.title,
-                    note=getattr(_dg279, "note", None),
-                    items=_itg279,
-                    quality_badges=_dg279.quality_badges,
-                    date=getattr(_dg279, "date", None),
-                    weekday=getattr(_dg279, "weekday", None),
-                ))
-            days = _days_geom279
-        except Exception as _exc279:
-            print(
-                f"[FIX #279] transit geometry finalize failed "
-                f"({type(_exc279).__name__}: {_exc279}) — keeping days as-is"
+                }
+                _days_geom279: List[DayPlan] = []
+                for _dg279 in days:
+                    _itg279 = self._finalize_transit_geometry(
+                        list(_dg279.items or []),
+                        _final_coord_map,
+                        _ctx_geom279,
+                    )
+                    _days_geom279.append(DayPlan(
+                        day=_dg279.day,
+                        title=_dg279.title,
+                        note=getattr(_dg279, "note", None),
+                        items=_itg279,
+                        quality_badges=_dg279.quality_badges,
+                        date=getattr(_dg279, "date", None),
+                        weekday=getattr(_dg279, "weekday", None),
+                    ))
+                days = _days_geom279
+            except Exception as _exc279:
+                print(
+                    f"[FIX #279] transit geometry finalize failed "
+                    f"({type(_exc279).__name__}: {_exc279}) — keeping days as-is"
+                )
+
+        _rounds = repair_round_stats()
+        print(
+            "[REPAIR ROUNDS] skipped "
+            f"{sum(r['skipped'] for r in _rounds.values())}/"
+            f"{sum(r['ran'] + r['skipped'] for r in _rounds.values())} — "
+            + ", ".join(
+                f"{n}={r['skipped']}/{r['ran'] + r['skipped']}"
+                for n, r in sorted(_rounds.items())
             )
+        )
+        _stages.lap("post_process")
 
         return PlanResponse(
             plan_id=plan_id,
@@ -7946,7 +7970,7 @@ class PlanService:
         # FIX #4 (22.02.2026): day_end must be added AFTER gap filling and validation
         # items.append(DayEndItem(time=day_end))
         
-        return items
+        return register_created(items)
 
     def _normalize_region_for_trails(self, city: str) -> str:
         """
@@ -8312,7 +8336,7 @@ class PlanService:
             _parking_display_name = "Brak danych o parkingu"
         # FIX #251: never ship empty description_short / pro_tip to the client.
         _desc_short, _pro_tip = self._fallback_attraction_copy(poi_dict, user=user)
-        return AttractionItem(
+        item = AttractionItem(
             type=ItemType.ATTRACTION,
             start_time=start_time,
             end_time=end_time,
@@ -8360,6 +8384,8 @@ class PlanService:
             why_selected=why_selected,  # ETAP 2 Day 5
             quality_badges=quality_badges  # ETAP 2 Day 5
         )
+        register_created([item])
+        return item
 
     def _estimate_cost(self, poi_dict: Dict[str, Any], user: Dict[str, Any]) -> int:
         """
@@ -9517,8 +9543,9 @@ class PlanService:
                         print(f"[GAP FILLING] FIX#82/#84 Single EOD block: {eod_block_start_str}-{eod_block_end_str} ({eod_block_duration} min): {eod_label[:50]}")
         
         print(f"[GAP FILLING] Final: {len(items)} -> {len(result)} items")
-        return result
+        return register_created(result)
 
+    @repair_round
     def _remove_timeline_overlaps(self, items: List[Any], day_num: int) -> List[Any]:
         """
         FIX #Problem9 / #196: usuń nakładające się bloki (skan parowy, nie tylko sąsiedzi).
@@ -10527,6 +10554,10 @@ class PlanService:
         # FIX #235: meals (lunch/dinner) between transit and next attraction do NOT orphan the leg.
         # FIX #251: when a meal with restaurant suggestion sits between POIs, route via restaurant.
         result = []
+        # Meal restaurant coords first — otherwise recompute no-ops and a
+        # gap-inflated attraction→attraction duration stays on the lunch leg.
+        # Stop coords do not change inside this loop, so merge once.
+        _coords255 = self._merge_coord_map(poi_coords or {}, items)
         for i, item in enumerate(items):
             if _item_type_value(item) != ItemType.TRANSIT.value:
                 result.append(item)
@@ -10583,9 +10614,6 @@ class PlanService:
                 pass
 
             # FIX #168/#255: recompute MODE/DURATION from rewritten endpoints.
-            # Merge meal restaurant coords first — otherwise recompute no-ops and
-            # a gap-inflated attraction→attraction duration stays on the lunch leg.
-            _coords255 = self._merge_coord_map(poi_coords or {}, items)
             self._recompute_transit_leg(item, items, i, _coords255)
             self._clamp_inflated_transit_leg(item, _coords255)
             # FIX #255: meal legs without restaurant GPS still inherit inflated gaps.
@@ -10680,32 +10708,46 @@ class PlanService:
         return out
 
     @staticmethod
-    def _merge_coord_map(poi_coords: Dict[str, dict], items: List[Any]) -> Dict[str, dict]:
-        coord_map: Dict[str, dict] = dict(poi_coords or {})
-        for it in items:
-            tv = _item_type_value(it)
-            if tv == ItemType.ATTRACTION.value:
-                nm = getattr(it, "name", "") or ""
-                lat = getattr(it, "lat", None)
-                lng = getattr(it, "lng", None)
-                if nm and lat is not None and lng is not None:
-                    existing = coord_map.get(nm) or {}
-                    if _poi_lat_lng(existing)[0] is None:
-                        coord_map[nm] = {"lat": lat, "lng": lng, "name": nm}
-            elif tv in (ItemType.LUNCH_BREAK.value, ItemType.DINNER_BREAK.value):
-                # FIX #251: restaurant coords for meal-aware transit routing
-                for sug in (getattr(it, "suggestions", None) or [])[:1]:
-                    rn = (getattr(sug, "name", None) or "").strip()
-                    rlat = getattr(sug, "lat", None)
-                    rlng = getattr(sug, "lng", None)
-                    if rn and rlat is not None and rlng is not None:
-                        coord_map[rn] = {
-                            "name": rn,
-                            "lat": float(rlat),
-                            "lng": float(rlng),
-                            "id": getattr(sug, "id", "") or f"rest_{rn}",
-                        }
-        return coord_map
+    def _merge_coord_map(poi_coords: Dict[str, dict], items: List[Any]) -> CoordRegistry:
+        """The plan's coord registry with `items` registered into it (in place).
+
+        Pool coords still win over attraction item coords; the primary meal
+        restaurant is (re)registered. A plain dict (tests, editors) is wrapped
+        in a new registry first and left untouched.
+        """
+        reg = registry_of(poi_coords)
+        reg.register_items(items)
+        return reg
+
+    @staticmethod
+    def _transit_endpoint(
+        label: str, coord_map: Dict[str, dict], context: dict,
+    ) -> Optional[dict]:
+        """Coords row for a transit from/to label (None when unknown)."""
+        # Exact / case-insensitive POI lookup, then city-centre fallback
+        # for day_start legs labelled "Wrocław" / "Warszawa" (FIX #261).
+        # FIX #279: also fold diacritics and accept "Movie Gate" ⊂ Excel name.
+        if not label:
+            return None
+        hit = coord_map.get(label)
+        if hit and _poi_lat_lng(hit)[0] is not None:
+            return hit
+        low = label.strip().lower()
+        folded = _fold_place_label(label)
+        matched = match_place(coord_map, label, with_coords=True)
+        if matched is not None:
+            return matched
+        cc = _city_center_coords(label) or _city_center_coords(
+            str((context or {}).get("requested_city") or "")
+        )
+        city = str((context or {}).get("requested_city") or "").strip().lower()
+        if cc and (low in _CITY_CENTER_COORDS or (city and low == city)):
+            return {"name": label, "lat": cc[0], "lng": cc[1]}
+        if cc and city and (low == city or city in low or low in city):
+            return {"name": label, "lat": cc[0], "lng": cc[1]}
+        if cc and ("centrum" in folded or "center" in folded or "centre" in folded):
+            return {"name": label, "lat": cc[0], "lng": cc[1]}
+        return hit
 
     def _normalize_transit_routing_item(
         self,
@@ -10728,47 +10770,8 @@ class PlanService:
             it = it.model_copy(update={"routing_source": "estimated_walk"})
         frm = getattr(it, "from_location", "") or ""
         to = getattr(it, "to_location", "") or ""
-
-        def _endpoint(label: str) -> Optional[dict]:
-            # Exact / case-insensitive POI lookup, then city-centre fallback
-            # for day_start legs labelled "Wrocław" / "Warszawa" (FIX #261).
-            # FIX #279: also fold diacritics and accept "Movie Gate" ⊂ Excel name.
-            if not label:
-                return None
-            hit = coord_map.get(label)
-            if hit and _poi_lat_lng(hit)[0] is not None:
-                return hit
-            low = label.strip().lower()
-            folded = _fold_place_label(label)
-            fuzzy: Optional[dict] = None
-            for k, v in coord_map.items():
-                if _poi_lat_lng(v)[0] is None:
-                    continue
-                kn = str(k).strip().lower()
-                kf = _fold_place_label(k)
-                if kn == low or kf == folded:
-                    return v
-                if (
-                    fuzzy is None
-                    and min(len(folded), len(kf)) >= 8
-                    and (folded in kf or kf in folded)
-                ):
-                    fuzzy = v
-            if fuzzy is not None:
-                return fuzzy
-            cc = _city_center_coords(label) or _city_center_coords(
-                str((context or {}).get("requested_city") or "")
-            )
-            city = str((context or {}).get("requested_city") or "").strip().lower()
-            if cc and (low in _CITY_CENTER_COORDS or (city and low == city)):
-                return {"name": label, "lat": cc[0], "lng": cc[1]}
-            if cc and city and (low == city or city in low or low in city):
-                return {"name": label, "lat": cc[0], "lng": cc[1]}
-            if cc and ("centrum" in folded or "center" in folded or "centre" in folded):
-                return {"name": label, "lat": cc[0], "lng": cc[1]}
-            return hit
-
-        fp, tp = _endpoint(frm), _endpoint(to)
+        fp = self._transit_endpoint(frm, coord_map, context)
+        tp = self._transit_endpoint(to, coord_map, context)
         lat1, lng1 = _poi_lat_lng(fp or {})
         lat2, lng2 = _poi_lat_lng(tp or {})
         # FIX #260/#264: never keep stale geometry after from/to rewrites.
@@ -10925,11 +10928,35 @@ class PlanService:
         """
         if not items:
             return items
+        from app.infrastructure.routing import needs_route_geometry, prefetch_route_geometry
+
         cmap = self._merge_coord_map(poi_coords, items)
         try:
             ordered = self._sort_items_by_time(list(items))
         except Exception:
             ordered = list(items)
+
+        def _rendered_legs():
+            # Legs the loop below would route one Directions call at a time.
+            # Lazy: with ORS off the prefetch returns before resolving endpoints.
+            for it in ordered:
+                if _item_type_value(it) != ItemType.TRANSIT.value:
+                    continue
+                if (getattr(it, "geometry", None) or getattr(it, "geometry_latlng", None)) \
+                        and not needs_route_geometry(getattr(it, "routing_source", None)):
+                    continue
+                frm = (getattr(it, "from_location", "") or "").strip()
+                to = (getattr(it, "to_location", "") or "").strip()
+                if frm and to:
+                    yield (
+                        self._transit_endpoint(frm, cmap, context),
+                        self._transit_endpoint(to, cmap, context),
+                    )
+
+        try:
+            prefetch_route_geometry(_rendered_legs(), context)
+        except Exception:
+            pass
         out: List[Any] = []
         for i, it in enumerate(ordered):
             if _item_type_value(it) != ItemType.TRANSIT.value:
@@ -10940,6 +10967,12 @@ class PlanService:
             if not frm or not to:
                 out.append(it)
                 continue
+            if needs_route_geometry(getattr(it, "routing_source", None)):
+                # Rendered leg with a timing-only polyline — fetch the real route.
+                try:
+                    it = it.model_copy(update={"geometry": None, "geometry_latlng": None})
+                except Exception:
+                    pass
             it = self._normalize_transit_routing_item(it, cmap, context)
             if getattr(it, "geometry", None) or getattr(it, "geometry_latlng", None):
                 out.append(it)
@@ -11758,6 +11791,7 @@ class PlanService:
             print(f"[FIX #240] Day {day_num}: pushed dinner {st} → {minutes_to_time(new_st)}")
         return out
 
+    @repair_round
     def _strip_transits_to_unscheduled_destinations(
         self,
         items: List[Any],
@@ -15407,7 +15441,7 @@ class PlanService:
             used.add(primary)
             use_counts[primary] = use_counts.get(primary, 0) + 1
             out.append(it)
-        return out
+        return register_created(out)
 
     def _day_fill_candidate(
         self,
@@ -16403,6 +16437,7 @@ class PlanService:
             merged.append(it)
         return merged
 
+    @repair_round
     def _fit_transits_between_stops(
         self,
         items: List[Any],
@@ -16541,6 +16576,7 @@ class PlanService:
             return items
         return [it for it in items if id(it) not in drop]
 
+    @repair_round
     def _trim_free_time_over_real_items(
         self,
         items: List[Any],
@@ -17645,6 +17681,7 @@ class PlanService:
         except Exception:
             pass
 
+    @repair_round
     def _strip_self_transits(
         self,
         items: List[Any],
@@ -18045,6 +18082,7 @@ class PlanService:
         ItemType.DINNER_BREAK.value: 17 * 60 + 30,
     }
 
+    @repair_round
     def _close_meal_approach_gaps(
         self,
         items: List[Any],
@@ -18386,24 +18424,7 @@ class PlanService:
             return None
         entry = poi_coords.get(key)
         if entry is None:
-            low = key.lower()
-            folded = _fold_place_label(key)
-            fuzzy = None
-            for k, v in poi_coords.items():
-                kn = str(k).strip().lower()
-                kf = _fold_place_label(k)
-                if kn == low or kf == folded:
-                    entry = v
-                    break
-                if (
-                    fuzzy is None
-                    and min(len(folded), len(kf)) >= 8
-                    and (folded in kf or kf in folded)
-                ):
-                    fuzzy = v
-            else:
-                if fuzzy is not None:
-                    entry = fuzzy
+            entry = match_place(poi_coords, key)
         if not isinstance(entry, dict):
             return None
         lat, lng = entry.get("lat"), entry.get("lng")
@@ -18726,7 +18747,7 @@ class PlanService:
                 except Exception:
                     pass
             out.append(it)
-        return out
+        return register_created(out)
 
     def _rotate_repeated_default_meals(
         self,
@@ -18807,7 +18828,7 @@ class PlanService:
                 )
             except Exception:
                 out.append(it)
-        return out
+        return register_created(out)
 
     def _dedupe_lunch_dinner_restaurants(
         self,
@@ -18908,7 +18929,7 @@ class PlanService:
                 out.append(it.model_copy(update={"suggestions": kept}))
             except Exception:
                 out.append(it)
-        return out
+        return register_created(out)
 
     def _enforce_dinner_min_duration(
         self,
@@ -19158,8 +19179,9 @@ class PlanService:
                 except Exception:
                     pass
             out.append(it)
-        return out
+        return register_created(out)
 
+    @repair_round
     def _merge_abutting_free_time_hard(
         self,
         items: List[Any],
@@ -22598,6 +22620,7 @@ class PlanService:
             ordered.insert(idx + offset, leg)
         return self._sort_items_by_time(ordered)
 
+    @repair_round
     def _force_approach_before_destination(
         self,
         items: List[Any],
@@ -22935,6 +22958,7 @@ class PlanService:
             return ordered
         return [it for it in ordered if id(it) not in drop]
 
+    @repair_round
     def _retarget_all_legs_to_prev_stop(
         self,
         items: List[Any],
@@ -22988,6 +23012,7 @@ class PlanService:
             out.append(it)
         return out
 
+    @repair_round
     def _unoverlap_lunch_with_attractions(
         self, items: List[Any], *, day_num: int = 0
     ) -> List[Any]:
@@ -23931,7 +23956,7 @@ class PlanService:
                 )
             except Exception:
                 out.append(it)
-        return out
+        return register_created(out)
 
     def _seal_city_timeline(
         self,
@@ -0,0 +1,100 @@
+"""
+Day-by-day plan generation for the streaming preview (POST /plan/preview/stream).
+
+`generate_plan` runs in a background thread; every day is handed over through
+the `on_day` hook as soon as its per-day post-processing is done, serialized
+right then. The engine plans all days before the first one is post-processed
+(FIX #195 reserves future-day POIs), so day 1 arrives after the engine phase,
+not after the trip-level passes that follow the day loop.
+
+The trip-level passes still rework most days (dates, cross-day gap filling,
+healing, titles), so a streamed day is a draft to render early. When the plan
+is complete every day whose JSON differs from what was already sent is
+emitted again with `"revised": true`, so the client always ends with the same
+days as `POST /plan/preview` would return.
+
+When the consumer stops early (client disconnected, generator closed) the
+worker is told to stop: its next `on_day` raises `PlanStreamCancelled`, so an
+abandoned plan does not run to the end. `on_finish` is called once the worker
+thread is done (or when it could not be started) — the admission ticket is
+released there, not when the response ends.
+"""
+from __future__ import annotations
+
+import queue
+import threading
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+
+from app.application.services.plan_service import PlanService
+from app.domain.models.plan import PlanResponse
+from app.domain.models.trip_input import TripInput
+
+_DONE = object()
+
+
+class PlanStreamCancelled(Exception):
+    """The stream consumer went away; raised from `on_day` to stop generation."""
+
+
+def iter_plan_days(
+    plan_service: PlanService,
+    trip_input: TripInput,
+    plan_id: Optional[str] = None,
+    on_finish: Optional[Callable[[], None]] = None,
+) -> Iterator[Tuple[str, Any]]:
+    """Yields ("day", day_json) per day, then ("plan", PlanResponse) — or raises."""
+    events: "queue.Queue[Any]" = queue.Queue()
+    sent: Dict[int, Dict[str, Any]] = {}
+    cancelled = threading.Event()
+
+    def _on_day(day_plan, days_total: int) -> None:
+        if cancelled.is_set():
+            raise PlanStreamCancelled("plan stream consumer gone")
+        events.put(("day", {"days_total": days_total, **jsonable_encoder(day_plan)}))
+
+    def _run() -> None:
+        try:
+            events.put(("plan", plan_service.generate_plan(
+                trip_input, plan_id=plan_id, on_day=_on_day,
+            )))
+        except BaseException as e:  # re-raised in the consumer
+            events.put(("error", e))
+        finally:
+            if on_finish is not None:
+                on_finish()
+            events.put(_DONE)
+
+    worker = threading.Thread(target=_run, name="plan-stream", daemon=True)
+    finished = False
+    try:
+        worker.start()
+        plan: Optional[PlanResponse] = None
+        while True:
+            event = events.get()
+            if event is _DONE:
+                break
+            kind, payload = event
+            if kind == "error":
+                raise payload
+            if kind == "plan":
+                plan = payload
+                continue
+            day = {k: v for k, v in payload.items() if k != "days_total"}
+            sent[day["day"]] = day
+            yield "day", payload
+        finished = True
+    finally:
+        if not finished:
+            cancelled.set()
+        if worker.ident is None and on_finish is not None:
+            on_finish()  # never started: nothing else will release
+    worker.join()
+
+    days_total = len(plan.days)
+    for day_plan in plan.days:
+        day = jsonable_encoder(day_plan)
+        if sent.get(day["day"]) != day:
+            yield "day", {"days_total": days_total, "revised": True, **day}
+    yield "plan", plan
@@ -0,0 +1,175 @@
+"""Structural fingerprints of a day timeline + per-request repair-round memo.
+
+`generate_plan` replays the same repair passes (sort → overlaps → transits →
+meals → holes) many times per day and most rounds change nothing. A round
+whose input fingerprint equals the output fingerprint of its previous run
+(same request, same day, same round, same arguments) is a fixed point and is
+skipped. The memo lives in a ContextVar set up per `generate_plan`, so plans
+running concurrently (threadpool, plan stream, warm-up) never share it; its
+ran/skipped counts go to `plan_repair_rounds_total` when the plan ends.
+
+The fingerprint covers what the repair passes read to make decisions: item
+type, ids, labels, start/end minutes, duration, transit endpoints and mode,
+the free-time `is_technical_buffer` flag (the day filter and the buffer
+merges key on it) and the primary meal restaurant. It deliberately ignores
+geometry and copy.
+"""
+from __future__ import annotations
+
+import functools
+import inspect
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Tuple
+
+from app.domain.planner.time_utils import time_to_minutes
+from app.infrastructure.metrics import PLAN_REPAIR_ROUNDS
+
+Fingerprint = Tuple[Tuple[Any, ...], ...]
+
+
+def _value(v: Any) -> Any:
+    return getattr(v, "value", v)
+
+
+@functools.lru_cache(maxsize=2048)
+def _clock_minutes(t: str) -> Optional[int]:
+    try:
+        return time_to_minutes(t)
+    except Exception:
+        return None
+
+
+def _minutes(t: Any) -> Optional[int]:
+    if not t or not isinstance(t, str):
+        return None
+    return _clock_minutes(t)
+
+
+def item_fingerprint(item: Any) -> Tuple[Any, ...]:
+    # Model fields live in __dict__; plain lookups avoid pydantic's slow
+    # __getattr__ miss path for fields a given item type does not have.
+    g = (item if isinstance(item, dict) else getattr(item, "__dict__", {})).get
+    sugs = g("suggestions") or ()
+    primary = sugs[0] if sugs else None
+    if primary is None:
+        primary_id = None
+    else:
+        p = primary if isinstance(primary, dict) else getattr(primary, "__dict__", {})
+        primary_id = p.get("id") or p.get("name")
+    return (
+        _value(g("type")),
+        g("poi_id") or g("id"),
+        g("name") or g("label"),
+        _minutes(g("start_time") or g("time")),
+        _minutes(g("end_time")),
+        g("duration_min"),
+        g("from_location") or g("from"),
+        g("to_location") or g("to"),
+        _value(g("mode")),
+        g("is_technical_buffer"),
+        primary_id,
+    )
+
+
+def timeline_fingerprint(items: Optional[List[Any]]) -> Fingerprint:
+    """Order-sensitive structural fingerprint of a day timeline."""
+    return tuple(item_fingerprint(it) for it in (items or ()))
+
+
+# ---------------------------------------------------------------------------
+# Request-scoped memo (one per generate_plan, like the routing session)
+# ---------------------------------------------------------------------------
+
+@dataclass
+class RepairRounds:
+    """Memo + counters of one plan request (plans run concurrently)."""
+
+    last_output: Dict[Hashable, Fingerprint] = field(default_factory=dict)
+    stats: Dict[str, Dict[str, int]] = field(default_factory=dict)
+
+
+_rounds: ContextVar[Optional[RepairRounds]] = ContextVar("repair_rounds", default=None)
+
+
+@contextmanager
+def repair_rounds() -> Iterator[RepairRounds]:
+    """Fresh memo for one plan; also usable as a decorator (`generate_plan`)."""
+    token = _rounds.set(RepairRounds())
+    try:
+        yield _rounds.get()
+    finally:
+        for name, counters in _rounds.get().stats.items():
+            for result, n in counters.items():
+                PLAN_REPAIR_ROUNDS.inc(n, round=name, result=result)
+        _rounds.reset(token)
+
+
+def repair_round_stats() -> Dict[str, Dict[str, int]]:
+    """{round name: {"ran": n, "skipped": n}} for the current plan."""
+    state = _rounds.get()
+    return {k: dict(v) for k, v in state.stats.items()} if state else {}
+
+
+def run_repair_round(
+    name: str,
+    items: List[Any],
+    fn: Callable[[List[Any]], List[Any]],
+    *,
+    day: int,
+    key: Hashable = None,
+) -> List[Any]:
+    """Run `fn(items)` unless its last output for (name, day, key) is exactly `items`.
+
+    `key` must cover every other non-timeline input the round depends on.
+    Outside a `repair_rounds()` scope nothing is memoized.
+    """
+    state = _rounds.get()
+    if state is None or not items:
+        return fn(items)
+    counters = state.stats.setdefault(name, {"ran": 0, "skipped": 0})
+    memo_key = (name, day, key)
+    fp_in = timeline_fingerprint(items)
+    if state.last_output.get(memo_key) == fp_in:
+        counters["skipped"] += 1
+        return list(items)
+    out = fn(items)
+    counters["ran"] += 1
+    state.last_output[memo_key] = timeline_fingerprint(out)
+    return out
+
+
+def repair_round(fn: Callable[..., List[Any]]) -> Callable[..., List[Any]]:
+    """Method decorator: `self.fn(items, ..., day_num=...)` as a skippable round.
+
+    Only for passes that are a pure function of the timeline, the day and
+    their hashable arguments (thresholds). The memo key is the day plus every
+    other bound argument, defaults included; a call with an unhashable
+    argument (coord map, day context) simply runs.
+    """
+    name = fn.__name__.lstrip("_")
+    sig = inspect.signature(fn)
+    if "day_num" not in sig.parameters:
+        raise TypeError(f"repair round {name} needs a day_num parameter")
+
+    @functools.wraps(fn)
+    def wrapper(self: Any, items: List[Any], *args: Any, **kwargs: Any) -> List[Any]:
+        if _rounds.get() is None:
+            return fn(self, items, *args, **kwargs)
+        bound = sig.bind(self, items, *args, **kwargs)
+        bound.apply_defaults()
+        day = bound.arguments.get("day_num")
+        key = tuple(
+            (k, v) for k, v in bound.arguments.items()
+            if k not in ("self", "items", "day_num")
+        )
+        try:
+            hash((day, key))
+        except TypeError:
+            return fn(self, items, *args, **kwargs)
+        return run_repair_round(
+            name, items, lambda it: fn(self, it, *args, **kwargs), day=day, key=key,
+        )
+
+    return wrapper
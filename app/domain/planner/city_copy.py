@@ -7,9 +7,10 @@ Single source for:
 """
 from __future__ import annotations
 
-import unicodedata
 from typing import Any, Dict, Iterable, List, Optional, Set
 
+from app.domain.planner.name_matching import fold_diacritics
+
 ZAKOPANE_REGION_RAW = (
     "zakopane", "szaflary", "chochołów", "białka tatrzańska",
     "bukowina tatrzańska", "kościelisko", "poronin",
@@ -21,10 +22,7 @@ ZAKOPANE_REGION_RAW = (
 
 def normalize_city_name(name: str) -> str:
     """Lowercase + strip diacritics: 'Kraków' → 'krakow', 'Warsaw' → 'warsaw'."""
-    if not name:
-        return ""
-    nfkd = unicodedata.normalize("NFKD", str(name).lower().strip())
-    return "".join(c for c in nfkd if not unicodedata.combining(c))
+    return fold_diacritics(name)
 
 
 # FIX #254: Polish locative for "Must-see w/we …" (client: "Must-see w Wrocław").
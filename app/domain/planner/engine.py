@@ -1,5 +1,6 @@
 # type: ignore
 import math
+from functools import lru_cache
 from math import radians, sin, cos, sqrt, atan2
 
 from app.domain.planner.time_utils import time_to_minutes, minutes_to_time
@@ -1706,7 +1707,12 @@ def poi_repeat_cluster_key(name: str) -> str:
     Different POI IDs (Krupówki vs Dolna Rówień Krupowa) share one cluster so the planner
     can penalise / block back-to-back visits to the same landmark area.
     """
-    n = str(name or "").lower().strip()
+    return _poi_repeat_cluster_key(str(name or ""))
+
+
+@lru_cache(maxsize=8192)
+def _poi_repeat_cluster_key(name: str) -> str:
+    n = name.lower().strip()
     if "krup" in n:
         return "cluster_krupowki"
     if "gubałów" in n or "gubalow" in n:
@@ -6315,10 +6321,6 @@ def build_day(pois, user, context, day_start=None, day_end=None, global_used=Non
     # FIX #Problem9 DEBUG: Simple print to verify execution
     print(f"🔥🔥🔥 build_day() CALLED: target_group={user.get('target_group')} 🔥🔥🔥", flush=True)
     
-    # FIX #Problem9 DEBUG: Marker to confirm function execution
-    with open(r"C:\Users\matte\Desktop\build_day_called.txt", "a", encoding="utf-8") as f:
-        f.write(f"build_day called: target_group={user.get('target_group')}\n")
-    
     # BUGFIX (16.02.2026 - CLIENT FEEDBACK Problem #10):
     # Standardize all items to use start_time/end_time (not "time")
     plan = [{
@@ -0,0 +1,103 @@
+"""
+Shared name normalization + marker matching for POI / city / stop labels.
+
+The same few hundred names (POIs, restaurants, cities) are lowercased,
+diacritic-folded and scanned against marker tuples thousands of times per
+plan. Everything here is memoized (bounded LRU) and marker lists are compiled
+once into a single alternation regex, so a repeated label costs one dict hit.
+
+Two folds exist on purpose — callers depend on their exact output:
+- `fold_diacritics` — Unicode NFKD, drops combining marks ("Kraków" → "krakow");
+  leaves "ł" alone because it has no decomposition.
+- `fold_polish` — explicit Polish table incl. "ł" → "l", no NFKD.
+"""
+from __future__ import annotations
+
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Any, Iterable, Optional
+
+_CACHE_SIZE = 8192
+
+_POLISH_FOLD = str.maketrans({
+    "ł": "l", "ó": "o", "ś": "s", "ź": "z", "ż": "z",
+    "ę": "e", "ą": "a", "ć": "c", "ń": "n",
+})
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _lower(text: str) -> str:
+    return text.lower()
+
+
+def lower_name(name: Any) -> str:
+    """`(name or "").lower()` for str labels, memoized."""
+    if not name:
+        return ""
+    return _lower(name) if isinstance(name, str) else str(name).lower()
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _fold_diacritics(text: str) -> str:
+    nfkd = unicodedata.normalize("NFKD", text.lower().strip())
+    return "".join(c for c in nfkd if not unicodedata.combining(c))
+
+
+def fold_diacritics(name: Any) -> str:
+    """Lowercase + strip + NFKD without combining marks: 'Kraków' → 'krakow'."""
+    if not name:
+        return ""
+    return _fold_diacritics(str(name))
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _fold_polish(text: str) -> str:
+    return text.lower().translate(_POLISH_FOLD)
+
+
+def fold_polish(name: Any) -> str:
+    """Lowercase + Polish letters to ASCII ('Ostrów' → 'ostrow'); no strip."""
+    if not name:
+        return ""
+    return _fold_polish(str(name))
+
+
+class MarkerMatcher:
+    """Substring markers compiled into one regex: `any(m in text for m in markers)`.
+
+    Matching is on the lowercased label; results are memoized per label.
+    """
+
+    __slots__ = ("markers", "_pattern", "_cached")
+
+    def __init__(self, markers: Iterable[str]) -> None:
+        self.markers = tuple(dict.fromkeys(m for m in markers if m))
+        # Longest first so `first()` prefers "jaskinia łokietka" over "łokietka".
+        alts = sorted(self.markers, key=len, reverse=True)
+        self._pattern = (
+            re.compile("|".join(re.escape(m) for m in alts)) if alts else None
+        )
+        self._cached = lru_cache(maxsize=_CACHE_SIZE)(self._search_lowered)
+
+    def _search_lowered(self, lowered: str) -> Optional[str]:
+        if self._pattern is None:
+            return None
+        m = self._pattern.search(lowered)
+        return m.group(0) if m else None
+
+    def first(self, name: Any) -> Optional[str]:
+        """A marker contained in the lowercased name, or None."""
+        return self._cached(lower_name(name))
+
+    def matches(self, name: Any) -> bool:
+        return self.first(name) is not None
+
+    def __contains__(self, name: Any) -> bool:
+        return self.matches(name)
+
+
+def clear_name_caches() -> None:
+    """Drop memoized folds (tests / catalog reload)."""
+    for fn in (_lower, _fold_diacritics, _fold_polish):
+        fn.cache_clear()
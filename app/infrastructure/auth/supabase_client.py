@@ -3,12 +3,15 @@ Supabase client wrapper for admin operations.
 Singleton pattern for efficient connection reuse.
 """
 from functools import lru_cache
-from supabase import create_client, Client
+from typing import TYPE_CHECKING
 from app.infrastructure.config.settings import settings
 
+if TYPE_CHECKING:
+    from supabase import Client
+
 
 @lru_cache()
-def get_supabase_client() -> Client:
+def get_supabase_client() -> "Client":
     """
     Get singleton Supabase client.
     
@@ -33,4 +36,8 @@ def get_supabase_client() -> Client:
             "Please set SUPABASE_URL and SUPABASE_ANON_KEY in .env"
         )
     
+    # Imported here: supabase + gotrue cost ~130 ms and JWTs are verified
+    # locally (jwt_handler), so most processes never need the client.
+    from supabase import create_client
+
     return create_client(settings.supabase_url, settings.supabase_anon_key)
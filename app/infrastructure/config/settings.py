@@ -28,15 +28,108 @@ class Settings(BaseSettings):
     openweather_api_key: str = ""
     # OpenRouteService (FIX #220)
     ors_api_key: str = ""
+    # Self-hosted ORS / local stand-in (tests) — same v2 API.
+    ors_base_url: str = "https://api.openrouteservice.org"
     ors_enabled: bool = False
     ors_routing_enabled: bool = True
     ors_matrix_enabled: bool = True
     ors_poi_supplement_enabled: bool = False
     ors_cache_ttl_days: int = 60
+    # Persistent route store (SQLite under ORS_CACHE_DIR): row cap, LRU-evicted.
+    ors_cache_max_entries: int = 200000
+    # In-process route LRU shared by all requests (entries, seconds).
+    ors_memory_cache_size: int = 20000
+    ors_memory_cache_ttl_seconds: int = 6 * 3600
     ors_daily_budget_directions: int = 1500
     ors_daily_budget_matrix: int = 120
+    # Shared per-day quota ledger (routing/ors_budget.py); empty = ORS_CACHE_DIR/ors_budget.sqlite3.
+    ors_budget_db_path: str = ""
     ors_matrix_max_locations: int = 8
+    # Pooled ORS client: in-flight requests, retries on 429/5xx, circuit breaker.
+    ors_max_concurrency: int = 8
+    ors_max_retries: int = 2
+    ors_retry_backoff_seconds: float = 0.5
+    ors_circuit_failure_threshold: int = 5
+    ors_circuit_reset_seconds: int = 60
     ors_overpass_radius_m: int = 2500
+    # Overpass supplement tiles (routing/overpass_tiles.py): geohash precision, TTL,
+    # and whether tiles missing from the store may be queried during a request.
+    overpass_tile_precision: int = 5
+    overpass_tile_ttl_days: int = 30
+    overpass_live_fetch_enabled: bool = False
+    # Douglas–Peucker tolerance for route polylines entering the cache (0 = keep all points).
+    route_geometry_tolerance_m: float = 5.0
+    # Day attraction order optimizer (routing/day_optimizer.py): schedule simulations
+    # per day (deterministic cap; the bench corpus converges within ~350), plus a
+    # wall-clock safety valve per day in ms (0 = off).
+    day_optimizer_max_evaluations: int = 400
+    day_optimizer_time_budget_ms: int = 1000
+    # Offline OSM routing (scripts/build_osm_graph.py) — tier between cache and ORS.
+    osm_routing_enabled: bool = False
+    osm_graph_dir: str = ".cache/osm_graphs"
+    osm_snap_max_m: int = 500
+    # A* / Dijkstra give up (→ ORS / haversine) after settling this many nodes.
+    osm_max_settled_nodes: int = 200000
+    # Precomputed POI↔POI matrices (scripts/build_poi_matrices.py), memory-mapped.
+    poi_matrix_enabled: bool = True
+    poi_matrix_dir: str = "data/poi_matrices"
+
+    # =========================
+    # ASYNC PLAN JOBS (POST /plan/preview?mode=async)
+    # =========================
+
+    # Local process pool generating queued plans; jobs beyond max_pending → 503.
+    plan_job_workers: int = 2
+    plan_job_max_pending: int = 16
+    plan_job_ttl_hours: int = 24
+    # The owning worker refreshes its jobs' heartbeat; older than stale_s = lost (→ failed).
+    plan_job_heartbeat_s: float = 10.0
+    plan_job_stale_s: float = 60.0
+    # Job state (app/infrastructure/repositories/plan_job_store.py); empty = ORS_CACHE_DIR/plan_jobs.sqlite3.
+    plan_job_db_path: str = ""
+    # Identical concurrent previews share one generation (app/application/services/plan_coalescer.py).
+    plan_preview_coalescing: bool = True
+
+    # =========================
+    # PLAN ADMISSION CONTROL (app/application/services/plan_admission.py)
+    # =========================
+
+    # Per-process CPU budget in cost units (1.0 ≈ one day in Kraków; cluster ×1.5); 0 = off.
+    plan_admission_budget: float = 10.0
+    # Requests over budget wait in FIFO order up to max_wait_s, then 429 + Retry-After.
+    plan_admission_max_wait_s: float = 20.0
+    plan_admission_max_queue: int = 16
+
+    # =========================
+    # HEALTH PROBES (app/api/health.py)
+    # =========================
+
+    # Background checks per worker; /health and /health/ready read the cached snapshot.
+    health_check_interval_s: float = 30.0
+    # Also GET the ORS base URL each interval (no quota used); off = breaker state only.
+    health_check_ors: bool = False
+    # /health/ready → 503 while the database check fails.
+    health_ready_requires_db: bool = True
+
+    # =========================
+    # STARTUP WARM-UP (app/api/warmup.py)
+    # =========================
+
+    # Load every catalog + derived indices and run synthetic plans before /health/ready.
+    warmup_enabled: bool = True
+    # One synthetic plan per region type: mountain, city, cluster (sea). Empty = no plans.
+    warmup_plan_cities: Union[list[str], str] = ["Zakopane", "Kraków", "Trójmiasto"]
+    warmup_plan_days: int = 2
+    # Preloaded trail / restaurant tables are re-read after this many seconds (0 = never).
+    catalog_snapshot_ttl_s: int = 3600
+
+    @field_validator('warmup_plan_cities', mode='before')
+    @classmethod
+    def parse_warmup_plan_cities(cls, v):
+        """Parse WARMUP_PLAN_CITIES from a comma-separated string."""
+        if isinstance(v, str):
+            return [city.strip() for city in v.split(',') if city.strip()]
+        return v
 
     # =========================
     # SUPABASE AUTH (ETAP 2)
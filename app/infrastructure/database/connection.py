@@ -11,6 +11,9 @@ from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import NullPool
 from typing import Generator
 
+from app.infrastructure.metrics import count_db_query
+from app.infrastructure.plan_json import dumps_str
+
 # Load environment variables from .env (for local development)
 env_path = Path(__file__).resolve().parent.parent.parent.parent / ".env"
 if env_path.exists():
@@ -32,8 +35,18 @@ engine = create_engine(
     poolclass=NullPool,  # No connection pooling (better for serverless)
     echo=False,  # Set to True for SQL query logging (debug only)
     future=True,  # SQLAlchemy 2.0 style
+    json_serializer=dumps_str,  # JSON columns (plan snapshots): orjson when installed
 )
 
+# Query counts for /metrics (total + per HTTP request).
+@event.listens_for(engine, "before_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    count_db_query()
+
+# Forked workers (gunicorn preload) must not reuse the parent's connections.
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=lambda: engine.dispose(close=False))
+
 # Session factory
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -76,3 +89,10 @@ def test_connection():
     except Exception as e:
         print(f"[DB] Database connection failed: {e}")
         return False
+
+
+def ping() -> None:
+    """SELECT 1 on a fresh connection; raises on failure (health monitor)."""
+    from sqlalchemy import text
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
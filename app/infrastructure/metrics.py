@@ -0,0 +1,376 @@
+"""
+In-process metrics registry, rendered at `GET /metrics` (Prometheus text format).
+
+No client library: counters, gauges and histograms are a few dicts behind a
+lock, and histograms reuse `LatencyHistogram` (cumulative buckets, as the ORS
+client already kept). Subsystems that keep their own state (ORS budget and
+latency, plan admission, plan jobs) are read at scrape time through
+`register_collector`, so nothing is counted twice.
+
+Values are per process. Under gunicorn every worker has its own registry and
+a scrape sees the worker that answered it; the `pid` of the process is in
+`process_info` to tell them apart.
+"""
+from __future__ import annotations
+
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+Labels = Tuple[str, ...]
+# (sample name, labels, value)
+Sample = Tuple[str, Dict[str, str], float]
+# (metric name, type, help, samples)
+Family = Tuple[str, str, str, List[Sample]]
+
+
+class LatencyHistogram:
+    """Cumulative latency buckets (seconds), Prometheus-style."""
+
+    BUCKETS: Tuple[float, ...] = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, buckets: Optional[Sequence[float]] = None) -> None:
+        self.buckets = tuple(sorted(buckets or self.BUCKETS))
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot: +Inf
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        slot = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                slot = i
+                break
+        with self._lock:
+            self._counts[slot] += 1
+            self._sum += seconds
+
+    def snapshot(self) -> Dict[str, Any]:
+        """{"buckets": {le: cumulative count}, "count": n, "sum": seconds}."""
+        with self._lock:
+            counts, total = list(self._counts), self._sum
+        cumulative: Dict[str, int] = {}
+        running = 0
+        for bound, n in zip(self.buckets + (float("inf"),), counts):
+            running += n
+            cumulative["+Inf" if bound == float("inf") else str(bound)] = running
+        return {"buckets": cumulative, "count": running, "sum": round(total, 6)}
+
+
+def histogram_samples(name: str, snapshot: Dict[str, Any], labels: Optional[Dict[str, str]] = None) -> List[Sample]:
+    """`LatencyHistogram.snapshot()` → `_bucket` / `_sum` / `_count` samples."""
+    labels = labels or {}
+    out: List[Sample] = [
+        (f"{name}_bucket", {**labels, "le": le}, count) for le, count in snapshot["buckets"].items()
+    ]
+    out.append((f"{name}_sum", labels, snapshot["sum"]))
+    out.append((f"{name}_count", labels, snapshot["count"]))
+    return out
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames: Labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Labels:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: expected labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def _labels(self, key: Labels) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def samples(self) -> List[Sample]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labels)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            items = list(self._values.items())
+        return [(self.name, self._labels(k), v) for k, v in items]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+        buckets: Optional[Sequence[float]] = None,
+    ) -> None:
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets or LatencyHistogram.BUCKETS)
+        self._children: Dict[Labels, LatencyHistogram] = {}
+
+    def _child(self, labels: Dict[str, Any]) -> LatencyHistogram:
+        key = self._key(labels)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, LatencyHistogram(self.buckets))
+        return child
+
+    def observe(self, value: float, **labels: Any) -> None:
+        self._child(labels).observe(value)
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def snapshot(self, **labels: Any) -> Dict[str, Any]:
+        return self._child(labels).snapshot()
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            children = list(self._children.items())
+        out: List[Sample] = []
+        for key, child in children:
+            out.extend(histogram_samples(self.name, child.snapshot(), self._labels(key)))
+        return out
+
+
+class StageClock:
+    """Consecutive stages of one operation into a histogram labelled `stage`.
+
+    `lap(stage)` records the time since the previous lap. Time spent in
+    `measure(stage)` blocks is left out of the enclosing lap and recorded at
+    that lap under its own stage, summed over the blocks (one sample per
+    operation, however many blocks ran).
+    """
+
+    def __init__(self, histogram: Histogram) -> None:
+        self._histogram = histogram
+        self._mark = time.perf_counter()
+        self._nested: Dict[str, float] = {}
+
+    def lap(self, stage: str) -> None:
+        now = time.perf_counter()
+        nested, self._nested = self._nested, {}
+        self._histogram.observe(max(0.0, now - self._mark - sum(nested.values())), stage=stage)
+        for inner, seconds in nested.items():
+            self._histogram.observe(seconds, stage=inner)
+        self._mark = now
+
+    @contextmanager
+    def measure(self, stage: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._nested[stage] = self._nested.get(stage, 0.0) + time.perf_counter() - started
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+
+    def _register(self, cls, name: str, *args: Any, **kwargs: Any):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif type(metric) is not cls:
+                raise ValueError(f"metric {name} already registered as {metric.type}")
+            return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, help, labels)
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge, name, help, labels)
+
+    def histogram(
+        self, name: str, help: str, labels: Sequence[str] = (), buckets: Optional[Sequence[float]] = None,
+    ) -> Histogram:
+        return self._register(Histogram, name, help, labels, buckets)
+
+    def register_collector(self, collect: Callable[[], Iterable[Family]]) -> None:
+        """`collect()` is called at every scrape; a failing collector is skipped."""
+        with self._lock:
+            if collect not in self._collectors:
+                self._collectors.append(collect)
+
+    def families(self) -> List[Family]:
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+            collectors = list(self._collectors)
+        out: List[Family] = [(m.name, m.type, m.help, m.samples()) for m in metrics]
+        for collect in collectors:
+            try:
+                out.extend(collect())
+            except Exception:
+                continue
+        return out
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for name, kind, help, samples in self.families():
+            lines.append(f"# HELP {name} {_escape_help(help)}")
+            lines.append(f"# TYPE {name} {kind}")
+            for sample, labels, value in samples:
+                lines.append(f"{sample}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    inner = ",".join(f'{k}="{_escape_label(v)}"' for k, v in labels.items())
+    return "{" + inner + "}"
+
+
+def _escape_label(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if value is None:
+        return "NaN"
+    value = float(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+REGISTRY = Registry()
+
+REGISTRY.register_collector(lambda: [(
+    "process_info", "gauge", "Process answering this scrape",
+    [("process_info", {"pid": str(os.getpid())}, 1)],
+)])
+
+# --- HTTP ---
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "Request latency by route template",
+    ("method", "route", "status"),
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+
+# --- plan generation ---
+PLAN_STAGE_SECONDS = REGISTRY.histogram(
+    "plan_stage_duration_seconds",
+    "generate_plan stages: load, engine, route, post_process; persist = plan + version #1 save",
+    ("stage",),
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+PLAN_REPAIR_ROUNDS = REGISTRY.counter(
+    "plan_repair_rounds_total",
+    "generate_plan repair rounds by round and result (ran | skipped at a fixed point)",
+    ("round", "result"),
+)
+
+# --- caches: result = hit | miss (route cache: memory | store | miss) ---
+CACHE_LOOKUPS = REGISTRY.counter(
+    "cache_lookups_total",
+    "Cache lookups by cache (catalog, route, overpass_tile, plan) and result",
+    ("cache", "result"),
+)
+
+# --- external services ---
+EXTERNAL_REQUESTS = REGISTRY.counter(
+    "external_requests_total", "Outbound HTTP calls by service and outcome", ("service", "outcome"),
+)
+EXTERNAL_REQUEST_SECONDS = REGISTRY.histogram(
+    "external_request_duration_seconds", "Outbound HTTP call latency", ("service",),
+)
+
+# --- database ---
+DB_QUERIES = REGISTRY.counter("db_queries_total", "SQL statements executed")
+DB_QUERIES_PER_REQUEST = REGISTRY.histogram(
+    "db_queries_per_request",
+    "SQL statements executed while serving one HTTP request",
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100),
+)
+
+# --- PDF ---
+PDF_RENDER_SECONDS = REGISTRY.histogram(
+    "pdf_render_duration_seconds",
+    "Plan PDF rendering (reportlab: GET /plan/{id}/pdf, playwright: POST /plan/pdf)",
+    ("renderer",),
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+
+# --- cold start ---
+STARTUP_SECONDS = REGISTRY.gauge(
+    "startup_duration_seconds",
+    "Cold start by phase: import = app.api.main module, startup = startup hooks",
+    ("phase",),
+)
+
+
+# Statements of the current HTTP request; the context is copied into the
+# threadpool that runs sync endpoints, so the list object is shared with it.
+_request_queries: ContextVar[Optional[List[int]]] = ContextVar("request_queries", default=None)
+
+
+def count_db_query() -> None:
+    """SQLAlchemy `before_cursor_execute` hook (database/connection.py)."""
+    DB_QUERIES.inc()
+    holder = _request_queries.get()
+    if holder is not None:
+        holder[0] += 1
+
+
+@contextmanager
+def db_query_scope() -> Iterator[List[int]]:
+    """Count statements run inside; the total goes to `db_queries_per_request`."""
+    holder = [0]
+    token = _request_queries.set(holder)
+    try:
+        yield holder
+    finally:
+        _request_queries.reset(token)
+        DB_QUERIES_PER_REQUEST.observe(holder[0])
+
+
+def render_metrics() -> str:
+    return REGISTRY.render()
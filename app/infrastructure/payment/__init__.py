@@ -5,6 +5,7 @@ Handles Stripe integration for checkout sessions and webhooks.
 from .stripe_client import (
     create_checkout_session,
     get_checkout_session,
+    get_stripe,
     StripeCheckoutSession
 )
 from .webhook_handler import (
@@ -18,6 +19,7 @@ __all__ = [
     # Stripe client
     "create_checkout_session",
     "get_checkout_session",
+    "get_stripe",
     "StripeCheckoutSession",
     # Webhook handlers
     "validate_webhook_signature",
@@ -2,7 +2,6 @@
 Stripe API client wrapper.
 Handles checkout session creation and management.
 """
-import stripe
 from typing import Optional, Dict, Any
 from pydantic import BaseModel
 from datetime import datetime, timezone
@@ -10,8 +9,28 @@ from datetime import datetime, timezone
 from app.infrastructure.config.settings import settings
 
 
-# Initialize Stripe with secret key
-stripe.api_key = settings.stripe_secret_key
+def get_stripe():
+    """
+    The `stripe` SDK, imported and configured on first use.
+
+    `import stripe` costs ~0.5 s (hundreds of resource modules) and most
+    workers never serve a payment, so it is not imported at startup.
+    """
+    module = globals().get("stripe")
+    if module is None:
+        import stripe as module
+
+        # Initialize Stripe with secret key
+        module.api_key = settings.stripe_secret_key
+        globals()["stripe"] = module
+    return module
+
+
+def __getattr__(name: str):
+    # `stripe_client.stripe` (mock.patch targets in tests) resolves lazily too
+    if name == "stripe":
+        return get_stripe()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class StripeCheckoutSession(BaseModel):
@@ -65,6 +84,7 @@ def create_checkout_session(
             "Stripe not configured. Set STRIPE_SECRET_KEY and STRIPE_PRICE_ID in .env"
         )
     
+    stripe = get_stripe()
     try:
         # Create Stripe Checkout Session
         session = stripe.checkout.Session.create(
@@ -121,6 +141,7 @@ def get_checkout_session(session_id: str) -> Optional[Dict[str, Any]]:
     if not settings.stripe_secret_key:
         raise ValueError("Stripe not configured. Set STRIPE_SECRET_KEY in .env")
     
+    stripe = get_stripe()
     try:
         session = stripe.checkout.Session.retrieve(session_id)
         return session
@@ -2,17 +2,20 @@
 Stripe webhook handler.
 Validates webhook signatures and processes payment events.
 """
-import stripe
-from typing import Dict, Optional
+from typing import TYPE_CHECKING, Dict, Optional
 from datetime import datetime, timezone
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 
 from app.infrastructure.config.settings import settings
 from app.infrastructure.database.models import PaymentSession, Transaction, Plan
+from app.infrastructure.payment.stripe_client import get_stripe
 
+if TYPE_CHECKING:
+    import stripe
 
-def validate_webhook_signature(payload: bytes, sig_header: str) -> stripe.Event:
+
+def validate_webhook_signature(payload: bytes, sig_header: str) -> "stripe.Event":
     """
     Validate Stripe webhook signature and construct event.
     
@@ -46,6 +49,7 @@ def validate_webhook_signature(payload: bytes, sig_header: str) -> stripe.Event:
             "Set STRIPE_WEBHOOK_SECRET in .env after configuring webhook in Stripe dashboard"
         )
     
+    stripe = get_stripe()
     try:
         event = stripe.Webhook.construct_event(
             payload=payload,
@@ -1,5 +1,4 @@
 """PDF generation utilities (01.07.2026 - plan download)."""
-from .plan_pdf import build_plan_pdf
 from .pdf_render_token import (
     validate_pdf_render_url,
     verify_x_render_secret,
@@ -14,3 +13,13 @@ __all__ = [
     "pdf_render_shared_secret",
     "render_url_to_pdf",
 ]
+
+
+def __getattr__(name):
+    # reportlab (fonts, platypus) is imported on the first PDF download,
+    # not when app.api.main is loaded.
+    if name == "build_plan_pdf":
+        from .plan_pdf import build_plan_pdf
+
+        return build_plan_pdf
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
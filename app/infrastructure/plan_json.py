@@ -0,0 +1,93 @@
+"""
+Plan JSON — one serialization pass per plan version.
+
+A preview used to serialize the same PlanResponse three times: `_serialize_days`
+(plan row snapshot), `day.dict()` (version #1) and FastAPI's response path
+(re-validation against `response_model` + `jsonable_encoder` + `json.dumps`).
+GET /plan/{id} and the edit endpoints paid the response path on every call.
+
+`encode_plan()` now runs `model_dump(mode="json", by_alias=True)` once and
+encodes it once (orjson when installed, else the stdlib with the compact
+separators FastAPI uses). The result is reused for:
+
+- the HTTP body (`Response(content=payload.body)`), identical to the old one,
+- the database snapshot (`payload.days_json()`: alias keys mapped back to field
+  names, so stored versions keep their old shape; SQLAlchemy writes it with
+  `dumps_str`),
+- the ETag (hash of the body) — GET /plan/{id} answers 304 on If-None-Match.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any, Dict, Optional
+
+from app.domain.models.plan import PlanResponse, TransitItem
+
+try:
+    import orjson
+except ImportError:  # optional: stdlib fallback, same bytes for plan payloads
+    orjson = None
+
+# TransitItem serializes `from_location` / `to_location` as "from" / "to".
+_FIELD_BY_ALIAS = {
+    field.alias: name for name, field in TransitItem.model_fields.items() if field.alias
+}
+
+
+def dumps(obj: Any) -> bytes:
+    """Compact UTF-8 JSON (FastAPI's JSONResponse format)."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps_str(obj: Any) -> str:
+    """`dumps` as str — SQLAlchemy `json_serializer` for JSON columns."""
+    return dumps(obj).decode("utf-8")
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check (weak comparison, `*` and lists allowed)."""
+    if not if_none_match:
+        return False
+    tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
+class PlanPayload:
+    """Canonical JSON of one plan version: dict, bytes and ETag."""
+
+    __slots__ = ("data", "body", "etag")
+
+    def __init__(self, data: Dict[str, Any]) -> None:
+        self.data = data
+        self.body = dumps(data)
+        self.etag = make_etag(self.body)
+
+    def days_json(self) -> Dict[str, Any]:
+        """`{"days": [...]}` snapshot for plan_versions (field names, as `day.dict()`)."""
+        return {"days": [_storage_day(day) for day in self.data.get("days") or []]}
+
+
+def _storage_day(day: Dict[str, Any]) -> Dict[str, Any]:
+    items = day.get("items")
+    if not items:
+        return day
+    return {
+        **day,
+        "items": [
+            {_FIELD_BY_ALIAS.get(k, k): v for k, v in item.items()}
+            if isinstance(item, dict) and item.get("type") == "transit" else item
+            for item in items
+        ],
+    }
+
+
+def encode_plan(plan: PlanResponse) -> PlanPayload:
+    """The single serialization pass for `plan` (as FastAPI would render it)."""
+    return PlanPayload(plan.model_dump(mode="json", by_alias=True))
@@ -0,0 +1,141 @@
+"""
+Process-wide catalog workbook cache.
+
+Every plan request used to re-read `zakopane.xlsx` / `multi_city_attractions.xlsx`
+with openpyxl and re-run the FIX #110 validator on them (a second full read),
+which was most of the time spent before the engine even started. The parsed
+sheet is now kept per (file, sheet) and reused while the file's mtime and size
+are unchanged; validation runs once per file version.
+
+`app/api/serving.py` fills this cache in the gunicorn master
+(preload_app) so forked workers share the parsed frames copy-on-write.
+`TTLSnapshot` does the same for the trail/restaurant tables.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from app.infrastructure.config.settings import settings
+from app.infrastructure.metrics import CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+_Stamp = Tuple[int, int]
+
+_lock = threading.Lock()
+_frames: Dict[Tuple[str, Any], Tuple[_Stamp, pd.DataFrame]] = {}
+_validated: Dict[Tuple[str, Any], _Stamp] = {}
+
+
+def _key_and_stamp(path: str, sheet_name: Any) -> Tuple[Tuple[str, Any], _Stamp]:
+    st = os.stat(path)  # FileNotFoundError, same as pd.read_excel
+    return (os.path.abspath(path), sheet_name), (st.st_mtime_ns, st.st_size)
+
+
+def read_workbook(path: str, sheet_name: Any = 0) -> pd.DataFrame:
+    """`pd.read_excel(path, sheet_name=...)`, parsed once per file version.
+
+    Returns a copy — callers rename columns and filter freely.
+    """
+    key, stamp = _key_and_stamp(path, sheet_name)
+    with _lock:
+        hit = _frames.get(key)
+    if hit is not None and hit[0] == stamp:
+        CACHE_LOOKUPS.inc(cache="catalog", result="hit")
+        return hit[1].copy()
+    CACHE_LOOKUPS.inc(cache="catalog", result="miss")
+    df = pd.read_excel(path, sheet_name=sheet_name)
+    with _lock:
+        _frames[key] = (stamp, df)
+    return df.copy()
+
+
+def validate_workbook_once(path: str, city_name: str = "", sheet_name: Any = 0) -> None:
+    """FIX #110 validation + printed summary, once per file version (not per request)."""
+    from app.infrastructure.repositories.excel_validator import validate_excel
+
+    key, stamp = _key_and_stamp(path, sheet_name)
+    with _lock:
+        if _validated.get(key) == stamp:
+            return
+        _validated[key] = stamp
+    report = validate_excel(excel_path=path, city_name=city_name, sheet_name=sheet_name)
+    if report.has_errors or report.warnings:
+        report.print_summary()
+
+
+def cached_workbooks() -> Dict[str, int]:
+    """"path[:sheet]" → rows, for the preload log."""
+    with _lock:
+        items = list(_frames.items())
+    return {
+        f"{path}" + ("" if sheet == 0 else f":{sheet}"): len(df)
+        for (path, sheet), (_, df) in items
+    }
+
+
+def clear_catalog_cache() -> None:
+    with _lock:
+        _frames.clear()
+        _validated.clear()
+
+
+class TTLSnapshot:
+    """Process-wide snapshot key → detached rows (serving.preload_catalogs).
+
+    Empty until `preload()`; None = the repository queries the database on every
+    call. The snapshot is up to CATALOG_SNAPSHOT_TTL_S old: after that the next
+    lookup re-reads the table (per process — gunicorn workers refresh
+    independently), and POST /admin/reload-poi re-reads it at once in the
+    worker that serves it.
+    """
+
+    def __init__(self, name: str, loader: Callable[[], Iterable[Any]], key: Callable[[Any], str]):
+        self.name = name
+        self._loader = loader  # reads the whole table; rows must stay usable detached
+        self._key = key
+        self._rows: Optional[Dict[str, List[Any]]] = None
+        self.loaded_at = 0.0
+        self._refresh_lock = threading.Lock()
+
+    def preload(self) -> int:
+        """Read the whole table once; returns the row count."""
+        rows = list(self._loader())
+        snapshot: Dict[str, List[Any]] = {}
+        for row in rows:
+            snapshot.setdefault(self._key(row), []).append(row)
+        self._rows = snapshot
+        self.loaded_at = time.monotonic()
+        return len(rows)
+
+    def clear(self) -> None:
+        self._rows = None
+
+    def refresh(self) -> Optional[int]:
+        """Re-read a preloaded snapshot now (None when there is none)."""
+        if self._rows is None:
+            return None
+        return self.preload()
+
+    def current(self) -> Optional[Dict[str, List[Any]]]:
+        """The snapshot, re-read first when older than CATALOG_SNAPSHOT_TTL_S."""
+        snapshot = self._rows
+        ttl = settings.catalog_snapshot_ttl_s
+        if snapshot is None or ttl <= 0 or time.monotonic() - self.loaded_at < ttl:
+            return snapshot
+        # One thread refreshes; the others keep serving the current rows.
+        if self._refresh_lock.acquire(blocking=False):
+            try:
+                self.preload()
+            except Exception as e:
+                self.loaded_at = time.monotonic()  # retry after another TTL
+                logger.warning("%s snapshot refresh failed, keeping old rows: %s", self.name, e)
+            finally:
+                self._refresh_lock.release()
+        return self._rows
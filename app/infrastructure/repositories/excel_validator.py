@@ -307,7 +307,8 @@ def validate_excel(
 
     # ── Load file ────────────────────────────────────────────────────────────
     try:
-        df = pd.read_excel(excel_path, sheet_name=sheet_name)
+        from app.infrastructure.repositories.catalog_cache import read_workbook
+        df = read_workbook(excel_path, sheet_name=sheet_name)
     except FileNotFoundError:
         report.issues.append(ValidationIssue(
             "ERROR", None, "file", f"File not found: {excel_path}"
@@ -327,13 +328,14 @@ def validate_excel(
     _check_required_columns(df, report)
 
     # ── Row-level checks ─────────────────────────────────────────────────────
+    known_tags = _get_known_tags()  # built once per file, not once per tag
     for excel_row, (_, row) in enumerate(df.iterrows(), start=2):  # row 1 = header
         _check_name(row, excel_row, report)
         _check_coordinates(row, excel_row, report)
         _check_priority_level(row, excel_row, report)
         _check_time_values(row, excel_row, report)
         _check_tod(row, excel_row, report)
-        _check_tags(row, excel_row, report)
+        _check_tags(row, excel_row, report, known_tags)
         _check_opening_hours_sentinel(row, excel_row, report)
         _check_target_group(row, excel_row, report)
         _check_must_see_score(row, excel_row, report)
@@ -483,7 +485,9 @@ def _check_tod(row: pd.Series, excel_row: int, report: ValidationReport) -> None
             ))
 
 
-def _check_tags(row: pd.Series, excel_row: int, report: ValidationReport) -> None:
+def _check_tags(
+    row: pd.Series, excel_row: int, report: ValidationReport, known: Optional[set] = None,
+) -> None:
     """FIX #94/#95: Detect tags that won't match any preference in tag_preferences.py."""
     raw = row.get("Tags", "")
     if raw is None or (isinstance(raw, float) and math.isnan(raw)) or str(raw).strip() == "":
@@ -494,7 +498,9 @@ def _check_tags(row: pd.Series, excel_row: int, report: ValidationReport) -> Non
         return
 
     tags = _parse_tag_list(raw)
-    unknown = [t for t in tags if t not in _get_known_tags()]
+    if known is None:
+        known = _get_known_tags()
+    unknown = [t for t in tags if t not in known]
 
     if unknown:
         report.issues.append(ValidationIssue(
@@ -18,7 +18,7 @@ import unicodedata
 import pandas as pd
 from typing import List, Dict, Any
 # FIX #110 (29.05.2026): Auto-validate Excel on load — detects tag mismatch, Polish values, etc.
-from app.infrastructure.repositories.excel_validator import validate_excel
+from app.infrastructure.repositories.catalog_cache import read_workbook, validate_workbook_once
 # FIX #111 (31.05.2026): Tag mapper — translates Excel tags to engine scoring vocabulary
 from app.domain.scoring.tag_mapper import apply_tag_mapping
 
@@ -132,24 +132,18 @@ def load_multi_city_poi(excel_path: str, cities: List[str]) -> List[Dict[str, An
         FileNotFoundError: If Excel file not found
         ValueError: If no cities found in Excel
     """
-    # Read Excel (single sheet "All Cities" in Phase 6)
+    # Read Excel (single sheet "All Cities" in Phase 6) — parsed once per file version.
     try:
-        df = pd.read_excel(excel_path, sheet_name='All Cities')
+        df = read_workbook(excel_path, sheet_name='All Cities')
     except FileNotFoundError:
         raise FileNotFoundError(f"Excel file not found: {excel_path}")
     except Exception as e:
         raise ValueError(f"Failed to read Excel file {excel_path}: {e}")
 
     # FIX #110 (29.05.2026): Validate Excel data quality before processing.
-    # Runs once per load — prints warnings/errors to console without blocking.
+    # Runs once per file version — prints warnings/errors to console without blocking.
     _city_label = ", ".join(cities) if cities else ""
-    _val_report = validate_excel(
-        excel_path=excel_path,
-        city_name=_city_label,
-        sheet_name='All Cities',
-    )
-    if _val_report.has_errors or _val_report.warnings:
-        _val_report.print_summary()
+    validate_workbook_once(excel_path, city_name=_city_label, sheet_name='All Cities')
 
     # Filter by cities
     if 'City' not in df.columns:
@@ -6,7 +6,7 @@ import ast
 from typing import Optional, Dict, List
 from app.infrastructure.repositories.normalizer import normalize_pois
 # FIX #110 (29.05.2026): Auto-validate Excel on load — detects tag mismatch, Polish values, etc.
-from app.infrastructure.repositories.excel_validator import validate_excel
+from app.infrastructure.repositories.catalog_cache import read_workbook, validate_workbook_once
 # FIX #111 (31.05.2026): Tag mapper — translates Excel tags to engine scoring vocabulary
 from app.domain.scoring.tag_mapper import apply_tag_mapping
 
@@ -199,11 +199,10 @@ def load_zakopane_poi(path: str, city_filter: Optional[str] = None):
     Solution: Added city_filter parameter to filter POIs by City column
     """
     # FIX #110 (29.05.2026): Validate Excel before loading — report issues without blocking.
-    _val_report = validate_excel(path, city_name=city_filter or "")
-    if _val_report.has_errors or _val_report.warnings:
-        _val_report.print_summary()
+    # Once per file version (catalog_cache), not on every request.
+    validate_workbook_once(path, city_name=city_filter or "")
 
-    df = pd.read_excel(path)
+    df = read_workbook(path)
 
     # CLIENT DATA UPDATE (22.05.2026): Strip trailing spaces from column names
     # New "Planer - miasta atrakcje.xlsx" has trailing spaces in "Target group ", "Budget type ", etc.
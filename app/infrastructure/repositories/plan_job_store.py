@@ -0,0 +1,265 @@
+"""Async plan generation job state — SQLite (WAL), one row per plan_id.
+
+`POST /plan/preview` in async mode returns the plan_id before the plan exists;
+the worker process that generates it reports progress here and the plan is
+written to the plans table only once it is complete. `GET /plan/{id}/status`
+reads this table while the plan is not in the database yet.
+
+The file lives under `ORS_CACHE_DIR` (or at `PLAN_JOB_DB_PATH`), so every
+uvicorn worker and pool process on the host sees the same jobs without an
+outside queue service. Rows older than `plan_job_ttl_hours` are purged on open.
+
+Each pending job records its owner (`host:pid` of the web worker that queued
+it, then of the pool process running it) and a heartbeat the owning queue
+refreshes every `plan_job_heartbeat_s`. A queued / running job whose owner
+process is gone (same host) or whose heartbeat is older than
+`plan_job_stale_s` was lost to a worker or container restart: it is marked
+failed when the store opens and whenever `pending()` or `get()` reads it, so
+clients stop polling a job that will never finish and it no longer counts
+toward PLAN_JOB_MAX_PENDING.
+"""
+from __future__ import annotations
+
+import os
+import socket
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.infrastructure.config.settings import settings
+from app.infrastructure.routing.route_store import cache_dir
+
+DB_FILENAME = "plan_jobs.sqlite3"
+
+QUEUED = "queued"
+RUNNING = "running"
+READY = "ready"
+FAILED = "failed"
+PENDING_STATUSES = (QUEUED, RUNNING)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    plan_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    days_done INTEGER NOT NULL DEFAULT 0,
+    days_total INTEGER,
+    error TEXT,
+    created_ts REAL NOT NULL,
+    updated_ts REAL NOT NULL,
+    owner TEXT,
+    heartbeat_ts REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status);
+"""
+# Added after the first release — ALTERed into older job files.
+_LATE_COLUMNS = (("owner", "TEXT"), ("heartbeat_ts", "REAL"))
+
+LOST_ERROR = "job lost: its worker process stopped (restart?)"
+
+
+def process_owner() -> str:
+    """`host:pid` of this process, stored as a job's owner."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _owner_gone(owner: Optional[str]) -> bool:
+    """True when `owner` is a process on this host that no longer exists."""
+    host, _, pid = (owner or "").rpartition(":")
+    if host != socket.gethostname() or not pid.isdigit():
+        return False  # other host / unknown: only the heartbeat can tell
+    if int(pid) == os.getpid():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        pass  # exists, owned by another user
+    return False
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat()
+
+
+class PlanJobStore:
+    """plan_id → status / progress of its generation job."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._conn = self._connect()
+        self.purge()
+        self.reap_lost()
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(
+            str(self.path), timeout=10, isolation_level=None, check_same_thread=False,
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        have = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+        for name, kind in _LATE_COLUMNS:
+            if name not in have:
+                conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {kind}")
+        return conn
+
+    def _db(self) -> sqlite3.Connection:
+        # A connection must not cross fork() — reopen in the child.
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._conn = self._connect()
+        return self._conn
+
+    def _update(self, plan_id: str, sql: str, args: tuple, now: Optional[float], where: str = "") -> bool:
+        ts = time.time() if now is None else now
+        with self._lock:
+            cur = self._db().execute(
+                f"UPDATE jobs SET {sql}, updated_ts = ? WHERE plan_id = ?{where}", (*args, ts, plan_id),
+            )
+        return cur.rowcount == 1
+
+    def create(self, plan_id: str, now: Optional[float] = None) -> None:
+        ts = time.time() if now is None else now
+        with self._lock:
+            self._db().execute(
+                "INSERT INTO jobs (plan_id, status, created_ts, updated_ts, owner, heartbeat_ts) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (plan_id, QUEUED, ts, ts, process_owner(), ts),
+            )
+
+    def start(self, plan_id: str, now: Optional[float] = None) -> bool:
+        ts = time.time() if now is None else now
+        return self._update(
+            plan_id, "status = ?, owner = ?, heartbeat_ts = ?", (RUNNING, process_owner(), ts), now,
+        )
+
+    def heartbeat(self, plan_ids: Iterable[str], now: Optional[float] = None) -> int:
+        """Owner still alive: refresh the heartbeat of these pending jobs."""
+        ids = list(plan_ids)
+        if not ids:
+            return 0
+        ts = time.time() if now is None else now
+        marks = ",".join("?" * len(ids))
+        states = ",".join("?" * len(PENDING_STATUSES))
+        with self._lock:
+            cur = self._db().execute(
+                f"UPDATE jobs SET heartbeat_ts = ? WHERE plan_id IN ({marks}) AND status IN ({states})",
+                (ts, *ids, *PENDING_STATUSES),
+            )
+        return cur.rowcount
+
+    def reap_lost(self, now: Optional[float] = None, plan_id: Optional[str] = None) -> int:
+        """Mark failed the pending jobs whose owner is gone or heartbeat is stale."""
+        ts = time.time() if now is None else now
+        cutoff = ts - settings.plan_job_stale_s
+        states = ",".join("?" * len(PENDING_STATUSES))
+        sql = f"SELECT plan_id, owner, heartbeat_ts FROM jobs WHERE status IN ({states})"
+        args: tuple = PENDING_STATUSES
+        if plan_id is not None:
+            sql, args = sql + " AND plan_id = ?", (*args, plan_id)
+        with self._lock:
+            rows = self._db().execute(sql, args).fetchall()
+        lost: List[str] = [
+            pid for pid, owner, beat in rows
+            if beat is None or beat < cutoff or _owner_gone(owner)
+        ]
+        if not lost:
+            return 0
+        marks = ",".join("?" * len(lost))
+        with self._lock:
+            cur = self._db().execute(
+                f"UPDATE jobs SET status = ?, error = ?, updated_ts = ? "
+                f"WHERE plan_id IN ({marks}) AND status IN ({states})",
+                (FAILED, LOST_ERROR, ts, *lost, *PENDING_STATUSES),
+            )
+        return cur.rowcount
+
+    def progress(self, plan_id: str, days_done: int, days_total: int, now: Optional[float] = None) -> bool:
+        return self._update(plan_id, "days_done = ?, days_total = ?", (days_done, days_total), now)
+
+    def finish(self, plan_id: str, now: Optional[float] = None) -> bool:
+        return self._update(plan_id, "status = ?, error = NULL", (READY,), now)
+
+    def fail(self, plan_id: str, error: str, now: Optional[float] = None) -> bool:
+        """Mark failed — unless the job already finished (a late pool error)."""
+        return self._update(
+            plan_id, "status = ?, error = ?", (FAILED, error[:500]), now,
+            where=f" AND status != '{READY}'",
+        )
+
+    def get(self, plan_id: str) -> Optional[Dict[str, Any]]:
+        self.reap_lost(plan_id=plan_id)
+        with self._lock:
+            row = self._db().execute(
+                "SELECT status, days_done, days_total, error, created_ts, updated_ts "
+                "FROM jobs WHERE plan_id = ?", (plan_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        job_status, done, total, error, created, updated = row
+        return {
+            "plan_id": plan_id,
+            "status": job_status,
+            "days_done": done,
+            "days_total": total,
+            "error": error,
+            "created_at": _iso(created),
+            "updated_at": _iso(updated),
+        }
+
+    def pending(self) -> int:
+        """Jobs queued or running on this host (lost ones are failed first)."""
+        self.reap_lost()
+        marks = ",".join("?" * len(PENDING_STATUSES))
+        with self._lock:
+            (count,) = self._db().execute(
+                f"SELECT COUNT(*) FROM jobs WHERE status IN ({marks})", PENDING_STATUSES,
+            ).fetchone()
+        return int(count)
+
+    def purge(self, now: Optional[float] = None) -> int:
+        """Drop jobs not touched for `plan_job_ttl_hours` (also ones lost to a restart)."""
+        cutoff = (time.time() if now is None else now) - settings.plan_job_ttl_hours * 3600
+        with self._lock:
+            cur = self._db().execute("DELETE FROM jobs WHERE updated_ts < ?", (cutoff,))
+        return cur.rowcount
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db().execute("DELETE FROM jobs")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_store: Optional[PlanJobStore] = None
+_store_lock = threading.Lock()
+
+
+def _store_path() -> Path:
+    if settings.plan_job_db_path:
+        return Path(settings.plan_job_db_path)
+    return cache_dir() / DB_FILENAME
+
+
+def get_plan_job_store() -> PlanJobStore:
+    """Process-wide job store (reopened if its path changes)."""
+    global _store
+    path = _store_path()
+    store = _store
+    if store is not None and store.path == path:
+        return store
+    with _store_lock:
+        if _store is None or _store.path != path:
+            if _store is not None:
+                _store.close()
+            _store = PlanJobStore(path)
+        return _store
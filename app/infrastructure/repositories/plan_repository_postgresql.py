@@ -11,6 +11,7 @@ from sqlalchemy.exc import SQLAlchemyError
 
 from app.infrastructure.repositories.interfaces import IPlanRepository
 from app.infrastructure.database.models import Plan, PlanVersion
+from app.infrastructure.routing.polyline import pack_days_geometry, unpack_days_geometry
 from app.domain.models.plan import PlanResponse, DayPlan
 
 
@@ -34,7 +35,7 @@ class PlanPostgreSQLRepository(IPlanRepository):
         """
         self.db = db
 
-    def save(self, plan: PlanResponse, user_id: Optional[uuid.UUID] = None, guest_id: Optional[str] = None, trip_input: Optional[Any] = None) -> str:
+    def save(self, plan: PlanResponse, user_id: Optional[uuid.UUID] = None, guest_id: Optional[str] = None, trip_input: Optional[Any] = None, days_json: Optional[Dict[str, Any]] = None) -> str:
         """
         Saves plan to database and creates version snapshot.
         
@@ -51,6 +52,9 @@ class PlanPostgreSQLRepository(IPlanRepository):
             plan: PlanResponse domain model
             user_id: Optional UUID of authenticated user
             guest_id: Optional guest ID string (UUID from frontend)
+            days_json: Precomputed `{"days": [...]}` snapshot
+                (`PlanPayload.days_json()`, app/infrastructure/plan_json.py);
+                serialized from `plan.days` when omitted
             
         Returns:
             plan_id (str)
@@ -78,6 +82,10 @@ class PlanPostgreSQLRepository(IPlanRepository):
             # Derive trip context (city, group, budget, dates, title) from
             # trip_input (preferred) or from PlanResponse fields (fallback).
             ctx = self._derive_trip_context(plan, trip_input)
+            snapshot = (
+                pack_days_geometry(days_json) if days_json is not None
+                else self._serialize_days(plan.days)
+            )
 
             if existing_plan:
                 # UPDATE existing plan
@@ -120,7 +128,7 @@ class PlanPostgreSQLRepository(IPlanRepository):
                     version_number=next_version,
                     change_type='regenerated',
                     parent_version_id=None,  # TODO: track parent when rollback is implemented
-                    days_json=self._serialize_days(plan.days),
+                    days_json=snapshot,
                     change_summary=f"Regenerated plan (version {next_version})"
                 )
                 self.db.add(new_version)
@@ -147,7 +155,7 @@ class PlanPostgreSQLRepository(IPlanRepository):
                     version_number=1,
                     change_type='initial',
                     parent_version_id=None,
-                    days_json=self._serialize_days(plan.days),
+                    days_json=snapshot,
                     change_summary=f"Initial plan created (version 1)"
                 )
                 self.db.add(initial_version)
@@ -540,15 +548,15 @@ class PlanPostgreSQLRepository(IPlanRepository):
             return False
 
     def _serialize_days(self, days: list[DayPlan]) -> Dict[str, Any]:
-        """Serializes days list to JSON-compatible dict."""
-        return {
+        """Serializes days list to JSON-compatible dict (transit geometry as polyline6)."""
+        return pack_days_geometry({
             "days": [day.dict() for day in days]
-        }
+        })
 
     def _reconstruct_plan_response(self, plan: Plan, version: PlanVersion) -> PlanResponse:
         """Reconstructs PlanResponse from Plan and PlanVersion database models."""
         # Deserialize days
-        days_data = version.days_json.get("days", [])
+        days_data = unpack_days_geometry(version.days_json).get("days", [])
         days = [DayPlan(**day_data) for day_data in days_data]
 
         trip_meta = plan.trip_metadata or {}
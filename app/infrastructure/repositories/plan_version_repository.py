@@ -8,6 +8,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 
 from app.infrastructure.database.models import Plan, PlanVersion
+from app.infrastructure.routing.polyline import pack_days_geometry, unpack_days_geometry
 
 
 class PlanVersionRepository:
@@ -43,7 +44,8 @@ class PlanVersionRepository:
         
         Args:
             plan_id: UUID string
-            days_json: Full plan data (days with items)
+            days_json: Full plan data (days with items); transit geometry is
+                stored as polyline6 and decoded again by get_version
             change_type: Type of change (generated, edited, rollback, etc.)
             change_summary: Optional description of what changed
             parent_version_id: Optional UUID of parent version (for lineage tracking)
@@ -69,7 +71,7 @@ class PlanVersionRepository:
                 version_number=next_version_number,
                 change_type=change_type,
                 parent_version_id=uuid.UUID(parent_version_id) if parent_version_id else None,
-                days_json=days_json,
+                days_json=pack_days_geometry(days_json),
                 change_summary=change_summary or f"{change_type.capitalize()} plan (version {next_version_number})"
             )
             self.db.add(new_version)
@@ -154,7 +156,7 @@ class PlanVersionRepository:
                 "change_type": version.change_type,
                 "change_summary": version.change_summary,
                 "parent_version_id": str(version.parent_version_id) if version.parent_version_id else None,
-                "days_json": version.days_json,  # Full snapshot
+                "days_json": unpack_days_geometry(version.days_json),  # Full snapshot
             }
             
         except SQLAlchemyError as e:
@@ -2,11 +2,24 @@
 Restaurant Repository - PostgreSQL access for dining places (ETAP 3).
 Queries RestaurantDB table loaded in Phase 1.
 """
-from typing import List, Optional
+from typing import Dict, List, Optional
 from sqlalchemy.orm import Session
 
 from app.infrastructure.database import RestaurantDB
 from app.infrastructure.database.connection import SessionLocal
+from app.infrastructure.repositories.catalog_cache import TTLSnapshot
+
+
+def _load_all() -> List[RestaurantDB]:
+    session = SessionLocal()
+    try:
+        return session.query(RestaurantDB).all()
+    finally:
+        session.close()  # rows stay usable detached (plain column attributes)
+
+
+# Process-wide city → rows; see TTLSnapshot.
+_SNAPSHOT = TTLSnapshot("RestaurantRepository", _load_all, key=lambda row: row.city)
 
 
 class RestaurantRepository:
@@ -19,6 +32,24 @@ class RestaurantRepository:
         family_restaurants = repo.get_family_friendly("Warszawa")
     """
     
+    @classmethod
+    def preload(cls) -> int:
+        """Read the whole table once; later `get_by_city` calls skip the database."""
+        return _SNAPSHOT.preload()
+
+    @classmethod
+    def clear_snapshot(cls) -> None:
+        _SNAPSHOT.clear()
+
+    @classmethod
+    def refresh_snapshot(cls) -> Optional[int]:
+        """Re-read a preloaded snapshot now (None when there is none)."""
+        return _SNAPSHOT.refresh()
+
+    @classmethod
+    def current_snapshot(cls) -> Optional[Dict[str, List[RestaurantDB]]]:
+        return _SNAPSHOT.current()
+
     def __init__(self, session: Optional[Session] = None):
         """
         Initialize repository.
@@ -52,6 +83,9 @@ class RestaurantRepository:
         Returns:
             List of restaurants in city
         """
+        snapshot = RestaurantRepository.current_snapshot()
+        if snapshot is not None:
+            return list(snapshot.get(city, ()))
         return self.session.query(RestaurantDB).filter(RestaurantDB.city == city).all()
     
     def get_by_meal_type(self, meal_type: str, city: Optional[str] = None) -> List[RestaurantDB]:
@@ -2,11 +2,24 @@
 Trail Repository - PostgreSQL access for mountain trails (ETAP 3).
 Queries TrailDB table loaded in Phase 1.
 """
-from typing import List, Optional
+from typing import Dict, List, Optional
 from sqlalchemy.orm import Session
 
 from app.infrastructure.database import TrailDB
 from app.infrastructure.database.connection import SessionLocal
+from app.infrastructure.repositories.catalog_cache import TTLSnapshot
+
+
+def _load_all() -> List[TrailDB]:
+    session = SessionLocal()
+    try:
+        return session.query(TrailDB).all()
+    finally:
+        session.close()  # rows stay usable detached (plain column attributes)
+
+
+# Process-wide region → rows; see TTLSnapshot.
+_SNAPSHOT = TTLSnapshot("TrailRepository", _load_all, key=lambda row: row.region)
 
 
 class TrailRepository:
@@ -42,6 +55,24 @@ class TrailRepository:
         parts = [s.strip() for s in cleaned.replace(",", " ").split() if s.strip()]
         return parts
 
+    @classmethod
+    def preload(cls) -> int:
+        """Read the whole table once; later `get_by_region` calls skip the database."""
+        return _SNAPSHOT.preload()
+
+    @classmethod
+    def clear_snapshot(cls) -> None:
+        _SNAPSHOT.clear()
+
+    @classmethod
+    def refresh_snapshot(cls) -> Optional[int]:
+        """Re-read a preloaded snapshot now (None when there is none)."""
+        return _SNAPSHOT.refresh()
+
+    @classmethod
+    def current_snapshot(cls) -> Optional[Dict[str, List[TrailDB]]]:
+        return _SNAPSHOT.current()
+
     def __init__(self, session: Optional[Session] = None):
         """
         Initialize repository.
@@ -90,6 +121,9 @@ class TrailRepository:
         Returns:
             List of trails in region
         """
+        snapshot = TrailRepository.current_snapshot()
+        if snapshot is not None:
+            return list(snapshot.get(region, ()))
         return self.session.query(TrailDB).filter(TrailDB.region == region).all()
     
     def get_by_difficulty(self, difficulty: str, region: Optional[str] = None) -> List[TrailDB]:
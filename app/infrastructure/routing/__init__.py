@@ -5,6 +5,10 @@ from app.infrastructure.routing.provider import (
     clear_route_session,
     get_travel_route,
     get_travel_minutes,
+    needs_route_geometry,
+    prefetch_route_durations,
+    prefetch_route_geometry,
+    route_session,
 )
 
 __all__ = [
@@ -12,4 +16,8 @@ __all__ = [
     "clear_route_session",
     "get_travel_route",
     "get_travel_minutes",
+    "needs_route_geometry",
+    "prefetch_route_durations",
+    "prefetch_route_geometry",
+    "route_session",
 ]
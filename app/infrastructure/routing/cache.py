@@ -1,27 +1,28 @@
-"""Persistent + in-memory route cache."""
+"""Persistent + in-memory route cache.
+
+The persistent tier is the SQLite `RouteStore` (see `route_store`). The
+in-memory layer is one process-wide LRU shared by all requests, bounded
+by `ors_memory_cache_size` entries and `ors_memory_cache_ttl_seconds` since
+an entry was loaded; the per-request overlay lives in `provider`.
+"""
 from __future__ import annotations
 
-import json
-import os
+import logging
+import sqlite3
 import threading
 import time
-from pathlib import Path
-from typing import Any, Dict, Optional, Tuple
-
-_lock = threading.Lock()
-_mem: Dict[str, Tuple[float, Dict[str, Any]]] = {}
-
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
 
-def _cache_dir() -> Path:
-    base = os.environ.get("ORS_CACHE_DIR", ".cache/ors_routes")
-    p = Path(base)
-    p.mkdir(parents=True, exist_ok=True)
-    return p
+from app.infrastructure.config.settings import settings
+from app.infrastructure.metrics import CACHE_LOOKUPS
+from app.infrastructure.routing.route_store import get_route_store
 
+logger = logging.getLogger(__name__)
 
-def _file_path(key: str) -> Path:
-    safe = key.replace("/", "_").replace("\\", "_")[:200]
-    return _cache_dir() / f"{safe}.json"
+_lock = threading.Lock()
+# key → (written_ts, loaded_ts, payload); most recently used last
+_mem: "OrderedDict[str, Tuple[float, float, Dict[str, Any]]]" = OrderedDict()
 
 
 def make_route_key(
@@ -33,43 +34,89 @@ def make_route_key(
     )
 
 
-def get_cached(key: str, ttl_seconds: int) -> Optional[Dict[str, Any]]:
-    now = time.time()
+def _mem_get(key: str, ttl_seconds: int, now: float) -> Optional[Dict[str, Any]]:
+    mem_ttl = settings.ors_memory_cache_ttl_seconds
     with _lock:
         hit = _mem.get(key)
-        if hit and now - hit[0] < ttl_seconds:
-            return hit[1]
-    fp = _file_path(key)
-    if not fp.exists():
-        return None
-    try:
-        data = json.loads(fp.read_text(encoding="utf-8"))
-        ts = float(data.get("_ts", 0))
-        if now - ts >= ttl_seconds:
+        if hit is None:
             return None
-        payload = data.get("payload")
-        if isinstance(payload, dict):
-            with _lock:
-                _mem[key] = (ts, payload)
-            return payload
-    except (OSError, json.JSONDecodeError, TypeError, ValueError):
-        return None
-    return None
+        written, loaded, payload = hit
+        if now - written >= ttl_seconds or (mem_ttl > 0 and now - loaded >= mem_ttl):
+            del _mem[key]
+            return None
+        _mem.move_to_end(key)
+        return payload
 
 
-def set_cached(key: str, payload: Dict[str, Any]) -> None:
-    ts = time.time()
+def _mem_put(key: str, written: float, payload: Dict[str, Any]) -> None:
+    size = settings.ors_memory_cache_size
+    if size <= 0:
+        return
     with _lock:
-        _mem[key] = (ts, payload)
+        _mem[key] = (written, time.time(), payload)
+        _mem.move_to_end(key)
+        while len(_mem) > size:
+            _mem.popitem(last=False)
+
+
+def get_cached_many(keys: Iterable[str], ttl_seconds: int) -> Dict[str, Dict[str, Any]]:
+    """{key: payload} for every fresh key — memory first, one store query for the rest."""
+    now = time.time()
+    out: Dict[str, Dict[str, Any]] = {}
+    missing: List[str] = []
+    for key in dict.fromkeys(keys):
+        hit = _mem_get(key, ttl_seconds, now)
+        if hit is not None:
+            out[key] = hit
+        else:
+            missing.append(key)
+    if out:
+        CACHE_LOOKUPS.inc(len(out), cache="route", result="memory")
+    if not missing:
+        return out
     try:
-        _file_path(key).write_text(
-            json.dumps({"_ts": ts, "payload": payload}, ensure_ascii=False),
-            encoding="utf-8",
-        )
-    except OSError:
-        pass
+        found = get_route_store().get_many(missing, ttl_seconds, now)
+    except sqlite3.Error as exc:
+        logger.warning("Route store read failed: %s", exc)
+        found = {}
+    for key, (written, payload) in found.items():
+        _mem_put(key, written, payload)
+        out[key] = payload
+    if found:
+        CACHE_LOOKUPS.inc(len(found), cache="route", result="store")
+    if len(missing) > len(found):
+        CACHE_LOOKUPS.inc(len(missing) - len(found), cache="route", result="miss")
+    return out
+
+
+def get_cached(key: str, ttl_seconds: int) -> Optional[Dict[str, Any]]:
+    return get_cached_many([key], ttl_seconds).get(key)
+
+
+def set_cached_many(items: Mapping[str, Dict[str, Any]]) -> None:
+    ts = time.time()
+    for key, payload in items.items():
+        _mem_put(key, ts, payload)
+    try:
+        get_route_store().put_many(items, ts)
+    except sqlite3.Error as exc:
+        logger.warning("Route store write failed: %s", exc)
+
+
+def set_cached(key: str, payload: Dict[str, Any]) -> None:
+    set_cached_many({key: payload})
 
 
 def clear_memory_cache() -> None:
     with _lock:
         _mem.clear()
+
+
+def memory_cache_size() -> int:
+    with _lock:
+        return len(_mem)
+
+
+def clear_persistent_cache() -> None:
+    """Drop every stored route (tests / manual reset)."""
+    get_route_store().clear()
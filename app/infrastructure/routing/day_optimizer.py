@@ -1,15 +1,75 @@
-"""Optimize attraction visit order within a day using ORS Matrix."""
+"""Time-window-aware attraction order within a day (TSPTW-style).
+
+The engine's day plan is a fixed skeleton — day start, meal breaks and other
+timed items — with attraction slots in between. The optimizer permutes the
+attractions over those slots and re-times them together with the transfers
+and buffers between them: each visit starts after the travel from the
+previous attraction, waits (briefly) for opening hours, must fit `is_open`,
+and must end before the next fixed item and the day end. Pinned attractions
+(`meta.pinned` / `poi.pinned`) keep their slot and time.
+
+Search: earliest-deadline cheapest insertion, then 2-opt and Or-opt moves
+screened by O(1) travel deltas (prefix sums over the current order) and
+confirmed by a full schedule simulation. The search is capped by schedule
+simulations (`day_optimizer_max_evaluations`), so the same day always gets
+the same order; `day_optimizer_time_budget_ms` is only a safety valve for
+pathological days (0 = off). The result replaces the engine order only when
+its schedule is feasible and strictly cheaper.
+"""
 from __future__ import annotations
 
 import logging
-from typing import Any, Dict, List, Optional, Sequence
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
+from app.domain.planner.time_utils import minutes_to_time, time_to_minutes
 from app.infrastructure.config.settings import settings
 from app.infrastructure.routing.haversine import haversine_km, resolve_profile
 from app.infrastructure.routing.ors_client import get_ors_client
+from app.infrastructure.routing.osm_graph import get_offline_router
+from app.infrastructure.routing.poi_matrix import get_poi_matrices
 
 logger = logging.getLogger(__name__)
 
+# Longest wait for an attraction to open before the slot counts as infeasible.
+MAX_OPENING_WAIT_MIN = 60
+_WAIT_STEP_MIN = 15
+_WAIT_WEIGHT = 0.25
+_INFEASIBLE = 10000.0
+# Engine items that follow the visits around them instead of holding a clock time.
+_SOFT_TYPES = {"buffer", "parking_walk"}
+
+
+@dataclass
+class ScheduledStop:
+    item: dict
+    start_min: int
+    end_min: int
+    travel_min: float = 0.0
+
+
+@dataclass
+class DaySchedule:
+    """Optimizer output: attraction order (indices into the day's attractions,
+    pinned ones included) plus the timed visits in that order."""
+
+    order: List[int]
+    stops: List[ScheduledStop] = field(default_factory=list)
+    travel_min: float = 0.0
+    wait_min: float = 0.0
+    violations: int = 0
+    # The re-timed day (every engine item); filled for the returned schedule.
+    items: List[dict] = field(default_factory=list)
+
+    @property
+    def feasible(self) -> bool:
+        return self.violations == 0
+
+    @property
+    def cost(self) -> float:
+        return self.travel_min + _WAIT_WEIGHT * self.wait_min + _INFEASIBLE * self.violations
+
 
 def _attractions_from_day_plan(day_items: List[dict]) -> List[dict]:
     out = []
@@ -36,54 +96,402 @@ def _haversine_matrix(coords: Sequence[tuple]) -> List[List[float]]:
     return m
 
 
-def _nearest_neighbor_order(matrix: List[List[float]], start: int = 0) -> List[int]:
-    n = len(matrix)
-    if n <= 1:
-        return list(range(n))
-    visited = {start}
-    order = [start]
-    cur = start
-    while len(visited) < n:
-        best_j = None
-        best_d = float("inf")
-        for j in range(n):
-            if j in visited:
+def travel_matrix(
+    pois: Sequence[dict], profile: str, context: Optional[dict] = None,
+) -> List[List[float]]:
+    """Minutes NxN: precomputed POI matrix → offline OSM graph → ORS Matrix →
+    the per-leg route provider (session-cached, the same times the engine
+    scheduled with)."""
+    coords = [(float(p["lat"]), float(p["lng"])) for p in pois]
+    matrix: Optional[List[List[float]]] = None
+    matrices = get_poi_matrices()
+    if matrices is not None:
+        matrix = matrices.submatrix(pois, profile)
+    offline = get_offline_router()
+    if matrix is None and offline is not None:
+        table = offline.matrix(coords, profile)
+        matrix = table[0] if table else None
+    client = get_ors_client()
+    if (
+        matrix is None
+        and client.matrix_enabled()
+        and len(coords) <= settings.ors_matrix_max_locations
+    ):
+        matrix = client.matrix_durations(coords, profile)
+    if matrix is not None:
+        return matrix
+    try:
+        from app.infrastructure.routing.provider import get_travel_route
+
+        return [
+            [
+                0.0 if i == j else float(
+                    get_travel_route(a, b, context, with_geometry=False).duration_min
+                )
+                for j, b in enumerate(pois)
+            ]
+            for i, a in enumerate(pois)
+        ]
+    except Exception:
+        return _haversine_matrix(coords)
+
+
+def _minutes(value: Any) -> Optional[int]:
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        return time_to_minutes(value)
+    except Exception:
+        return None
+
+
+def _is_pinned(item: dict) -> bool:
+    return bool((item.get("meta") or {}).get("pinned") or (item.get("poi") or {}).get("pinned"))
+
+
+class _DayModel:
+    """Fixed skeleton of one day + the schedule simulation for an order.
+
+    Engine items between visits (transfers, buffers) keep their positions and
+    are re-timed along with them; a transfer between two attractions takes
+    the new pair's travel time once its endpoints change.
+    """
+
+    def __init__(self, day_items: List[dict], attrs: List[dict], matrix, context: dict) -> None:
+        self.items = day_items
+        self.attrs = attrs
+        self.matrix = matrix
+        self.context = context
+        self.season = context.get("season")
+        self.names = [(a.get("poi") or {}).get("name") for a in attrs]
+        ids = {id(a): i for i, a in enumerate(attrs)}
+        # slot → attraction index (or None for any other item)
+        self.layout: List[Optional[int]] = [ids.get(id(it)) for it in day_items]
+        self.pinned = {
+            ids[id(it)]: pos for pos, it in enumerate(day_items)
+            if id(it) in ids and _is_pinned(it)
+        }
+        self.durations = []
+        for a in attrs:
+            s, e = _minutes(a.get("start_time")), _minutes(a.get("end_time"))
+            dur = (e - s) if s is not None and e is not None and e > s else None
+            if dur is None:
+                dur = int((a.get("poi") or {}).get("time_min") or 60)
+            self.durations.append(dur)
+        # transfer position → (attraction position it leaves, attraction position
+        # it reaches), matched on the engine's from/to names; None when the
+        # transfer leads to/from something else (e.g. the lunch place).
+        self.legs: Dict[int, Tuple[Optional[int], Optional[int]]] = {}
+        last: Optional[int] = None
+        for pos, it in enumerate(day_items):
+            if self.layout[pos] is not None:
+                last = pos
+            elif it.get("type") == "transfer":
+                nxt = next(
+                    (q for q in range(pos + 1, len(day_items)) if self.layout[q] is not None),
+                    None,
+                )
+                self.legs[pos] = (
+                    last if last is not None and it.get("from") == self.names[self.layout[last]] else None,
+                    nxt if nxt is not None and it.get("to") == self.names[self.layout[nxt]] else None,
+                )
+        self.day_start = _minutes(context.get("day_start")) or self._first_time() or 9 * 60
+        self.day_end = _minutes(context.get("day_end")) or 20 * 60
+        self._open_cache: Dict[Tuple[int, int], bool] = {}
+
+    def _first_time(self) -> Optional[int]:
+        for it in self.items:
+            t = _minutes(it.get("start_time"))
+            if t is not None:
+                return t
+        return None
+
+    def _open(self, i: int, start: int) -> bool:
+        key = (i, start)
+        hit = self._open_cache.get(key)
+        if hit is None:
+            try:
+                from app.domain.planner.engine import is_open
+
+                hit = bool(is_open(
+                    self.attrs[i]["poi"], start, self.durations[i], self.season, self.context,
+                ))
+            except Exception:
+                hit = True
+            self._open_cache[key] = hit
+        return hit
+
+    def _leg_minutes(self, a: int, b: int) -> float:
+        from app.domain.planner.engine import MIN_TRANSFER_MIN
+
+        return float(max(int(round(self.matrix[a][b])), MIN_TRANSFER_MIN))
+
+    def _changed(self, seq: Sequence[Optional[int]], p: int, q: int) -> bool:
+        return (seq[p], seq[q]) != (self.layout[p], self.layout[q])
+
+    def slot_sequence(self, order: Sequence[int]) -> List[Optional[int]]:
+        """Place `order` into the free attraction slots (pinned ones stay put)."""
+        free = iter(i for i in order if i not in self.pinned)
+        out: List[Optional[int]] = []
+        for slot in self.layout:
+            if slot is None:
+                out.append(None)
+            elif slot in self.pinned:
+                out.append(slot)
+            else:
+                out.append(next(free))
+        return out
+
+    def simulate(self, order: Sequence[int], render: bool = False) -> DaySchedule:
+        sched = DaySchedule(order=list(order))
+        now: float = self.day_start
+        prev: Optional[int] = None
+        leg: Optional[float] = None  # transfer time into the next attraction
+        seq = self.slot_sequence(order)
+        for pos, slot in enumerate(seq):
+            item = self.items[pos]
+            kind = item.get("type")
+            if slot is None and kind == "transfer":
+                p, q = self.legs[pos]
+                dur = float(item.get("duration_min") or 0)
+                if p is not None and q is not None and self._changed(seq, p, q):
+                    dur = self._leg_minutes(seq[p], seq[q])
+                now += dur
+                sched.travel_min += dur
+                if q is not None:
+                    leg = dur
+                if render:
+                    sched.items.append(self._transfer(item, seq, p, q, dur))
                 continue
-            d = matrix[cur][j]
-            if d < best_d:
-                best_d = d
-                best_j = j
-        if best_j is None:
-            break
-        visited.add(best_j)
-        order.append(best_j)
-        cur = best_j
-    return order
+            if slot is None and kind in _SOFT_TYPES:
+                start = int(round(now))
+                now += _span(item)
+                if render:
+                    sched.items.append(_retimed(item, start, int(round(now))))
+                continue
+            if slot is None:
+                start = _minutes(item.get("start_time"))
+                if start is not None:
+                    end = _minutes(item.get("end_time"))
+                    if now > start:
+                        sched.violations += 1
+                    now = max(now, end if end is not None and end >= start else start)
+                if render:
+                    sched.items.append(item)
+                continue
+            if leg is None:
+                leg = self.matrix[prev][slot] if prev is not None else 0.0
+                now += leg
+                sched.travel_min += leg
+            arrival = int(round(now))
+            dur = self.durations[slot]
+            if slot in self.pinned:
+                start = _minutes(item.get("start_time")) or arrival
+                if arrival > start:
+                    sched.violations += 1
+            else:
+                start = arrival
+                while not self._open(slot, start):
+                    start += _WAIT_STEP_MIN
+                    if start - arrival > MAX_OPENING_WAIT_MIN:
+                        sched.violations += 1
+                        start = arrival
+                        break
+            sched.wait_min += max(start - arrival, 0)
+            sched.stops.append(ScheduledStop(self.attrs[slot], start, start + dur, leg))
+            if render:
+                sched.items.append(_retimed(self.attrs[slot], start, start + dur))
+            now = start + dur
+            prev, leg = slot, None
+        if now > self.day_end:
+            sched.violations += 1
+        return sched
+
+    def _transfer(
+        self, item: dict, seq: Sequence[Optional[int]],
+        p: Optional[int], q: Optional[int], dur: float,
+    ) -> dict:
+        """The engine transfer pointed at the attractions now on either side."""
+        out = dict(item)
+        if p is not None:
+            out["from"] = self.names[seq[p]]
+        if q is not None:
+            out["to"] = self.names[seq[q]]
+        if p is not None and q is not None and self._changed(seq, p, q):
+            from app.domain.planner.engine import (
+                INTER_CITY_THRESHOLD_KM,
+                _walk_threshold,
+                haversine_distance,
+            )
+
+            a, b = self.attrs[seq[p]]["poi"], self.attrs[seq[q]]["poi"]
+            km = haversine_distance(a["lat"], a["lng"], b["lat"], b["lng"])
+            out.update(
+                duration_min=int(dur),
+                distance_km=round(km, 3),
+                transport_mode="walking" if km < _walk_threshold(a, b) else "car",
+                inter_city=km >= INTER_CITY_THRESHOLD_KM,
+            )
+        return out
+
+
+def _span(item: dict) -> int:
+    s, e = _minutes(item.get("start_time")), _minutes(item.get("end_time"))
+    if s is not None and e is not None and e >= s:
+        return e - s
+    return int(item.get("duration_min") or 0)
+
 
+def _retimed(item: dict, start: int, end: int) -> dict:
+    return {**item, "start_time": minutes_to_time(start), "end_time": minutes_to_time(end)}
 
-def _two_opt(matrix: List[List[float]], order: List[int], max_iter: int = 20) -> List[int]:
-    n = len(order)
-    if n < 4:
-        return order
 
-    def _tour_len(ord_: List[int]) -> float:
-        return sum(matrix[ord_[i]][ord_[i + 1]] for i in range(len(ord_) - 1))
+def _edge(matrix, a: Optional[int], b: Optional[int]) -> float:
+    return matrix[a][b] if a is not None and b is not None else 0.0
 
-    best = order[:]
-    best_len = _tour_len(best)
-    for _ in range(max_iter):
+
+class _SearchBudget:
+    """Schedule simulations one day's search may still run.
+
+    The count is what bounds the search; the wall-clock deadline (None = off)
+    only stops a day that is slow for other reasons, and makes the result
+    depend on machine load when it fires.
+    """
+
+    def __init__(self, max_evaluations: int, time_budget_ms: int) -> None:
+        self.left = max(max_evaluations, 0)
+        self.deadline = (
+            time.perf_counter() + time_budget_ms / 1000.0 if time_budget_ms > 0 else None
+        )
+
+    def spend(self) -> bool:
+        """Take one simulation; False once the budget is used up."""
+        if self.left <= 0:
+            return False
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            self.left = 0
+            return False
+        self.left -= 1
+        return True
+
+
+def _insertion_order(model: _DayModel, movable: List[int], budget: _SearchBudget) -> List[int]:
+    """Earliest-deadline-first cheapest insertion (by simulated cost).
+
+    Stops left when the budget runs out follow in deadline order.
+    """
+    def deadline(i: int) -> int:
+        # The engine's own slot end is the best proxy for how late a stop may go.
+        return _minutes(model.attrs[i].get("end_time")) or model.day_end
+
+    order: List[int] = []
+    for i in sorted(movable, key=deadline):
+        best, best_cost = None, None
+        for k in range(len(order) + 1):
+            if not budget.spend():
+                break
+            cand = order[:k] + [i] + order[k:]
+            cost = model.simulate(cand + [j for j in movable if j not in cand]).cost
+            if best_cost is None or cost < best_cost:
+                best, best_cost = cand, cost
+        order = best or order + [i]
+    return order
+
+
+def _local_search(model: _DayModel, order: List[int], budget: _SearchBudget) -> DaySchedule:
+    """2-opt + Or-opt until no improving move or the budget runs out."""
+    m = model.matrix
+    best = model.simulate(order)
+    improved = True
+    while improved and budget.left > 0:
         improved = False
-        for i in range(1, n - 2):
+        o = best.order
+        n = len(o)
+        # Prefix sums: forward edge costs and reversed-edge costs.
+        fwd = [0.0] * n
+        bwd = [0.0] * n
+        for k in range(1, n):
+            fwd[k] = fwd[k - 1] + m[o[k - 1]][o[k]]
+            bwd[k] = bwd[k - 1] + m[o[k]][o[k - 1]]
+        candidates: List[Tuple[float, List[int]]] = []
+        # 2-opt: reverse o[i..j]
+        for i in range(n - 1):
             for j in range(i + 1, n):
-                if j - i == 1:
-                    continue
-                new = best[:i] + best[i:j][::-1] + best[j:]
-                new_len = _tour_len(new)
-                if new_len + 0.01 < best_len:
-                    best, best_len = new, new_len
-                    improved = True
-        if not improved:
+                before = (m[o[i - 1]][o[i]] if i else 0.0) + (m[o[j]][o[j + 1]] if j + 1 < n else 0.0)
+                after = (m[o[i - 1]][o[j]] if i else 0.0) + (m[o[i]][o[j + 1]] if j + 1 < n else 0.0)
+                delta = after - before + (bwd[j] - bwd[i]) - (fwd[j] - fwd[i])
+                candidates.append((delta, o[:i] + o[i:j + 1][::-1] + o[j + 1:]))
+        # Or-opt: move a run of 1–3 stops elsewhere
+        for length in (1, 2, 3):
+            for i in range(n - length + 1):
+                run = o[i:i + length]
+                rest = o[:i] + o[i + length:]
+                p = o[i - 1] if i else None
+                q = o[i + length] if i + length < n else None
+                removal = _edge(m, p, q) - _edge(m, p, run[0]) - _edge(m, run[-1], q)
+                for k in range(len(rest) + 1):
+                    if k == i:
+                        continue
+                    a = rest[k - 1] if k else None
+                    b = rest[k] if k < len(rest) else None
+                    insertion = _edge(m, a, run[0]) + _edge(m, run[-1], b) - _edge(m, a, b)
+                    candidates.append((removal + insertion, rest[:k] + run + rest[k:]))
+        # Time windows can make a longer route the only feasible one, so
+        # travel-increasing moves are still tried while infeasible.
+        candidates.sort(key=lambda c: c[0])
+        for delta, cand in candidates:
+            if best.feasible and delta >= -1e-9:
+                break
+            if not budget.spend():
+                break
+            sched = model.simulate(cand)
+            if sched.cost + 1e-9 < best.cost:
+                best = sched
+                improved = True
+                break
+    return best
+
+
+def optimize_day_schedule(
+    day_items: List[dict],
+    context: Optional[dict] = None,
+    *,
+    max_evaluations: Optional[int] = None,
+    time_budget_ms: Optional[int] = None,
+) -> Optional[DaySchedule]:
+    """Best schedule for the day's attractions, or None when the engine
+    order should stay (too few stops, or nothing strictly better found).
+
+    `max_evaluations` / `time_budget_ms` default to the settings.
+    """
+    attrs = _attractions_from_day_plan(day_items)
+    if len(attrs) < 3:
+        return None
+    ctx = context or {}
+    pois = [a["poi"] for a in attrs]
+    profile = resolve_profile(pois[0], pois[1], ctx)
+    matrix = travel_matrix(pois, profile, ctx)
+
+    budget = _SearchBudget(
+        settings.day_optimizer_max_evaluations if max_evaluations is None else max_evaluations,
+        settings.day_optimizer_time_budget_ms if time_budget_ms is None else time_budget_ms,
+    )
+    model = _DayModel(day_items, attrs, matrix, ctx)
+    # Search over the movable stops only; pinned ones are placed by slot.
+    movable = [i for i in range(len(attrs)) if i not in model.pinned]
+    original = model.simulate(movable)
+
+    best = original
+    for start in (movable, _insertion_order(model, movable, budget)):
+        if budget.left <= 0:
             break
+        cand = _local_search(model, start, budget)
+        if cand.cost < best.cost:
+            best = cand
+    if best is original or not best.feasible or best.cost + 1e-9 >= original.cost:
+        return None
+    best.items = model.simulate(best.order, render=True).items
+    best.order = [slot for slot in model.slot_sequence(best.order) if slot is not None]
     return best
 
 
@@ -92,50 +500,16 @@ def optimize_day_attraction_order(
     context: Optional[dict] = None,
 ) -> List[dict]:
     """
-    Reorder attraction entries in engine day plan to reduce travel time.
+    Reorder + re-time attraction entries in engine day plan to reduce travel time.
     Preserves non-attraction items (lunch, free_time) — only permutes attractions.
     """
     if not settings.ors_matrix_enabled:
         return day_items
-
-    attrs = _attractions_from_day_plan(day_items)
-    if len(attrs) < 3 or len(attrs) > settings.ors_matrix_max_locations:
+    schedule = optimize_day_schedule(day_items, context)
+    if schedule is None:
         return day_items
-
-    coords = [(float(a["poi"]["lat"]), float(a["poi"]["lng"])) for a in attrs]
-    ctx = context or {}
-    profile = resolve_profile(attrs[0]["poi"], attrs[1]["poi"], ctx)
-
-    matrix: Optional[List[List[float]]] = None
-    client = get_ors_client()
-    if client.matrix_enabled():
-        matrix = client.matrix_durations(coords, profile)
-    if matrix is None:
-        matrix = _haversine_matrix(coords)
-
-    order = _nearest_neighbor_order(matrix, start=0)
-    order = _two_opt(matrix, order)
-
-    old_total = sum(matrix[i][i + 1] for i in range(len(order) - 1))
-    # Try different starts
-    for start in range(1, len(order)):
-        cand = _two_opt(matrix, _nearest_neighbor_order(matrix, start=start))
-        cand_total = sum(matrix[cand[i]][cand[i + 1]] for i in range(len(cand) - 1))
-        if cand_total < old_total:
-            order, old_total = cand, cand_total
-
-    ordered_attrs = [attrs[i] for i in order]
     logger.info(
-        "[ORS Matrix] Reordered %d attractions (est. travel %.0f min)",
-        len(attrs), old_total,
+        "[Day optimizer] Reordered %d attractions (travel %.0f min, wait %.0f min)",
+        len(schedule.order), schedule.travel_min, schedule.wait_min,
     )
-
-    out: List[dict] = []
-    ai = 0
-    for it in day_items:
-        if it.get("type") == "attraction" and it in attrs:
-            out.append(ordered_attrs[ai])
-            ai += 1
-        else:
-            out.append(it)
-    return out
+    return schedule.items
@@ -1,42 +1,70 @@
 """Deduplicate external/map POIs against Excel-curated pool."""
 from __future__ import annotations
 
+import math
 import re
-import unicodedata
-from typing import Dict, Iterable, List, Sequence
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Sequence
 
+from app.domain.planner.name_matching import fold_diacritics
+from app.infrastructure.routing.geohash import Cell, cell_of, cells_within
 from app.infrastructure.routing.haversine import haversine_km
 
 _STRIP_WORDS = (
     "muzeum", "museum", "park", "zamek", "castle", "kościół", "kosciol",
     "church", "galeria", "gallery", "centrum", "the", "w", "we", "na",
 )
+# Words are whole [a-z0-9] tokens by the time they are stripped, so one
+# alternation pass removes exactly what the old per-word loop removed.
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9\s]")
+_STRIP_WORDS_RE = re.compile(
+    r"\b(?:" + "|".join(re.escape(w) for w in _STRIP_WORDS) + r")\b"
+)
+_SPACES_RE = re.compile(r"\s+")
+
+# Pairs closer than this are one place whatever their names.
+_SAME_SPOT_M = 50.0
+# Defaults of `is_duplicate_of_excel`, used by the pool index.
+_DISTANCE_M = 150.0
+_NAME_THRESHOLD = 0.72
+# Without coordinates only (near-)identical names count.
+_NAME_ONLY_THRESHOLD = 0.92
+# Smallest token count at which an overlap short of equal sets reaches 0.92.
+_LONG_NAME_TOKENS = 12
+# Geohash precision 7: ~153 x 98 m cells, a 150 m search is a few cells.
+_GRID_PRECISION = 7
+
+
+@lru_cache(maxsize=8192)
+def _normalize_name_cached(name: str) -> str:
+    s = _NON_ALNUM_RE.sub(" ", fold_diacritics(name))
+    s = _STRIP_WORDS_RE.sub(" ", s)
+    return _SPACES_RE.sub(" ", s).strip()
 
 
 def _normalize_name(name: str) -> str:
-    s = (name or "").lower().strip()
-    s = unicodedata.normalize("NFKD", s)
-    s = "".join(c for c in s if not unicodedata.combining(c))
-    s = re.sub(r"[^a-z0-9\s]", " ", s)
-    for w in _STRIP_WORDS:
-        s = re.sub(rf"\b{w}\b", " ", s)
-    return re.sub(r"\s+", " ", s).strip()
+    return _normalize_name_cached(name or "")
 
 
-def _name_similarity(a: str, b: str) -> float:
-    na, nb = _normalize_name(a), _normalize_name(b)
+def _similarity(na: str, ta: FrozenSet[str], nb: str, tb: FrozenSet[str]) -> float:
+    """`_name_similarity` on names already normalized (+ their token sets)."""
     if not na or not nb:
         return 0.0
     if na == nb:
         return 1.0
     if na in nb or nb in na:
         return 0.85
-    ta, tb = set(na.split()), set(nb.split())
     if not ta or not tb:
         return 0.0
     return len(ta & tb) / max(len(ta), len(tb))
 
 
+def _name_similarity(a: str, b: str) -> float:
+    na, nb = _normalize_name(a), _normalize_name(b)
+    return _similarity(na, frozenset(na.split()), nb, frozenset(nb.split()))
+
+
 def is_duplicate_of_excel(
     external: dict,
     excel_poi: dict,
@@ -49,38 +77,142 @@ def is_duplicate_of_excel(
     if None in (lat1, lng1, lat2, lng2):
         return _name_similarity(
             external.get("name", ""), excel_poi.get("name", "")
-        ) >= 0.92
+        ) >= _NAME_ONLY_THRESHOLD
     dist_km = haversine_km(float(lat1), float(lng1), float(lat2), float(lng2))
-    if dist_km * 1000 < 50:
+    if dist_km * 1000 < _SAME_SPOT_M:
         return True
     if dist_km * 1000 > distance_m:
         return False
     sim = _name_similarity(external.get("name", ""), excel_poi.get("name", ""))
     if sim >= name_threshold:
         return True
-    if dist_km * 1000 < 50 and sim >= 0.5:
+    if dist_km * 1000 < _SAME_SPOT_M and sim >= 0.5:
         return True
     return False
 
 
+# ----------------------------------------------------------------------
+# pool index — same decisions as pairwise `is_duplicate_of_excel`
+# ----------------------------------------------------------------------
+
+class _Entry:
+    __slots__ = ("poi", "lat", "lng", "norm", "tokens")
+
+    def __init__(self, poi: dict) -> None:
+        self.poi = poi
+        self.norm = _normalize_name(poi.get("name", ""))
+        self.tokens = frozenset(self.norm.split())
+        self.lat = self.lng = None
+        lat, lng = poi.get("lat"), poi.get("lng")
+        if lat is not None and lng is not None:
+            try:
+                self.lat, self.lng = float(lat), float(lng)
+            except (TypeError, ValueError):
+                pass
+
+    @property
+    def unlocated(self) -> bool:
+        return self.poi.get("lat") is None or self.poi.get("lng") is None
+
+    @property
+    def gridded(self) -> bool:
+        """Finite coordinates — anything else goes through the pairwise rule."""
+        return self.lat is not None and math.isfinite(self.lat) and math.isfinite(self.lng)
+
+
+class _NameIndex:
+    """Candidates for similarity >= `_NAME_ONLY_THRESHOLD`.
+
+    Above 0.85 the score is 1.0 (equal token sets) or a token overlap of
+    at least 12 of 13+ tokens, so equal token sets plus the long names cover
+    every pair that can reach the threshold.
+    """
+
+    def __init__(self) -> None:
+        self.by_tokens: Dict[FrozenSet[str], List[_Entry]] = defaultdict(list)
+        self.long: List[_Entry] = []
+
+    def add(self, entry: _Entry) -> None:
+        self.by_tokens[entry.tokens].append(entry)
+        if len(entry.tokens) >= _LONG_NAME_TOKENS:
+            self.long.append(entry)
+
+    def candidates(self, entry: _Entry) -> Iterable[_Entry]:
+        yield from self.by_tokens.get(entry.tokens, ())
+        if len(entry.tokens) >= _LONG_NAME_TOKENS:
+            yield from self.long
+
+
+class _PoolIndex:
+    """Excel (or already kept) POIs on a geohash grid plus name indexes."""
+
+    def __init__(self, pool: Iterable[dict] = ()) -> None:
+        self.grid: Dict[Cell, List[_Entry]] = defaultdict(list)
+        self.names = _NameIndex()             # every POI (candidate has no coords)
+        self.unlocated_names = _NameIndex()   # POIs without coords (candidate has them)
+        self.pairwise: List[_Entry] = []      # non-finite / non-numeric coords
+        for poi in pool:
+            self.add(poi)
+
+    def add(self, poi: dict) -> None:
+        entry = _Entry(poi)
+        self.names.add(entry)
+        if entry.unlocated:
+            self.unlocated_names.add(entry)
+        elif entry.gridded:
+            self.grid[cell_of(entry.lat, entry.lng, _GRID_PRECISION)].append(entry)
+        else:
+            self.pairwise.append(entry)
+
+    def is_duplicate(self, poi: dict) -> bool:
+        """True when `poi` duplicates a POI of the pool (`is_duplicate_of_excel`)."""
+        entry = _Entry(poi)
+        if entry.unlocated:
+            return any(
+                _similarity(entry.norm, entry.tokens, other.norm, other.tokens) >= _NAME_ONLY_THRESHOLD
+                for other in self.names.candidates(entry)
+            )
+        if not entry.gridded:
+            return any(is_duplicate_of_excel(poi, other.poi) for other in self._all())
+        if any(
+            _similarity(entry.norm, entry.tokens, other.norm, other.tokens) >= _NAME_ONLY_THRESHOLD
+            for other in self.unlocated_names.candidates(entry)
+        ):
+            return True
+        if any(is_duplicate_of_excel(poi, other.poi) for other in self.pairwise):
+            return True
+        for cell in cells_within(entry.lat, entry.lng, _DISTANCE_M, _GRID_PRECISION):
+            for other in self.grid.get(cell, ()):
+                dist_m = haversine_km(entry.lat, entry.lng, other.lat, other.lng) * 1000
+                if dist_m < _SAME_SPOT_M:
+                    return True
+                if dist_m > _DISTANCE_M:
+                    continue
+                if _similarity(entry.norm, entry.tokens, other.norm, other.tokens) >= _NAME_THRESHOLD:
+                    return True
+        return False
+
+    def _all(self) -> Iterable[_Entry]:
+        for entries in self.names.by_tokens.values():
+            yield from entries
+
+
 def filter_external_duplicates(
     external_candidates: Sequence[dict],
     excel_pool: Sequence[dict],
 ) -> List[dict]:
     """Keep only external POIs that do not duplicate Excel entries."""
-    kept: List[dict] = []
-    for ext in external_candidates:
-        if any(is_duplicate_of_excel(ext, ex) for ex in excel_pool):
-            continue
-        kept.append(ext)
-    return kept
+    index = _PoolIndex(excel_pool)
+    return [ext for ext in external_candidates if not index.is_duplicate(ext)]
 
 
 def dedupe_external_list(candidates: Sequence[dict]) -> List[dict]:
     """Remove duplicates within external candidates."""
+    index = _PoolIndex()
     out: List[dict] = []
     for c in candidates:
-        if any(is_duplicate_of_excel(c, prev) for prev in out):
+        if index.is_duplicate(c):
             continue
+        index.add(c)
         out.append(c)
     return out
@@ -0,0 +1,100 @@
+"""Geohash grid shared by the Overpass tile cache and POI dedup.
+
+A geohash of precision p is a cell of a fixed lat/lng grid; `cell_of` gives
+its integer (row, col) so neighbours are plain index arithmetic, `geohash`
+its base-32 name. Precision 5 ≈ 4.9 x 3.1 km and 7 ≈ 153 x 98 m in Poland.
+"""
+from __future__ import annotations
+
+import math
+from typing import List, Tuple
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+# Metres per degree of latitude, rounded down: radius → degrees never
+# under-covers a haversine (R = 6371 km) distance.
+_M_PER_DEG = 111_000.0
+
+Cell = Tuple[int, int]
+
+
+def cell_size(precision: int) -> Tuple[float, float]:
+    """(lat, lng) degrees of one geohash cell."""
+    bits = 5 * precision
+    lng_bits = (bits + 1) // 2
+    return 180.0 / (1 << (bits - lng_bits)), 360.0 / (1 << lng_bits)
+
+
+def cell_of(lat: float, lng: float, precision: int) -> Cell:
+    """(row, col) of the geohash cell containing the point."""
+    cell_lat, cell_lng = cell_size(precision)
+    return math.floor((lat + 90.0) / cell_lat), math.floor((lng + 180.0) / cell_lng)
+
+
+def cells_within(lat: float, lng: float, radius_m: float, precision: int) -> List[Cell]:
+    """Every cell intersecting the bounding box of the circle (row-major)."""
+    dlat = radius_m / _M_PER_DEG
+    widest = min(abs(lat) + dlat, 89.0)
+    dlng = radius_m / (_M_PER_DEG * math.cos(math.radians(widest)))
+    r0, c0 = cell_of(lat - dlat, lng - dlng, precision)
+    r1, c1 = cell_of(lat + dlat, lng + dlng, precision)
+    return [(r, c) for r in range(r0, r1 + 1) for c in range(c0, c1 + 1)]
+
+
+def cell_geohash(cell: Cell, precision: int) -> str:
+    cell_lat, cell_lng = cell_size(precision)
+    row, col = cell
+    return geohash((row + 0.5) * cell_lat - 90.0, (col + 0.5) * cell_lng - 180.0, precision)
+
+
+def geohash(lat: float, lng: float, precision: int) -> str:
+    lat_lo, lat_hi, lng_lo, lng_hi = -90.0, 90.0, -180.0, 180.0
+    out: List[str] = []
+    bit = value = 0
+    even = True
+    while len(out) < precision:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            if lng >= mid:
+                value, lng_lo = value * 2 + 1, mid
+            else:
+                value, lng_hi = value * 2, mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                value, lat_lo = value * 2 + 1, mid
+            else:
+                value, lat_hi = value * 2, mid
+        even = not even
+        bit += 1
+        if bit == 5:
+            out.append(_BASE32[value])
+            bit = value = 0
+    return "".join(out)
+
+
+def tile_bbox(tile: str) -> Tuple[float, float, float, float]:
+    """(south, west, north, east) of a geohash tile."""
+    lat_lo, lat_hi, lng_lo, lng_hi = -90.0, 90.0, -180.0, 180.0
+    even = True
+    for ch in tile:
+        value = _BASE32.index(ch)
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            if even:
+                mid = (lng_lo + lng_hi) / 2
+                lng_lo, lng_hi = (mid, lng_hi) if bit else (lng_lo, mid)
+            else:
+                mid = (lat_lo + lat_hi) / 2
+                lat_lo, lat_hi = (mid, lat_hi) if bit else (lat_lo, mid)
+            even = not even
+    return lat_lo, lng_lo, lat_hi, lng_hi
+
+
+def covering_tiles(lat: float, lng: float, radius_m: float, precision: int) -> List[str]:
+    """Geohash names of `cells_within` the circle."""
+    return [cell_geohash(cell, precision) for cell in cells_within(lat, lng, radius_m, precision)]
+
+
+def tile_children(tile: str) -> List[str]:
+    """The 32 tiles of precision len(tile) + 1 that make up `tile`."""
+    return [tile + ch for ch in _BASE32]
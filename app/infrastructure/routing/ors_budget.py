@@ -0,0 +1,252 @@
+"""Shared ORS quota ledger — SQLite (WAL), one row per (UTC day, endpoint).
+
+The ORS plan quota is per API key and per calendar day (reset 00:00 UTC), so
+the count has to be shared by every uvicorn worker and survive restarts. Each
+call takes one unit with a single atomic upsert that only succeeds while
+`used + n <= limit`; nothing is counted in process memory.
+
+Batch jobs (prefetch of a day, `scripts/build_poi_matrices.py`) reserve their
+matrix calls up front. A `Reservation` holds units already counted in the
+ledger, so concurrent requests cannot take them. Units it does not spend are
+refunded when it is released.
+
+The file lives under `ORS_CACHE_DIR` next to the route store (or at
+`ORS_BUDGET_DB_PATH`). Workers on one host share it. Replicas on other hosts
+share it only through a common volume.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from app.infrastructure.config.settings import settings
+from app.infrastructure.metrics import REGISTRY
+from app.infrastructure.routing.route_store import cache_dir
+
+logger = logging.getLogger(__name__)
+
+DB_FILENAME = "ors_budget.sqlite3"
+ENDPOINTS = ("directions", "matrix")
+# Days of history kept for the usage view.
+_KEEP_DAYS = 31
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS usage (
+    day TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    used INTEGER NOT NULL,
+    PRIMARY KEY (day, endpoint)
+);
+"""
+
+
+def quota_day(now: Optional[float] = None) -> str:
+    """ORS quota day (UTC date) of timestamp `now`."""
+    return time.strftime("%Y-%m-%d", time.gmtime(time.time() if now is None else now))
+
+
+def daily_limit(endpoint: str) -> int:
+    return max(0, int(getattr(settings, f"ors_daily_budget_{endpoint}")))
+
+
+class Reservation:
+    """`size` units of `endpoint` already counted in the ledger for `day`."""
+
+    def __init__(self, ledger: "BudgetLedger", endpoint: str, day: str, size: int) -> None:
+        self.ledger = ledger
+        self.endpoint = endpoint
+        self.day = day
+        self.size = size
+        self.spent = 0
+        self._released = False
+
+    @property
+    def remaining(self) -> int:
+        return 0 if self._released else self.size - self.spent
+
+    def take(self) -> bool:
+        if self.remaining <= 0:
+            return False
+        self.spent += 1
+        return True
+
+    def release(self) -> None:
+        """Refund the units not spent (idempotent)."""
+        if self._released:
+            return
+        self._released = True
+        unused = self.size - self.spent
+        if unused > 0:
+            self.ledger.refund(self.endpoint, unused, self.day)
+
+    def __enter__(self) -> "Reservation":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.release()
+
+
+class BudgetLedger:
+    """Per-day ORS call counters shared through one SQLite file."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._conn = self._connect()
+        self.purge()
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(
+            str(self.path), timeout=10, isolation_level=None, check_same_thread=False,
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        return conn
+
+    def _db(self) -> sqlite3.Connection:
+        # A connection must not cross fork() — reopen in the child.
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._conn = self._connect()
+        return self._conn
+
+    def take(self, endpoint: str, n: int = 1, now: Optional[float] = None) -> bool:
+        """Count `n` calls for today; False (nothing counted) when over the limit."""
+        limit = daily_limit(endpoint)
+        if n > limit:
+            return False
+        with self._lock:
+            cur = self._db().execute(
+                "INSERT INTO usage (day, endpoint, used) VALUES (?, ?, ?) "
+                "ON CONFLICT (day, endpoint) DO UPDATE SET used = used + excluded.used "
+                "WHERE usage.used + excluded.used <= ?",
+                (quota_day(now), endpoint, n, limit),
+            )
+        return cur.rowcount == 1
+
+    def reserve(
+        self,
+        endpoint: str,
+        n: int,
+        minimum: Optional[int] = None,
+        now: Optional[float] = None,
+    ) -> Optional[Reservation]:
+        """Count up to `n` calls now and hand them out later.
+
+        Grants min(n, remaining) when that is at least `minimum` (default `n`,
+        all or nothing); otherwise None and nothing is counted.
+        """
+        day = quota_day(now)
+        need = n if minimum is None else max(1, minimum)
+        limit = daily_limit(endpoint)
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute(
+                    "SELECT used FROM usage WHERE day = ? AND endpoint = ?", (day, endpoint),
+                ).fetchone()
+                grant = min(n, limit - (row[0] if row else 0))
+                if grant < need or grant <= 0:
+                    db.execute("COMMIT")
+                    return None
+                db.execute(
+                    "INSERT INTO usage (day, endpoint, used) VALUES (?, ?, ?) "
+                    "ON CONFLICT (day, endpoint) DO UPDATE SET used = used + excluded.used",
+                    (day, endpoint, grant),
+                )
+                db.execute("COMMIT")
+            except sqlite3.Error:
+                db.execute("ROLLBACK")
+                raise
+        return Reservation(self, endpoint, day, grant)
+
+    def refund(self, endpoint: str, n: int, day: Optional[str] = None) -> None:
+        with self._lock:
+            self._db().execute(
+                "UPDATE usage SET used = MAX(0, used - ?) WHERE day = ? AND endpoint = ?",
+                (n, day or quota_day(), endpoint),
+            )
+
+    def used(self, endpoint: str, now: Optional[float] = None) -> int:
+        with self._lock:
+            row = self._db().execute(
+                "SELECT used FROM usage WHERE day = ? AND endpoint = ?",
+                (quota_day(now), endpoint),
+            ).fetchone()
+        return int(row[0]) if row else 0
+
+    def remaining(self, endpoint: str, now: Optional[float] = None) -> int:
+        return max(0, daily_limit(endpoint) - self.used(endpoint, now))
+
+    def snapshot(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """Today's usage per endpoint (for /admin/ors-budget)."""
+        now = time.time() if now is None else now
+        out: Dict[str, Any] = {"day": quota_day(now)}
+        for endpoint in ENDPOINTS:
+            used = self.used(endpoint, now)
+            limit = daily_limit(endpoint)
+            out[endpoint] = {"limit": limit, "used": used, "remaining": max(0, limit - used)}
+        return out
+
+    def purge(self, now: Optional[float] = None) -> int:
+        """Drop rows older than `_KEEP_DAYS` days."""
+        now = time.time() if now is None else now
+        with self._lock:
+            return self._db().execute(
+                "DELETE FROM usage WHERE day < ?", (quota_day(now - _KEEP_DAYS * 86400),),
+            ).rowcount
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db().execute("DELETE FROM usage")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_ledger: Optional[BudgetLedger] = None
+_ledger_lock = threading.Lock()
+
+
+def _ledger_path() -> Path:
+    if settings.ors_budget_db_path:
+        return Path(settings.ors_budget_db_path)
+    return cache_dir() / DB_FILENAME
+
+
+def get_budget_ledger() -> BudgetLedger:
+    """Process-wide ledger for the configured path (reopened if it changes)."""
+    global _ledger
+    path = _ledger_path()
+    ledger = _ledger
+    if ledger is not None and ledger.path == path:
+        return ledger
+    with _ledger_lock:
+        if _ledger is None or _ledger.path != path:
+            if _ledger is not None:
+                _ledger.close()
+            _ledger = BudgetLedger(path)
+        return _ledger
+
+
+def _collect_metrics():
+    """Today's shared quota for /metrics (same numbers as /admin/ors-budget)."""
+    snap = get_budget_ledger().snapshot()
+    for field in ("used", "limit"):
+        yield (
+            f"ors_budget_{field}", "gauge", f"ORS daily quota {field} (UTC day, all workers)",
+            [(f"ors_budget_{field}", {"endpoint": e}, snap[e][field]) for e in ENDPOINTS],
+        )
+
+
+REGISTRY.register_collector(_collect_metrics)
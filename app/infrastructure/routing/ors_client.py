@@ -1,33 +1,211 @@
-"""OpenRouteService HTTP client — Directions + Matrix."""
+"""OpenRouteService HTTP client — Directions + Matrix.
+
+`AsyncORSClient` owns one pooled `httpx.AsyncClient` (keep-alive), bounds the
+number of in-flight ORS requests, retries 429/5xx/transport errors with
+jittered backoff and trips a circuit breaker after repeated failures — while
+it is open every call returns None at once and the provider falls back to
+haversine.
+
+The planner is synchronous (it runs in the FastAPI threadpool), so
+`ORSClient` is a thin sync facade: it submits coroutines to one background
+event loop, which lets every request thread share the same pool, concurrency
+limit, breaker and latency histograms.
+
+Daily budgets are counted in the shared `ors_budget` ledger: one unit per HTTP
+attempt, taken before it is sent, so workers and restarts see the same count.
+"""
 from __future__ import annotations
 
+import asyncio
 import logging
-from typing import Any, Dict, List, Optional, Sequence, Tuple
+import os
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, TypeVar
 
-import requests
+import httpx
 
 from app.infrastructure.config.settings import settings
+from app.infrastructure.metrics import EXTERNAL_REQUEST_SECONDS, EXTERNAL_REQUESTS, LatencyHistogram
+from app.infrastructure.routing.ors_budget import Reservation, get_budget_ledger
 
 logger = logging.getLogger(__name__)
 
 ORS_BASE = "https://api.openrouteservice.org"
 
+_DIRECTIONS_TIMEOUT_S = 15.0
+_MATRIX_TIMEOUT_S = 20.0
+# Never sleep longer than this between retries, whatever Retry-After says.
+_MAX_BACKOFF_S = 8.0
+
+T = TypeVar("T")
+
+MatrixTable = Tuple[List[List[float]], List[List[Optional[float]]]]
+
 
 class ORSBudgetExhausted(Exception):
     """Daily ORS call budget exceeded — use haversine."""
 
 
-class ORSClient:
+# Synthetic plans (startup warm-up, app/api/warmup.py) must not spend the daily
+# budget; a contextvar switches ORS off for them without touching `settings`,
+# which concurrent requests read.
+_offline: ContextVar[bool] = ContextVar("ors_offline", default=False)
+
+
+@contextmanager
+def ors_offline() -> Iterator[None]:
+    """ORS reports disabled inside this block (current thread / context only)."""
+    token = _offline.set(True)
+    try:
+        yield
+    finally:
+        _offline.reset(token)
+
+
+def is_ors_offline() -> bool:
+    return _offline.get()
+
+
+def _outcome(r: Optional[httpx.Response]) -> str:
+    if r is None:
+        return "error"
+    if r.status_code < 400:
+        return "ok"
+    return "retry" if r.status_code == 429 or r.status_code >= 500 else "client_error"
+
+
+class CircuitBreaker:
+    """closed → open after `threshold` consecutive failures → half-open after
+    `reset_after` seconds (one trial call) → closed on success."""
+
+    def __init__(
+        self,
+        threshold: int,
+        reset_after: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.threshold = max(1, int(threshold))
+        self.reset_after = float(reset_after)
+        self._clock = clock
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if self._clock() - self._opened_at >= self.reset_after:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.threshold:
+                if self._opened_at is None:
+                    logger.warning("ORS circuit open — haversine until retry window")
+                self._opened_at = self._clock()
+            self._trial_in_flight = False
+
+
+def _retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    raw = response.headers.get("Retry-After")
+    try:
+        return float(raw) if raw is not None else None
+    except ValueError:
+        return None
+
+
+def _parse_directions(
+    data: Dict[str, Any], lat1: float, lng1: float, lat2: float, lng2: float, profile: str,
+) -> Optional[Dict[str, Any]]:
+    routes = data.get("routes") or []
+    if not routes:
+        return None
+    summary = routes[0].get("summary") or {}
+    geometry = routes[0].get("geometry")
+    coords: List[List[float]] = []
+    if isinstance(geometry, dict) and geometry.get("type") == "LineString":
+        coords = geometry.get("coordinates") or []
+    elif isinstance(geometry, str) and geometry:
+        coords = [[lng1, lat1], [lng2, lat2]]
+    if not coords:
+        coords = [[lng1, lat1], [lng2, lat2]]
+    duration_sec = float(summary.get("duration") or 0)
+    distance_m = float(summary.get("distance") or 0)
+    return {
+        "duration_min": max(int(duration_sec / 60), 1),
+        "distance_km": distance_m / 1000.0,
+        "geometry": coords,
+        "profile": profile,
+    }
+
+
+def _parse_matrix(data: Dict[str, Any]) -> Optional[MatrixTable]:
+    durations = data.get("durations")
+    if not durations:
+        return None
+    out: List[List[float]] = []
+    for row in durations:
+        out.append([(d or 0) / 60.0 for d in row])
+    distances = data.get("distances") or []
+    return out, [list(row) for row in distances]
+
+
+class AsyncORSClient:
+    """Pooled async ORS client. All calls return None on failure (→ haversine)."""
+
     def __init__(self) -> None:
-        self._directions_today = 0
-        self._matrix_today = 0
+        self._http: Optional[httpx.AsyncClient] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.breaker = CircuitBreaker(
+            settings.ors_circuit_failure_threshold,
+            settings.ors_circuit_reset_seconds,
+        )
+        self.latency: Dict[str, LatencyHistogram] = {
+            "directions": LatencyHistogram(),
+            "matrix": LatencyHistogram(),
+        }
 
     @property
     def api_key(self) -> str:
         return (settings.ors_api_key or "").strip()
 
+    @property
+    def base_url(self) -> str:
+        return (settings.ors_base_url or ORS_BASE).rstrip("/")
+
     def enabled(self) -> bool:
-        return bool(settings.ors_enabled and settings.ors_routing_enabled and self.api_key)
+        return bool(
+            settings.ors_enabled and settings.ors_routing_enabled and self.api_key and not _offline.get()
+        )
 
     def matrix_enabled(self) -> bool:
         return bool(self.enabled() and settings.ors_matrix_enabled)
@@ -38,15 +216,103 @@ class ORSClient:
             "Content-Type": "application/json",
         }
 
-    def _check_directions_budget(self) -> None:
-        if self._directions_today >= settings.ors_daily_budget_directions:
-            raise ORSBudgetExhausted("ORS directions daily budget exhausted")
+    @staticmethod
+    def _take_budget(kind: str, reservation: Optional[Reservation] = None) -> None:
+        """Count one `kind` call against today's ledger (or `reservation`)."""
+        if reservation is not None:
+            ok = reservation.take()
+        else:
+            try:
+                ok = get_budget_ledger().take(kind)
+            except sqlite3.Error as exc:
+                # Unknown usage: stay under the quota rather than overrun it.
+                logger.warning("ORS budget ledger unavailable (%s) — skipping %s", exc, kind)
+                ok = False
+        if not ok:
+            raise ORSBudgetExhausted(f"ORS {kind} daily budget exhausted")
 
-    def _check_matrix_budget(self) -> None:
-        if self._matrix_today >= settings.ors_daily_budget_matrix:
-            raise ORSBudgetExhausted("ORS matrix daily budget exhausted")
+    def _client(self) -> httpx.AsyncClient:
+        if self._http is None:
+            size = max(1, int(settings.ors_max_concurrency))
+            self._http = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=size, max_keepalive_connections=size),
+            )
+            self._slots = asyncio.Semaphore(size)
+        return self._http
 
-    def directions(
+    @staticmethod
+    def _backoff(attempt: int, retry_after: Optional[float]) -> float:
+        if retry_after is not None:
+            return min(max(retry_after, 0.0), _MAX_BACKOFF_S)
+        # Full jitter: uniform(0, base * 2^attempt).
+        ceiling = float(settings.ors_retry_backoff_seconds) * (2 ** attempt)
+        return random.uniform(0.0, min(ceiling, _MAX_BACKOFF_S))
+
+    async def _post(
+        self,
+        kind: str,
+        url: str,
+        body: Dict[str, Any],
+        timeout: float,
+        reservation: Optional[Reservation] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """POST with bounded concurrency, retries on 429/5xx and the breaker.
+
+        Raises ORSBudgetExhausted when the first attempt has no budget left;
+        retries past the budget are dropped.
+        """
+        service = f"ors_{kind}"
+        if not self.breaker.allow():
+            logger.info("ORS circuit open — skipping %s", kind)
+            EXTERNAL_REQUESTS.inc(service=service, outcome="circuit_open")
+            return None
+        client = self._client()
+        attempts = max(0, int(settings.ors_max_retries)) + 1
+        reason = ""
+        for attempt in range(attempts):
+            try:
+                self._take_budget(kind, reservation)
+            except ORSBudgetExhausted:
+                EXTERNAL_REQUESTS.inc(service=service, outcome="budget_exhausted")
+                if not attempt:
+                    raise
+                break
+            retry_after: Optional[float] = None
+            async with self._slots:
+                started = time.perf_counter()
+                try:
+                    r = await client.post(url, json=body, headers=self._headers(), timeout=timeout)
+                except httpx.HTTPError as exc:
+                    r = None
+                    reason = f"{type(exc).__name__}: {exc}"
+                elapsed = time.perf_counter() - started
+                self.latency[kind].observe(elapsed)
+                EXTERNAL_REQUEST_SECONDS.observe(elapsed, service=service)
+            EXTERNAL_REQUESTS.inc(service=service, outcome=_outcome(r))
+            if r is not None:
+                if r.status_code < 400:
+                    self.breaker.record_success()
+                    try:
+                        return r.json()
+                    except ValueError:
+                        return None
+                if r.status_code != 429 and r.status_code < 500:
+                    # 4xx (bad coords, unroutable) — the service itself is fine.
+                    self.breaker.record_success()
+                    logger.warning("ORS %s failed: HTTP %s", kind, r.status_code)
+                    return None
+                reason = f"HTTP {r.status_code}"
+                retry_after = _retry_after_seconds(r)
+            if attempt + 1 < attempts:
+                await asyncio.sleep(self._backoff(attempt, retry_after))
+        self.breaker.record_failure()
+        logger.warning(
+            "ORS %s failed after %d attempt(s) (%s) — falling back to haversine",
+            kind, attempts, reason,
+        )
+        return None
+
+    async def directions(
         self,
         lat1: float,
         lng1: float,
@@ -56,90 +322,232 @@ class ORSClient:
     ) -> Optional[Dict[str, Any]]:
         if not self.enabled():
             return None
-        self._check_directions_budget()
-        url = f"{ORS_BASE}/v2/directions/{profile}"
         body = {
             "coordinates": [[lng1, lat1], [lng2, lat2]],
             "geometry": True,
             "instructions": False,
             "format": "geojson",
         }
-        try:
-            r = requests.post(url, json=body, headers=self._headers(), timeout=15)
-            self._directions_today += 1
-            if r.status_code == 429:
-                logger.warning("ORS rate limit — falling back to haversine")
-                return None
-            r.raise_for_status()
-            data = r.json()
-        except requests.RequestException as exc:
-            logger.warning("ORS directions failed: %s", exc)
+        data = await self._post(
+            "directions",
+            f"{self.base_url}/v2/directions/{profile}",
+            body,
+            _DIRECTIONS_TIMEOUT_S,
+        )
+        if data is None:
             return None
+        return _parse_directions(data, lat1, lng1, lat2, lng2, profile)
 
-        routes = data.get("routes") or []
-        if not routes:
-            return None
-        summary = routes[0].get("summary") or {}
-        geometry = routes[0].get("geometry")
-        coords: List[List[float]] = []
-        if isinstance(geometry, dict) and geometry.get("type") == "LineString":
-            coords = geometry.get("coordinates") or []
-        elif isinstance(geometry, str) and geometry:
-            coords = [[lng1, lat1], [lng2, lat2]]
-        if not coords:
-            coords = [[lng1, lat1], [lng2, lat2]]
-        duration_sec = float(summary.get("duration") or 0)
-        distance_m = float(summary.get("distance") or 0)
-        return {
-            "duration_min": max(int(duration_sec / 60), 1),
-            "distance_km": distance_m / 1000.0,
-            "geometry": coords,
-            "profile": profile,
-        }
+    async def directions_many(
+        self,
+        legs: Sequence[Tuple[float, float, float, float, str]],
+    ) -> List[Optional[Dict[str, Any]]]:
+        """Concurrent directions for (lat1, lng1, lat2, lng2, profile) legs.
 
-    def matrix_durations(
+        Legs past the daily budget come back as None.
+        """
+        async def _one(leg: Tuple[float, float, float, float, str]):
+            try:
+                return await self.directions(*leg)
+            except ORSBudgetExhausted:
+                return None
+
+        return list(await asyncio.gather(*(_one(leg) for leg in legs)))
+
+    async def matrix(
         self,
         coordinates: Sequence[Tuple[float, float]],
         profile: str,
-    ) -> Optional[List[List[float]]]:
-        """Return duration matrix in minutes (NxN). coordinates = [(lat,lng), ...]."""
+        reservation: Optional[Reservation] = None,
+    ) -> Optional[MatrixTable]:
+        """(durations in minutes, distances in km), both NxN. coordinates = [(lat,lng), ...].
+
+        Unreachable pairs are None in the distance table and 0 in durations.
+        With `reservation` the call is paid from it instead of the ledger.
+        """
         if not self.matrix_enabled() or len(coordinates) < 2:
             return None
-        n = len(coordinates)
-        if n > settings.ors_matrix_max_locations:
+        if len(coordinates) > settings.ors_matrix_max_locations:
             return None
-        self._check_matrix_budget()
-        url = f"{ORS_BASE}/v2/matrix/{profile}"
         body = {
             "locations": [[lng, lat] for lat, lng in coordinates],
-            "metrics": ["duration"],
-            "units": "m",
+            "metrics": ["duration", "distance"],
+            "units": "km",
         }
-        try:
-            r = requests.post(url, json=body, headers=self._headers(), timeout=20)
-            self._matrix_today += 1
-            if r.status_code == 429:
-                return None
-            r.raise_for_status()
-            data = r.json()
-        except requests.RequestException as exc:
-            logger.warning("ORS matrix failed: %s", exc)
+        data = await self._post(
+            "matrix",
+            f"{self.base_url}/v2/matrix/{profile}",
+            body,
+            _MATRIX_TIMEOUT_S,
+            reservation,
+        )
+        if data is None:
+            return None
+        return _parse_matrix(data)
+
+    def latency_snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {kind: h.snapshot() for kind, h in self.latency.items()}
+
+    async def aclose(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+            self._slots = None
+
+
+class _LoopThread:
+    """One daemon thread running an event loop for sync callers."""
+
+    def __init__(self) -> None:
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    def _ensure(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=loop.run_forever, name="ors-client-loop", daemon=True,
+                ).start()
+                self._loop = loop
+            return self._loop
+
+    @property
+    def running(self) -> bool:
+        return self._loop is not None and not self._loop.is_closed()
+
+    def run(self, coro: Awaitable[T]) -> T:
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure()).result()
+
+    def stop(self) -> None:
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+
+
+class ORSClient:
+    """Synchronous facade over `AsyncORSClient` (same API as before)."""
+
+    def __init__(self) -> None:
+        self._async = AsyncORSClient()
+        self._runner = _LoopThread()
+
+    @property
+    def aio(self) -> AsyncORSClient:
+        """The underlying async client (for async callers on their own loop)."""
+        return self._async
+
+    @property
+    def breaker(self) -> CircuitBreaker:
+        return self._async.breaker
+
+    @property
+    def api_key(self) -> str:
+        return self._async.api_key
+
+    @property
+    def base_url(self) -> str:
+        return self._async.base_url
+
+    def enabled(self) -> bool:
+        return self._async.enabled()
+
+    def matrix_enabled(self) -> bool:
+        return self._async.matrix_enabled()
+
+    def directions(
+        self,
+        lat1: float,
+        lng1: float,
+        lat2: float,
+        lng2: float,
+        profile: str,
+    ) -> Optional[Dict[str, Any]]:
+        if not self.enabled():
             return None
+        return self._runner.run(self._async.directions(lat1, lng1, lat2, lng2, profile))
 
-        durations = data.get("durations")
-        if not durations:
+    def directions_many(
+        self,
+        legs: Sequence[Tuple[float, float, float, float, str]],
+    ) -> List[Optional[Dict[str, Any]]]:
+        if not self.enabled() or not legs:
+            return [None] * len(legs)
+        return self._runner.run(self._async.directions_many(legs))
+
+    def matrix(
+        self,
+        coordinates: Sequence[Tuple[float, float]],
+        profile: str,
+        reservation: Optional[Reservation] = None,
+    ) -> Optional[MatrixTable]:
+        if not self.matrix_enabled() or len(coordinates) < 2:
             return None
-        out: List[List[float]] = []
-        for row in durations:
-            out.append([(d or 0) / 60.0 for d in row])
-        return out
+        return self._runner.run(self._async.matrix(coordinates, profile, reservation))
+
+    def reserve_matrix(self, calls: int, minimum: Optional[int] = None) -> Optional[Reservation]:
+        """Reserve up to `calls` matrix calls of today's budget (see `BudgetLedger.reserve`)."""
+        if not self.matrix_enabled() or calls <= 0:
+            return None
+        try:
+            return get_budget_ledger().reserve("matrix", calls, minimum)
+        except sqlite3.Error as exc:
+            logger.warning("ORS budget ledger unavailable: %s", exc)
+            return None
+
+    def matrix_durations(
+        self,
+        coordinates: Sequence[Tuple[float, float]],
+        profile: str,
+    ) -> Optional[List[List[float]]]:
+        """Return duration matrix in minutes (NxN). coordinates = [(lat,lng), ...]."""
+        table = self.matrix(coordinates, profile)
+        return table[0] if table else None
+
+    def latency_snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return self._async.latency_snapshot()
+
+    def budget_snapshot(self) -> Dict[str, Any]:
+        """Today's shared quota usage per endpoint."""
+        return get_budget_ledger().snapshot()
+
+    def close(self) -> None:
+        """Close the connection pool and stop the loop thread (shutdown / tests)."""
+        if self._runner.running:
+            self._runner.run(self._async.aclose())
+        self._runner.stop()
 
 
 _ors_client: Optional[ORSClient] = None
+_ors_client_lock = threading.Lock()
 
 
 def get_ors_client() -> ORSClient:
     global _ors_client
     if _ors_client is None:
-        _ors_client = ORSClient()
+        with _ors_client_lock:
+            if _ors_client is None:
+                _ors_client = ORSClient()
     return _ors_client
+
+
+def _forget_client_after_fork() -> None:
+    # The loop thread and pooled sockets belong to the parent: a forked
+    # worker (gunicorn preload) builds its own client on first use.
+    global _ors_client, _ors_client_lock
+    _ors_client = None
+    _ors_client_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_client_after_fork)
+
+
+def close_ors_client() -> None:
+    """Release the shared client's connection pool (app shutdown)."""
+    global _ors_client
+    with _ors_client_lock:
+        client, _ors_client = _ors_client, None
+    if client is not None:
+        client.close()
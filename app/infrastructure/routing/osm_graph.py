@@ -0,0 +1,408 @@
+"""Offline road / foot routing on preprocessed OSM graphs — tier between cache and ORS.
+
+Graphs are built ahead of time from regional OSM extracts by
+`scripts/build_osm_graph.py`: one `<region>-<profile>.npz` per voivodeship and
+profile in `OSM_GRAPH_DIR`, holding node coordinates and a CSR adjacency
+(`offsets`, `targets`) with per-edge travel seconds and metres. Files are
+opened lazily — the directory scan only reads each graph's bounding box.
+
+Queries snap both points to the nearest graph node (grid index, at most
+`osm_snap_max_m` away) and run A* with a straight-line / max-speed heuristic;
+matrices run one bounded Dijkstra per source. Both searches give up after
+settling `osm_max_settled_nodes` nodes: an unreachable target (other island,
+one-way trap) would otherwise expand the whole voivodeship graph on the
+request path. Anything the graphs cannot answer (outside every region, no
+path, search cap hit, snap too far) returns None and the provider falls
+through to ORS / haversine.
+"""
+from __future__ import annotations
+
+import heapq
+import logging
+import math
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.infrastructure.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+GRAPH_FORMAT = 1
+REGIONS = (
+    "malopolskie",
+    "slaskie",
+    "dolnoslaskie",
+    "pomorskie",
+    "mazowieckie",
+    "wielkopolskie",
+)
+PROFILES = ("driving-car", "foot-walking")
+
+FOOT_SPEED_MPS = 5.0 / 3.6
+# Access from the exact point to its snapped node (parking, courtyard, path).
+SNAP_SPEED_MPS = {"driving-car": 20.0 / 3.6, "foot-walking": FOOT_SPEED_MPS}
+_GRID_DEG = 0.01
+_EARTH_M = 6371000.0
+
+MatrixTable = Tuple[List[List[float]], List[List[Optional[float]]]]
+
+
+def _dist_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Equirectangular distance — exact enough for snapping and the A* bound."""
+    x = math.radians(lng2 - lng1) * math.cos(math.radians((lat1 + lat2) / 2))
+    y = math.radians(lat2 - lat1)
+    return _EARTH_M * math.hypot(x, y)
+
+
+class RoadGraph:
+    """Directed CSR graph for one (region, profile)."""
+
+    def __init__(
+        self,
+        lat: np.ndarray,
+        lng: np.ndarray,
+        offsets: np.ndarray,
+        targets: np.ndarray,
+        seconds: np.ndarray,
+        meters: np.ndarray,
+        *,
+        region: str,
+        profile: str,
+    ) -> None:
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lng = np.asarray(lng, dtype=np.float64)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.targets = np.asarray(targets, dtype=np.int64)
+        self.seconds = np.asarray(seconds, dtype=np.float32)
+        self.meters = np.asarray(meters, dtype=np.float32)
+        self.region = region
+        self.profile = profile
+        with np.errstate(divide="ignore", invalid="ignore"):
+            speeds = self.meters / np.maximum(self.seconds, 1e-6)
+        # Admissible A* bound: no edge is faster than this.
+        self.max_speed_mps = float(speeds.max()) if len(speeds) else FOOT_SPEED_MPS
+        self._grid: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._grid_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+    @property
+    def bbox(self) -> Tuple[float, float, float, float]:
+        """(min_lat, min_lng, max_lat, max_lng)."""
+        return (
+            float(self.lat.min()), float(self.lng.min()),
+            float(self.lat.max()), float(self.lng.max()),
+        )
+
+    # ------------------------------------------------------------------
+    # persistence
+    # ------------------------------------------------------------------
+
+    def save(self, path: Path) -> None:
+        np.savez(
+            path,
+            format=np.array([GRAPH_FORMAT]),
+            meta=np.array([self.region, self.profile]),
+            bbox=np.array(self.bbox),
+            lat=self.lat, lng=self.lng,
+            offsets=self.offsets, targets=self.targets,
+            seconds=self.seconds, meters=self.meters,
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> "RoadGraph":
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["format"][0]) != GRAPH_FORMAT:
+                raise ValueError(f"{path}: unsupported graph format {int(data['format'][0])}")
+            region, profile = (str(x) for x in data["meta"])
+            return cls(
+                data["lat"], data["lng"], data["offsets"], data["targets"],
+                data["seconds"], data["meters"], region=region, profile=profile,
+            )
+
+    # ------------------------------------------------------------------
+    # snapping
+    # ------------------------------------------------------------------
+
+    def _cells(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(sorted cell keys, node ids in that order) — built on first snap."""
+        if self._grid is None:
+            with self._grid_lock:
+                if self._grid is None:
+                    keys = self._cell_key(self.lat, self.lng)
+                    order = np.argsort(keys, kind="stable")
+                    self._grid = (keys[order], order)
+        return self._grid
+
+    @staticmethod
+    def _cell_key(lat, lng):
+        row = np.floor((np.asarray(lat) + 90.0) / _GRID_DEG).astype(np.int64)
+        col = np.floor((np.asarray(lng) + 180.0) / _GRID_DEG).astype(np.int64)
+        return row * 100000 + col
+
+    def nearest(self, lat: float, lng: float, max_m: float) -> Optional[Tuple[int, float]]:
+        """(node, metres) of the closest node within `max_m`, else None."""
+        sorted_keys, order = self._cells()
+        reach = max(1, int(math.ceil(max_m / (_GRID_DEG * 111000.0 * 0.6))))
+        base_row = int(math.floor((lat + 90.0) / _GRID_DEG))
+        base_col = int(math.floor((lng + 180.0) / _GRID_DEG))
+        candidates: List[np.ndarray] = []
+        for dr in range(-reach, reach + 1):
+            row_key = (base_row + dr) * 100000
+            lo = np.searchsorted(sorted_keys, row_key + base_col - reach, side="left")
+            hi = np.searchsorted(sorted_keys, row_key + base_col + reach, side="right")
+            if hi > lo:
+                candidates.append(order[lo:hi])
+        if not candidates:
+            return None
+        nodes = np.concatenate(candidates)
+        x = np.radians(self.lng[nodes] - lng) * math.cos(math.radians(lat))
+        y = np.radians(self.lat[nodes] - lat)
+        d = _EARTH_M * np.hypot(x, y)
+        i = int(np.argmin(d))
+        if float(d[i]) > max_m:
+            return None
+        return int(nodes[i]), float(d[i])
+
+    # ------------------------------------------------------------------
+    # search
+    # ------------------------------------------------------------------
+
+    def _edges(self, u: int):
+        start, end = int(self.offsets[u]), int(self.offsets[u + 1])
+        return zip(
+            self.targets[start:end].tolist(),
+            self.seconds[start:end].tolist(),
+            self.meters[start:end].tolist(),
+        )
+
+    def shortest_path(
+        self, src: int, dst: int, max_settled: Optional[int] = None,
+    ) -> Optional[Tuple[float, float, List[int]]]:
+        """A* by travel time: (seconds, metres, node path).
+
+        None if unreachable or not found within `max_settled` settled nodes.
+        """
+        if src == dst:
+            return 0.0, 0.0, [src]
+        goal_lat, goal_lng = float(self.lat[dst]), float(self.lng[dst])
+        speed = self.max_speed_mps
+
+        def h(n: int) -> float:
+            return _dist_m(float(self.lat[n]), float(self.lng[n]), goal_lat, goal_lng) / speed
+
+        best: Dict[int, float] = {src: 0.0}
+        dist: Dict[int, float] = {src: 0.0}
+        parent: Dict[int, int] = {src: -1}
+        heap = [(h(src), 0.0, src)]
+        closed = set()
+        while heap:
+            _, g, u = heapq.heappop(heap)
+            if u in closed:
+                continue
+            if u == dst:
+                path = [u]
+                while parent[path[-1]] != -1:
+                    path.append(parent[path[-1]])
+                return g, dist[u], path[::-1]
+            closed.add(u)
+            if max_settled is not None and len(closed) >= max_settled:
+                logger.debug("A* %s→%s gave up after %d nodes", src, dst, len(closed))
+                return None
+            for v, sec, m in self._edges(u):
+                ng = g + sec
+                if ng < best.get(v, math.inf):
+                    best[v] = ng
+                    dist[v] = dist[u] + m
+                    parent[v] = u
+                    heapq.heappush(heap, (ng + h(v), ng, v))
+        return None
+
+    def one_to_many(
+        self, src: int, targets: Iterable[int], max_settled: Optional[int] = None,
+    ) -> Optional[Dict[int, Tuple[float, float]]]:
+        """Dijkstra from `src`, stopped once every target is settled.
+
+        Targets missing from the result are unreachable; None when the search
+        hit `max_settled` before settling them all.
+        """
+        pending = set(targets)
+        out: Dict[int, Tuple[float, float]] = {}
+        best: Dict[int, float] = {src: 0.0}
+        heap = [(0.0, 0.0, src)]
+        closed = set()
+        while heap and pending:
+            g, m_u, u = heapq.heappop(heap)
+            if u in closed:
+                continue
+            closed.add(u)
+            if u in pending:
+                pending.discard(u)
+                out[u] = (g, m_u)
+            if pending and max_settled is not None and len(closed) >= max_settled:
+                logger.debug("Dijkstra from %s gave up after %d nodes", src, len(closed))
+                return None
+            for v, sec, m in self._edges(u):
+                ng = g + sec
+                if ng < best.get(v, math.inf):
+                    best[v] = ng
+                    heapq.heappush(heap, (ng, m_u + m, v))
+        return out
+
+
+def build_graph(
+    nodes: Sequence[Tuple[float, float]],
+    edges: Iterable[Tuple[int, int, float, float]],
+    *,
+    region: str,
+    profile: str,
+) -> RoadGraph:
+    """CSR graph from (lat, lng) nodes and directed (u, v, metres, seconds) edges."""
+    coords = np.asarray(nodes, dtype=np.float64).reshape(-1, 2)
+    e = np.asarray(list(edges), dtype=np.float64).reshape(-1, 4)
+    src = e[:, 0].astype(np.int64)
+    order = np.argsort(src, kind="stable")
+    counts = np.bincount(src, minlength=len(coords))
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    return RoadGraph(
+        coords[:, 0], coords[:, 1], offsets,
+        e[order, 1].astype(np.int64), e[order, 3], e[order, 2],
+        region=region, profile=profile,
+    )
+
+
+class OfflineRouter:
+    """All graphs in a directory; each loaded on first use."""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = Path(directory)
+        self._bboxes: Dict[Path, Tuple[str, Tuple[float, float, float, float]]] = {}
+        self._graphs: Dict[Path, RoadGraph] = {}
+        self._lock = threading.Lock()
+        for path in sorted(self.directory.glob("*.npz")):
+            try:
+                with np.load(path, allow_pickle=False) as data:
+                    _, profile = (str(x) for x in data["meta"])
+                    self._bboxes[path] = (profile, tuple(float(x) for x in data["bbox"]))
+            except (OSError, KeyError, ValueError) as exc:
+                logger.warning("Skipping OSM graph %s: %s", path, exc)
+
+    def __bool__(self) -> bool:
+        return bool(self._bboxes)
+
+    def _graph_for(self, profile: str, points: Sequence[Tuple[float, float]]) -> Optional[RoadGraph]:
+        margin = 0.01
+        for path, (p, (lat0, lng0, lat1, lng1)) in self._bboxes.items():
+            if p != profile:
+                continue
+            if all(
+                lat0 - margin <= lat <= lat1 + margin and lng0 - margin <= lng <= lng1 + margin
+                for lat, lng in points
+            ):
+                graph = self._graphs.get(path)
+                if graph is None:
+                    with self._lock:
+                        graph = self._graphs.get(path)
+                        if graph is None:
+                            graph = RoadGraph.load(path)
+                            self._graphs[path] = graph
+                            logger.info("Loaded OSM graph %s (%d nodes)", path.name, len(graph))
+                return graph
+        return None
+
+    def covers(self, lat1: float, lng1: float, lat2: float, lng2: float, profile: str) -> bool:
+        """Cheap bbox test (no graph load) — used to keep legs out of ORS batches."""
+        margin = 0.01
+        for p, (a0, b0, a1, b1) in self._bboxes.values():
+            if p == profile and all(
+                a0 - margin <= lat <= a1 + margin and b0 - margin <= lng <= b1 + margin
+                for lat, lng in ((lat1, lng1), (lat2, lng2))
+            ):
+                return True
+        return False
+
+    def _snap(self, graph: RoadGraph, lat: float, lng: float) -> Optional[Tuple[int, float]]:
+        return graph.nearest(lat, lng, float(settings.osm_snap_max_m))
+
+    def route(
+        self, lat1: float, lng1: float, lat2: float, lng2: float, profile: str,
+    ) -> Optional[Dict[str, object]]:
+        """Same shape as `ORSClient.directions` (duration_min, distance_km, geometry)."""
+        graph = self._graph_for(profile, [(lat1, lng1), (lat2, lng2)])
+        if graph is None:
+            return None
+        a, b = self._snap(graph, lat1, lng1), self._snap(graph, lat2, lng2)
+        if a is None or b is None:
+            return None
+        found = graph.shortest_path(a[0], b[0], int(settings.osm_max_settled_nodes))
+        if found is None:
+            return None
+        seconds, meters, path = found
+        access_m = a[1] + b[1]
+        seconds += access_m / SNAP_SPEED_MPS.get(profile, FOOT_SPEED_MPS)
+        geometry = [[lng1, lat1]]
+        geometry += [[float(graph.lng[n]), float(graph.lat[n])] for n in path]
+        geometry.append([lng2, lat2])
+        return {
+            "duration_min": max(int(seconds / 60), 1),
+            "distance_km": (meters + access_m) / 1000.0,
+            "geometry": geometry,
+            "profile": profile,
+        }
+
+    def matrix(
+        self, coordinates: Sequence[Tuple[float, float]], profile: str,
+    ) -> Optional[MatrixTable]:
+        """(durations in minutes, distances in km) like `ORSClient.matrix`."""
+        if len(coordinates) < 2:
+            return None
+        graph = self._graph_for(profile, coordinates)
+        if graph is None:
+            return None
+        snapped = [self._snap(graph, lat, lng) for lat, lng in coordinates]
+        if any(s is None for s in snapped):
+            return None
+        speed = SNAP_SPEED_MPS.get(profile, FOOT_SPEED_MPS)
+        n = len(coordinates)
+        durations = [[0.0] * n for _ in range(n)]
+        distances: List[List[Optional[float]]] = [[0.0] * n for _ in range(n)]
+        nodes = [s[0] for s in snapped]
+        max_settled = int(settings.osm_max_settled_nodes)
+        for i, (src, access_i) in enumerate(snapped):
+            reached = graph.one_to_many(src, nodes, max_settled)
+            if reached is None:
+                return None
+            for j, (dst, access_j) in enumerate(snapped):
+                if i == j:
+                    continue
+                hit = reached.get(dst)
+                if hit is None:
+                    distances[i][j] = None
+                    continue
+                access = access_i + access_j
+                durations[i][j] = (hit[0] + access / speed) / 60.0
+                distances[i][j] = (hit[1] + access) / 1000.0
+        return durations, distances
+
+
+_router: Optional[OfflineRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_offline_router() -> Optional[OfflineRouter]:
+    """Router over `OSM_GRAPH_DIR`, or None when disabled / no graphs present."""
+    global _router
+    if not settings.osm_routing_enabled:
+        return None
+    directory = Path(settings.osm_graph_dir)
+    router = _router
+    if router is None or router.directory != directory:
+        with _router_lock:
+            if _router is None or _router.directory != directory:
+                _router = OfflineRouter(directory)
+            router = _router
+    return router if router else None
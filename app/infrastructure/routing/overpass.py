@@ -4,14 +4,25 @@ from __future__ import annotations
 import hashlib
 import logging
 import time
-from typing import Any, Dict, List, Optional, Sequence
+from typing import List, Optional
 
 import requests
 
+from app.infrastructure.metrics import EXTERNAL_REQUEST_SECONDS, EXTERNAL_REQUESTS
+
 logger = logging.getLogger(__name__)
 
 OVERPASS_URL = "https://overpass-api.de/api/interpreter"
 
+
+class OverpassTruncated(Exception):
+    """The answer hit `out center <limit>` — the area holds more elements."""
+
+    def __init__(self, limit: int, pois: List[dict]) -> None:
+        super().__init__(f"Overpass answer truncated at {limit} elements")
+        self.limit = limit
+        self.pois = pois
+
 _OSM_TAG_TO_OUR = {
     "museum": ("museum_heritage",),
     "gallery": ("museum_heritage",),
@@ -101,26 +112,33 @@ def normalize_overpass_element(el: dict, city: str) -> Optional[dict]:
     }
 
 
-def fetch_tourism_near(
-    lat: float,
-    lng: float,
-    radius_m: int = 2500,
-    city: str = "",
-    limit: int = 25,
-) -> List[dict]:
-    """Query Overpass for tourism/leisure POIs near a point."""
+_TOURISM_SELECTORS = (
+    'node["tourism"]',
+    'way["tourism"]',
+    'node["leisure"~"park|garden|nature_reserve"]',
+    'way["leisure"~"park|garden|nature_reserve"]',
+    'node["historic"]',
+    'way["historic"]',
+)
+
+
+def _run_query(
+    area: str, city: str, limit: int, *, complete: bool = False,
+) -> Optional[List[dict]]:
+    """POIs matching the tourism selectors in `area`; None when Overpass failed.
+
+    With `complete`, an answer cut off at `limit` elements raises
+    `OverpassTruncated` (carrying the partial POIs) instead of being returned.
+    """
+    body = "\n".join(f"      {sel}{area};" for sel in _TOURISM_SELECTORS)
     query = f"""
     [out:json][timeout:25];
     (
-      node["tourism"](around:{radius_m},{lat},{lng});
-      way["tourism"](around:{radius_m},{lat},{lng});
-      node["leisure"~"park|garden|nature_reserve"](around:{radius_m},{lat},{lng});
-      way["leisure"~"park|garden|nature_reserve"](around:{radius_m},{lat},{lng});
-      node["historic"](around:{radius_m},{lat},{lng});
-      way["historic"](around:{radius_m},{lat},{lng});
+{body}
     );
     out center {limit};
     """
+    started = time.perf_counter()
     try:
         r = requests.post(
             OVERPASS_URL,
@@ -130,9 +148,13 @@ def fetch_tourism_near(
         )
         r.raise_for_status()
         data = r.json()
-    except requests.RequestException as exc:
+    except (requests.RequestException, ValueError) as exc:
         logger.warning("Overpass query failed: %s", exc)
-        return []
+        EXTERNAL_REQUESTS.inc(service="overpass", outcome="error")
+        return None
+    finally:
+        EXTERNAL_REQUEST_SECONDS.observe(time.perf_counter() - started, service="overpass")
+    EXTERNAL_REQUESTS.inc(service="overpass", outcome="ok")
 
     elements = data.get("elements") or []
     out: List[dict] = []
@@ -142,21 +164,32 @@ def fetch_tourism_near(
             out.append(poi)
         if len(out) >= limit:
             break
+    if complete and len(elements) >= limit:
+        raise OverpassTruncated(limit, out)
     return out
 
 
-_overpass_cache: Dict[str, tuple] = {}
-_CACHE_TTL = 3600
+def fetch_tourism_near(
+    lat: float,
+    lng: float,
+    radius_m: int = 2500,
+    city: str = "",
+    limit: int = 25,
+) -> List[dict]:
+    """Query Overpass for tourism/leisure POIs near a point."""
+    return _run_query(f"(around:{radius_m},{lat},{lng})", city, limit) or []
+
 
+def fetch_tourism_bbox(
+    south: float,
+    west: float,
+    north: float,
+    east: float,
+    limit: int = 1000,
+) -> Optional[List[dict]]:
+    """Every tourism/leisure POI in a bounding box (one tile), without a city.
 
-def fetch_tourism_cached(
-    lat: float, lng: float, city: str, radius_m: int = 2500,
-) -> List[dict]:
-    key = f"{round(lat, 3)}|{round(lng, 3)}|{radius_m}|{city}"
-    now = time.time()
-    hit = _overpass_cache.get(key)
-    if hit and now - hit[0] < _CACHE_TTL:
-        return hit[1]
-    pois = fetch_tourism_near(lat, lng, radius_m=radius_m, city=city)
-    _overpass_cache[key] = (now, pois)
-    return pois
+    None when the query failed, so a failed tile is not cached as empty;
+    `OverpassTruncated` when the box holds `limit` elements or more.
+    """
+    return _run_query(f"({south},{west},{north},{east})", "", limit, complete=True)
@@ -0,0 +1,246 @@
+"""Persistent Overpass cache on fixed geohash tiles — SQLite (WAL) under `ORS_CACHE_DIR`.
+
+The supplement used to query Overpass around each city centre at request
+time and kept the answer in process memory only. Now Overpass is queried per
+geohash tile (precision `overpass_tile_precision`; 5 = ~4.9 x 3.1 km here) and
+every tile is stored for `overpass_tile_ttl_days`. A lookup unions the tiles
+that cover the search circle and keeps the POIs inside it, nearest first.
+
+`scripts/prefetch_overpass_tiles.py` fills the tiles for every catalog city,
+so at request time the supplement is a local lookup. Expired tiles are still
+served until the next prefetch. Tiles that were never fetched are only queried
+live when `overpass_live_fetch_enabled` is set.
+
+A tile whose answer hits the Overpass element limit (dense old towns) is
+fetched again as its 32 sub-tiles (precision + 1) and stored as their union.
+If a sub-tile is still truncated the tile is logged and not stored, so a
+cut-off answer is never cached as complete for the whole TTL.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.infrastructure.config.settings import settings
+from app.infrastructure.metrics import CACHE_LOOKUPS
+from app.infrastructure.routing.geohash import covering_tiles, tile_bbox, tile_children
+from app.infrastructure.routing.haversine import haversine_km
+from app.infrastructure.routing.overpass import OverpassTruncated, fetch_tourism_bbox
+from app.infrastructure.routing.route_store import cache_dir
+
+logger = logging.getLogger(__name__)
+
+DB_FILENAME = "overpass_tiles.sqlite3"
+# Truncated tiles are split at most this many geohash levels.
+_MAX_SPLIT_DEPTH = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tiles (
+    tile TEXT PRIMARY KEY,
+    fetched_ts REAL NOT NULL,
+    pois TEXT NOT NULL
+);
+"""
+
+
+# ----------------------------------------------------------------------
+# store
+# ----------------------------------------------------------------------
+
+class OverpassTileStore:
+    """tile → (fetched_ts, POIs with no city)."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._conn = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(
+            str(self.path), timeout=10, isolation_level=None, check_same_thread=False,
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        return conn
+
+    def _db(self) -> sqlite3.Connection:
+        # A connection must not cross fork() — reopen in the child.
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._conn = self._connect()
+        return self._conn
+
+    def get_many(self, tiles: Iterable[str]) -> Dict[str, Tuple[float, List[dict]]]:
+        wanted = list(dict.fromkeys(tiles))
+        if not wanted:
+            return {}
+        marks = ",".join("?" * len(wanted))
+        with self._lock:
+            rows = self._db().execute(
+                f"SELECT tile, fetched_ts, pois FROM tiles WHERE tile IN ({marks})", wanted,
+            ).fetchall()
+        out: Dict[str, Tuple[float, List[dict]]] = {}
+        for tile, fetched, pois in rows:
+            try:
+                out[tile] = (fetched, json.loads(pois))
+            except ValueError:
+                continue
+        return out
+
+    def put(self, tile: str, pois: Sequence[dict], now: Optional[float] = None) -> None:
+        with self._lock:
+            self._db().execute(
+                "INSERT OR REPLACE INTO tiles (tile, fetched_ts, pois) VALUES (?, ?, ?)",
+                (tile, time.time() if now is None else now, json.dumps(list(pois), ensure_ascii=False)),
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._db().execute("SELECT COUNT(*) FROM tiles").fetchone()
+        return int(count)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db().execute("DELETE FROM tiles")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_store: Optional[OverpassTileStore] = None
+_store_lock = threading.Lock()
+
+
+def get_tile_store() -> OverpassTileStore:
+    """Process-wide store for the current `ORS_CACHE_DIR` (reopened if it changes)."""
+    global _store
+    path = cache_dir() / DB_FILENAME
+    store = _store
+    if store is not None and store.path == path:
+        return store
+    with _store_lock:
+        if _store is None or _store.path != path:
+            if _store is not None:
+                _store.close()
+            _store = OverpassTileStore(path)
+        return _store
+
+
+# ----------------------------------------------------------------------
+# fetch / lookup
+# ----------------------------------------------------------------------
+
+def _fetch_pois(tile: str, depth: int = 0) -> Optional[List[dict]]:
+    """Every POI of `tile`, splitting it while Overpass truncates the answer."""
+    try:
+        return fetch_tourism_bbox(*tile_bbox(tile))
+    except OverpassTruncated as exc:
+        if depth >= _MAX_SPLIT_DEPTH:
+            raise
+        logger.info("Overpass tile %s truncated at %d elements — splitting", tile, exc.limit)
+    merged: Dict[str, dict] = {}
+    for child in tile_children(tile):
+        pois = _fetch_pois(child, depth + 1)
+        if pois is None:
+            return None
+        for poi in pois:
+            merged.setdefault(poi["id"], poi)
+    return list(merged.values())
+
+
+def _fetch_tile(store: OverpassTileStore, tile: str) -> Optional[List[dict]]:
+    try:
+        pois = _fetch_pois(tile)
+    except OverpassTruncated as exc:
+        logger.warning(
+            "Overpass tile %s still truncated at %d elements after splitting — not stored",
+            tile, exc.limit,
+        )
+        return None
+    if pois is None:
+        return None
+    store.put(tile, pois)
+    return pois
+
+
+def prefetch_tiles(
+    centres: Iterable[Tuple[float, float]],
+    radius_m: Optional[float] = None,
+    *,
+    force: bool = False,
+    pause_s: float = 0.0,
+) -> Tuple[int, int]:
+    """Fetch every tile around `centres` that is missing or past the TTL.
+
+    Returns (fetched, failed). Fresh tiles are skipped unless `force`;
+    `pause_s` spaces out the queries (public Overpass rate limits).
+    """
+    radius = settings.ors_overpass_radius_m if radius_m is None else radius_m
+    precision = settings.overpass_tile_precision
+    tiles = list(dict.fromkeys(
+        t for lat, lng in centres for t in covering_tiles(lat, lng, radius, precision)
+    ))
+    store = get_tile_store()
+    ttl = settings.overpass_tile_ttl_days * 86400
+    now = time.time()
+    have = {} if force else store.get_many(tiles)
+    fetched = failed = 0
+    for tile in tiles:
+        hit = have.get(tile)
+        if hit is not None and now - hit[0] < ttl:
+            continue
+        if pause_s and fetched + failed:
+            time.sleep(pause_s)
+        if _fetch_tile(store, tile) is None:
+            failed += 1
+        else:
+            fetched += 1
+    return fetched, failed
+
+
+def fetch_tourism_cached(
+    lat: float, lng: float, city: str, radius_m: int = 2500, limit: int = 25,
+) -> List[dict]:
+    """Overpass POIs within `radius_m` of (lat, lng), nearest first, from the tile store."""
+    store = get_tile_store()
+    tiles = covering_tiles(lat, lng, radius_m, settings.overpass_tile_precision)
+    try:
+        found = store.get_many(tiles)
+    except sqlite3.Error as exc:
+        logger.warning("Overpass tile store read failed: %s", exc)
+        found = {}
+    missing = [t for t in tiles if t not in found]
+    if len(tiles) > len(missing):
+        CACHE_LOOKUPS.inc(len(tiles) - len(missing), cache="overpass_tile", result="hit")
+    if missing:
+        CACHE_LOOKUPS.inc(len(missing), cache="overpass_tile", result="miss")
+        if settings.overpass_live_fetch_enabled:
+            for tile in missing:
+                pois = _fetch_tile(store, tile)
+                if pois is not None:
+                    found[tile] = (time.time(), pois)
+        else:
+            logger.info(
+                "Overpass: %d/%d tiles near %s not prefetched (scripts/prefetch_overpass_tiles.py)",
+                len(missing), len(tiles), city or f"{lat:.3f},{lng:.3f}",
+            )
+
+    nearby: Dict[str, Tuple[float, dict]] = {}
+    radius_km = radius_m / 1000.0
+    for _, pois in found.values():
+        for poi in pois:
+            d = haversine_km(lat, lng, poi["lat"], poi["lng"])
+            if d <= radius_km and poi["id"] not in nearby:
+                nearby[poi["id"]] = (d, poi)
+    ranked = sorted(nearby.values(), key=lambda x: (x[0], x[1]["id"]))[:limit]
+    return [{**poi, "city": city, "hub_city": city} for _, poi in ranked]
@@ -0,0 +1,244 @@
+"""Precomputed per-city POI travel matrices — shipped with the catalog snapshot.
+
+`scripts/build_poi_matrices.py` routes every pair of catalog POIs in a city
+(and in each multi-city cluster) once, per profile, with the offline OSM graph
+or ORS Matrix. Each matrix is three files in `POI_MATRIX_DIR`:
+
+    <scope>.<profile>.json            ids, coordinates, source, catalog hash
+    <scope>.<profile>.durations.npy   float32 minutes, NaN = no route
+    <scope>.<profile>.distances.npy   float32 km
+
+The arrays are memory-mapped, so every worker shares the same pages and a
+lookup is two dict hits and one array read. A pair is only answered when both
+POIs are in the same matrix and still sit at the coordinates the matrix was
+built for — a moved POI falls through to the live tiers until the next build.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import math
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.infrastructure.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+MATRIX_FORMAT = 1
+# Catalog coordinates are 6-decimal; anything beyond that is a moved POI.
+_COORD_TOLERANCE = 1e-5
+
+
+def _paths(directory: Path, name: str) -> Tuple[Path, Path, Path]:
+    return (
+        directory / f"{name}.json",
+        directory / f"{name}.durations.npy",
+        directory / f"{name}.distances.npy",
+    )
+
+
+class PoiMatrix:
+    """Pairwise durations/distances between the POIs of one (scope, profile)."""
+
+    def __init__(
+        self,
+        ids: Sequence[str],
+        coords: Sequence[Tuple[float, float]],
+        durations: np.ndarray,
+        distances: np.ndarray,
+        *,
+        scope: str,
+        profile: str,
+        source: str,
+        meta: Optional[dict] = None,
+    ) -> None:
+        self.ids = [str(i) for i in ids]
+        self.coords = [(float(lat), float(lng)) for lat, lng in coords]
+        self.durations = durations
+        self.distances = distances
+        self.scope = scope
+        self.profile = profile
+        self.source = source
+        self.meta = dict(meta or {})
+        self.rows: Dict[str, int] = {pid: i for i, pid in enumerate(self.ids)}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def name(self) -> str:
+        return f"{self.scope}.{self.profile}"
+
+    def row(self, poi: dict) -> Optional[int]:
+        """Row of `poi`, or None when unknown or moved since the build."""
+        pid = poi.get("id")
+        i = self.rows.get(str(pid)) if pid is not None else None
+        if i is None:
+            return None
+        try:
+            lat, lng = float(poi["lat"]), float(poi["lng"])
+        except (KeyError, TypeError, ValueError):
+            return None
+        mlat, mlng = self.coords[i]
+        if abs(lat - mlat) > _COORD_TOLERANCE or abs(lng - mlng) > _COORD_TOLERANCE:
+            return None
+        return i
+
+    def cell(self, i: int, j: int) -> Optional[Tuple[float, float]]:
+        minutes = float(self.durations[i, j])
+        if math.isnan(minutes):
+            return None
+        km = float(self.distances[i, j])
+        return minutes, (0.0 if math.isnan(km) else km)
+
+    def save(self, directory: Path) -> Path:
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        meta_path, dur_path, dist_path = _paths(directory, self.name)
+        np.save(dur_path, np.asarray(self.durations, dtype=np.float32))
+        np.save(dist_path, np.asarray(self.distances, dtype=np.float32))
+        meta = {
+            **self.meta,
+            "format": MATRIX_FORMAT,
+            "scope": self.scope,
+            "profile": self.profile,
+            "source": self.source,
+            "ids": self.ids,
+            "coords": [[lat, lng] for lat, lng in self.coords],
+        }
+        meta_path.write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+        return meta_path
+
+    @classmethod
+    def load(cls, meta_path: Path) -> "PoiMatrix":
+        meta_path = Path(meta_path)
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        if meta.get("format") != MATRIX_FORMAT:
+            raise ValueError(f"unsupported POI matrix format {meta.get('format')!r}")
+        name = meta_path.name[: -len(".json")]
+        _, dur_path, dist_path = _paths(meta_path.parent, name)
+        durations = np.load(dur_path, mmap_mode="r")
+        distances = np.load(dist_path, mmap_mode="r")
+        n = len(meta["ids"])
+        if durations.shape != (n, n) or distances.shape != (n, n):
+            raise ValueError(f"{name}: arrays do not match {n} ids")
+        extra = {k: v for k, v in meta.items() if k not in ("ids", "coords")}
+        return cls(
+            meta["ids"], meta["coords"], durations, distances,
+            scope=meta["scope"], profile=meta["profile"], source=meta["source"], meta=extra,
+        )
+
+
+class PoiMatrixSet:
+    """Every matrix in a directory, indexed by (profile, POI id)."""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = Path(directory)
+        self.matrices: List[PoiMatrix] = []
+        self._index: Dict[Tuple[str, str], List[PoiMatrix]] = {}
+        for meta_path in sorted(self.directory.glob("*.json")):
+            try:
+                matrix = PoiMatrix.load(meta_path)
+            except (OSError, KeyError, ValueError) as exc:
+                logger.warning("Skipping POI matrix %s: %s", meta_path.name, exc)
+                continue
+            self.matrices.append(matrix)
+            for pid in matrix.ids:
+                self._index.setdefault((matrix.profile, pid), []).append(matrix)
+        if self.matrices:
+            logger.info(
+                "POI matrices: %d loaded from %s (%d POIs)",
+                len(self.matrices), self.directory,
+                len({pid for _, pid in self._index}),
+            )
+
+    def __bool__(self) -> bool:
+        return bool(self.matrices)
+
+    def _pair(self, a: dict, b: dict, profile: str) -> Optional[Tuple[PoiMatrix, int, int]]:
+        ida, idb = a.get("id"), b.get("id")
+        if ida is None or idb is None:
+            return None
+        for matrix in self._index.get((profile, str(ida)), ()):
+            i, j = matrix.row(a), matrix.row(b)
+            if i is not None and j is not None:
+                return matrix, i, j
+        return None
+
+    def covers(self, a: dict, b: dict, profile: str) -> bool:
+        return self._pair(a, b, profile) is not None
+
+    def lookup(self, a: dict, b: dict, profile: str) -> Optional[Tuple[float, float]]:
+        """(minutes, km) for the leg a → b, or None."""
+        hit = self._pair(a, b, profile)
+        if hit is None:
+            return None
+        matrix, i, j = hit
+        return matrix.cell(i, j)
+
+    def submatrix(self, pois: Sequence[dict], profile: str) -> Optional[List[List[float]]]:
+        """Minutes NxN when one matrix holds every POI, else None."""
+        if len(pois) < 2 or pois[0].get("id") is None:
+            return None
+        for matrix in self._index.get((profile, str(pois[0]["id"])), ()):
+            rows = [matrix.row(p) for p in pois]
+            if any(r is None for r in rows):
+                continue
+            block = np.asarray(matrix.durations[np.ix_(rows, rows)], dtype=float)
+            if np.isnan(block).any():
+                continue
+            return block.tolist()
+        return None
+
+
+_matrices: Optional[PoiMatrixSet] = None
+_matrices_lock = threading.Lock()
+
+
+def get_poi_matrices() -> Optional[PoiMatrixSet]:
+    """Matrices in `POI_MATRIX_DIR`, or None when disabled / none shipped."""
+    global _matrices
+    if not settings.poi_matrix_enabled:
+        return None
+    directory = Path(settings.poi_matrix_dir)
+    matrices = _matrices
+    if matrices is None or matrices.directory != directory:
+        with _matrices_lock:
+            if _matrices is None or _matrices.directory != directory:
+                _matrices = PoiMatrixSet(directory)
+            matrices = _matrices
+    return matrices if matrices else None
+
+
+def build_poi_matrix(
+    pois: Sequence[dict],
+    profile: str,
+    durations: Sequence[Sequence[Optional[float]]],
+    distances: Sequence[Sequence[Optional[float]]],
+    *,
+    scope: str,
+    source: str,
+    catalog: Optional[dict] = None,
+) -> PoiMatrix:
+    """Pack routed tables (None = no route) for `pois` into a PoiMatrix."""
+    def _array(table) -> np.ndarray:
+        return np.array(
+            [[np.nan if v is None else float(v) for v in row] for row in table],
+            dtype=np.float32,
+        ).reshape(len(pois), len(pois))
+
+    return PoiMatrix(
+        [str(p["id"]) for p in pois],
+        [(float(p["lat"]), float(p["lng"])) for p in pois],
+        _array(durations),
+        _array(distances),
+        scope=scope,
+        profile=profile,
+        source=source,
+        meta={"built_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), **(catalog or {})},
+    )
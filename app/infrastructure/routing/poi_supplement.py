@@ -6,12 +6,13 @@ from typing import Dict, List, Optional, Sequence
 
 from app.infrastructure.config.settings import settings
 from app.infrastructure.routing.dedup import dedupe_external_list, filter_external_duplicates
-from app.infrastructure.routing.overpass import fetch_tourism_cached
+from app.infrastructure.routing.overpass_tiles import fetch_tourism_cached
+from app.infrastructure.routing.ors_client import is_ors_offline
 
 logger = logging.getLogger(__name__)
 
 
-def _city_center(pool: Sequence[dict], city: str) -> Optional[tuple]:
+def city_center(pool: Sequence[dict], city: str) -> Optional[tuple]:
     coords = [
         (float(p["lat"]), float(p["lng"]))
         for p in pool
@@ -43,7 +44,7 @@ def should_supplement(
     Triggers: empty/sparse day after fill, large free_time blocks, dedup exhaustion.
     No proactive supplement on merely sparse pre-check days (regression vs FIX #220).
     """
-    if not settings.ors_poi_supplement_enabled or not settings.ors_enabled:
+    if not settings.ors_poi_supplement_enabled or not settings.ors_enabled or is_ors_offline():
         return False
     if duplication_gap:
         return True
@@ -66,8 +67,9 @@ def supplement_external_pois(
     """
     Fetch Overpass POIs near city center, dedupe against Excel, score by prefs.
     Returns normalized POI dicts ready for gap-fill (never replaces Excel).
+    Overpass is read from the prefetched tile store (overpass_tiles.py).
     """
-    center = _city_center(excel_pool, city)
+    center = city_center(excel_pool, city)
     if not center:
         return []
     lat, lng = center
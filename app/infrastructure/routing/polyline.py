@@ -0,0 +1,171 @@
+"""Route geometry compaction — Douglas–Peucker simplification + polyline6.
+
+ORS Directions polylines carry a point every few metres; on a plan map that
+detail is invisible but it is stored in the route cache, in every
+`plan_versions.days_json` snapshot and sent on every response. Geometry is
+simplified once, when a route enters the cache (tolerance
+`route_geometry_tolerance_m`), and stored / optionally served as a polyline6
+string (Google encoded polyline, 1e-6 degree precision — lossless for ORS
+coordinates, which have at most 6 decimals).
+
+Points are GeoJSON order [lng, lat] everywhere in the app; the encoded string
+follows the polyline convention (lat first) so standard decoders
+(`@mapbox/polyline`, `polyline.decode(s, 6)`) read it directly.
+"""
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.infrastructure.config.settings import settings
+
+POLYLINE_PRECISION = 6
+# Persisted / wire key replacing `geometry` + `geometry_latlng` on a transit item.
+POLYLINE_KEY = "geometry_polyline6"
+GEOMETRY_FORMATS = ("geojson", "polyline6")
+_EARTH_M = 6371000.0
+
+
+def _offset_m(origin: Sequence[float], pt: Sequence[float]) -> tuple:
+    """Local equirectangular (x, y) metres of `pt` from `origin` ([lng, lat])."""
+    x = math.radians(pt[0] - origin[0]) * math.cos(math.radians(origin[1])) * _EARTH_M
+    y = math.radians(pt[1] - origin[1]) * _EARTH_M
+    return x, y
+
+
+def _segment_distance_m(pt, a, b) -> float:
+    px, py = _offset_m(a, pt)
+    bx, by = _offset_m(a, b)
+    seg = bx * bx + by * by
+    if seg == 0.0:
+        return math.hypot(px, py)
+    t = max(0.0, min(1.0, (px * bx + py * by) / seg))
+    return math.hypot(px - t * bx, py - t * by)
+
+
+def simplify(points: Sequence[Sequence[float]], tolerance_m: Optional[float] = None) -> List[List[float]]:
+    """Douglas–Peucker: drop points closer than `tolerance_m` to the simplified line.
+
+    Endpoints are always kept; tolerance <= 0 returns the input unchanged.
+    """
+    pts = [list(p[:2]) for p in points]
+    tol = settings.route_geometry_tolerance_m if tolerance_m is None else tolerance_m
+    if len(pts) < 3 or tol <= 0:
+        return pts
+    keep = [False] * len(pts)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(pts) - 1)]
+    while stack:
+        first, last = stack.pop()
+        worst, worst_d = None, tol
+        for i in range(first + 1, last):
+            d = _segment_distance_m(pts[i], pts[first], pts[last])
+            if d > worst_d:
+                worst, worst_d = i, d
+        if worst is not None:
+            keep[worst] = True
+            stack.append((first, worst))
+            stack.append((worst, last))
+    return [p for p, k in zip(pts, keep) if k]
+
+
+def _encode_value(value: int, out: List[str]) -> None:
+    value = ~(value << 1) if value < 0 else value << 1
+    while value >= 0x20:
+        out.append(chr((0x20 | (value & 0x1F)) + 63))
+        value >>= 5
+    out.append(chr(value + 63))
+
+
+def encode_polyline(points: Sequence[Sequence[float]], precision: int = POLYLINE_PRECISION) -> str:
+    """[[lng, lat], ...] → encoded polyline string."""
+    factor = 10 ** precision
+    out: List[str] = []
+    prev_lat = prev_lng = 0
+    for lng, lat in (p[:2] for p in points):
+        ilat, ilng = int(round(lat * factor)), int(round(lng * factor))
+        _encode_value(ilat - prev_lat, out)
+        _encode_value(ilng - prev_lng, out)
+        prev_lat, prev_lng = ilat, ilng
+    return "".join(out)
+
+
+def decode_polyline(encoded: str, precision: int = POLYLINE_PRECISION) -> List[List[float]]:
+    """Encoded polyline string → [[lng, lat], ...]."""
+    factor = float(10 ** precision)
+    coords: List[List[float]] = []
+    index = lat = lng = 0
+    n = len(encoded)
+    while index < n:
+        deltas = []
+        for _ in range(2):
+            shift = result = 0
+            while True:
+                if index >= n:
+                    raise ValueError("truncated polyline")
+                b = ord(encoded[index]) - 63
+                index += 1
+                result |= (b & 0x1F) << shift
+                shift += 5
+                if b < 0x20:
+                    break
+            deltas.append(~(result >> 1) if result & 1 else result >> 1)
+        lat += deltas[0]
+        lng += deltas[1]
+        coords.append([round(lng / factor, precision), round(lat / factor, precision)])
+    return coords
+
+
+# ----------------------------------------------------------------------
+# plan day dicts (persisted snapshots / wire format)
+# ----------------------------------------------------------------------
+
+def _is_transit(item: Dict[str, Any]) -> bool:
+    return str(item.get("type", "")).rsplit(".", 1)[-1].lower() == "transit"
+
+
+def pack_item_geometry(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Transit item dict with `geometry`/`geometry_latlng` replaced by polyline6."""
+    geometry = item.get("geometry")
+    if not _is_transit(item) or not geometry or isinstance(geometry, str):
+        return item
+    out = dict(item)
+    out[POLYLINE_KEY] = encode_polyline(geometry)
+    out["geometry"] = None
+    out["geometry_latlng"] = None
+    return out
+
+
+def unpack_item_geometry(item: Dict[str, Any]) -> Dict[str, Any]:
+    encoded = item.get(POLYLINE_KEY)
+    if not encoded or not _is_transit(item):
+        return item
+    out = dict(item)
+    geometry = decode_polyline(out.pop(POLYLINE_KEY))
+    out["geometry"] = geometry
+    out["geometry_latlng"] = [[lat, lng] for lng, lat in geometry]
+    return out
+
+
+def _map_days(days_json: Dict[str, Any], fn) -> Dict[str, Any]:
+    days = days_json.get("days") if isinstance(days_json, dict) else None
+    if not isinstance(days, list):
+        return days_json
+    return {
+        **days_json,
+        "days": [
+            {**day, "items": [fn(it) if isinstance(it, dict) else it for it in day.get("items") or []]}
+            if isinstance(day, dict) else day
+            for day in days
+        ],
+    }
+
+
+def pack_days_geometry(days_json: Dict[str, Any]) -> Dict[str, Any]:
+    """`{"days": [...]}` snapshot with every transit polyline encoded."""
+    return _map_days(days_json, pack_item_geometry)
+
+
+def unpack_days_geometry(days_json: Dict[str, Any]) -> Dict[str, Any]:
+    """Inverse of `pack_days_geometry`; snapshots stored before it pass through."""
+    return _map_days(days_json, unpack_item_geometry)
@@ -1,22 +1,76 @@
-"""Unified travel route provider — cache → ORS → haversine."""
+"""Unified travel route provider — POI matrices → cache → offline OSM graph → ORS → haversine."""
 from __future__ import annotations
 
 import logging
-from typing import Any, Dict, Optional
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 from app.infrastructure.config.settings import settings
-from app.infrastructure.routing.cache import get_cached, make_route_key, set_cached
+from app.infrastructure.routing.cache import (
+    get_cached,
+    get_cached_many,
+    make_route_key,
+    set_cached,
+)
 from app.infrastructure.routing.haversine import haversine_route, resolve_profile
 from app.infrastructure.routing.models import RouteResult
 from app.infrastructure.routing.ors_client import ORSBudgetExhausted, get_ors_client
+from app.infrastructure.routing.osm_graph import get_offline_router
+from app.infrastructure.routing.poi_matrix import PoiMatrixSet, get_poi_matrices
+from app.infrastructure.routing.polyline import simplify
 
 logger = logging.getLogger(__name__)
 
-_session: Dict[str, RouteResult] = {}
+# Matrix-only legs: real ORS duration/distance, straight-line geometry.
+MATRIX_SOURCE = "ors_matrix"
+# Catalog POI pairs from the precomputed matrices shipped with the catalog.
+POI_MATRIX_SOURCE = "poi_matrix"
+# Sources whose polyline is a straight stand-in (see `needs_route_geometry`).
+_STRAIGHT_SOURCES = frozenset({
+    MATRIX_SOURCE, POI_MATRIX_SOURCE, "haversine", "estimated_road", "estimated_walk",
+})
+
+
+@dataclass
+class RouteSession:
+    """Per-request overlay on top of the shared route cache."""
+
+    routes: Dict[str, RouteResult] = field(default_factory=dict)
+    # Legs resolved for timing only (matrix batches, or haversine when a
+    # duration-only leg was not prefetched); never served as map geometry.
+    durations: Dict[str, RouteResult] = field(default_factory=dict)
+
+
+# A contextvar, not a module dict: concurrent previews in the threadpool each
+# see their own session and never clear one another's.
+_session: ContextVar[Optional[RouteSession]] = ContextVar(
+    "route_session", default=None,
+)
 
 
 def clear_route_session() -> None:
-    _session.clear()
+    """Start a fresh session for the current request context."""
+    _session.set(RouteSession())
+
+
+@contextmanager
+def route_session() -> Iterator[RouteSession]:
+    """Scoped session; the previous one (if any) is restored on exit."""
+    token = _session.set(RouteSession())
+    try:
+        yield _session.get()
+    finally:
+        _session.reset(token)
+
+
+def _remember(key: str, result: RouteResult) -> RouteResult:
+    session = _session.get()
+    if session is not None:
+        session.routes[key] = result
+    return result
 
 
 def _coords(a: dict, b: dict) -> Optional[tuple]:
@@ -27,7 +81,58 @@ def _coords(a: dict, b: dict) -> Optional[tuple]:
     return float(lat1), float(lng1), float(lat2), float(lng2)
 
 
-def get_travel_route(a: dict, b: dict, context: Optional[dict] = None) -> RouteResult:
+def _poi_matrix_route(
+    matrices: PoiMatrixSet, a: dict, b: dict, profile: str, coords: tuple,
+) -> Optional[RouteResult]:
+    hit = matrices.lookup(a, b, profile)
+    if hit is None:
+        return None
+    minutes, km = hit
+    lat1, lng1, lat2, lng2 = coords
+    return RouteResult(
+        duration_min=max(int(minutes), 1),
+        distance_km=km,
+        profile=profile,
+        source=POI_MATRIX_SOURCE,
+        geometry=[[lng1, lat1], [lng2, lat2]],
+    )
+
+
+def _store_directions(key: str, ors: dict, profile: str, coords: tuple) -> RouteResult:
+    """RouteResult of an ORS Directions answer, written to the persistent cache."""
+    lat1, lng1, lat2, lng2 = coords
+    result = RouteResult(
+        duration_min=int(ors["duration_min"]),
+        distance_km=float(ors["distance_km"]),
+        profile=profile,
+        source="ors",
+        geometry=simplify(ors.get("geometry") or [[lng1, lat1], [lng2, lat2]]),
+    )
+    set_cached(key, {
+        "duration_min": result.duration_min,
+        "distance_km": result.distance_km,
+        "profile": profile,
+        "geometry": result.geometry,
+    })
+    return result
+
+
+def get_travel_route(
+    a: dict,
+    b: dict,
+    context: Optional[dict] = None,
+    *,
+    with_geometry: bool = True,
+) -> RouteResult:
+    """Route for one leg.
+
+    `with_geometry=False` is for legs that only need timing: inside a route
+    session with Matrix enabled they are served from matrix prefetches
+    (`prefetch_route_durations`) and never spend an ORS Directions call — an
+    unprefetched leg gets the haversine estimate. Pairs of catalog POIs come
+    from the precomputed POI matrices first; legs that need geometry use them
+    only when ORS Directions cannot draw the route.
+    """
     ctx = context or {}
     coords = _coords(a, b)
     if coords is None:
@@ -36,8 +141,21 @@ def get_travel_route(a: dict, b: dict, context: Optional[dict] = None) -> RouteR
     lat1, lng1, lat2, lng2 = coords
     profile = resolve_profile(a, b, ctx)
     session_key = make_route_key(lat1, lng1, lat2, lng2, profile)
-    if session_key in _session:
-        return _session[session_key]
+    session = _session.get()
+    if session is not None:
+        if session_key in session.routes:
+            return session.routes[session_key]
+        if not with_geometry and session_key in session.durations:
+            return session.durations[session_key]
+
+    matrices = get_poi_matrices()
+    from_matrix = (
+        _poi_matrix_route(matrices, a, b, profile, coords) if matrices is not None else None
+    )
+    if from_matrix is not None and not with_geometry:
+        if session is not None:
+            session.durations[session_key] = from_matrix
+        return from_matrix
 
     ttl = settings.ors_cache_ttl_days * 86400
     cached = get_cached(session_key, ttl)
@@ -49,37 +167,213 @@ def get_travel_route(a: dict, b: dict, context: Optional[dict] = None) -> RouteR
             source="cache",
             geometry=cached.get("geometry") or [],
         )
-        _session[session_key] = result
-        return result
+        return _remember(session_key, result)
+
+    offline = get_offline_router()
+    if offline is not None:
+        osm = offline.route(lat1, lng1, lat2, lng2, profile)
+        if osm:
+            # Local and cheap: not written to the persistent cache, so a
+            # rebuilt graph takes effect immediately.
+            return _remember(session_key, RouteResult(
+                duration_min=int(osm["duration_min"]),
+                distance_km=float(osm["distance_km"]),
+                profile=profile,
+                source="osm",
+                geometry=simplify(osm["geometry"]),
+            ))
 
     result: RouteResult
     client = get_ors_client()
+    if from_matrix is not None and not client.enabled():
+        return _remember(session_key, from_matrix)
     if client.enabled():
+        if not with_geometry and session is not None and client.matrix_enabled():
+            result = haversine_route(a, b, ctx)
+            if session is not None:
+                session.durations[session_key] = result
+            return result
         try:
             ors = client.directions(lat1, lng1, lat2, lng2, profile)
             if ors:
-                result = RouteResult(
-                    duration_min=int(ors["duration_min"]),
-                    distance_km=float(ors["distance_km"]),
-                    profile=profile,
-                    source="ors",
-                    geometry=ors.get("geometry") or [[lng1, lat1], [lng2, lat2]],
-                )
-                set_cached(session_key, {
-                    "duration_min": result.duration_min,
-                    "distance_km": result.distance_km,
-                    "profile": profile,
-                    "geometry": result.geometry,
-                })
-                _session[session_key] = result
-                return result
+                return _remember(session_key, _store_directions(session_key, ors, profile, coords))
         except ORSBudgetExhausted:
             logger.info("ORS budget exhausted — haversine fallback")
+        # Directions unavailable: a matrix duration still beats haversine.
+        if from_matrix is not None:
+            return _remember(session_key, from_matrix)
+        if session is not None:
+            prefetched = session.durations.get(session_key)
+            if prefetched is not None and prefetched.source == MATRIX_SOURCE:
+                return _remember(session_key, prefetched)
 
-    result = haversine_route(a, b, ctx)
-    _session[session_key] = result
-    return result
+    return _remember(session_key, haversine_route(a, b, ctx))
+
+
+def needs_route_geometry(source: Optional[str]) -> bool:
+    """True when a rendered leg still carries a timing-only straight polyline
+    that an ORS Directions call could replace."""
+    if source == MATRIX_SOURCE:
+        return True
+    return source in _STRAIGHT_SOURCES and get_ors_client().enabled()
 
 
 def get_travel_minutes(a: dict, b: dict, context: Optional[dict] = None) -> int:
     return get_travel_route(a, b, context).duration_min
+
+
+Point = Tuple[float, float]
+
+
+def _matrix_batches(
+    legs: List[Tuple[str, Point, Point]], max_locations: int,
+) -> Iterator[Tuple[List[Point], List[Tuple[str, int, int]]]]:
+    """Greedy batches of legs whose distinct endpoints fit one matrix call."""
+    points: Dict[Point, int] = {}
+    batch: List[Tuple[str, int, int]] = []
+    for key, p, q in legs:
+        new = [x for x in dict.fromkeys((p, q)) if x not in points]
+        if batch and len(points) + len(new) > max_locations:
+            yield list(points), batch
+            points, batch = {}, []
+            new = list(dict.fromkeys((p, q)))
+        for x in new:
+            points[x] = len(points)
+        batch.append((key, points[p], points[q]))
+    if batch:
+        yield list(points), batch
+
+
+def prefetch_route_durations(
+    legs: Iterable[Tuple[dict, dict]],
+    context: Optional[dict] = None,
+) -> int:
+    """Resolve timing for many legs with batched ORS Matrix calls.
+
+    Legs already in the session or the persistent cache are skipped; the rest
+    are grouped per profile into matrices of at most `ors_matrix_max_locations`
+    points. Results land in the request session for `with_geometry=False`
+    lookups. On budget exhaustion the remaining legs are left to the per-leg
+    haversine fallback. Returns the number of legs resolved.
+    """
+    session = _session.get()
+    client = get_ors_client()
+    if session is None or not client.matrix_enabled():
+        return 0
+    ctx = context or {}
+    ttl = settings.ors_cache_ttl_days * 86400
+    offline = get_offline_router()
+    matrices = get_poi_matrices()
+    pending: Dict[str, List[Tuple[str, Point, Point]]] = defaultdict(list)
+    seen = set()
+    for a, b in legs:
+        coords = _coords(a or {}, b or {})
+        if coords is None or coords[:2] == coords[2:]:
+            continue
+        lat1, lng1, lat2, lng2 = coords
+        profile = resolve_profile(a, b, ctx)
+        key = make_route_key(lat1, lng1, lat2, lng2, profile)
+        if key in seen or key in session.routes or key in session.durations:
+            continue
+        seen.add(key)
+        if matrices is not None and matrices.covers(a, b, profile):
+            continue  # precomputed catalog pair
+        if offline is not None and offline.covers(lat1, lng1, lat2, lng2, profile):
+            continue  # resolved per leg by the offline graph, no ORS quota
+        pending[profile].append((key, (lat1, lng1), (lat2, lng2)))
+
+    cached = get_cached_many([k for legs_ in pending.values() for k, _, _ in legs_], ttl)
+    if cached:
+        pending = {
+            profile: [leg for leg in profile_legs if leg[0] not in cached]
+            for profile, profile_legs in pending.items()
+        }
+
+    max_locations = max(2, int(settings.ors_matrix_max_locations))
+    batches = [
+        (profile, points, batch)
+        for profile, profile_legs in pending.items()
+        for points, batch in _matrix_batches(profile_legs, max_locations)
+    ]
+    if not batches:
+        return 0
+    # The day's calls come out of one reservation, so concurrent requests
+    # cannot drain the shared budget half-way through it.
+    reservation = client.reserve_matrix(len(batches), minimum=1)
+    if reservation is None:
+        logger.info("ORS matrix budget exhausted — haversine per leg")
+        return 0
+    resolved = 0
+    with reservation:
+        for profile, points, batch in batches:
+            try:
+                table = client.matrix(points, profile, reservation=reservation)
+            except ORSBudgetExhausted:
+                logger.info("ORS matrix budget exhausted — haversine per leg")
+                return resolved
+            if table is None:
+                continue
+            durations, distances = table
+            for key, i, j in batch:
+                minutes = durations[i][j]
+                if minutes is None:
+                    continue
+                (lat1, lng1), (lat2, lng2) = points[i], points[j]
+                km = distances[i][j] if distances else None
+                session.durations[key] = RouteResult(
+                    duration_min=max(int(minutes), 1),
+                    distance_km=float(km) if km is not None else 0.0,
+                    profile=profile,
+                    source=MATRIX_SOURCE,
+                    geometry=[[lng1, lat1], [lng2, lat2]],
+                )
+                resolved += 1
+    return resolved
+
+
+def prefetch_route_geometry(
+    legs: Iterable[Tuple[dict, dict]],
+    context: Optional[dict] = None,
+) -> int:
+    """Resolve rendered legs with concurrent ORS Directions calls.
+
+    The geometry counterpart of `prefetch_route_durations`: legs already in
+    the session or the persistent cache, or within the offline graph, are
+    skipped; the rest go out together through `directions_many` instead of
+    one blocking call per leg. Results land in the request session
+    (and the cache), so the following `get_travel_route` calls are lookups.
+    Legs ORS could not answer are left to the per-leg fallbacks. Returns the
+    number of legs resolved.
+    """
+    session = _session.get()
+    client = get_ors_client()
+    if session is None or not client.enabled():
+        return 0
+    ctx = context or {}
+    ttl = settings.ors_cache_ttl_days * 86400
+    offline = get_offline_router()
+    pending: Dict[str, Tuple[tuple, str]] = {}
+    for a, b in legs:
+        coords = _coords(a or {}, b or {})
+        if coords is None or coords[:2] == coords[2:]:
+            continue
+        profile = resolve_profile(a, b, ctx)
+        key = make_route_key(*coords, profile)
+        if key in pending or key in session.routes:
+            continue
+        if offline is not None and offline.covers(*coords, profile):
+            continue  # resolved per leg by the offline graph, no ORS quota
+        pending[key] = (coords, profile)
+
+    cached = get_cached_many(list(pending), ttl)
+    keys = [key for key in pending if key not in cached]
+    if not keys:
+        return 0
+    answers = client.directions_many([(*pending[key][0], pending[key][1]) for key in keys])
+    resolved = 0
+    for key, ors in zip(keys, answers):
+        if ors:
+            coords, profile = pending[key]
+            session.routes[key] = _store_directions(key, ors, profile, coords)
+            resolved += 1
+    return resolved
@@ -0,0 +1,341 @@
+"""Persistent route store — SQLite (WAL) under `ORS_CACHE_DIR`.
+
+Replaces the one-JSON-file-per-route layout: lookups are one indexed query
+(batched with `get_many` / `put_many`), expired rows are purged on disk, the
+table is capped at `ors_cache_max_entries` rows with least-recently-used
+eviction, and geometry is stored as a polyline6 blob (see `polyline.py`).
+Legacy `<key>.json` files found in the directory are imported once (their
+geometry simplified) and removed.
+
+WAL lets several worker processes share the file; within a process one
+connection is shared under a lock (queries are sub-millisecond).
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from app.infrastructure.config.settings import settings
+from app.infrastructure.routing.polyline import decode_polyline, encode_polyline, simplify
+
+logger = logging.getLogger(__name__)
+
+DB_FILENAME = "routes.sqlite3"
+
+# Run TTL purge + LRU cap every N writes (and once on open).
+_MAINTENANCE_EVERY = 256
+# Access timestamps are only refreshed when older than this — reads stay reads.
+_TOUCH_GRANULARITY_S = 3600.0
+# SQLite default SQLITE_MAX_VARIABLE_NUMBER is 999 on older builds.
+_CHUNK = 500
+
+# Geometry blob codecs (first byte). Rows written before polyline6 keep zlib JSON.
+_CODEC_ZLIB_JSON = b"z"
+_CODEC_POLYLINE6 = b"p"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS routes (
+    key TEXT PRIMARY KEY,
+    written_ts REAL NOT NULL,
+    accessed_ts REAL NOT NULL,
+    payload TEXT NOT NULL,
+    geometry BLOB
+);
+CREATE INDEX IF NOT EXISTS routes_accessed ON routes (accessed_ts);
+CREATE INDEX IF NOT EXISTS routes_written ON routes (written_ts);
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def cache_dir() -> Path:
+    base = os.environ.get("ORS_CACHE_DIR", ".cache/ors_routes")
+    p = Path(base)
+    p.mkdir(parents=True, exist_ok=True)
+    return p
+
+
+def encode_geometry(geometry: Optional[List[List[float]]]) -> Optional[bytes]:
+    if not geometry:
+        return None
+    return _CODEC_POLYLINE6 + encode_polyline(geometry).encode("ascii")
+
+
+def decode_geometry(blob: Optional[bytes]) -> List[List[float]]:
+    if not blob:
+        return []
+    codec, body = blob[:1], blob[1:]
+    if codec == _CODEC_POLYLINE6:
+        return decode_polyline(body.decode("ascii"))
+    if codec == _CODEC_ZLIB_JSON:
+        return json.loads(zlib.decompress(body))
+    raise ValueError(f"unknown geometry codec {codec!r}")
+
+
+def _split(payload: Mapping[str, Any]) -> Tuple[str, Optional[bytes]]:
+    rest = {k: v for k, v in payload.items() if k != "geometry"}
+    return json.dumps(rest, ensure_ascii=False), encode_geometry(payload.get("geometry"))
+
+
+def _join(payload_json: str, blob: Optional[bytes]) -> Dict[str, Any]:
+    payload = json.loads(payload_json)
+    if blob:
+        payload["geometry"] = decode_geometry(blob)
+    return payload
+
+
+def _chunks(items: List[Any], size: int = _CHUNK) -> Iterable[List[Any]]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class RouteStore:
+    """key → route payload dict (duration_min, distance_km, profile, geometry)."""
+
+    def __init__(self, path: Path, max_entries: Optional[int] = None) -> None:
+        self.path = Path(path)
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._writes = 0
+        self._conn = self._connect()
+        self.migrate_json_files(self.path.parent)
+        self.maintain()
+
+    @property
+    def max_entries(self) -> int:
+        if self._max_entries is not None:
+            return self._max_entries
+        return int(settings.ors_cache_max_entries)
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(
+            str(self.path), timeout=10, isolation_level=None, check_same_thread=False,
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        return conn
+
+    def _db(self) -> sqlite3.Connection:
+        # A connection must not cross fork() — reopen in the child.
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._conn = self._connect()
+        return self._conn
+
+    # ------------------------------------------------------------------
+    # reads
+    # ------------------------------------------------------------------
+
+    def get_many(
+        self, keys: Iterable[str], ttl_seconds: float, now: Optional[float] = None,
+    ) -> Dict[str, Tuple[float, Dict[str, Any]]]:
+        """{key: (written_ts, payload)} for fresh rows among `keys`."""
+        now = time.time() if now is None else now
+        wanted = list(dict.fromkeys(keys))
+        out: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        stale_touch: List[str] = []
+        with self._lock:
+            db = self._db()
+            for chunk in _chunks(wanted):
+                marks = ",".join("?" * len(chunk))
+                rows = db.execute(
+                    f"SELECT key, written_ts, accessed_ts, payload, geometry "
+                    f"FROM routes WHERE key IN ({marks}) AND written_ts > ?",
+                    (*chunk, now - ttl_seconds),
+                ).fetchall()
+                for key, written, accessed, payload_json, blob in rows:
+                    try:
+                        out[key] = (written, _join(payload_json, blob))
+                    except (ValueError, TypeError, zlib.error):
+                        continue
+                    if now - accessed >= _TOUCH_GRANULARITY_S:
+                        stale_touch.append(key)
+            for chunk in _chunks(stale_touch):
+                marks = ",".join("?" * len(chunk))
+                db.execute(
+                    f"UPDATE routes SET accessed_ts = ? WHERE key IN ({marks})",
+                    (now, *chunk),
+                )
+        return out
+
+    def get(
+        self, key: str, ttl_seconds: float, now: Optional[float] = None,
+    ) -> Optional[Tuple[float, Dict[str, Any]]]:
+        return self.get_many([key], ttl_seconds, now).get(key)
+
+    # ------------------------------------------------------------------
+    # writes
+    # ------------------------------------------------------------------
+
+    def put_many(
+        self, items: Mapping[str, Mapping[str, Any]], now: Optional[float] = None,
+    ) -> None:
+        if not items:
+            return
+        now = time.time() if now is None else now
+        rows = [(key, now, now, *_split(payload)) for key, payload in items.items()]
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN")
+            try:
+                db.executemany(
+                    "INSERT OR REPLACE INTO routes "
+                    "(key, written_ts, accessed_ts, payload, geometry) VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+                db.execute("COMMIT")
+            except sqlite3.Error:
+                db.execute("ROLLBACK")
+                raise
+            self._writes += len(rows)
+            due = self._writes >= _MAINTENANCE_EVERY
+            if due:
+                self._writes = 0
+        if due:
+            self.maintain(now)
+
+    def put(self, key: str, payload: Mapping[str, Any], now: Optional[float] = None) -> None:
+        self.put_many({key: payload}, now)
+
+    # ------------------------------------------------------------------
+    # maintenance
+    # ------------------------------------------------------------------
+
+    def maintain(self, now: Optional[float] = None) -> Tuple[int, int]:
+        """Purge rows past the route TTL, then trim to `max_entries` by LRU.
+
+        Returns (expired, evicted).
+        """
+        now = time.time() if now is None else now
+        ttl = settings.ors_cache_ttl_days * 86400
+        with self._lock:
+            db = self._db()
+            expired = db.execute(
+                "DELETE FROM routes WHERE written_ts <= ?", (now - ttl,),
+            ).rowcount
+            evicted = 0
+            cap = self.max_entries
+            if cap > 0:
+                (count,) = db.execute("SELECT COUNT(*) FROM routes").fetchone()
+                if count > cap:
+                    evicted = db.execute(
+                        "DELETE FROM routes WHERE key IN ("
+                        "SELECT key FROM routes ORDER BY accessed_ts ASC LIMIT ?)",
+                        (count - cap,),
+                    ).rowcount
+        return expired, evicted
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._db().execute("SELECT COUNT(*) FROM routes").fetchone()
+        return int(count)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db().execute("DELETE FROM routes")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # ------------------------------------------------------------------
+    # legacy JSON files
+    # ------------------------------------------------------------------
+
+    def migrate_json_files(self, directory: Path) -> int:
+        """One-shot import of legacy `<key>.json` files; imported files are deleted.
+
+        Files keep their original write time, so expired routes stay expired.
+        A file that cannot be read or parsed is logged and left in place; only
+        files whose key is in the store after the import are deleted.
+        Returns the number of routes imported.
+        """
+        files = sorted(Path(directory).glob("*.json"))
+        if not files:
+            return 0
+        rows = []
+        imported: List[Path] = []
+        skipped: List[str] = []
+        for fp in files:
+            try:
+                data = json.loads(fp.read_text(encoding="utf-8"))
+                payload = data.get("payload")
+                ts = float(data.get("_ts", 0))
+            except (OSError, ValueError, TypeError, AttributeError) as e:
+                skipped.append(f"{fp.name} ({type(e).__name__})")
+                continue
+            if not isinstance(payload, dict):
+                skipped.append(f"{fp.name} (no payload)")
+                continue
+            if payload.get("geometry"):
+                payload["geometry"] = simplify(payload["geometry"])
+            # Legacy names are the key with path separators replaced; the
+            # route key format never contains either, so the stem is the key.
+            rows.append((fp.stem, ts, ts, *_split(payload)))
+            imported.append(fp)
+        if skipped:
+            logger.warning(
+                "Route cache: %d legacy JSON files not imported (kept): %s",
+                len(skipped), ", ".join(skipped[:20]),
+            )
+        if not rows:
+            return 0
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN")
+            before = db.total_changes
+            db.executemany(
+                "INSERT OR IGNORE INTO routes "
+                "(key, written_ts, accessed_ts, payload, geometry) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            inserted = db.total_changes - before
+            db.execute(
+                "INSERT OR REPLACE INTO meta (name, value) VALUES ('json_migrated_at', ?)",
+                (str(time.time()),),
+            )
+            db.execute("COMMIT")
+            # A key that was already stored (INSERT OR IGNORE) is not lost either.
+            stored = set()
+            for chunk in _chunks([fp.stem for fp in imported]):
+                marks = ",".join("?" * len(chunk))
+                stored.update(
+                    k for (k,) in db.execute(f"SELECT key FROM routes WHERE key IN ({marks})", chunk)
+                )
+        for fp in imported:
+            if fp.stem not in stored:
+                continue
+            try:
+                fp.unlink()
+            except OSError:
+                pass
+        logger.info("Route cache: migrated %d legacy JSON files into %s", inserted, self.path)
+        return inserted
+
+
+_store: Optional[RouteStore] = None
+_store_lock = threading.Lock()
+
+
+def get_route_store() -> RouteStore:
+    """Process-wide store for the current `ORS_CACHE_DIR` (reopened if it changes)."""
+    global _store
+    path = cache_dir() / DB_FILENAME
+    store = _store
+    if store is not None and store.path == path:
+        return store
+    with _store_lock:
+        if _store is None or _store.path != path:
+            if _store is not None:
+                _store.close()
+            _store = RouteStore(path)
+        return _store
@@ -0,0 +1,42 @@
+"""
+gunicorn config — production serving mode (see app/api/serving.py).
+
+    gunicorn -c gunicorn.conf.py app.api.main:app
+
+The master imports the app (preload_app), preloads every catalog and runs the
+startup warm-up (app/api/warmup.py), freezes the heap and forks
+WEB_CONCURRENCY uvicorn workers (default: one per CPU core).
+`uvicorn app.api.main:app` still works for local development (one process).
+"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY") or multiprocessing.cpu_count())
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+# A 7-day cluster plan can take well over the default 30 s on a busy core.
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "180"))
+graceful_timeout = 30
+keepalive = 5
+accesslog = "-"
+
+
+def when_ready(server):
+    """Master, after the app import and before the first fork."""
+    from app.api.serving import freeze_heap, preload_catalogs
+    from app.api.warmup import get_warmup
+
+    warmup = get_warmup()
+    if warmup.enabled:
+        # catalogs + indices + synthetic plans; workers inherit the warm state
+        state = warmup.run()
+        server.log.info("Warm-up finished in %ss: %s", state["seconds"], state["steps"])
+    else:
+        stats = preload_catalogs()
+        server.log.info("Catalogs preloaded in %ss: %s", stats["seconds"], stats)
+    freeze_heap()
+
+
+def post_fork(server, worker):
+    server.log.info("Worker %s forked from preloaded master", worker.pid)
@@ -0,0 +1,600 @@
+"""Plan generation benchmark + golden-output regression gate.
+
+Runs `PlanService.generate_plan` over a fixed corpus of TripInputs
+(city × group type × 1/3/5/7 days) against local stand-ins, so every run
+sees the same inputs. `--mode` picks the routing setup:
+
+- stub (default): ORS is an in-process HTTP server answering Directions /
+  Matrix from the haversine distance (detour factor, fixed speed per
+  profile); route cache, quota ledger, offline graphs and POI matrices live
+  in a throwaway directory,
+- legacy: ORS and the Matrix-based day optimizer off — haversine only, the
+  planner as it ran before the routing work. Its goldens were recorded on
+  the pre-optimization tree, so a match shows later refactors kept output,
+
+and Postgres is a SQLite file with the trail / restaurant tables the
+planner reads (empty — their source workbooks are not in the repo). The day
+optimizer runs with its wall-clock valve off (only the evaluation cap), so
+plans do not depend on machine load.
+
+For each case it records:
+
+- p50 / p95 wall time over `--repeat` runs (each run starts with a cold
+  route cache),
+- peak RSS of the process,
+- traced allocations per stage: catalog load, generate and serialize, and
+  inside generate the engine stages of `PLAN_STAGE_SECONDS` (load, engine,
+  route, post_process),
+- whether the plan JSON still matches the golden file in
+  tests/golden/plans/<mode>.
+
+tests/integration/test_plan_goldens.py replays `GOLDEN_SUBSET` under pytest.
+tests/golden/plans/stub-nn2opt keeps that subset as planned by the earlier
+nearest-neighbour + 2-opt day optimizer; `--subset --golden-dir
+tests/golden/plans/stub-nn2opt` lists what the time-window search changed.
+
+Exit code 1 when a golden file differs or is missing, a case errors or
+plans no attractions, or p95 regresses past `--max-regression` against a
+`--baseline` report.
+
+    python scripts/bench_plans.py --cities Kraków Wrocław --days 1 3
+    python scripts/bench_plans.py --update-golden
+    python scripts/bench_plans.py --mode legacy --subset --repeat 1 --no-alloc
+    python scripts/bench_plans.py --out bench.json
+    python scripts/bench_plans.py --baseline bench.json --max-regression 0.25
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from unittest import mock
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+_TMP = tempfile.mkdtemp(prefix="bench_plans_")
+if __name__ == "__main__":
+    # Local stand-ins before app modules read the environment: never the
+    # developer's DATABASE_URL, and the route cache lives in a throwaway
+    # directory. (Imported from pytest, the test configuration provides both.)
+    os.environ["DATABASE_URL"] = f"sqlite:///{Path(_TMP) / 'bench.db'}"
+    os.environ["ORS_CACHE_DIR"] = str(Path(_TMP) / "ors_routes")
+
+from app.application.services import plan_service  # noqa: E402
+from app.application.services.plan_service import PlanService  # noqa: E402
+from app.domain.models.trip_input import TripInput  # noqa: E402
+from app.domain.planner.name_matching import fold_polish  # noqa: E402
+from app.infrastructure.config.settings import settings  # noqa: E402
+from app.infrastructure.metrics import StageClock  # noqa: E402
+from app.infrastructure.repositories import POIRepository  # noqa: E402
+from app.infrastructure.routing.cache import (  # noqa: E402
+    clear_memory_cache,
+    clear_persistent_cache,
+)
+from app.infrastructure.routing.haversine import haversine_km  # noqa: E402
+from app.infrastructure.routing.ors_client import close_ors_client  # noqa: E402
+
+GOLDEN_DIR = ROOT / "tests" / "golden" / "plans"
+
+CITIES = (
+    "Zakopane", "Kraków", "Warszawa", "Wrocław", "Poznań", "Katowice",
+    "Trójmiasto", "Kotlina Kłodzka", "Karkonosze",
+)
+CLUSTERS = ("Trójmiasto", "Kotlina Kłodzka", "Karkonosze")
+GROUPS: Dict[str, List[str]] = {
+    "solo": ["museum_heritage", "relaxation"],
+    "couples": ["museum_heritage", "history_mystery"],
+    "friends": ["active_sport", "museum_heritage"],
+    "family_kids": ["kids_attractions", "nature_landscape"],
+    "seniors": ["relaxation", "nature_landscape"],
+}
+DAYS = (1, 3, 5, 7)
+START_DATE = "2026-07-10"
+MODES = ("stub", "legacy")
+
+# Replayed by tests/integration/test_plan_goldens.py, and the legacy golden
+# set (recorded on the pre-optimization tree). No Zakopane solo / seniors
+# (generic meal ids were hash()-salted there) and no 1-day cluster trips
+# (FIX #283) — both differ for reasons unrelated to routing.
+GOLDEN_SUBSET = (
+    "krakow-couples-3d",
+    "wroclaw-family_kids-1d",
+    "warszawa-friends-3d",
+    "poznan-seniors-3d",
+    "zakopane-family_kids-3d",
+    "trojmiasto-couples-3d",
+)
+
+# Regressions smaller than this are timer noise, whatever the ratio.
+MIN_REGRESSION_MS = 50.0
+
+# ORS stand-in: road distance = haversine × detour, at a fixed speed per profile.
+_DETOUR = 1.3
+_SPEED_KMH = {"driving-car": 40.0, "foot-walking": 4.5, "cycling-regular": 15.0}
+
+
+class _LocalORS(BaseHTTPRequestHandler):
+    """Deterministic ORS Directions / Matrix answers (no network, no quota)."""
+
+    @staticmethod
+    def _leg(p: List[float], q: List[float], profile: str) -> Tuple[float, float]:
+        """(seconds, km) between two [lng, lat] points."""
+        km = haversine_km(p[1], p[0], q[1], q[0]) * _DETOUR
+        return km / _SPEED_KMH.get(profile, 40.0) * 3600.0, km
+
+    def do_POST(self) -> None:
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        _, _, kind, profile = self.path.split("/")[:4]
+        if kind == "matrix":
+            locs = body["locations"]
+            legs = [[self._leg(p, q, profile) for q in locs] for p in locs]
+            data = {
+                "durations": [[sec for sec, _ in row] for row in legs],
+                "distances": [[km for _, km in row] for row in legs],
+            }
+        else:
+            p, q = body["coordinates"]
+            sec, km = self._leg(p, q, profile)
+            # A bend ~100 m off the straight line, so it survives simplification.
+            mid = [(p[0] + q[0]) / 2 + 0.0015, (p[1] + q[1]) / 2]
+            data = {"routes": [{
+                "summary": {"duration": sec, "distance": km * 1000.0},
+                "geometry": {"type": "LineString", "coordinates": [p, mid, q]},
+            }]}
+        payload = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args: Any) -> None:
+        pass
+
+
+def _pinned_settings() -> Dict[str, Any]:
+    """Settings every mode fixes, so the goldens do not depend on the machine."""
+    return {
+        # A developer's built graphs / matrices would change the goldens.
+        "osm_graph_dir": str(Path(_TMP) / "osm_graphs"),
+        "poi_matrix_dir": str(Path(_TMP) / "poi_matrices"),
+        "overpass_live_fetch_enabled": False,
+        "ors_poi_supplement_enabled": False,
+        # The optimizer's evaluation cap alone bounds the search; its
+        # wall-clock valve would make the order depend on machine load.
+        "day_optimizer_time_budget_ms": 0,
+    }
+
+
+@contextmanager
+def local_ors() -> Iterator[None]:
+    """ORS pointed at `_LocalORS`; local routing artefacts kept out of the run."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _LocalORS)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    conf = {
+        **_pinned_settings(),
+        "ors_base_url": f"http://127.0.0.1:{server.server_port}",
+        "ors_api_key": "bench",
+        "ors_enabled": True,
+        "ors_routing_enabled": True,
+        "ors_matrix_enabled": True,
+        "ors_daily_budget_directions": 10 ** 9,
+        "ors_daily_budget_matrix": 10 ** 9,
+        "ors_budget_db_path": str(Path(_TMP) / "ors_budget.db"),
+    }
+    try:
+        with mock.patch.multiple(settings, **conf):
+            close_ors_client()  # a client built earlier points at another server
+            try:
+                yield
+            finally:
+                close_ors_client()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@contextmanager
+def routing_mode(mode: str) -> Iterator[None]:
+    """The routing setup of `--mode` (see the module docstring)."""
+    if mode == "stub":
+        with local_ors():
+            yield
+    elif mode == "legacy":
+        conf = {**_pinned_settings(), "ors_enabled": False, "ors_matrix_enabled": False}
+        with mock.patch.multiple(settings, **conf):
+            yield
+    else:
+        raise ValueError(f"unknown bench mode {mode!r}")
+
+
+def local_database() -> None:
+    """Postgres stand-in: the tables the planner reads, in the bench SQLite file."""
+    from app.infrastructure.database import Base, RestaurantDB, TrailDB, get_engine
+
+    Base.metadata.create_all(get_engine(), tables=[TrailDB.__table__, RestaurantDB.__table__])
+
+
+def _excel_for(city: str) -> str:
+    name = "zakopane.xlsx" if city == "Zakopane" else "multi_city_attractions.xlsx"
+    return str(ROOT / "data" / name)
+
+
+def case_id(city: str, group: str, days: int) -> str:
+    return f"{fold_polish(city).replace(' ', '-')}-{group}-{days}d"
+
+
+def build_corpus(
+    cities: Iterable[str], groups: Iterable[str], days: Iterable[int],
+) -> List[Tuple[str, str, Dict[str, Any]]]:
+    """[(case_id, excel path, TripInput payload)]"""
+    corpus = []
+    for city in cities:
+        for group in groups:
+            for n in days:
+                payload = {
+                    "location": {
+                        "city": city,
+                        "country": "Poland",
+                        "is_cluster": city in CLUSTERS,
+                    },
+                    "group": {
+                        "type": group,
+                        "size": 2,
+                        "children_age": 8 if group == "family_kids" else None,
+                    },
+                    "trip_length": {"days": n, "start_date": START_DATE},
+                    "daily_time_window": {"start": "09:00", "end": "19:00"},
+                    "budget": {"level": 2},
+                    "transport_modes": ["car"],
+                    "preferences": GROUPS[group],
+                    "travel_style": "balanced",
+                }
+                corpus.append((case_id(city, group, n), _excel_for(city), payload))
+    return corpus
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Linear-interpolated percentile, q in [0, 100]."""
+    if not values:
+        return 0.0
+    s = sorted(values)
+    k = (len(s) - 1) * q / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(s) - 1)
+    return s[lo] + (s[hi] - s[lo]) * (k - lo)
+
+
+def peak_rss_mib() -> Optional[float]:
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+class _Stage:
+    """Traced allocations of one stage: peak bytes and net live blocks."""
+
+    def __init__(self, out: Dict[str, Dict[str, float]], name: str, traced: bool):
+        self.out, self.name, self.traced = out, name, traced
+
+    def __enter__(self) -> "_Stage":
+        if self.traced:
+            tracemalloc.reset_peak()
+            self._blocks = sys.getallocatedblocks()
+        self._t = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        entry = {"ms": round((time.perf_counter() - self._t) * 1000, 1)}
+        if self.traced:
+            entry["alloc_peak_kib"] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+            entry["alloc_net_blocks"] = sys.getallocatedblocks() - self._blocks
+        self.out[self.name] = entry
+
+
+class _AllocClock(StageClock):
+    """`StageClock` that also records traced allocations per engine stage.
+
+    Swapped in for `plan_service.StageClock` during the traced run; the
+    stages land in `ENGINE_ALLOC` under the names of PLAN_STAGE_SECONDS.
+    A lap's net blocks leave out its nested `measure` blocks, as its time does.
+    """
+
+    ENGINE_ALLOC: Dict[str, Dict[str, float]] = {}
+
+    def __init__(self, histogram: Any) -> None:
+        super().__init__(histogram)
+        self._peak = 0
+        self._nested_blocks = 0
+        tracemalloc.reset_peak()
+        self._blocks = sys.getallocatedblocks()
+
+    def _record(self, stage: str, peak: int, blocks: int) -> None:
+        entry = self.ENGINE_ALLOC.setdefault(stage, {"alloc_peak_kib": 0.0, "alloc_net_blocks": 0})
+        entry["alloc_peak_kib"] = max(entry["alloc_peak_kib"], round(peak / 1024, 1))
+        entry["alloc_net_blocks"] += blocks
+
+    def lap(self, stage: str) -> None:
+        super().lap(stage)
+        now = sys.getallocatedblocks()
+        peak = max(self._peak, tracemalloc.get_traced_memory()[1])
+        self._record(stage, peak, now - self._blocks - self._nested_blocks)
+        tracemalloc.reset_peak()
+        self._peak, self._nested_blocks, self._blocks = 0, 0, now
+
+    @contextmanager
+    def measure(self, stage: str) -> Iterator[None]:
+        self._peak = max(self._peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        blocks = sys.getallocatedblocks()
+        try:
+            with super().measure(stage):
+                yield
+        finally:
+            peak = tracemalloc.get_traced_memory()[1]
+            net = sys.getallocatedblocks() - blocks
+            self._record(stage, peak, net)
+            self._nested_blocks += net
+            self._peak = max(self._peak, peak)
+            tracemalloc.reset_peak()
+
+
+def _canonical(plan: Any) -> Dict[str, Any]:
+    data = plan.model_dump(mode="json")
+    data.pop("plan_id", None)
+    return data
+
+
+def golden_text(data: Dict[str, Any]) -> str:
+    return json.dumps(data, ensure_ascii=False, indent=1, sort_keys=True) + "\n"
+
+
+def diff_paths(a: Any, b: Any, path: str = "$", limit: int = 8) -> List[str]:
+    if len(path) > 400:
+        return [path]
+    if type(a) is not type(b):
+        return [path]
+    if isinstance(a, dict):
+        out: List[str] = []
+        for k in sorted(set(a) | set(b)):
+            if k not in a or k not in b:
+                out.append(f"{path}.{k}")
+            elif a[k] != b[k]:
+                out.extend(diff_paths(a[k], b[k], f"{path}.{k}", limit))
+            if len(out) >= limit:
+                break
+        return out[:limit]
+    if isinstance(a, list):
+        if len(a) != len(b):
+            return [f"{path} (len {len(a)} != {len(b)})"]
+        out = []
+        for i, (x, y) in enumerate(zip(a, b)):
+            if x != y:
+                out.extend(diff_paths(x, y, f"{path}[{i}]", limit))
+            if len(out) >= limit:
+                break
+        return out[:limit]
+    return [path] if a != b else []
+
+
+def plan_shape(data: Dict[str, Any]) -> Dict[str, int]:
+    days = data.get("days") or []
+    attractions = sum(
+        1 for day in days for item in day.get("items") or [] if item.get("type") == "attraction"
+    )
+    return {"days": len(days), "attractions": attractions}
+
+
+def generate_case(svc: PlanService, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Golden-comparable plan JSON for one corpus case (inside `routing_mode`)."""
+    return _generate(svc, payload, {}, traced=False)
+
+
+def _generate(svc: PlanService, payload: Dict[str, Any], stages: Dict, traced: bool):
+    # Cold route cache every run: a second run must not see "cache" legs.
+    clear_memory_cache()
+    clear_persistent_cache()
+    random.seed(0)
+    with contextlib.ExitStack() as stack:
+        stack.enter_context(contextlib.redirect_stdout(io.StringIO()))
+        trip = TripInput(**payload)
+        if traced:
+            _AllocClock.ENGINE_ALLOC = {}
+            stack.enter_context(mock.patch.object(plan_service, "StageClock", _AllocClock))
+        with _Stage(stages, "generate", traced):
+            plan = svc.generate_plan(trip)
+    if traced:
+        # The engine clock resets the traced peak between its stages.
+        gen = stages["generate"]
+        for entry in _AllocClock.ENGINE_ALLOC.values():
+            gen["alloc_peak_kib"] = max(gen["alloc_peak_kib"], entry["alloc_peak_kib"])
+        stages["engine"] = _AllocClock.ENGINE_ALLOC
+    with _Stage(stages, "serialize", traced):
+        data = _canonical(plan)
+    return data
+
+
+def run_case(
+    cid: str,
+    svc: PlanService,
+    payload: Dict[str, Any],
+    *,
+    repeat: int,
+    track_alloc: bool,
+    golden_dir: Path,
+    update_golden: bool,
+) -> Dict[str, Any]:
+    runs: List[float] = []
+    data: Dict[str, Any] = {}
+    for _ in range(repeat):
+        stages: Dict[str, Dict[str, float]] = {}
+        data = _generate(svc, payload, stages, traced=False)
+        runs.append(round(stages["generate"]["ms"] + stages["serialize"]["ms"], 1))
+    result: Dict[str, Any] = {
+        "runs_ms": runs,
+        "p50_ms": round(percentile(runs, 50), 1),
+        "p95_ms": round(percentile(runs, 95), 1),
+        "plan": plan_shape(data),
+    }
+    if track_alloc:
+        stages = {}
+        tracemalloc.start()
+        try:
+            _generate(svc, payload, stages, traced=True)
+        finally:
+            tracemalloc.stop()
+        result["stages"] = stages
+    result["rss_peak_mib"] = peak_rss_mib()
+
+    golden = golden_dir / f"{cid}.json"
+    if update_golden:
+        golden.parent.mkdir(parents=True, exist_ok=True)
+        golden.write_text(golden_text(data), encoding="utf-8")
+        result["golden"] = "updated"
+    elif not golden.exists():
+        result["golden"] = "missing"
+    else:
+        expected = json.loads(golden.read_text(encoding="utf-8"))
+        if expected == data:
+            result["golden"] = "match"
+        else:
+            result["golden"] = "diff"
+            result["golden_diff"] = diff_paths(expected, data)
+    return result
+
+
+def regressions(
+    report: Dict[str, Any], baseline: Dict[str, Any], max_regression: float,
+) -> List[str]:
+    out = []
+    for cid, res in report["cases"].items():
+        base = (baseline.get("cases") or {}).get(cid)
+        if not base or "p95_ms" not in res:
+            continue
+        limit = base["p95_ms"] * (1.0 + max_regression)
+        if res["p95_ms"] > limit and res["p95_ms"] - base["p95_ms"] > MIN_REGRESSION_MS:
+            out.append(
+                f"{cid}: p95 {res['p95_ms']:.0f} ms > {base['p95_ms']:.0f} ms "
+                f"(+{max_regression:.0%} allowed)"
+            )
+    return out
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--cities", nargs="+", default=list(CITIES))
+    ap.add_argument("--groups", nargs="+", default=list(GROUPS), choices=list(GROUPS))
+    ap.add_argument("--days", nargs="+", type=int, default=list(DAYS))
+    ap.add_argument("--mode", choices=MODES, default="stub")
+    ap.add_argument("--subset", action="store_true", help="only the GOLDEN_SUBSET cases")
+    ap.add_argument("--repeat", type=int, default=3, help="timed runs per case")
+    ap.add_argument("--no-alloc", action="store_true", help="skip the traced run")
+    ap.add_argument("--golden-dir", type=Path, help=f"default {GOLDEN_DIR.relative_to(ROOT)}/<mode>")
+    ap.add_argument("--update-golden", action="store_true")
+    ap.add_argument("--baseline", type=Path, help="earlier --out report to compare p95 against")
+    ap.add_argument("--max-regression", type=float, default=0.25, help="allowed p95 growth, 0.25 = +25%%")
+    ap.add_argument("--out", type=Path, help="write the JSON report here")
+    args = ap.parse_args(argv)
+
+    logging.disable(logging.CRITICAL)
+    corpus = build_corpus(args.cities, args.groups, args.days)
+    if args.subset:
+        corpus = [case for case in corpus if case[0] in GOLDEN_SUBSET]
+    golden_dir = args.golden_dir or GOLDEN_DIR / args.mode
+    report: Dict[str, Any] = {"mode": args.mode, "catalog": {}, "cases": {}}
+    services: Dict[str, PlanService] = {}
+
+    local_database()
+    with routing_mode(args.mode):
+        for cid, excel, payload in corpus:
+            if excel not in services:
+                stages: Dict[str, Dict[str, float]] = {}
+                if not args.no_alloc:
+                    tracemalloc.start()
+                try:
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        with _Stage(stages, "catalog", not args.no_alloc):
+                            repo = POIRepository(excel)
+                            repo.get_all()
+                    services[excel] = PlanService(repo)
+                finally:
+                    if not args.no_alloc:
+                        tracemalloc.stop()
+                report["catalog"][Path(excel).name] = stages["catalog"]
+            try:
+                res = run_case(
+                    cid, services[excel], payload,
+                    repeat=max(1, args.repeat),
+                    track_alloc=not args.no_alloc,
+                    golden_dir=golden_dir,
+                    update_golden=args.update_golden,
+                )
+            except Exception as exc:
+                res = {"error": f"{type(exc).__name__}: {exc}", "golden": "error"}
+            report["cases"][cid] = res
+            gen = (res.get("stages") or {}).get("generate") or {}
+            shape = res.get("plan") or {}
+            print(
+                f"{cid:40s} p50={res.get('p50_ms', 0):8.1f}ms p95={res.get('p95_ms', 0):8.1f}ms "
+                f"rss={res.get('rss_peak_mib')}MiB alloc_peak={gen.get('alloc_peak_kib', '-')}KiB "
+                f"plan={shape.get('days', 0)}d/{shape.get('attractions', 0)}a "
+                f"golden={res['golden']}",
+                flush=True,
+            )
+            for path in res.get("golden_diff") or []:
+                print(f"    differs at {path}")
+            if "error" in res:
+                print(f"    {res['error']}")
+
+    # A case without a golden file proves nothing: write it with --update-golden.
+    failures = [
+        f"{cid}: golden {res['golden']}"
+        for cid, res in report["cases"].items()
+        if res["golden"] in ("diff", "missing", "error")
+    ]
+    failures.extend(
+        f"{cid}: empty plan ({res['plan']['days']} days, {res['plan']['attractions']} attractions)"
+        for cid, res in report["cases"].items()
+        if "plan" in res and not (res["plan"]["days"] and res["plan"]["attractions"])
+    )
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        failures.extend(regressions(report, baseline, args.max_regression))
+    report["failures"] = failures
+    if args.out:
+        args.out.write_text(json.dumps(report, ensure_ascii=False, indent=1), encoding="utf-8")
+
+    all_runs = [r for res in report["cases"].values() for r in res.get("runs_ms", [])]
+    print(
+        f"\n{len(report['cases'])} cases, p50={percentile(all_runs, 50):.0f}ms "
+        f"p95={percentile(all_runs, 95):.0f}ms, peak RSS={peak_rss_mib()}MiB"
+    )
+    for f in failures:
+        print(f"FAIL {f}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
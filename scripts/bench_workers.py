@@ -0,0 +1,132 @@
+"""
+Throughput of plan generation vs number of forked workers.
+
+Mirrors the production serving mode (gunicorn.conf.py): the parent preloads
+every catalog (app/api/serving.py), freezes the heap and forks N workers that
+pull trips from a shared queue and run PlanService.generate_plan. No HTTP and
+no database writes — only the CPU-bound part that the GIL used to serialize.
+Per worker it also reports Pss / Private memory (Linux smaps_rollup) to show
+how much of the catalog stays shared.
+
+USAGE:
+    cd travel-planner-backend
+    python scripts/bench_workers.py                       # 1,2,4,... up to cores
+    python scripts/bench_workers.py --workers 1,2,4 --plans 24 --days 3
+    python scripts/bench_workers.py --no-preload          # each worker loads cold
+"""
+
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+os.chdir(project_root)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{Path(tempfile.gettempdir()) / 'bench_workers.db'}")
+
+CITIES = ("Kraków", "Zakopane", "Wrocław", "Warszawa", "Gdańsk", "Poznań")
+
+
+def _trip(city: str, days: int) -> dict:
+    return {
+        "location": {"city": city, "country": "Poland", "region_type": "city"},
+        "group": {"type": "couples", "size": 2, "crowd_tolerance": 1},
+        "trip_length": {"days": days, "start_date": "2026-06-15"},
+        "daily_time_window": {"start": "09:00", "end": "19:00"},
+        "budget": {"level": 2},
+        "transport_modes": ["car"],
+        "travel_style": "balanced",
+    }
+
+
+def _memory_kb() -> dict:
+    out = {}
+    try:
+        for line in Path("/proc/self/smaps_rollup").read_text().splitlines():
+            key, _, rest = line.partition(":")
+            if key in ("Rss", "Pss", "Private_Clean", "Private_Dirty"):
+                out[key] = int(rest.split()[0])
+    except OSError:
+        pass
+    return out
+
+
+def _worker(tasks, results) -> None:
+    from app.api.dependencies import get_poi_repository
+    from app.application.services.plan_service import PlanService
+    from app.domain.models.trip_input import TripInput
+
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)  # the planner prints a lot
+    done = 0
+    while True:
+        trip = tasks.get()
+        if trip is None:
+            break
+        with contextlib.redirect_stdout(io.StringIO()):
+            PlanService(get_poi_repository()).generate_plan(TripInput.model_validate(trip))
+        done += 1
+    results.put((os.getpid(), done, _memory_kb()))
+
+
+def _run(workers: int, trips: list) -> tuple:
+    ctx = multiprocessing.get_context("fork")
+    tasks, results = ctx.Queue(), ctx.Queue()
+    for trip in trips:
+        tasks.put(trip)
+    for _ in range(workers):
+        tasks.put(None)
+    started = time.perf_counter()
+    procs = [ctx.Process(target=_worker, args=(tasks, results)) for _ in range(workers)]
+    for p in procs:
+        p.start()
+    reports = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    return time.perf_counter() - started, reports
+
+
+def main() -> None:
+    cores = os.cpu_count() or 1
+    default_workers = sorted({1, *(n for n in (2, 4, 8, 16) if n <= cores), cores})
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--workers", default=",".join(map(str, default_workers)),
+                        help="comma-separated worker counts (default: powers of 2 up to cores)")
+    parser.add_argument("--plans", type=int, default=0, help="plans per run (default: 4 per max workers)")
+    parser.add_argument("--days", type=int, default=3)
+    parser.add_argument("--no-preload", action="store_true", help="do not preload in the parent")
+    args = parser.parse_args()
+
+    counts = [int(n) for n in args.workers.split(",") if n.strip()]
+    n_plans = args.plans or 4 * max(counts)
+    trips = [_trip(CITIES[i % len(CITIES)], args.days) for i in range(n_plans)]
+
+    if not args.no_preload:
+        from app.api.serving import freeze_heap, preload_catalogs
+        with contextlib.redirect_stdout(io.StringIO()):
+            stats = preload_catalogs()
+        print(f"Preloaded in {stats['seconds']}s: {stats['pois']} POIs, workbooks {stats['workbooks']}")
+        freeze_heap()
+
+    print(f"{cores} CPU cores, {n_plans} plans x {args.days} days\n")
+    print(f"{'workers':>7} {'wall s':>8} {'plans/s':>8} {'speedup':>8} {'Pss MB':>8} {'private MB':>11}")
+    base = None
+    for n in counts:
+        wall, reports = _run(n, trips)
+        rate = n_plans / wall
+        base = base or rate
+        pss = sum(r[2].get("Pss", 0) for r in reports) / len(reports) / 1024
+        private = sum(
+            r[2].get("Private_Clean", 0) + r[2].get("Private_Dirty", 0) for r in reports
+        ) / len(reports) / 1024
+        print(f"{n:>7} {wall:>8.1f} {rate:>8.2f} {rate / base:>7.2f}x {pss:>8.0f} {private:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Build offline routing graphs from Geofabrik voivodeship extracts.
+
+Writes `<region>-driving-car.npz` and `<region>-foot-walking.npz` into
+OSM_GRAPH_DIR for the offline routing tier (app/infrastructure/routing/osm_graph.py).
+
+Requires pyosmium (build-time only, not an app dependency):
+    pip install osmium
+
+USAGE:
+    cd travel-planner-backend
+    # extracts: https://download.geofabrik.de/europe/poland/<region>-latest.osm.pbf
+    python scripts/build_osm_graph.py --pbf-dir data/osm
+    python scripts/build_osm_graph.py --pbf-dir data/osm --region malopolskie --out .cache/osm_graphs
+"""
+
+import argparse
+import logging
+import math
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.infrastructure.config.settings import settings
+from app.infrastructure.routing.osm_graph import (
+    FOOT_SPEED_MPS,
+    PROFILES,
+    REGIONS,
+    build_graph,
+)
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# Free-flow car speeds (km/h) per highway class, ORS-like defaults.
+CAR_SPEEDS_KMH = {
+    "motorway": 120, "motorway_link": 60,
+    "trunk": 90, "trunk_link": 50,
+    "primary": 70, "primary_link": 40,
+    "secondary": 60, "secondary_link": 35,
+    "tertiary": 50, "tertiary_link": 30,
+    "unclassified": 40, "residential": 30,
+    "living_street": 10, "service": 15, "road": 30,
+}
+FOOT_HIGHWAYS = {
+    "primary", "primary_link", "secondary", "secondary_link", "tertiary",
+    "tertiary_link", "unclassified", "residential", "living_street", "service",
+    "road", "pedestrian", "footway", "path", "steps", "track", "cycleway",
+    "bridleway",
+}
+NO_ACCESS = {"no", "private"}
+
+
+def _meters(lat1, lng1, lat2, lng2):
+    r = 6371000.0
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * r * math.asin(math.sqrt(a))
+
+
+def _way_rules(tags, profile):
+    """(speed m/s, forward, backward) or None when the profile may not use the way."""
+    hw = tags.get("highway")
+    if profile == "driving-car":
+        if hw not in CAR_SPEEDS_KMH or tags.get("access") in NO_ACCESS:
+            return None
+        if tags.get("motor_vehicle") in NO_ACCESS or tags.get("motorcar") in NO_ACCESS:
+            return None
+        speed = CAR_SPEEDS_KMH[hw]
+        maxspeed = tags.get("maxspeed", "")
+        if maxspeed.isdigit():
+            speed = min(speed, int(maxspeed))
+        oneway = tags.get("oneway", "")
+        if tags.get("junction") == "roundabout" or hw in ("motorway", "motorway_link"):
+            oneway = oneway or "yes"
+        if oneway in ("yes", "1", "true"):
+            return speed / 3.6, True, False
+        if oneway == "-1":
+            return speed / 3.6, False, True
+        return speed / 3.6, True, True
+    foot = tags.get("foot")
+    if foot in NO_ACCESS or (tags.get("access") in NO_ACCESS and foot not in ("yes", "designated")):
+        return None
+    if hw in FOOT_HIGHWAYS or foot in ("yes", "designated"):
+        speed = FOOT_SPEED_MPS * (0.5 if hw == "steps" else 1.0)
+        return speed, True, True
+    return None
+
+
+def build_region(pbf: Path, region: str, out_dir: Path) -> None:
+    try:
+        import osmium
+    except ImportError:
+        sys.exit("pyosmium is required: pip install osmium")
+
+    class _Ways(osmium.SimpleHandler):
+        def __init__(self):
+            super().__init__()
+            self.index = {p: {} for p in PROFILES}
+            self.nodes = {p: [] for p in PROFILES}
+            self.edges = {p: [] for p in PROFILES}
+
+        def _node(self, profile, ref, loc):
+            idx = self.index[profile]
+            i = idx.get(ref)
+            if i is None:
+                i = idx[ref] = len(self.nodes[profile])
+                self.nodes[profile].append((loc.lat, loc.lon))
+            return i
+
+        def way(self, w):
+            if "highway" not in w.tags:
+                return
+            tags = {t.k: t.v for t in w.tags}
+            refs = [(n.ref, n.location) for n in w.nodes if n.location.valid()]
+            if len(refs) < 2:
+                return
+            for profile in PROFILES:
+                rules = _way_rules(tags, profile)
+                if rules is None:
+                    continue
+                speed, fwd, bwd = rules
+                edges = self.edges[profile]
+                for (r1, l1), (r2, l2) in zip(refs, refs[1:]):
+                    u, v = self._node(profile, r1, l1), self._node(profile, r2, l2)
+                    m = _meters(l1.lat, l1.lon, l2.lat, l2.lon)
+                    if fwd:
+                        edges.append((u, v, m, m / speed))
+                    if bwd:
+                        edges.append((v, u, m, m / speed))
+
+    handler = _Ways()
+    logger.info("Reading %s", pbf)
+    handler.apply_file(str(pbf), locations=True)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for profile in PROFILES:
+        graph = build_graph(
+            handler.nodes[profile], handler.edges[profile], region=region, profile=profile,
+        )
+        target = out_dir / f"{region}-{profile}.npz"
+        graph.save(target)
+        logger.info(
+            "%s: %d nodes, %d edges → %s",
+            profile, len(graph), len(handler.edges[profile]), target,
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--pbf-dir", type=Path, required=True,
+                        help="directory with <region>-latest.osm.pbf files")
+    parser.add_argument("--region", choices=REGIONS, action="append",
+                        help="region(s) to build (default: all)")
+    parser.add_argument("--out", type=Path, default=Path(settings.osm_graph_dir))
+    args = parser.parse_args()
+
+    for region in args.region or REGIONS:
+        pbf = args.pbf_dir / f"{region}-latest.osm.pbf"
+        if not pbf.exists():
+            logger.warning("Missing extract %s — skipped", pbf)
+            continue
+        build_region(pbf, region, args.out)
+
+
+if __name__ == "__main__":
+    main()
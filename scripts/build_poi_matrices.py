@@ -0,0 +1,191 @@
+"""
+Precompute POI↔POI travel matrices for the catalog snapshot.
+
+For every city in each catalog workbook (and every multi-city cluster, e.g.
+Trójmiasto, GZM) routes all POI pairs once per profile and writes
+`<scope>.<profile>.json` + `.durations.npy` + `.distances.npy` into
+POI_MATRIX_DIR (app/infrastructure/routing/poi_matrix.py). Re-run after every
+catalog update and ship the directory with the workbooks; POIs that moved or
+were added since the build simply fall back to live routing.
+
+Sources:
+    osm  offline OSM graphs (scripts/build_osm_graph.py) — no network, no quota
+    ors  ORS Matrix in square tiles of --max-locations points; the tiles
+         come out of ORS_DAILY_BUDGET_MATRIX (shared ledger, also used by
+         the running API) — the hosted API accepts up to 50 locations
+
+Haversine is not a source: the runtime estimate depends on the trip context
+(city factor, traffic), so it is computed per request anyway.
+
+USAGE:
+    cd travel-planner-backend
+    python scripts/build_poi_matrices.py --source osm
+    python scripts/build_poi_matrices.py --source ors --max-locations 50 --city Kraków
+"""
+
+import argparse
+import hashlib
+import logging
+import os
+import re
+import sys
+import tempfile
+import unicodedata
+from collections import defaultdict
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{Path(tempfile.gettempdir()) / 'poi_matrices.db'}")
+
+from app.domain.config.destination_clusters import DestinationClusters
+from app.infrastructure.config.settings import settings
+from app.infrastructure.repositories.load_zakopane import load_zakopane_poi
+from app.infrastructure.routing.ors_client import ORSBudgetExhausted, get_ors_client
+from app.infrastructure.routing.osm_graph import PROFILES, OfflineRouter
+from app.infrastructure.routing.poi_matrix import build_poi_matrix
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATALOGS = ("data/multi_city_attractions.xlsx", "data/zakopane.xlsx")
+
+
+def _slug(text):
+    ascii_ = unicodedata.normalize("NFKD", text.replace("ł", "l").replace("Ł", "L"))
+    ascii_ = ascii_.encode("ascii", "ignore").decode("ascii").lower()
+    return re.sub(r"[^a-z0-9]+", "-", ascii_).strip("-")
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _scopes(pois):
+    """{scope: [poi, ...]} — one per city, plus one per destination cluster."""
+    by_city = defaultdict(list)
+    for p in pois:
+        if p.get("id") is None or p.get("lat") is None or p.get("lng") is None:
+            continue
+        by_city[str(p.get("city") or "").strip()].append(p)
+    scopes = {}
+    clusters = defaultdict(list)
+    for city, members in by_city.items():
+        if not city or len(members) < 2:
+            continue
+        scopes[_slug(city)] = members
+        cluster = DestinationClusters.CITY_TO_CLUSTER.get(city)
+        if cluster:
+            clusters[cluster].extend(members)
+    for cluster, members in clusters.items():
+        if len({p.get("city") for p in members}) > 1:
+            scopes[f"cluster-{_slug(cluster)}"] = members
+    return scopes
+
+
+def _ors_table(points, profile, max_locations):
+    """Full NxN through square tiles: sources S and targets T in one call.
+
+    Every tile is reserved in the shared budget ledger before the first call,
+    so a matrix is either paid for in full or not started.
+    """
+    client = get_ors_client()
+    n = len(points)
+    durations = [[None] * n for _ in range(n)]
+    distances = [[None] * n for _ in range(n)]
+    half = max(1, max_locations // 2)
+    blocks = [list(range(i, min(i + half, n))) for i in range(0, n, half)]
+    reservation = client.reserve_matrix(len(blocks) ** 2)
+    if reservation is None:
+        raise ORSBudgetExhausted(f"{len(blocks) ** 2} matrix calls needed")
+    with reservation:
+        for rows in blocks:
+            for cols in blocks:
+                idx = list(dict.fromkeys(rows + cols))
+                table = client.matrix([points[k] for k in idx], profile, reservation=reservation)
+                if table is None:
+                    continue
+                dur, dist = table
+                pos = {k: i for i, k in enumerate(idx)}
+                for r in rows:
+                    for c in cols:
+                        durations[r][c] = dur[pos[r]][pos[c]]
+                        distances[r][c] = dist[pos[r]][pos[c]] if dist else None
+    return durations, distances
+
+
+def _osm_table(points, profile, router):
+    table = router.matrix(points, profile)
+    if table is not None:
+        return table
+    # Some POI does not snap: route pair by pair so the rest still land.
+    n = len(points)
+    durations = [[None] * n for _ in range(n)]
+    distances = [[None] * n for _ in range(n)]
+    for i, (lat1, lng1) in enumerate(points):
+        durations[i][i] = distances[i][i] = 0.0
+        for j, (lat2, lng2) in enumerate(points):
+            if i == j:
+                continue
+            leg = router.route(lat1, lng1, lat2, lng2, profile)
+            if leg:
+                durations[i][j] = leg["duration_min"]
+                distances[i][j] = leg["distance_km"]
+    return durations, distances
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--catalog", action="append", type=Path,
+                        help=f"catalog workbook(s) (default: {', '.join(DEFAULT_CATALOGS)})")
+    parser.add_argument("--source", choices=("osm", "ors"), default="osm")
+    parser.add_argument("--profile", choices=PROFILES, action="append",
+                        help="profile(s) to build (default: all)")
+    parser.add_argument("--city", action="append", help="only these cities / clusters")
+    parser.add_argument("--max-locations", type=int, default=settings.ors_matrix_max_locations,
+                        help="ORS tile size (points per Matrix call)")
+    parser.add_argument("--out", type=Path, default=Path(settings.poi_matrix_dir))
+    args = parser.parse_args()
+
+    router = None
+    if args.source == "osm":
+        router = OfflineRouter(Path(settings.osm_graph_dir))
+        if not router:
+            sys.exit(f"No OSM graphs in {settings.osm_graph_dir} — run scripts/build_osm_graph.py")
+    elif not get_ors_client().matrix_enabled():
+        sys.exit("ORS Matrix is disabled — set ORS_ENABLED / ORS_API_KEY")
+
+    wanted = {_slug(c) for c in args.city or ()}
+    for catalog in args.catalog or [Path(c) for c in DEFAULT_CATALOGS]:
+        if not catalog.exists():
+            logger.warning("Missing catalog %s — skipped", catalog)
+            continue
+        provenance = {"catalog": catalog.name, "catalog_sha256": _sha256(catalog)}
+        for scope, pois in sorted(_scopes(load_zakopane_poi(str(catalog))).items()):
+            if wanted and scope not in wanted and scope.replace("cluster-", "") not in wanted:
+                continue
+            # Both workbooks carry e.g. Zakopane — keep their matrices apart.
+            scope = f"{_slug(catalog.stem)}--{scope}"
+            points = [(float(p["lat"]), float(p["lng"])) for p in pois]
+            for profile in args.profile or PROFILES:
+                try:
+                    if router is not None:
+                        durations, distances = _osm_table(points, profile, router)
+                    else:
+                        durations, distances = _ors_table(points, profile, args.max_locations)
+                except ORSBudgetExhausted:
+                    sys.exit("ORS matrix budget exhausted — re-run tomorrow or raise the budget")
+                matrix = build_poi_matrix(
+                    pois, profile, durations, distances,
+                    scope=scope, source=args.source, catalog=provenance,
+                )
+                target = matrix.save(args.out)
+                logger.info("%s %s: %d POIs → %s", scope, profile, len(matrix), target)
+
+
+if __name__ == "__main__":
+    main()
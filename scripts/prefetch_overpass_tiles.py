@@ -0,0 +1,103 @@
+"""
+Prefetch Overpass supplement tiles for every destination city.
+
+Cities come from the catalog workbooks, `DestinationClusters` (members and
+cluster names) and `data/destinations.json` (`api_city`). Each centre is the
+mean of its catalog POIs, the same point `poi_supplement` searches around. The
+geohash tiles covering that circle (plus a margin) are fetched into the tile
+store under ORS_CACHE_DIR (app/infrastructure/routing/overpass_tiles.py).
+Only tiles that are missing or past OVERPASS_TILE_TTL_DAYS are fetched, so the
+job is cheap to re-run from cron or a deploy hook.
+
+USAGE:
+    cd travel-planner-backend
+    python scripts/prefetch_overpass_tiles.py
+    python scripts/prefetch_overpass_tiles.py --city Kraków --force
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{Path(tempfile.gettempdir()) / 'overpass_tiles.db'}")
+
+from app.domain.config.destination_clusters import DestinationClusters
+from app.infrastructure.config.settings import settings
+from app.infrastructure.repositories.load_zakopane import load_zakopane_poi
+from app.infrastructure.routing.overpass_tiles import get_tile_store, prefetch_tiles
+from app.infrastructure.routing.poi_supplement import city_center
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATALOGS = ("data/multi_city_attractions.xlsx", "data/zakopane.xlsx")
+DESTINATIONS_JSON = Path("data/destinations.json")
+# Request pools are filtered (season, cluster), so their centre drifts a little.
+_RADIUS_MARGIN = 1.5
+
+
+def _destination_cities():
+    names = set(DestinationClusters.CITY_TO_CLUSTER)
+    for cluster in DestinationClusters.ALL_CLUSTERS.values():
+        names.add(cluster["name"])
+    if DESTINATIONS_JSON.exists():
+        data = json.loads(DESTINATIONS_JSON.read_text(encoding="utf-8"))
+        names.update(d["api_city"] for d in data.get("destinations", []) if d.get("api_city"))
+    return names
+
+
+def _pool_for(name, pois):
+    cluster = DestinationClusters.ALL_CLUSTERS.get(name)
+    members = set(cluster["cities"]) if cluster else {name}
+    return [p for p in pois if str(p.get("city") or "").strip() in members]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--catalog", action="append", type=Path,
+                        help=f"catalog workbook(s) (default: {', '.join(DEFAULT_CATALOGS)})")
+    parser.add_argument("--city", action="append", help="only these cities / clusters")
+    parser.add_argument("--force", action="store_true", help="refetch fresh tiles too")
+    parser.add_argument("--pause", type=float, default=1.0,
+                        help="seconds between Overpass queries (public API rate limit)")
+    args = parser.parse_args()
+
+    pois = []
+    for catalog in args.catalog or [Path(c) for c in DEFAULT_CATALOGS]:
+        if not catalog.exists():
+            logger.warning("Missing catalog %s — skipped", catalog)
+            continue
+        pois.extend(load_zakopane_poi(str(catalog)))
+
+    names = _destination_cities() | {str(p.get("city") or "").strip() for p in pois}
+    names.discard("")
+    if args.city:
+        names &= set(args.city)
+
+    centres = []
+    for name in sorted(names):
+        pool = _pool_for(name, pois)
+        centre = city_center(pool, name) if pool else None
+        if centre is None:
+            logger.warning("%s: no catalog POIs — no centre to prefetch around", name)
+            continue
+        centres.append(centre)
+
+    radius = settings.ors_overpass_radius_m * _RADIUS_MARGIN
+    fetched, failed = prefetch_tiles(centres, radius, force=args.force, pause_s=args.pause)
+    logger.info(
+        "Overpass tiles: %d centres, %d fetched, %d failed, %d in store",
+        len(centres), fetched, failed, len(get_tile_store()),
+    )
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
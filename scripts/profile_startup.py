@@ -0,0 +1,178 @@
+"""
+Cold start profile: per-module import cost of `app.api.main` + startup hooks.
+
+Each run is a fresh interpreter (`python -X importtime`), so nothing is cached
+in memory between runs; bytecode (.pyc) is, as in production after the first
+boot. Reports the wall time of the import (and with --with-startup of the
+startup hooks: POI reload, DB check), the slowest first-party modules by
+cumulative time and third-party packages by self time, and whether the
+dependencies that should load on first use only (LAZY_MODULES) stayed out.
+
+Tracked as a benchmark: save a run with --json and compare later runs with
+--baseline; the exit code is 1 when the median import time regresses by more
+than --max-regression, or when a lazy dependency is imported at startup.
+
+USAGE:
+    cd travel-planner-backend
+    python scripts/profile_startup.py                         # 5 runs, top 20
+    python scripts/profile_startup.py --with-startup --runs 3
+    python scripts/profile_startup.py --json startup_base.json
+    python scripts/profile_startup.py --baseline startup_base.json --max-regression 0.15
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+project_root = Path(__file__).parent.parent
+
+# Needed only by rarely used endpoints — must not be imported by app.api.main.
+LAZY_MODULES = ("stripe", "supabase", "gotrue", "reportlab", "playwright")
+
+_CHILD = """
+import asyncio, json, sys, time
+t0 = time.perf_counter()
+import app.api.main as main
+t1 = time.perf_counter()
+out = {{"import_s": t1 - t0, "lazy_loaded": [m for m in {lazy!r} if m in sys.modules]}}
+if {with_startup!r}:
+    asyncio.run(main.startup_event())
+    out["startup_s"] = time.perf_counter() - t1
+    main.shutdown_event()
+print("PROFILE_JSON " + json.dumps(out))
+"""
+
+
+def parse_importtime(stderr: str) -> Dict[str, Tuple[int, int]]:
+    """`-X importtime` output → {module: (self_us, cumulative_us)}."""
+    modules: Dict[str, Tuple[int, int]] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            self_us, cumulative_us = int(parts[0]), int(parts[1])
+        except ValueError:
+            continue  # header line
+        modules[parts[2].strip()] = (self_us, cumulative_us)
+    return modules
+
+
+def group_modules(modules: Dict[str, Tuple[int, int]]) -> Tuple[Dict[str, int], Dict[str, int]]:
+    """(first-party module → cumulative µs, third-party package → summed self µs)."""
+    first_party: Dict[str, int] = {}
+    third_party: Dict[str, int] = defaultdict(int)
+    for name, (self_us, cumulative_us) in modules.items():
+        if name == "app" or name.startswith("app."):
+            first_party[name] = cumulative_us
+        else:
+            third_party[name.split(".")[0]] += self_us
+    return first_party, dict(third_party)
+
+
+def run_once(with_startup: bool) -> Tuple[dict, Dict[str, Tuple[int, int]]]:
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", f"sqlite:///{Path(tempfile.gettempdir()) / 'profile_startup.db'}")
+    env["PYTHONPATH"] = str(project_root) + os.pathsep + env.get("PYTHONPATH", "")
+    code = _CHILD.format(lazy=LAZY_MODULES, with_startup=with_startup)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=project_root, env=env, capture_output=True, text=True,
+    )
+    result = None
+    for line in proc.stdout.splitlines():
+        if line.startswith("PROFILE_JSON "):
+            result = json.loads(line[len("PROFILE_JSON "):])
+    if proc.returncode != 0 or result is None:
+        sys.stderr.write(proc.stderr[-4000:])
+        raise SystemExit(f"profiling run failed (exit {proc.returncode})")
+    return result, parse_importtime(proc.stderr)
+
+
+def _median_modules(runs: List[Dict[str, Tuple[int, int]]]) -> Dict[str, Tuple[int, int]]:
+    names = set().union(*runs)
+    return {
+        name: (
+            int(statistics.median(r[name][0] for r in runs if name in r)),
+            int(statistics.median(r[name][1] for r in runs if name in r)),
+        )
+        for name in names
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--with-startup", action="store_true", help="also run the startup hooks (POI reload, DB check)")
+    parser.add_argument("--json", dest="json_path", help="write the summary here")
+    parser.add_argument("--baseline", help="summary JSON of an earlier run to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.15, help="allowed import slowdown vs baseline (0.15 = 15%%)")
+    args = parser.parse_args()
+
+    results, module_runs = [], []
+    for i in range(max(1, args.runs)):
+        result, modules = run_once(args.with_startup)
+        results.append(result)
+        module_runs.append(modules)
+        extra = f"  startup {result['startup_s']:.2f}s" if "startup_s" in result else ""
+        print(f"run {i + 1}: import {result['import_s']:.2f}s{extra}")
+
+    modules = _median_modules(module_runs)
+    first_party, third_party = group_modules(modules)
+    import_times = [r["import_s"] for r in results]
+    summary = {
+        "python": sys.version.split()[0],
+        "runs": len(results),
+        "import_s": {"min": min(import_times), "median": statistics.median(import_times)},
+        "modules_imported": len(modules),
+        "lazy_loaded": sorted({m for r in results for m in r["lazy_loaded"]}),
+        "first_party_ms": {k: round(v / 1000, 1) for k, v in sorted(first_party.items(), key=lambda kv: -kv[1])[: args.top]},
+        "third_party_ms": {k: round(v / 1000, 1) for k, v in sorted(third_party.items(), key=lambda kv: -kv[1])[: args.top]},
+    }
+    if args.with_startup:
+        startup_times = [r["startup_s"] for r in results]
+        summary["startup_s"] = {"min": min(startup_times), "median": statistics.median(startup_times)}
+
+    print(f"\nimport app.api.main: median {summary['import_s']['median']:.2f}s, "
+          f"min {summary['import_s']['min']:.2f}s, {len(modules)} modules")
+    if "startup_s" in summary:
+        print(f"startup hooks:       median {summary['startup_s']['median']:.2f}s")
+    print(f"\nfirst-party modules (cumulative ms, top {args.top}):")
+    for name, ms in summary["first_party_ms"].items():
+        print(f"  {ms:8.1f}  {name}")
+    print(f"\nthird-party packages (self ms, top {args.top}):")
+    for name, ms in summary["third_party_ms"].items():
+        print(f"  {ms:8.1f}  {name}")
+
+    status = 0
+    if summary["lazy_loaded"]:
+        print(f"\nFAIL: imported at startup, expected on first use only: {', '.join(summary['lazy_loaded'])}")
+        status = 1
+
+    if args.baseline:
+        base = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        before, now = base["import_s"]["median"], summary["import_s"]["median"]
+        change = (now - before) / before if before else 0.0
+        print(f"\nvs baseline: import {before:.2f}s -> {now:.2f}s ({change:+.0%})")
+        if change > args.max_regression:
+            print(f"FAIL: import time regressed more than {args.max_regression:.0%}")
+            status = 1
+
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(summary, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\nsummary written to {args.json_path}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
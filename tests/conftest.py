@@ -6,7 +6,7 @@ import tempfile
 import pytest
 
 from app.infrastructure.config.settings import settings
-from app.infrastructure.routing.cache import clear_memory_cache
+from app.infrastructure.routing.cache import clear_memory_cache, clear_persistent_cache
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -41,13 +41,7 @@ def _offline_routing():
 def _empty_route_cache():
     """FIX #253: no test inherits travel times computed by an earlier test."""
     clear_memory_cache()
-    cache_dir = os.environ.get("ORS_CACHE_DIR")
-    if cache_dir and os.path.isdir(cache_dir):
-        for entry in os.listdir(cache_dir):
-            try:
-                os.remove(os.path.join(cache_dir, entry))
-            except OSError:
-                pass
+    clear_persistent_cache()
     yield
 
 
@@ -0,0 +1,53 @@
+"""
+Golden plans - przypadki GOLDEN_SUBSET z scripts/bench_plans.py muszą dawać
+plany identyczne z tests/golden/plans/<mode>.
+
+stub: ORS zastąpiony lokalnym serwerem (haversine), optymalizator dnia włączony.
+legacy: bez ORS i bez optymalizatora; pliki nagrane na drzewie sprzed prac nad
+routingiem, więc zgodność oznacza, że refaktory nie zmieniły planów.
+Po świadomej zmianie planów: python scripts/bench_plans.py --update-golden
+"""
+import json
+
+import pytest
+
+from app.application.services.plan_service import PlanService
+from app.infrastructure.repositories import POIRepository
+from scripts.bench_plans import (
+    CITIES,
+    DAYS,
+    GOLDEN_DIR,
+    GOLDEN_SUBSET,
+    GROUPS,
+    MODES,
+    build_corpus,
+    diff_paths,
+    generate_case,
+    local_database,
+    routing_mode,
+)
+
+CASES = {
+    cid: (excel, payload)
+    for cid, excel, payload in build_corpus(CITIES, GROUPS, DAYS)
+    if cid in GOLDEN_SUBSET
+}
+
+
+@pytest.fixture(scope="module")
+def services():
+    """PlanService per workbook, shared by all cases."""
+    local_database()
+    return {}
+
+
+@pytest.mark.parametrize("mode", MODES)
+@pytest.mark.parametrize("cid", GOLDEN_SUBSET)
+def test_plan_matches_golden(services, mode, cid):
+    excel, payload = CASES[cid]
+    expected = json.loads((GOLDEN_DIR / mode / f"{cid}.json").read_text(encoding="utf-8"))
+    if excel not in services:
+        services[excel] = PlanService(POIRepository(excel))
+    with routing_mode(mode):
+        data = generate_case(services[excel], payload)
+    assert diff_paths(expected, data) == []
@@ -105,6 +105,8 @@ def test_day_optimizer_reorders():
     with patch("app.infrastructure.routing.day_optimizer.settings") as mock_s:
         mock_s.ors_matrix_enabled = True
         mock_s.ors_matrix_max_locations = 8
+        mock_s.day_optimizer_max_evaluations = 400
+        mock_s.day_optimizer_time_budget_ms = 0
         out = optimize_day_attraction_order(day, {})
     names = [x["poi"]["name"] for x in out if x.get("type") == "attraction"]
     assert set(names) == {"A", "B", "C"}
@@ -0,0 +1,42 @@
+"""FIX #283 — 1-day trips in hub mode (clusters, soft clusters) raised
+UnboundLocalError: `_day_hub_cities` was only assigned on the multi-day path
+but read in the day loop for every hub-mode trip."""
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from app.application.services.plan_service import PlanService
+from app.domain.models.plan import ItemType
+from app.domain.models.trip_input import TripInput
+from app.infrastructure.repositories import POIRepository
+
+
+@pytest.fixture(scope="module")
+def plan_service():
+    return PlanService(POIRepository(str(Path("data") / "multi_city_attractions.xlsx")))
+
+
+def _trip(city: str, is_cluster: bool) -> TripInput:
+    return TripInput(**{
+        "location": {"city": city, "country": "Poland", "is_cluster": is_cluster},
+        "group": {"type": "solo", "size": 1},
+        "trip_length": {"days": 1, "start_date": "2026-07-10"},
+        "daily_time_window": {"start": "09:00", "end": "19:00"},
+        "budget": {"level": 2},
+        "transport_modes": ["car"],
+        "preferences": ["museum_heritage", "relaxation"],
+        "travel_style": "balanced",
+    })
+
+
+@pytest.mark.parametrize("city, is_cluster", [
+    ("Karkonosze", True),
+    ("Trójmiasto", True),
+    ("Katowice", False),
+])
+def test_one_day_hub_trip_is_planned(plan_service, city, is_cluster):
+    plan = plan_service.generate_plan(_trip(city, is_cluster))
+    assert len(plan.days) == 1
+    assert any(it.type == ItemType.ATTRACTION for it in plan.days[0].items)
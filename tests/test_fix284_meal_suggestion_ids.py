@@ -0,0 +1,35 @@
+"""FIX #284 — generic meal suggestion ids were `hash(name) & 0xFFFF`.
+
+`str` hashes are salted per process (PYTHONHASHSEED), so the same plan got
+different suggestion ids on every worker and every restart — and a different
+ETag for the same plan body.
+"""
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from app.application.services.plan_service import _restaurant_dict_to_suggestion
+
+_ROOT = Path(__file__).resolve().parents[1]
+_SNIPPET = (
+    "from app.application.services.plan_service import _restaurant_dict_to_suggestion as s;"
+    "print(s('Regionalna restauracja', 'dinner').id)"
+)
+
+
+def _id_in_process(seed: str) -> str:
+    env = {**os.environ, "PYTHONHASHSEED": seed}
+    out = subprocess.run(
+        [sys.executable, "-c", _SNIPPET], cwd=_ROOT, env=env,
+        capture_output=True, text=True, check=True, timeout=120,
+    )
+    return out.stdout.strip().splitlines()[-1]
+
+
+def test_generic_suggestion_id_is_the_same_in_every_process():
+    here = _restaurant_dict_to_suggestion("Regionalna restauracja", "dinner").id
+    assert here.startswith("generic_dinner_")
+    assert _id_in_process("1") == _id_in_process("2") == here
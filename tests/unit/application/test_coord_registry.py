@@ -0,0 +1,101 @@
+"""Tests dla CoordRegistry (plan-wide coordinate lookups)"""
+from app.application.services.coord_registry import (
+    CoordRegistry,
+    activate_plan_coords,
+    match_place,
+    plan_coords,
+    register_created,
+)
+from app.application.services.plan_service import PlanService
+from app.domain.models.plan import (
+    AttractionItem,
+    ItemType,
+    LunchBreakItem,
+    RestaurantSuggestion,
+)
+
+
+def _attr(name, lat, lng):
+    return AttractionItem.model_construct(
+        type=ItemType.ATTRACTION,
+        poi_id=f"id-{name}",
+        name=name,
+        start_time="10:00",
+        end_time="11:00",
+        duration_min=60,
+        lat=lat,
+        lng=lng,
+    )
+
+
+def _lunch(rest_name, lat, lng):
+    return LunchBreakItem.model_construct(
+        type=ItemType.LUNCH_BREAK,
+        start_time="12:00",
+        end_time="13:00",
+        duration_min=60,
+        suggestions=[
+            RestaurantSuggestion.model_construct(name=rest_name, lat=lat, lng=lng, id="r1")
+        ],
+    )
+
+
+def test_from_pois_reads_zakopane_uppercase_coords():
+    reg = CoordRegistry.from_pois([
+        {"id": "p1", "name": "Gubałówka", "Lat": 49.30, "Lng": 19.93},
+        {"id": "p2", "name": "Bez GPS"},
+    ])
+    assert reg["Gubałówka"]["lat"] == 49.30
+    assert "Bez GPS" not in reg
+    assert reg.by_id("p1")["name"] == "Gubałówka"
+    assert reg.by_id("p2")["name"] == "Bez GPS"  # id lookups cover the whole pool
+    assert list(reg.pois_by_id) == ["p1", "p2"]
+
+
+def test_folded_lookup_matches_plain_dict_scan():
+    data = {
+        "Ostrów Tumski": {"lat": 51.11, "lng": 17.04},
+        "Movie Gate Wrocław": {"lat": 51.10, "lng": 17.03},
+    }
+    reg = CoordRegistry(data)
+    for label in ("ostrow tumski", "OSTRÓW TUMSKI", "Movie Gate", "Rynek"):
+        assert match_place(reg, label) == match_place(data, label)
+
+
+def test_merge_registers_items_into_plan_registry():
+    base = CoordRegistry.from_pois([{"id": "p1", "name": "Zoo", "lat": 51.1, "lng": 17.07}])
+    items = [_attr("Nowe miejsce", 51.0, 17.0), _lunch("Pierogarnia", 51.2, 17.1)]
+    merged = PlanService._merge_coord_map(base, items)
+    assert merged is base  # no per-pass copy of the pool
+    assert base["Nowe miejsce"]["lat"] == 51.0
+    assert base["Pierogarnia"]["id"] == "r1"
+    assert match_place(base, "pierogarnia")["lat"] == 51.2
+
+    plain = {"Zoo": {"lat": 51.1, "lng": 17.07}}
+    assert "Pierogarnia" in PlanService._merge_coord_map(plain, items)
+    assert "Pierogarnia" not in plain
+
+
+def test_pool_coords_win_over_item_coords():
+    base = CoordRegistry.from_pois([{"id": "p1", "name": "Zoo", "lat": 51.1, "lng": 17.07}])
+    merged = PlanService._merge_coord_map(base, [_attr("Zoo", 0.5, 0.5)])
+    assert merged["Zoo"]["lat"] == 51.1
+
+
+def test_lookup_coords_sees_keys_added_after_a_miss():
+    reg = CoordRegistry()
+    assert PlanService._lookup_coords(reg, "Hala Stulecia") is None
+    reg["Hala Stulecia (Wrocław)"] = {"lat": 51.107, "lng": 17.077}
+    assert PlanService._lookup_coords(reg, "Hala Stulecia") == (51.107, 17.077)
+
+
+def test_created_items_land_in_the_active_plan_registry():
+    items = [_attr("Nowe miejsce", 51.0, 17.0), _lunch("Pierogarnia", 51.2, 17.1)]
+    assert register_created(items) is items  # no plan: no-op
+    with plan_coords():
+        reg = activate_plan_coords(CoordRegistry())
+        register_created(items)
+    assert reg["Nowe miejsce"]["lat"] == 51.0
+    assert reg["Pierogarnia"]["id"] == "r1"
+    register_created([_attr("Poza planem", 50.0, 19.0)])  # scope has ended
+    assert "Poza planem" not in reg
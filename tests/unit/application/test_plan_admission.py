@@ -0,0 +1,94 @@
+"""Tests dla admission control generacji planów (budżet CPU, kolejka FIFO, 429)"""
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from app.application.services import plan_admission
+from app.application.services.plan_admission import (
+    AdmissionRejected,
+    PlanAdmission,
+    estimate_cost,
+)
+from app.domain.models.trip_input import TripInput
+
+
+def _trip(city="Kraków", days=3, is_cluster=False):
+    return TripInput.model_validate({
+        "location": {"city": city, "country": "Poland", "region_type": "city", "is_cluster": is_cluster},
+        "group": {"type": "couples", "size": 2, "crowd_tolerance": 1},
+        "trip_length": {"days": days, "start_date": "2026-03-15"},
+        "daily_time_window": {"start": "09:00", "end": "19:00"},
+        "budget": {"level": 2},
+        "transport_modes": ["car"],
+        "travel_style": "balanced",
+    })
+
+
+def test_cost_scales_with_days_pool_and_cluster():
+    pools = {("Kraków",): 80, ("Gdańsk", "Gdynia", "Sopot"): 160}
+    with patch.object(plan_admission, "_pool_size", side_effect=lambda cities: pools.get(cities)):
+        assert estimate_cost(_trip("Kraków", 1)) == 1.0
+        assert estimate_cost(_trip("Kraków", 5)) == 5.0
+        # Cluster city: whole cluster pool; explicit cluster trip: ×1.5 on top.
+        assert estimate_cost(_trip("Gdańsk", 2)) == 4.0
+        assert estimate_cost(_trip("Trójmiasto", 2, is_cluster=True)) == 6.0
+        # Unknown city → reference pool.
+        assert estimate_cost(_trip("Nowhere", 2)) == 2.0
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while not predicate():
+        assert time.time() < deadline
+        time.sleep(0.005)
+
+
+def test_over_budget_waits_in_fifo_order():
+    admission = PlanAdmission(budget=4, max_wait_s=5, max_queue=4)
+    running = admission.acquire(3)
+    order = []
+
+    def _run(name, cost):
+        ticket = admission.acquire(cost)
+        order.append(name)
+        admission.release(ticket)
+
+    big = threading.Thread(target=_run, args=("big", 4))
+    big.start()
+    _wait_for(lambda: admission.snapshot()["queue_depth"] == 1)
+    small = threading.Thread(target=_run, args=("small", 1))  # would fit now, but is behind "big"
+    small.start()
+    _wait_for(lambda: admission.snapshot()["queue_depth"] == 2)
+    assert order == []
+
+    admission.release(running)
+    admission.release(running)  # idempotent
+    big.join(5)
+    small.join(5)
+    assert order == ["big", "small"]
+    snap = admission.snapshot()
+    assert snap["in_use"] == 0 and snap["running"] == 0 and snap["admitted"] == 3
+    assert snap["wait_seconds"]["count"] == 3
+
+
+def test_rejects_after_max_wait_and_when_queue_full():
+    admission = PlanAdmission(budget=2, max_wait_s=0.05, max_queue=1)
+    ticket = admission.acquire(10)  # larger than the budget → runs alone
+    assert admission.snapshot()["in_use"] == 2
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        admission.acquire(1)
+    assert 1 <= rejected.value.retry_after <= 60
+    assert admission.snapshot()["queue_depth"] == 0
+
+    waiter = threading.Thread(target=lambda: pytest.raises(AdmissionRejected, admission.acquire, 1))
+    admission.max_wait_s = 1.0
+    waiter.start()
+    _wait_for(lambda: admission.snapshot()["queue_depth"] == 1)
+    with pytest.raises(AdmissionRejected, match="already waiting"):
+        admission.acquire(1)
+    waiter.join(5)
+    admission.release(ticket)
+    assert admission.snapshot()["rejected"] == 3
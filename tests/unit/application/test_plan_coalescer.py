@@ -0,0 +1,76 @@
+"""Tests dla single-flight coalescing identycznych preview"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.application.services.plan_coalescer import PlanCoalescer, trip_key
+from app.domain.models.plan import DayPlan, PlanResponse
+from app.domain.models.trip_input import TripInput
+
+TRIP = {
+    "location": {"city": "Kraków", "country": "Poland", "region_type": "city"},
+    "group": {"type": "couples", "size": 2, "crowd_tolerance": 1},
+    "trip_length": {"days": 1, "start_date": "2026-03-15"},
+    "daily_time_window": {"start": "09:00", "end": "19:00"},
+    "budget": {"level": 2},
+    "transport_modes": ["car"],
+    "travel_style": "balanced",
+}
+
+
+def _trip(**overrides):
+    return TripInput.model_validate({**TRIP, **overrides})
+
+
+def test_trip_key_is_canonical():
+    reordered = TripInput.model_validate(dict(reversed(list(TRIP.items()))))
+    assert trip_key(_trip()) == trip_key(reordered)
+    assert trip_key(_trip()) != trip_key(_trip(budget={"level": 3}))
+
+
+def test_identical_requests_share_one_generation():
+    coalescer = PlanCoalescer()
+    release = threading.Event()
+    calls = []
+
+    def generate(trip_input):
+        calls.append(trip_input)
+        assert release.wait(5)
+        return PlanResponse(plan_id="leader", days=[DayPlan(day=1, items=[])])
+
+    with ThreadPoolExecutor(4) as pool:
+        futures = [pool.submit(coalescer.generate, _trip(), generate) for _ in range(4)]
+        while coalescer.coalesced < 3:
+            threading.Event().wait(0.01)
+        release.set()
+        plans = [f.result() for f in futures]
+
+    assert len(calls) == 1 and coalescer.in_flight() == 0
+    assert len({p.plan_id for p in plans}) == 4 and "leader" in {p.plan_id for p in plans}
+    # Deep copies: editing one caller's plan does not touch the others.
+    plans[0].days[0].items.append("x")
+    assert [len(p.days[0].items) for p in plans[1:]] == [0, 0, 0]
+
+    # Nothing in flight → the next identical request generates again.
+    coalescer.generate(_trip(), generate)
+    assert len(calls) == 2
+
+
+def test_leader_failure_reaches_waiters_then_clears():
+    coalescer = PlanCoalescer()
+    release = threading.Event()
+
+    def failing(trip_input):
+        assert release.wait(5)
+        raise RuntimeError("engine failed")
+
+    with ThreadPoolExecutor(2) as pool:
+        futures = [pool.submit(coalescer.generate, _trip(), failing) for _ in range(2)]
+        while coalescer.coalesced < 1:
+            threading.Event().wait(0.01)
+        release.set()
+        for f in futures:
+            with pytest.raises(RuntimeError, match="engine failed"):
+                f.result()
+    assert coalescer.in_flight() == 0
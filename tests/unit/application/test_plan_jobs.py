@@ -0,0 +1,177 @@
+"""Tests dla async plan jobs (job store, bounded pool, progress per day)"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from app.application.services import plan_jobs
+from app.application.services.plan_jobs import PlanJobQueue, PlanQueueFull, run_plan_job
+from app.domain.models.trip_input import TripInput
+from app.infrastructure.config.settings import settings
+from app.infrastructure.repositories.plan_job_store import get_plan_job_store
+
+
+def _spawned_job(plan_id, trip_payload, user_id=None, guest_id=None):
+    # Runs in a spawned pool process: store path comes from PLAN_JOB_DB_PATH.
+    store = get_plan_job_store()
+    store.start(plan_id)
+    store.progress(plan_id, trip_payload["trip_length"]["days"], trip_payload["trip_length"]["days"])
+    store.finish(plan_id)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    path = str(tmp_path / "plan_jobs.sqlite3")
+    monkeypatch.setenv("PLAN_JOB_DB_PATH", path)
+    with patch.object(settings, "plan_job_db_path", path):
+        yield get_plan_job_store()
+
+
+@pytest.fixture
+def trip():
+    return TripInput.model_validate({
+        "location": {"city": "Kraków", "country": "Poland", "region_type": "city"},
+        "group": {"type": "couples", "size": 2, "crowd_tolerance": 1},
+        "trip_length": {"days": 1, "start_date": "2026-03-15"},
+        "daily_time_window": {"start": "09:00", "end": "19:00"},
+        "budget": {"level": 2},
+        "transport_modes": ["car"],
+        "travel_style": "balanced",
+    })
+
+
+def _wait(store, plan_id, statuses=("ready", "failed"), timeout=60.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = store.get(plan_id)
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {plan_id} still {store.get(plan_id)['status']}")
+
+
+def test_store_lifecycle_and_purge(store):
+    store.create("a")
+    assert store.get("a")["status"] == "queued" and store.pending() == 1
+    store.start("a")
+    store.progress("a", 2, 3)
+    assert store.get("a")["status"] == "running"
+    assert (store.get("a")["days_done"], store.get("a")["days_total"]) == (2, 3)
+    store.finish("a")
+    assert not store.fail("a", "late pool error")  # ready is final
+    assert store.get("a")["status"] == "ready" and store.pending() == 0
+
+    store.create("old", now=time.time() - (settings.plan_job_ttl_hours + 1) * 3600)
+    assert store.purge() == 1 and store.get("old") is None and store.get("missing") is None
+
+
+def test_jobs_of_a_dead_worker_are_failed(store):
+    import subprocess
+    import sys
+
+    from app.infrastructure.repositories import plan_job_store
+
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    now = time.time()
+    store.create("orphan", now=now)
+    store.create("silent", now=now - settings.plan_job_stale_s - 5)
+    store.create("alive", now=now)
+    store.heartbeat(["alive"], now=now)
+    with store._lock:
+        store._db().execute(
+            "UPDATE jobs SET owner = ? WHERE plan_id = 'orphan'",
+            (f"{plan_job_store.socket.gethostname()}:{dead.pid}",),
+        )
+    assert store.pending() == 1  # only "alive" still counts toward the limit
+    for plan_id in ("orphan", "silent"):
+        job = store.get(plan_id)
+        assert job["status"] == "failed" and "lost" in job["error"]
+    assert store.get("alive")["status"] == "queued"
+
+    # A job left running by a container restart is failed when the store reopens.
+    store.start("alive", now=now - settings.plan_job_stale_s - 5)
+    reopened = plan_job_store.PlanJobStore(store.path)
+    try:
+        assert reopened.get("alive")["status"] == "failed"
+    finally:
+        reopened.close()
+
+
+def test_queue_heartbeat_keeps_jobs_alive(store, trip):
+    release = []
+
+    def _slow(plan_id, payload, user_id, guest_id):
+        while not release:
+            time.sleep(0.01)
+
+    queue = PlanJobQueue(workers=1, max_pending=2, executor_factory=ThreadPoolExecutor, job=_slow)
+    with patch.multiple(settings, plan_job_heartbeat_s=0.05, plan_job_stale_s=0.5):
+        try:
+            plan_id = queue.submit(trip, guest_id="g")
+            time.sleep(1.0)
+            assert store.get(plan_id)["status"] == "queued" and store.pending() == 1
+        finally:
+            release.append(True)
+            queue.shutdown()
+
+
+def test_run_plan_job_reports_days_and_saves(store, trip):
+    class _Service:
+        def __init__(self, repo):
+            pass
+
+        def generate_plan(self, trip_input, plan_id=None, on_day=None):
+            days = [SimpleNamespace(day=n) for n in (1, 2)]
+            for day in days:
+                on_day(day, 2)
+                seen.append(store.get(plan_id)["days_done"])
+            return SimpleNamespace(plan_id=plan_id, days=days)
+
+    seen, saved = [], []
+    store.create("p1")
+    with patch("app.application.services.plan_service.PlanService", _Service), \
+         patch.object(plan_jobs, "_poi_repository"), \
+         patch.object(plan_jobs, "_save_plan", side_effect=lambda plan, *a: saved.append(plan.plan_id)):
+        run_plan_job("p1", trip.model_dump(mode="json"), guest_id="guest")
+    assert seen == [1, 2] and saved == ["p1"]
+    assert store.get("p1")["status"] == "ready"
+
+    store.create("p2")
+    with patch("app.application.services.plan_service.PlanService", side_effect=RuntimeError("boom")), \
+         patch.object(plan_jobs, "_poi_repository"):
+        run_plan_job("p2", trip.model_dump(mode="json"))
+    assert store.get("p2")["status"] == "failed" and "boom" in store.get("p2")["error"]
+
+
+def test_queue_is_bounded_and_records_lost_jobs(store, trip):
+    release = []
+
+    def _blocking(plan_id, payload, user_id, guest_id):
+        while not release:
+            time.sleep(0.01)
+        raise SystemError("worker died")
+
+    queue = PlanJobQueue(workers=1, max_pending=2, executor_factory=ThreadPoolExecutor, job=_blocking)
+    try:
+        ids = [queue.submit(trip, guest_id="g") for _ in range(2)]
+        with pytest.raises(PlanQueueFull):
+            queue.submit(trip, guest_id="g")
+        release.append(True)
+        for plan_id in ids:
+            assert "worker died" in _wait(store, plan_id)["error"]
+        assert store.pending() == 0
+    finally:
+        queue.shutdown()
+
+
+def test_spawned_pool_runs_job(store, trip):
+    queue = PlanJobQueue(workers=1, max_pending=4, job=_spawned_job)
+    try:
+        plan_id = queue.submit(trip, guest_id="g")
+        job = _wait(store, plan_id)
+    finally:
+        queue.shutdown()
+    assert job["status"] == "ready" and job["days_done"] == job["days_total"] == 1
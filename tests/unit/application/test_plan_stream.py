@@ -0,0 +1,86 @@
+"""Tests dla streaming preview (days yielded during generation, revised days resent)"""
+import threading
+
+import pytest
+
+from app.application.services.plan_stream import PlanStreamCancelled, iter_plan_days
+from app.domain.models.plan import DayPlan, PlanResponse
+
+
+class _Service:
+    """Emits days through on_day; waits for the consumer before finishing."""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.consumed_day1 = threading.Event()
+
+    def generate_plan(self, trip_input, plan_id=None, on_day=None):
+        days = [DayPlan(day=n, title=f"Dzień {n}", items=[]) for n in (1, 2, 3)]
+        for day in days:
+            on_day(day, len(days))
+        # Streamed before the plan exists: the consumer already has day 1.
+        assert self.consumed_day1.wait(5)
+        if self.fail:
+            raise RuntimeError("trip-level pass failed")
+        days[1].title = "Dzień 2 (po korekcie)"  # trip-level pass edits a sent day
+        return PlanResponse(plan_id=plan_id or "p", days=days)
+
+
+def test_days_stream_before_plan_and_revisions_follow():
+    service = _Service()
+    events = []
+    for kind, payload in iter_plan_days(service, trip_input=None, plan_id="p-1"):
+        events.append((kind, payload))
+        service.consumed_day1.set()
+
+    kinds = [k for k, _ in events]
+    assert kinds == ["day", "day", "day", "day", "plan"]
+    streamed = [p for _, p in events[:3]]
+    assert [d["day"] for d in streamed] == [1, 2, 3] and {d["days_total"] for d in streamed} == {3}
+    assert "revised" not in streamed[1] and streamed[1]["title"] == "Dzień 2"
+    revised = events[3][1]
+    assert revised["revised"] is True and revised["day"] == 2 and revised["title"] == "Dzień 2 (po korekcie)"
+    assert events[-1][1].plan_id == "p-1"
+
+
+def test_generation_error_is_raised_after_sent_days():
+    service = _Service(fail=True)
+    got = []
+    with pytest.raises(RuntimeError, match="trip-level pass failed"):
+        for kind, payload in iter_plan_days(service, trip_input=None):
+            got.append(payload["day"])
+            service.consumed_day1.set()
+    assert got == [1, 2, 3]
+
+
+def test_abandoned_stream_stops_generation_and_releases_when_worker_ends():
+    release_day2, stopped, finished = threading.Event(), [], threading.Event()
+
+    class _Slow:
+        def generate_plan(self, trip_input, plan_id=None, on_day=None):
+            for n in (1, 2, 3):
+                if n == 2:
+                    assert release_day2.wait(5)
+                try:
+                    on_day(DayPlan(day=n, title=f"Dzień {n}", items=[]), 3)
+                except PlanStreamCancelled:
+                    stopped.append(n)
+                    raise
+            return PlanResponse(plan_id="p", days=[])
+
+    stream = iter_plan_days(_Slow(), trip_input=None, on_finish=finished.set)
+    assert next(stream)[1]["day"] == 1
+    stream.close()  # client disconnected after day 1
+    assert not finished.is_set()  # the worker still holds the admission ticket
+    release_day2.set()
+    assert finished.wait(5) and stopped == [2]
+
+
+def test_failed_generation_releases_once_after_consumer_left():
+    finished = threading.Event()
+    calls = []
+    service = _Service(fail=True)
+    service.consumed_day1.set()
+    for _ in iter_plan_days(service, trip_input=None, on_finish=lambda: calls.append(1) or finished.set()):
+        break  # consumer leaves after day 1; the worker fails on its own
+    assert finished.wait(5) and calls == [1]
@@ -0,0 +1,107 @@
+"""Tests dla timeline fingerprint + repair-round memo"""
+import threading
+
+from app.application.services.timeline_fingerprint import (
+    repair_round,
+    repair_round_stats,
+    repair_rounds,
+    run_repair_round,
+    timeline_fingerprint,
+)
+from app.domain.models.plan import AttractionItem, FreeTimeItem, ItemType, TransitItem
+from app.infrastructure.metrics import PLAN_REPAIR_ROUNDS
+
+
+def _attr(name, start, end):
+    return AttractionItem.model_construct(
+        type=ItemType.ATTRACTION, poi_id=f"id-{name}", name=name,
+        start_time=start, end_time=end, duration_min=60,
+    )
+
+
+def _leg(frm, to, start, end):
+    return TransitItem.model_construct(
+        type=ItemType.TRANSIT, start_time=start, end_time=end, duration_min=15,
+        mode="walk", from_location=frm, to_location=to,
+    )
+
+
+def test_fingerprint_tracks_times_and_endpoints():
+    day = [_attr("Zoo", "10:00", "11:00"), _leg("Zoo", "Rynek", "11:00", "11:15")]
+    fp = timeline_fingerprint(day)
+    assert fp == timeline_fingerprint([_attr("Zoo", "10:00", "11:00"), _leg("Zoo", "Rynek", "11:00", "11:15")])
+    assert fp != timeline_fingerprint([_attr("Zoo", "10:05", "11:00"), day[1]])
+    assert fp != timeline_fingerprint([day[0], _leg("Zoo", "Hala Stulecia", "11:00", "11:15")])
+    assert fp != timeline_fingerprint(list(reversed(day)))
+
+
+def test_fingerprint_tracks_technical_buffer_flag():
+    def _free(tech):
+        return FreeTimeItem.model_construct(
+            type=ItemType.FREE_TIME, start_time="14:00", end_time="14:04",
+            duration_min=4, label="Czas wolny", is_technical_buffer=tech,
+        )
+
+    assert timeline_fingerprint([_free(True)]) != timeline_fingerprint([_free(False)])
+
+
+def test_round_skipped_when_input_is_its_last_output():
+    calls = []
+
+    def shift(items):
+        calls.append(1)
+        return [_attr(it.name, "12:00", "13:00") for it in items]
+
+    with repair_rounds():
+        out = run_repair_round("shift", [_attr("Zoo", "10:00", "11:00")], shift, day=1)
+        again = run_repair_round("shift", out, shift, day=1)
+        assert [it.start_time for it in again] == ["12:00"]
+        run_repair_round("shift", out, shift, day=2)
+        run_repair_round("shift", out, shift, day=1, key=("max_gap", 5))
+        assert len(calls) == 3
+        assert repair_round_stats() == {"shift": {"ran": 3, "skipped": 1}}
+        ran = PLAN_REPAIR_ROUNDS.value(round="shift", result="ran")
+        skipped = PLAN_REPAIR_ROUNDS.value(round="shift", result="skipped")
+    assert repair_round_stats() == {}
+    assert PLAN_REPAIR_ROUNDS.value(round="shift", result="ran") == ran + 3
+    assert PLAN_REPAIR_ROUNDS.value(round="shift", result="skipped") == skipped + 1
+    run_repair_round("shift", out, shift, day=1)  # no plan scope: always runs
+    assert len(calls) == 4
+
+
+class _Passes:
+    def __init__(self):
+        self.calls = 0
+
+    @repair_round
+    def _noop(self, items, *, day_num=0, max_gap=1):
+        self.calls += 1
+        return list(items)
+
+
+def test_concurrent_plans_do_not_share_memo():
+    day = [_attr("Zoo", "10:00", "11:00")]
+    passes = _Passes()
+    started, finish = threading.Event(), threading.Event()
+    seen = {}
+
+    def other_plan():
+        with repair_rounds():
+            passes._noop(day, day_num=1)
+            started.set()
+            finish.wait(5)
+            seen["other"] = repair_round_stats()
+
+    t = threading.Thread(target=other_plan)
+    t.start()
+    started.wait(5)
+    with repair_rounds():
+        passes._noop(day, day_num=1)  # the other plan's memo is not visible here
+        passes._noop(day, day_num=1)
+        passes._noop(day, day_num=2)
+        passes._noop(day, day_num=1, max_gap=3)
+        assert repair_round_stats() == {"noop": {"ran": 3, "skipped": 1}}
+    finish.set()
+    t.join()
+    assert seen["other"] == {"noop": {"ran": 1, "skipped": 0}}
+    assert passes.calls == 4
@@ -0,0 +1,43 @@
+"""Tests dla name matching (folds + marker matchers)"""
+import re
+import unicodedata
+
+from app.domain.planner.name_matching import MarkerMatcher, fold_diacritics, fold_polish
+from app.infrastructure.routing.dedup import _normalize_name
+
+_NAMES = (
+    "Jaskinia Łokietka", "Kopalnia Soli Wieliczka", "Muzeum Narodowe w Krakowie",
+    "Park Zdrojowy", "Kościół Mariacki", "Zamek Królewski na Wawelu", "", "  Rynek  ",
+)
+
+
+def test_marker_matcher_equals_any_substring():
+    markers = ("łokietka", "jaskinia łokietka", "wieliczka", "rynek")
+    matcher = MarkerMatcher(markers)
+    for name in _NAMES:
+        low = name.lower()
+        assert matcher.matches(name) == any(m in low for m in markers)
+    assert matcher.first("Jaskinia Łokietka") == "jaskinia łokietka"
+
+
+def test_folds():
+    assert fold_diacritics(" Kraków ") == "krakow"
+    assert fold_diacritics("Łódź") == "łodz"
+    assert fold_polish("Łódź ") == "lodz "
+    assert fold_polish(None) == ""
+
+
+def test_dedup_normalize_matches_sequential_substitutions():
+    words = ("muzeum", "museum", "park", "zamek", "castle", "kościół", "kosciol",
+             "church", "galeria", "gallery", "centrum", "the", "w", "we", "na")
+
+    def reference(name):
+        s = unicodedata.normalize("NFKD", (name or "").lower().strip())
+        s = "".join(c for c in s if not unicodedata.combining(c))
+        s = re.sub(r"[^a-z0-9\s]", " ", s)
+        for w in words:
+            s = re.sub(rf"\b{w}\b", " ", s)
+        return re.sub(r"\s+", " ", s).strip()
+
+    for name in _NAMES:
+        assert _normalize_name(name) == reference(name)
@@ -0,0 +1,116 @@
+"""Tests dla catalog preload (workbook parsed once per version, table snapshots)"""
+import os
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from app.infrastructure.config.settings import settings
+from app.infrastructure.repositories import RestaurantRepository, catalog_cache, restaurant_repository
+from app.infrastructure.repositories.catalog_cache import (
+    TTLSnapshot,
+    clear_catalog_cache,
+    read_workbook,
+    validate_workbook_once,
+)
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    clear_catalog_cache()
+    path = tmp_path / "catalog.xlsx"
+    pd.DataFrame({"Name ": ["Wawel", "Sukiennice"], "Lat": [50.05, 50.06]}).to_excel(path, index=False)
+    yield str(path)
+    clear_catalog_cache()
+
+
+def test_workbook_parsed_once_per_version(workbook):
+    with patch.object(catalog_cache.pd, "read_excel", wraps=pd.read_excel) as parse:
+        first = read_workbook(workbook)
+        first.columns = first.columns.str.strip()  # what load_zakopane does
+        first.loc[0, "Lat"] = 0.0
+        second = read_workbook(workbook)
+        assert parse.call_count == 1
+        # Callers get copies: the cached frame is untouched.
+        assert list(second.columns) == ["Name ", "Lat"] and second.loc[0, "Lat"] == 50.05
+
+        pd.DataFrame({"Name ": ["Barbakan"], "Lat": [50.065]}).to_excel(workbook, index=False)
+        os.utime(workbook, ns=(1, 10**18))
+        assert list(read_workbook(workbook)["Name "]) == ["Barbakan"]
+        assert parse.call_count == 2
+    with pytest.raises(FileNotFoundError):
+        read_workbook(workbook + ".missing")
+
+
+def test_validation_runs_once_per_version(workbook):
+    report = SimpleNamespace(has_errors=False, warnings=[])
+    with patch("app.infrastructure.repositories.excel_validator.validate_excel",
+               return_value=report) as validate:
+        for city in ("Kraków", "Wrocław", "Kraków"):
+            validate_workbook_once(workbook, city_name=city)
+    assert validate.call_count == 1
+
+
+def test_restaurant_snapshot_skips_database():
+    rows = [SimpleNamespace(city="Kraków", name="A"), SimpleNamespace(city="Kraków", name="B"),
+            SimpleNamespace(city="Wrocław", name="C")]
+
+    class _Session:
+        def query(self, model):
+            return SimpleNamespace(all=lambda: rows)
+
+        def close(self):
+            pass
+
+    repo = RestaurantRepository(session=SimpleNamespace(query=None))  # any query would fail
+    try:
+        with patch("app.infrastructure.repositories.restaurant_repository.SessionLocal", _Session):
+            assert RestaurantRepository.preload() == 3
+        assert [r.name for r in repo.get_by_city("Kraków")] == ["A", "B"]
+        assert repo.get_by_city("Gdańsk") == []
+    finally:
+        RestaurantRepository.clear_snapshot()
+
+
+def test_restaurant_snapshot_is_reread_after_ttl():
+    tables = [[SimpleNamespace(city="Kraków", name="A")], [SimpleNamespace(city="Kraków", name="B")]]
+
+    class _Session:
+        def query(self, model):
+            return SimpleNamespace(all=lambda: tables[0])
+
+        def close(self):
+            pass
+
+    repo = RestaurantRepository(session=SimpleNamespace(query=None))
+    try:
+        with patch("app.infrastructure.repositories.restaurant_repository.SessionLocal", _Session), \
+             patch.object(settings, "catalog_snapshot_ttl_s", 3600):
+            RestaurantRepository.preload()
+            tables.pop(0)  # the table changes in the database
+            assert [r.name for r in repo.get_by_city("Kraków")] == ["A"]  # fresh: no query
+            restaurant_repository._SNAPSHOT.loaded_at -= 3601
+            assert [r.name for r in repo.get_by_city("Kraków")] == ["B"]
+            assert RestaurantRepository.refresh_snapshot() == 1  # /admin/reload-poi
+        RestaurantRepository.clear_snapshot()
+        assert RestaurantRepository.refresh_snapshot() is None  # never preloaded: stays off
+    finally:
+        RestaurantRepository.clear_snapshot()
+
+
+def test_snapshot_keeps_old_rows_when_refresh_fails():
+    tables = [[SimpleNamespace(region="Tatry", name="A")]]
+
+    def loader():
+        if not tables:
+            raise RuntimeError("database down")
+        return tables.pop()
+
+    snapshot = TTLSnapshot("TrailRepository", loader, key=lambda row: row.region)
+    with patch.object(settings, "catalog_snapshot_ttl_s", 60):
+        assert snapshot.current() is None  # never preloaded
+        assert snapshot.preload() == 1
+        snapshot.loaded_at -= 61
+        assert [r.name for r in snapshot.current()["Tatry"]] == ["A"]
+        assert snapshot.current()["Tatry"][0].name == "A"  # failed refresh waits another TTL
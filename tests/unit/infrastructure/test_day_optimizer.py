@@ -0,0 +1,161 @@
+"""Tests dla time-window-aware day optimizer (TSPTW)"""
+import itertools
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from app.infrastructure.routing import day_optimizer
+from app.infrastructure.routing.day_optimizer import (
+    optimize_day_attraction_order,
+    optimize_day_schedule,
+)
+
+# Four stops on a line, 10 min apart per step; the engine zig-zags.
+LINE = {"A": 0, "B": 1, "C": 2, "D": 3}
+CTX = {"day_start": "09:00", "day_end": "19:00", "season": "summer"}
+
+
+def _matrix(pois, profile, context=None):
+    coords = [(p["lat"], p["lng"]) for p in pois]
+    pos = [int(round((lng - 19.90) * 100)) for _, lng in coords]
+    return [[abs(a - b) * 10.0 for b in pos] for a in pos]
+
+
+def _attr(name, start, end, **poi):
+    return {
+        "type": "attraction",
+        "name": name,
+        "start_time": start,
+        "end_time": end,
+        "poi": {"name": name, "lat": 50.06, "lng": 19.90 + LINE[name] / 100, **poi},
+    }
+
+
+def _day(*attrs, lunch=("13:00", "14:00")):
+    items = [{"type": "accommodation_start", "start_time": "09:00", "end_time": "09:00"}]
+    items += list(attrs)
+    if lunch:
+        items.insert(3, {"type": "lunch_break", "start_time": lunch[0], "end_time": lunch[1]})
+    return items
+
+
+def _names(items):
+    return [it["name"] for it in items if it.get("type") == "attraction"]
+
+
+def _run(items, opening=lambda poi, start: True, **budget):
+    def is_open(p, start, duration, season, context=None):
+        return opening(p, start)
+
+    budget.setdefault("time_budget_ms", 0)
+    with patch.object(day_optimizer, "travel_matrix", _matrix), \
+         patch("app.domain.planner.engine.is_open", is_open):
+        return optimize_day_schedule(items, CTX, **budget)
+
+
+def _zigzag():
+    return _day(
+        _attr("A", "09:00", "10:00"), _attr("C", "10:30", "11:30"),
+        _attr("B", "14:00", "15:00"), _attr("D", "15:30", "16:30"),
+    )
+
+
+def test_reorders_zigzag_and_retimes_around_lunch():
+    items = _zigzag()
+    schedule = _run(items)
+    assert schedule is not None and schedule.feasible
+    out = schedule.items
+    assert _names(out) == ["A", "B", "C", "D"]
+    assert schedule.travel_min == 30
+    lunch = next(it for it in out if it["type"] == "lunch_break")
+    before_lunch = [it for it in out[:out.index(lunch)] if it["type"] == "attraction"]
+    assert all(it["end_time"] <= "13:00" for it in before_lunch)
+    assert [it["start_time"] for it in out if it["type"] == "attraction"][:2] == ["09:00", "10:10"]
+
+
+def test_opening_hours_win_over_shorter_route():
+    items = _day(
+        _attr("A", "09:00", "10:00"), _attr("D", "10:30", "11:30"),
+        _attr("B", "14:00", "15:00"), _attr("C", "15:30", "16:30"),
+    )
+    # D only opens in the afternoon, so it cannot take a morning slot.
+    schedule = _run(items, opening=lambda poi, start: poi["name"] != "D" or start >= 14 * 60)
+    assert schedule is not None
+    names = [schedule.stops[i].item["name"] for i in range(4)]
+    assert names.index("D") >= 2
+    assert schedule.feasible
+
+
+def test_pinned_attraction_keeps_its_slot_and_time():
+    pinned = _attr("C", "10:30", "11:30")
+    pinned["meta"] = {"pinned": True}
+    items = _day(
+        _attr("A", "09:00", "10:00"), pinned,
+        _attr("D", "14:00", "15:00"), _attr("B", "15:30", "16:30"),
+    )
+    schedule = _run(items)
+    assert schedule is not None
+    out = schedule.items
+    kept = next(it for it in out if it.get("name") == "C")
+    assert out.index(kept) == 2 and kept["start_time"] == "10:30"
+
+
+def test_already_optimal_day_is_left_untouched():
+    items = _day(
+        _attr("A", "09:00", "10:00"), _attr("B", "10:10", "11:10"),
+        _attr("C", "14:00", "15:00"), _attr("D", "15:10", "16:10"),
+    )
+    assert _run(items) is None
+    with patch.object(day_optimizer, "travel_matrix", _matrix):
+        assert optimize_day_attraction_order(items, CTX) is items
+
+
+def test_transfers_follow_the_new_order():
+    def transfer(a, b, minutes):
+        return {"type": "transfer", "from": a, "to": b, "duration_min": minutes}
+
+    items = [
+        {"type": "accommodation_start", "start_time": "09:00", "end_time": "09:00"},
+        _attr("A", "09:00", "10:00"),
+        transfer("A", "C", 20),
+        _attr("C", "10:20", "11:20"),
+        {"type": "buffer", "start_time": "11:20", "end_time": "11:30", "duration_min": 10},
+        transfer("C", "B", 10),
+        _attr("B", "11:40", "12:40"),
+        transfer("B", "D", 20),
+        _attr("D", "13:00", "14:00"),
+    ]
+    schedule = _run(items)
+    assert schedule is not None
+    out = schedule.items
+    assert _names(out) == ["A", "B", "C", "D"]
+    legs = [(it["from"], it["to"], it["duration_min"]) for it in out if it["type"] == "transfer"]
+    assert legs == [("A", "B", 10), ("B", "C", 10), ("C", "D", 10)]
+    buffer = next(it for it in out if it["type"] == "buffer")
+    assert (buffer["start_time"], buffer["end_time"]) == ("11:10", "11:20")
+
+
+def test_search_is_capped_by_evaluations():
+    calls = []
+    simulate = day_optimizer._DayModel.simulate
+
+    def counting(self, order, render=False):
+        if not render:
+            calls.append(list(order))
+        return simulate(self, order, render)
+
+    with patch.object(day_optimizer._DayModel, "simulate", counting):
+        assert _run(_zigzag()) is not None
+        full = len(calls)
+        calls.clear()
+        assert _run(_zigzag(), max_evaluations=2) is None  # too few to find the better order
+    # + the engine order and the starting order of each local search
+    assert len(calls) <= 2 + 3 < full
+
+
+def test_same_order_however_slow_the_clock():
+    # Every clock reading is an hour later: only the safety valve looks at it.
+    clock = SimpleNamespace(perf_counter=itertools.count(step=3600.0).__next__)
+    with patch.object(day_optimizer, "time", clock):
+        schedule = _run(_zigzag())
+        assert schedule is not None and _names(schedule.items) == ["A", "B", "C", "D"]
+        assert _run(_zigzag(), time_budget_ms=1000) is None  # valve on: cut at once
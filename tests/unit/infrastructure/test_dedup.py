@@ -0,0 +1,65 @@
+"""Tests dla spatial-hash dedup of external POIs (same decisions as pairwise)"""
+import random
+
+from app.infrastructure.routing.dedup import (
+    dedupe_external_list,
+    filter_external_duplicates,
+    is_duplicate_of_excel,
+)
+
+_WORDS = ["Muzeum", "Zamek", "Park", "Wawel", "Rynek", "Stary", "Kościół", "Mariacki",
+          "Brama", "Floriańska", "Galeria", "Sukiennice", "Ogród", "Botaniczny"]
+_LONG = " ".join(f"słowo{i}" for i in range(13))
+
+
+def _pairwise_filter(external, excel):
+    return [e for e in external if not any(is_duplicate_of_excel(e, x) for x in excel)]
+
+
+def _pairwise_dedupe(candidates):
+    out = []
+    for c in candidates:
+        if not any(is_duplicate_of_excel(c, p) for p in out):
+            out.append(c)
+    return out
+
+
+def _random_pois(rng, n, prefix):
+    pois = []
+    for i in range(n):
+        name = " ".join(rng.sample(_WORDS, rng.randint(1, 3)))
+        roll = rng.random()
+        if roll < 0.03:
+            name = _LONG if rng.random() < 0.5 else _LONG.replace("słowo12", "inne")
+        # Clustered around Rynek, so many pairs fall within 50-150 m.
+        lat = 50.0617 + rng.gauss(0, 0.002)
+        lng = 19.9373 + rng.gauss(0, 0.003)
+        poi = {"id": f"{prefix}{i}", "name": name, "lat": lat, "lng": lng}
+        if roll > 0.97:
+            poi["lat"] = None
+        elif roll > 0.95:
+            poi["lng"] = float("nan")
+        elif roll > 0.93:
+            poi["lat"], poi["lng"] = str(lat), str(lng)
+        pois.append(poi)
+    return pois
+
+
+def test_decisions_match_pairwise_rule():
+    rng = random.Random(40)
+    for _ in range(20):
+        excel = _random_pois(rng, 120, "ex")
+        external = _random_pois(rng, 60, "ext")
+        assert filter_external_duplicates(external, excel) == _pairwise_filter(external, excel)
+        assert dedupe_external_list(external) == _pairwise_dedupe(external)
+
+
+def test_grid_edges_and_name_only_matches():
+    excel = [{"name": "Sukiennice", "lat": 50.0617, "lng": 19.9373},
+             {"name": "Brama Floriańska", "lat": None, "lng": None}]
+    # 140 m east and same name → duplicate across a ~98 m wide cell boundary.
+    near = {"name": "Sukiennice", "lat": 50.0617, "lng": 19.9373 + 0.00196}
+    far = {"name": "Sukiennice", "lat": 50.0617, "lng": 19.9373 + 0.0023}
+    spot = {"name": "Zupełnie inna nazwa", "lat": 50.06173, "lng": 19.93733}
+    unlocated = {"name": "brama florianska", "lat": 50.0, "lng": 20.0}
+    assert filter_external_duplicates([near, far, spot, unlocated], excel) == [far]
@@ -0,0 +1,78 @@
+"""Tests dla cached health probe (background checks, live / ready semantics)"""
+import time
+
+from app.api.health import HealthMonitor
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _monitor(db_ok=True, pois=10, calls=None, clock=None):
+    def database():
+        if calls is not None:
+            calls.append("db")
+        if not db_ok:
+            raise ConnectionError("could not connect")
+        return {"ok": True}
+
+    checks = {
+        "database": database,
+        "catalog": lambda: {"ok": pois > 0, "pois": pois},
+        "ors": lambda: {"ok": True, "enabled": False},
+    }
+    return HealthMonitor(checks=checks, interval_s=30, clock=clock or time.time)
+
+
+def test_probes_read_cached_snapshot():
+    calls = []
+    monitor = _monitor(calls=calls)
+    assert monitor.readiness() == (False, ["starting: no health check completed yet"])
+    assert monitor.report()["status"] == "starting"
+
+    monitor.run_checks()
+    for _ in range(5):
+        report = monitor.report()
+        assert monitor.readiness() == (True, [])
+    assert calls == ["db"]  # probes never touch the database
+    assert report["status"] == "ok" and report["database"] == "connected"
+    assert report["checks"]["catalog"]["pois"] == 10 and "latency_ms" in report["checks"]["database"]
+
+
+def test_not_ready_when_database_down_catalog_empty_or_stale():
+    clock = _Clock()
+    down = _monitor(db_ok=False, clock=clock)
+    down.run_checks()
+    ready, reasons = down.readiness()
+    assert not ready and reasons == ["database: ConnectionError: could not connect"]
+    report = down.report()
+    assert report["status"] == "degraded" and report["database"].startswith("error: ConnectionError")
+
+    empty = _monitor(pois=0, clock=clock)
+    empty.run_checks()
+    assert empty.readiness() == (False, ["catalog: no POIs loaded"])
+
+    fresh = _monitor(clock=clock)
+    fresh.run_checks()
+    clock.now += 91  # three intervals without a completed check
+    ready, reasons = fresh.readiness()
+    assert not ready and reasons[0].startswith("stale")
+
+
+def test_background_thread_refreshes_snapshot():
+    calls = []
+    monitor = _monitor(calls=calls)
+    monitor.interval_s = 0.01
+    monitor.start()
+    monitor.start()  # idempotent
+    try:
+        deadline = time.time() + 5
+        while len(calls) < 3 and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        monitor.stop()
+    assert len(calls) >= 3 and monitor.readiness()[0]
@@ -0,0 +1,41 @@
+"""Tests dla cold start: stripe / supabase / reportlab loaded on first use only"""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[3]
+
+
+def _run(code: str) -> dict:
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite:///:memory:")
+    env["PYTHONPATH"] = str(PROJECT_ROOT)
+    proc = subprocess.run(
+        [sys.executable, "-c", code], cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, timeout=120,
+    )
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def test_app_import_does_not_load_heavy_optional_deps():
+    out = _run(
+        "import json, sys\n"
+        "import app.api.main\n"
+        "print(json.dumps([m for m in ('stripe', 'supabase', 'reportlab', 'playwright') if m in sys.modules]))\n"
+    )
+    assert out == []
+
+
+def test_deferred_modules_resolve_on_first_use():
+    out = _run(
+        "import json, sys\n"
+        "from app.infrastructure import payment, pdf\n"
+        "before = 'stripe' in sys.modules\n"
+        "stripe = payment.stripe_client.stripe\n"  # mock.patch target path keeps working
+        "same = stripe is payment.get_stripe() and stripe is sys.modules['stripe']\n"
+        "pdf_ok = callable(pdf.build_plan_pdf) and 'reportlab' in sys.modules\n"
+        "print(json.dumps([before, same, pdf_ok]))\n"
+    )
+    assert out == [False, True, True]
@@ -0,0 +1,82 @@
+"""Tests dla in-process metrics registry (/metrics, Prometheus text format)"""
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.api.metrics import MetricsMiddleware
+from app.infrastructure.metrics import (
+    Registry,
+    StageClock,
+    count_db_query,
+    db_query_scope,
+    DB_QUERIES_PER_REQUEST,
+    HTTP_REQUEST_SECONDS,
+)
+
+
+def test_render_counters_gauges_histograms_and_collectors():
+    registry = Registry()
+    hits = registry.counter("cache_lookups_total", "Lookups", ("cache", "result"))
+    hits.inc(cache="route", result="hit")
+    hits.inc(2, cache="route", result="hit")
+    registry.gauge("queue_depth", "Waiting").set(3)
+    registry.histogram("latency_seconds", "Latency", ("kind",), buckets=(0.1, 1.0)).observe(0.5, kind='say "hi"')
+    registry.register_collector(lambda: [("ors_budget_used", "gauge", "Used", [("ors_budget_used", {"endpoint": "matrix"}, 7)])])
+    registry.register_collector(lambda: 1 / 0)  # broken collector is skipped
+
+    text = registry.render()
+    assert "# TYPE cache_lookups_total counter" in text
+    assert 'cache_lookups_total{cache="route",result="hit"} 3' in text
+    assert "queue_depth 3" in text
+    assert 'latency_seconds_bucket{kind="say \\"hi\\"",le="0.1"} 0' in text
+    assert 'latency_seconds_bucket{kind="say \\"hi\\"",le="+Inf"} 1' in text
+    assert 'latency_seconds_count{kind="say \\"hi\\""} 1' in text
+    assert 'ors_budget_used{endpoint="matrix"} 7' in text
+
+    assert registry.counter("cache_lookups_total", "Lookups", ("cache", "result")) is hits
+    with pytest.raises(ValueError):
+        registry.gauge("cache_lookups_total", "Lookups")
+    with pytest.raises(ValueError):
+        hits.inc(cache="route")
+
+
+def test_stage_clock_carves_nested_stage_out_of_lap():
+    registry = Registry()
+    stages = registry.histogram("stage_seconds", "Stages", ("stage",), buckets=(0.01, 1.0))
+    clock = StageClock(stages)
+    clock.lap("load")
+    for _ in range(2):
+        with clock.measure("route"):
+            time.sleep(0.02)
+    clock.lap("post_process")
+
+    route = stages.snapshot(stage="route")
+    post = stages.snapshot(stage="post_process")
+    assert route["count"] == 1 and route["sum"] >= 0.04  # one sample per operation
+    assert post["count"] == 1 and post["sum"] < 0.02
+
+
+def test_middleware_labels_route_template_and_counts_queries():
+    async def app(scope, receive, send):
+        scope["route"] = SimpleNamespace(path="/plan/{plan_id}")
+        count_db_query()
+        count_db_query()
+        await send({"type": "http.response.start", "status": 404, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def noop(message):
+        pass
+
+    before = DB_QUERIES_PER_REQUEST.snapshot()["sum"]
+    scope = {"type": "http", "method": "GET", "path": "/plan/abc"}
+    asyncio.run(MetricsMiddleware(app)(scope, None, noop))
+
+    snap = HTTP_REQUEST_SECONDS.snapshot(method="GET", route="/plan/{plan_id}", status="404")
+    assert snap["count"] >= 1
+    assert DB_QUERIES_PER_REQUEST.snapshot()["sum"] - before == 2
+
+    with db_query_scope() as queries:
+        count_db_query()
+    assert queries == [1]
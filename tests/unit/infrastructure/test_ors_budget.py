@@ -0,0 +1,64 @@
+"""Tests dla shared ORS budget ledger (per-day SQLite counters + reservations)"""
+import threading
+import time
+from unittest.mock import patch
+
+from app.infrastructure.config.settings import settings
+from app.infrastructure.routing.ors_budget import BudgetLedger, quota_day
+
+# An hour either side of the last UTC midnight (recent: old days are purged).
+MIDNIGHT = time.time() // 86400 * 86400
+DAY, NEXT_DAY = MIDNIGHT - 3600, MIDNIGHT + 3600
+
+
+def test_take_is_atomic_across_ledger_instances(tmp_path):
+    # Two handles on one file = two workers.
+    workers = [BudgetLedger(tmp_path / "budget.sqlite3") for _ in range(2)]
+    granted = []
+    with patch.object(settings, "ors_daily_budget_directions", 25):
+        def _spend(ledger):
+            for _ in range(20):
+                granted.append(ledger.take("directions", now=DAY))
+
+        threads = [threading.Thread(target=_spend, args=(w,)) for w in workers * 2]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert sum(granted) == 25
+        assert workers[1].used("directions", now=DAY) == 25
+        assert workers[0].remaining("directions", now=DAY) == 0
+
+
+def test_budget_resets_on_utc_day_and_survives_restart(tmp_path):
+    path = tmp_path / "budget.sqlite3"
+    with patch.object(settings, "ors_daily_budget_matrix", 2):
+        ledger = BudgetLedger(path)
+        assert ledger.take("matrix", now=DAY) and ledger.take("matrix", now=DAY)
+        assert not ledger.take("matrix", now=DAY)
+        ledger.close()
+        restarted = BudgetLedger(path)
+        assert not restarted.take("matrix", now=DAY)
+        assert quota_day(NEXT_DAY) != quota_day(DAY)
+        assert restarted.take("matrix", now=NEXT_DAY)
+        snap = restarted.snapshot(now=NEXT_DAY)
+        assert snap["matrix"] == {"limit": 2, "used": 1, "remaining": 1}
+        assert snap["directions"]["used"] == 0
+
+
+def test_reservation_holds_units_and_refunds_the_rest(tmp_path):
+    ledger = BudgetLedger(tmp_path / "budget.sqlite3")
+    with patch.object(settings, "ors_daily_budget_matrix", 10):
+        assert ledger.reserve("matrix", 11) is None
+        assert ledger.used("matrix") == 0
+        with ledger.reserve("matrix", 6) as reservation:
+            # Other requests only see what is left after the reservation.
+            assert ledger.remaining("matrix") == 4
+            assert ledger.reserve("matrix", 5) is None
+            partial = ledger.reserve("matrix", 5, minimum=1)
+            assert partial.size == 4 and ledger.remaining("matrix") == 0
+            assert reservation.take() and reservation.take()
+        assert ledger.used("matrix") == 2 + 4
+        partial.release()
+        partial.release()
+        assert ledger.used("matrix") == 2
@@ -0,0 +1,167 @@
+"""Tests dla pooled ORS client: retries, circuit breaker, concurrency, latency, budget"""
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+from app.infrastructure.config.settings import settings
+from app.infrastructure.routing.ors_client import (
+    CircuitBreaker,
+    LatencyHistogram,
+    ORSBudgetExhausted,
+    ORSClient,
+)
+
+ROUTE = {"routes": [{
+    "summary": {"duration": 600.0, "distance": 3000.0},
+    "geometry": {"type": "LineString", "coordinates": [[19.93, 50.06], [19.94, 50.05]]},
+}]}
+LEG = (50.06, 19.93, 50.05, 19.94, "driving-car")
+
+
+class _ScriptedORS(BaseHTTPRequestHandler):
+    """Replies with the next (status, headers) from `script`, then 200s."""
+
+    script: list = []
+    delay = 0.0
+    hits = 0
+    in_flight = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        cls = type(self)
+        with cls.lock:
+            cls.hits += 1
+            cls.in_flight += 1
+            cls.peak = max(cls.peak, cls.in_flight)
+            status, headers = cls.script.pop(0) if cls.script else (200, {})
+        time.sleep(cls.delay)
+        payload = json.dumps(ROUTE if status == 200 else {"error": status}).encode()
+        self.send_response(status)
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+        with cls.lock:
+            cls.in_flight -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+@contextmanager
+def _client(script=(), delay=0.0, **overrides):
+    _ScriptedORS.script = list(script)
+    _ScriptedORS.delay = delay
+    _ScriptedORS.hits = _ScriptedORS.in_flight = _ScriptedORS.peak = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ScriptedORS)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    conf = {
+        "ors_base_url": f"http://127.0.0.1:{server.server_port}",
+        "ors_enabled": True,
+        "ors_routing_enabled": True,
+        "ors_api_key": "test-key",
+        "ors_max_retries": 2,
+        "ors_retry_backoff_seconds": 0.0,
+        "ors_circuit_failure_threshold": 2,
+        "ors_circuit_reset_seconds": 60,
+        **overrides,
+    }
+    try:
+        with patch.multiple(settings, **conf):
+            client = ORSClient()
+            try:
+                yield client
+            finally:
+                client.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_retries_429_then_succeeds():
+    with _client(script=[(429, {"Retry-After": "0"}), (503, {})]) as client:
+        out = client.directions(*LEG)
+        assert out["duration_min"] == 10
+        assert _ScriptedORS.hits == 3
+        assert client.breaker.state == "closed"
+
+
+def test_client_error_is_not_retried():
+    with _client(script=[(404, {})]) as client:
+        assert client.directions(*LEG) is None
+        assert _ScriptedORS.hits == 1
+        assert client.breaker.state == "closed"
+
+
+def test_circuit_opens_after_repeated_failures():
+    with _client(script=[(500, {})] * 6, ors_max_retries=0) as client:
+        assert client.directions(*LEG) is None
+        assert client.directions(*LEG) is None
+        assert client.breaker.state == "open"
+        assert client.directions(*LEG) is None
+        assert _ScriptedORS.hits == 2
+
+
+def test_concurrency_is_bounded_and_connections_reused():
+    with _client(delay=0.05, ors_max_concurrency=2) as client:
+        results = client.directions_many([LEG] * 6)
+        assert all(r and r["distance_km"] == 3.0 for r in results)
+        assert _ScriptedORS.peak <= 2
+        snap = client.latency_snapshot()["directions"]
+        assert snap["count"] == 6 and snap["sum"] > 0
+
+
+def test_daily_budget_is_shared_between_clients(tmp_path):
+    ledger = tmp_path / "ors_budget.sqlite3"
+    with _client(ors_daily_budget_directions=3, ors_budget_db_path=str(ledger)) as first, \
+         _client(ors_daily_budget_directions=3, ors_budget_db_path=str(ledger)) as second:
+        assert first.directions(*LEG) and second.directions(*LEG)
+        assert first.directions_many([LEG, LEG]).count(None) == 1
+        try:
+            second.directions(*LEG)
+            raise AssertionError("budget not enforced")
+        except ORSBudgetExhausted:
+            pass
+        assert first.budget_snapshot()["directions"]["remaining"] == 0
+
+
+def test_retries_count_against_the_budget(tmp_path):
+    with _client(script=[(503, {})] * 3, ors_daily_budget_directions=2,
+                 ors_budget_db_path=str(tmp_path / "b.sqlite3")) as client:
+        assert client.directions(*LEG) is None
+        assert _ScriptedORS.hits == 2
+        assert client.budget_snapshot()["directions"]["used"] == 2
+
+
+def test_circuit_breaker_half_open_trial():
+    now = [0.0]
+    breaker = CircuitBreaker(threshold=2, reset_after=30, clock=lambda: now[0])
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+    now[0] = 31.0
+    assert breaker.allow()
+    assert not breaker.allow()  # one trial call at a time
+    breaker.record_failure()
+    assert breaker.state == "open"
+    now[0] = 62.0
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_latency_histogram_is_cumulative():
+    h = LatencyHistogram(buckets=(0.1, 1.0))
+    for s in (0.05, 0.5, 0.7, 3.0):
+        h.observe(s)
+    snap = h.snapshot()
+    assert snap["buckets"] == {"0.1": 1, "1.0": 3, "+Inf": 4}
+    assert snap["count"] == 4
@@ -0,0 +1,117 @@
+"""Tests dla offline OSM routing tier (A*, matrix, provider integration)"""
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.infrastructure.config.settings import settings
+from app.infrastructure.routing import osm_graph
+from app.infrastructure.routing.osm_graph import OfflineRouter, build_graph, get_offline_router
+from app.infrastructure.routing.provider import get_travel_route, route_session
+
+# A ── B ──▶ C   (B→C one-way, fast)
+#  \        /
+#   ── D ──     (slow both ways)
+NODES = [(50.060, 19.930), (50.060, 19.940), (50.060, 19.950), (50.066, 19.940)]
+FAST, SLOW = 50 / 3.6, 20 / 3.6
+
+
+def _edge(u, v, speed):
+    from app.infrastructure.routing.osm_graph import _dist_m
+
+    m = _dist_m(*NODES[u], *NODES[v])
+    return u, v, m, m / speed
+
+
+def _edges():
+    out = [_edge(0, 1, FAST), _edge(1, 0, FAST), _edge(1, 2, FAST)]
+    for u, v in ((0, 3), (3, 2)):
+        out += [_edge(u, v, SLOW), _edge(v, u, SLOW)]
+    return out
+
+
+@pytest.fixture
+def router(tmp_path):
+    build_graph(NODES, _edges(), region="malopolskie", profile="driving-car").save(
+        tmp_path / "malopolskie-driving-car.npz",
+    )
+    with patch.multiple(settings, osm_routing_enabled=True, osm_graph_dir=str(tmp_path),
+                        osm_snap_max_m=300), \
+         patch.object(osm_graph, "_router", None):
+        yield get_offline_router()
+
+
+def test_astar_prefers_fast_road_and_respects_oneway(router):
+    there = router.route(50.060, 19.930, 50.060, 19.950, "driving-car")
+    back = router.route(50.060, 19.950, 50.060, 19.930, "driving-car")
+    assert [pt[0] for pt in there["geometry"][1:-1]] == [19.930, 19.940, 19.950]
+    assert len(back["geometry"]) == 5  # C → D → A plus both endpoints
+    assert back["duration_min"] > there["duration_min"]
+
+
+def test_matrix_matches_point_to_point(router):
+    coords = [NODES[0], NODES[2], NODES[3]]
+    durations, distances = router.matrix(coords, "driving-car")
+    for i, a in enumerate(coords):
+        for j, b in enumerate(coords):
+            if i != j:
+                leg = router.route(*a, *b, "driving-car")
+                assert max(int(durations[i][j]), 1) == leg["duration_min"]
+                assert distances[i][j] == pytest.approx(leg["distance_km"], rel=1e-4)
+
+
+def test_outside_graph_or_unsnappable_returns_none(router):
+    assert router.route(52.23, 21.01, 52.24, 21.02, "driving-car") is None
+    assert router.route(50.060, 19.930, 50.060, 19.950, "foot-walking") is None
+    assert router.route(50.069, 19.930, 50.060, 19.950, "driving-car") is None
+
+
+def test_provider_uses_offline_tier_before_ors(router):
+    client = MagicMock()
+    client.enabled.return_value = True
+    a = {"lat": 50.060, "lng": 19.930}
+    b = {"lat": 50.060, "lng": 19.950}
+    with patch("app.infrastructure.routing.provider.get_ors_client", return_value=client), \
+         route_session():
+        r = get_travel_route(a, b, {"has_car": True})
+    assert r.source == "osm"
+    client.directions.assert_not_called()
+
+
+def test_disabled_or_empty_dir_gives_no_router(tmp_path):
+    with patch.multiple(settings, osm_routing_enabled=False, osm_graph_dir=str(tmp_path)), \
+         patch.object(osm_graph, "_router", None):
+        assert get_offline_router() is None
+    assert not OfflineRouter(tmp_path)
+
+
+def test_disconnected_target_stops_at_settled_node_cap(tmp_path):
+    # 300-node road chain plus an island (300 ↔ 301) that no chain node reaches.
+    nodes = [(50.0 + i * 0.0005, 19.9) for i in range(300)] + [(50.0, 19.95), (50.001, 19.95)]
+    edges = []
+    for i in range(299):
+        m = 55.0
+        edges += [(i, i + 1, m, m / FAST), (i + 1, i, m, m / FAST)]
+    edges += [(300, 301, 110.0, 8.0), (301, 300, 110.0, 8.0)]
+    graph = build_graph(nodes, edges, region="malopolskie", profile="driving-car")
+
+    settled = []
+    real_edges = graph._edges
+    graph._edges = lambda u: settled.append(u) or real_edges(u)
+    assert graph.shortest_path(0, 300, max_settled=50) is None
+    assert len(settled) < 50
+    settled.clear()
+    assert graph.one_to_many(0, [10, 300], max_settled=50) is None
+    assert len(settled) < 50
+    # Uncapped: the island is reported unreachable after the whole chain.
+    assert graph.shortest_path(0, 300) is None
+    assert set(graph.one_to_many(0, [10, 300])) == {10}
+    assert graph.shortest_path(0, 10, max_settled=50)[2] == list(range(11))
+
+    graph.save(tmp_path / "malopolskie-driving-car.npz")
+    with patch.multiple(settings, osm_routing_enabled=True, osm_graph_dir=str(tmp_path),
+                        osm_snap_max_m=300, osm_max_settled_nodes=50), \
+         patch.object(osm_graph, "_router", None):
+        router = get_offline_router()
+        assert router.route(*nodes[0], *nodes[300], "driving-car") is None
+        assert router.matrix([nodes[0], nodes[300]], "driving-car") is None
+        assert router.route(*nodes[0], *nodes[10], "driving-car") is not None
@@ -0,0 +1,105 @@
+"""Tests dla persistent Overpass tile cache (geohash tiles + prefetch)"""
+import time
+from unittest.mock import patch
+
+import pytest
+
+from app.infrastructure.config.settings import settings
+from app.infrastructure.routing import overpass_tiles
+from app.infrastructure.routing.geohash import covering_tiles, geohash, tile_bbox
+from app.infrastructure.routing.overpass import OverpassTruncated
+from app.infrastructure.routing.overpass_tiles import (
+    fetch_tourism_cached,
+    get_tile_store,
+    prefetch_tiles,
+)
+
+RYNEK = (50.0617, 19.9373)
+
+
+def _poi(name, lat, lng):
+    return {"id": f"ext_osm_{name}", "name": name, "lat": lat, "lng": lng, "city": ""}
+
+
+def _fake_overpass(south, west, north, east):
+    # One POI at the centre of every tile, one right at the south-west corner.
+    lat, lng = (south + north) / 2, (west + east) / 2
+    return [_poi(f"{lat:.4f}_{lng:.4f}", lat, lng), _poi(f"sw_{south:.4f}_{west:.4f}", south, west)]
+
+
+@pytest.fixture
+def store(tmp_path):
+    with patch.object(overpass_tiles, "cache_dir", return_value=tmp_path), \
+         patch.multiple(settings, overpass_tile_precision=5, overpass_tile_ttl_days=30,
+                        overpass_live_fetch_enabled=False, ors_overpass_radius_m=2500):
+        yield get_tile_store()
+
+
+def test_geohash_grid_matches_reference():
+    assert geohash(57.64911, 10.40744, 11) == "u4pruydqqvj"
+    south, west, north, east = tile_bbox("u2yhv")
+    assert south <= RYNEK[0] < north and west <= RYNEK[1] < east
+    assert geohash(*RYNEK, 5) == "u2yhv"
+    tiles = covering_tiles(*RYNEK, 2500, 5)
+    assert geohash(*RYNEK, 5) in tiles and len(set(tiles)) == len(tiles)
+    # 5 km x 5 km box at ~3.1 x 4.9 km tiles: 2-3 rows, 2-3 columns.
+    assert 4 <= len(tiles) <= 9
+
+
+def test_prefetch_then_request_is_local(store):
+    with patch.object(overpass_tiles, "fetch_tourism_bbox", side_effect=_fake_overpass) as live:
+        fetched, failed = prefetch_tiles([RYNEK])
+        assert (fetched, failed) == (live.call_count, 0) and fetched > 0
+        assert prefetch_tiles([RYNEK]) == (0, 0)  # all fresh
+
+        live.reset_mock()
+        pois = fetch_tourism_cached(*RYNEK, "Kraków", radius_m=2500)
+        live.assert_not_called()
+    assert pois and all(p["city"] == "Kraków" and p["hub_city"] == "Kraków" for p in pois)
+    dist = [overpass_tiles.haversine_km(*RYNEK, p["lat"], p["lng"]) for p in pois]
+    assert dist == sorted(dist) and max(dist) <= 2.5
+
+
+def test_missing_tiles_fetch_live_only_when_enabled(store):
+    with patch.object(overpass_tiles, "fetch_tourism_bbox", side_effect=_fake_overpass) as live:
+        assert fetch_tourism_cached(*RYNEK, "Kraków") == []
+        live.assert_not_called()
+        with patch.object(settings, "overpass_live_fetch_enabled", True):
+            assert fetch_tourism_cached(*RYNEK, "Kraków")
+        assert live.call_count == len(covering_tiles(*RYNEK, 2500, 5)) == len(store)
+
+
+def test_failed_tile_is_not_cached_and_stale_is_refetched(store):
+    tile = geohash(*RYNEK, 5)
+    with patch.object(overpass_tiles, "fetch_tourism_bbox", return_value=None):
+        assert prefetch_tiles([RYNEK], radius_m=10)[1] == 1
+    assert len(store) == 0
+    store.put(tile, [_poi("old", *RYNEK)], now=time.time() - 31 * 86400)
+    # Stale tiles are still served...
+    assert [p["name"] for p in fetch_tourism_cached(*RYNEK, "Kraków", radius_m=10)] == ["old"]
+    # ...until the next prefetch replaces them.
+    with patch.object(overpass_tiles, "fetch_tourism_bbox", side_effect=_fake_overpass):
+        assert prefetch_tiles([RYNEK], radius_m=10) == (1, 0)
+    assert "old" not in {p["name"] for p in store.get_many([tile])[tile][1]}
+
+
+def test_truncated_tile_is_split_or_not_stored(store):
+    tile = geohash(*RYNEK, 5)
+
+    def dense_old_town(south, west, north, east):
+        # The precision-5 tile hits the element limit; its sub-tiles do not.
+        if north - south > 0.03:
+            raise OverpassTruncated(1000, [_poi("partial", *RYNEK)])
+        return _fake_overpass(south, west, north, east)
+
+    with patch.object(overpass_tiles, "fetch_tourism_bbox", side_effect=dense_old_town) as live:
+        assert prefetch_tiles([RYNEK], radius_m=10) == (1, 0)
+    assert live.call_count == 1 + 32
+    names = {p["name"] for p in store.get_many([tile])[tile][1]}
+    assert len(names) == 64 and "partial" not in names
+
+    store.clear()
+    truncated = OverpassTruncated(1000, [_poi("partial", *RYNEK)])
+    with patch.object(overpass_tiles, "fetch_tourism_bbox", side_effect=truncated):
+        assert prefetch_tiles([RYNEK], radius_m=10) == (0, 1)
+    assert len(store) == 0
@@ -0,0 +1,82 @@
+"""Tests dla plan JSON fast path (one serialization: response body, DB snapshot, ETag)"""
+import asyncio
+import json
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.api.routes.plan import _plan_response
+from app.domain.models.plan import (
+    AttractionItem,
+    DayEndItem,
+    DayPlan,
+    DayStartItem,
+    ItemType,
+    ParkingInfo,
+    PlanResponse,
+    TicketInfo,
+    TransitItem,
+    TransitMode,
+)
+from app.infrastructure import plan_json
+from app.infrastructure.plan_json import encode_plan, etag_matches
+from app.infrastructure.routing.polyline import pack_days_geometry
+
+
+def _plan() -> PlanResponse:
+    attraction = AttractionItem(
+        poi_id="poi_1", name="Ostrów Tumski", start_time="11:20", end_time="12:50",
+        duration_min=90, description_short="Najstarsza część", lat=51.1, lng=17.0,
+        address="Wrocław", city="Wrocław", cost_estimate=0,
+        ticket_info=TicketInfo(ticket_normal=0, ticket_reduced=0),
+        parking=ParkingInfo(name="P", walk_time_min=2),
+    )
+    leg = TransitItem(
+        type=ItemType.TRANSIT, mode=TransitMode.WALK,
+        from_location="Konspira", to_location="Ostrów Tumski",
+        start_time="11:00", end_time="11:20", duration_min=20,
+        geometry=[[17.0, 51.1], [17.1, 51.2]], geometry_latlng=[[51.1, 17.0], [51.2, 17.1]],
+        distance_km=1.25, routing_source="estimated_walk",
+    )
+    return PlanResponse(
+        plan_id="a2f5e80a-9e3c-44fb-b1eb-617f933b148b", version=2, city="Wrocław",
+        start_date="2026-07-06", days_count=1, title="Wrocław — 1 dzień",
+        days=[DayPlan(day=1, date="2026-07-06", weekday="poniedziałek",
+                      items=[DayStartItem(time="09:00"), leg, attraction, DayEndItem(time="18:00")])],
+    )
+
+
+def test_body_matches_fastapi_response_and_stdlib_fallback(monkeypatch):
+    plan = _plan()
+    field = create_response_field(name="plan", type_=PlanResponse)
+    content = asyncio.run(serialize_response(field=field, response_content=plan, is_coroutine=False))
+    payload = encode_plan(plan)
+    assert payload.body == JSONResponse(content).body
+    assert b'"from":"Konspira"' in payload.body
+
+    monkeypatch.setattr(plan_json, "orjson", None)
+    assert encode_plan(plan).body == payload.body
+
+
+def test_days_json_keeps_stored_snapshot_shape():
+    plan = _plan()
+    old = pack_days_geometry({"days": [day.model_dump() for day in plan.days]})
+    new = pack_days_geometry(encode_plan(plan).days_json())
+    assert json.loads(json.dumps(old)) == new
+    assert new["days"][0]["items"][1]["from_location"] == "Konspira"
+
+
+def test_etag_and_conditional_get():
+    payload = encode_plan(_plan())
+    first = _plan_response(payload, "geojson")
+    etag = first.headers["etag"]
+    assert first.status_code == 200 and first.body == payload.body and etag == payload.etag
+
+    assert _plan_response(payload, "geojson", etag).status_code == 304
+    assert _plan_response(payload, "geojson", f'"other", W/{etag}').status_code == 304
+    assert _plan_response(payload, "geojson", '"other"').status_code == 200
+    assert etag_matches("*", etag) and not etag_matches(None, etag)
+
+    packed = _plan_response(payload, "polyline6")
+    assert packed.headers["etag"] != etag and b"geometry_polyline6" in packed.body
@@ -0,0 +1,89 @@
+"""Tests dla precomputed POI travel matrices (memory-mapped tier)"""
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+from app.infrastructure.config.settings import settings
+from app.infrastructure.routing import poi_matrix
+from app.infrastructure.routing.poi_matrix import (
+    PoiMatrix,
+    PoiMatrixSet,
+    build_poi_matrix,
+    get_poi_matrices,
+)
+from app.infrastructure.routing.provider import get_travel_route, route_session
+
+POIS = [
+    {"id": "poi_1", "name": "Rynek", "lat": 50.0617, "lng": 19.9373},
+    {"id": "poi_2", "name": "Wawel", "lat": 50.0540, "lng": 19.9354},
+    {"id": "poi_3", "name": "Kazimierz", "lat": 50.0510, "lng": 19.9450},
+]
+DURATIONS = [[0, 7.6, 9.2], [8.1, 0, 6.0], [9.0, None, 0]]
+DISTANCES = [[0, 2.1, 3.0], [2.2, 0, 1.4], [3.1, None, 0]]
+CTX = {"has_car": True}
+
+
+@pytest.fixture
+def matrices(tmp_path):
+    build_poi_matrix(
+        POIS, "driving-car", DURATIONS, DISTANCES,
+        scope="krakow", source="osm", catalog={"catalog": "test.xlsx"},
+    ).save(tmp_path)
+    with patch.multiple(settings, poi_matrix_enabled=True, poi_matrix_dir=str(tmp_path)), \
+         patch.object(poi_matrix, "_matrices", None):
+        yield get_poi_matrices()
+
+
+def test_saved_matrix_is_memory_mapped(matrices, tmp_path):
+    loaded = PoiMatrix.load(tmp_path / "krakow.driving-car.json")
+    assert isinstance(loaded.durations, np.memmap)
+    assert loaded.meta["catalog"] == "test.xlsx"
+    assert matrices.lookup(POIS[0], POIS[1], "driving-car") == pytest.approx((7.6, 2.1))
+    assert matrices.lookup(POIS[1], POIS[0], "driving-car") == pytest.approx((8.1, 2.2))
+
+
+def test_unrouted_moved_or_foreign_pairs_miss(matrices):
+    assert matrices.lookup(POIS[2], POIS[1], "driving-car") is None
+    assert matrices.lookup(POIS[0], POIS[1], "foot-walking") is None
+    moved = {**POIS[1], "lat": 50.0600}
+    assert matrices.lookup(POIS[0], moved, "driving-car") is None
+    assert matrices.lookup(POIS[0], {"lat": 50.05, "lng": 19.93}, "driving-car") is None
+    block = matrices.submatrix(POIS[:2], "driving-car")
+    assert np.allclose(block, [[0, 7.6], [8.1, 0]])
+    assert matrices.submatrix(POIS, "driving-car") is None
+
+
+def test_provider_serves_timing_without_network(matrices):
+    client = MagicMock()
+    client.enabled.return_value = True
+    client.matrix_enabled.return_value = True
+    with patch("app.infrastructure.routing.provider.get_ors_client", return_value=client), \
+         route_session() as session:
+        r = get_travel_route(POIS[0], POIS[2], CTX, with_geometry=False)
+    assert (r.source, r.duration_min, r.distance_km) == ("poi_matrix", 9, pytest.approx(3.0))
+    assert session.routes == {}
+    client.directions.assert_not_called()
+
+
+def test_geometry_legs_prefer_ors_and_fall_back_to_matrix(matrices):
+    client = MagicMock()
+    client.enabled.return_value = True
+    client.directions.return_value = None
+    with patch("app.infrastructure.routing.provider.get_ors_client", return_value=client), \
+         route_session():
+        r = get_travel_route(POIS[0], POIS[1], CTX)
+    client.directions.assert_called_once()
+    assert r.source == "poi_matrix"
+
+    client.enabled.return_value = False
+    with patch("app.infrastructure.routing.provider.get_ors_client", return_value=client), \
+         route_session():
+        assert get_travel_route(POIS[1], POIS[2], CTX).source == "poi_matrix"
+
+
+def test_disabled_or_empty_dir_gives_no_matrices(tmp_path):
+    with patch.multiple(settings, poi_matrix_enabled=False, poi_matrix_dir=str(tmp_path)), \
+         patch.object(poi_matrix, "_matrices", None):
+        assert get_poi_matrices() is None
+    assert not PoiMatrixSet(tmp_path)
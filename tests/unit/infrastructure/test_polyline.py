@@ -0,0 +1,63 @@
+"""Tests dla route geometry compaction (Douglas–Peucker + polyline6)"""
+import json
+import zlib
+
+from app.infrastructure.routing.polyline import (
+    decode_polyline,
+    encode_polyline,
+    pack_days_geometry,
+    simplify,
+    unpack_days_geometry,
+)
+from app.infrastructure.routing.route_store import decode_geometry, encode_geometry
+
+# ORS-like polyline: 6-decimal [lng, lat], dense along a bent street.
+ROUTE = [[19.937301, 50.061702], [19.937355, 50.061512], [19.937412, 50.061321],
+         [19.937466, 50.061130], [19.938901, 50.060988], [19.940327, 50.060845],
+         [19.941802, 50.060701], [19.941850, 50.059004], [-0.000001, -89.999999]]
+
+
+def test_polyline6_round_trip_is_lossless():
+    assert decode_polyline(encode_polyline(ROUTE)) == ROUTE
+    assert decode_polyline(encode_polyline([])) == []
+
+
+def test_matches_reference_encoding():
+    # Reference vector of the encoded polyline algorithm (precision 5, lat first).
+    pts = [[-120.2, 38.5], [-120.95, 40.7], [-126.453, 43.252]]
+    assert encode_polyline(pts, precision=5) == "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+    assert decode_polyline("_p~iF~ps|U_ulLnnqC_mqNvxq`@", precision=5) == pts
+
+
+def test_douglas_peucker_drops_collinear_points_only():
+    street = ROUTE[:8]
+    out = simplify(street, tolerance_m=2.0)
+    assert out[0] == street[0] and out[-1] == street[-1]
+    # The two corners survive, points on the straight runs do not.
+    assert [19.937466, 50.061130] in out and [19.941802, 50.060701] in out
+    assert len(out) == 4
+    assert simplify(street, tolerance_m=0) == street
+    assert simplify(street[:2], tolerance_m=50) == street[:2]
+
+
+def test_route_store_blob_reads_both_codecs():
+    blob = encode_geometry(ROUTE)
+    assert blob[:1] == b"p" and decode_geometry(blob) == ROUTE
+    legacy = b"z" + zlib.compress(json.dumps(ROUTE).encode())
+    assert decode_geometry(legacy) == ROUTE
+    assert len(blob) < len(legacy)
+
+
+def test_days_json_pack_and_unpack():
+    transit = {"type": "transit", "from_location": "A", "to_location": "B",
+               "geometry": ROUTE[:3], "geometry_latlng": [[p[1], p[0]] for p in ROUTE[:3]]}
+    attraction = {"type": "attraction", "name": "A"}
+    days = {"days": [{"day": 1, "items": [attraction, transit]}]}
+    packed = pack_days_geometry(days)
+    stored = packed["days"][0]["items"][1]
+    assert stored["geometry"] is None and stored["geometry_latlng"] is None
+    assert isinstance(stored["geometry_polyline6"], str)
+    assert packed["days"][0]["items"][0] is attraction
+    assert unpack_days_geometry(packed) == days
+    # Snapshots written before compaction pass through untouched.
+    assert unpack_days_geometry(days) == days
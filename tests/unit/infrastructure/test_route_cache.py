@@ -0,0 +1,113 @@
+"""Tests dla route cache LRU, SQLite route store + request-scoped routing session"""
+import contextvars
+import json
+import time
+from unittest.mock import patch
+
+from app.infrastructure.routing import cache
+from app.infrastructure.routing.route_store import RouteStore, encode_geometry
+from app.infrastructure.routing.provider import (
+    _session,
+    clear_route_session,
+    get_travel_route,
+    route_session,
+)
+
+
+def test_memory_cache_evicts_least_recently_used():
+    with patch.object(cache.settings, "ors_memory_cache_size", 2):
+        cache.clear_memory_cache()
+        now = time.time()
+        cache._mem_put("a", now, {"v": 1})
+        cache._mem_put("b", now, {"v": 2})
+        assert cache._mem_get("a", 60, now) == {"v": 1}
+        cache._mem_put("c", now, {"v": 3})
+        assert cache._mem_get("b", 60, now) is None
+        assert cache._mem_get("a", 60, now) == {"v": 1}
+        assert cache.memory_cache_size() == 2
+
+
+def test_memory_cache_ttl_counts_from_load():
+    with patch.object(cache.settings, "ors_memory_cache_ttl_seconds", 10):
+        cache.clear_memory_cache()
+        now = time.time()
+        cache._mem_put("k", now, {"v": 1})
+        assert cache._mem_get("k", 3600, now + 5) == {"v": 1}
+        assert cache._mem_get("k", 3600, now + 11) is None
+
+
+def test_sessions_are_isolated_per_context():
+    a = {"lat": 50.06, "lng": 19.94}
+    b = {"lat": 50.07, "lng": 19.95}
+
+    def _request():
+        clear_route_session()
+        get_travel_route(a, b, {"has_car": True})
+        return len(_session.get().routes)
+
+    def _worker():
+        assert contextvars.copy_context().run(_request) == 1
+        assert _session.get() is None
+        with route_session() as s:
+            get_travel_route(a, b, {"has_car": True})
+            assert len(s.routes) == 1
+        assert _session.get() is None
+
+    contextvars.Context().run(_worker)
+
+
+def _route(minutes, geometry=None):
+    return {
+        "duration_min": minutes,
+        "distance_km": 1.5,
+        "profile": "driving-car",
+        "geometry": geometry or [[19.93, 50.06], [19.94, 50.05]],
+    }
+
+
+def test_route_store_batch_roundtrip_with_compressed_geometry(tmp_path):
+    store = RouteStore(tmp_path / "routes.sqlite3")
+    line = [[19.9 + i / 1000, 50.0 + i / 1000] for i in range(200)]
+    store.put_many({"a": _route(5, line), "b": _route(7)})
+    got = store.get_many(["a", "b", "missing"], ttl_seconds=3600)
+    assert set(got) == {"a", "b"}
+    # polyline6 keeps 1e-6 degree precision — the catalog/ORS resolution.
+    assert got["a"][1]["geometry"] == [[round(x, 6), round(y, 6)] for x, y in line]
+    assert got["b"][1]["duration_min"] == 7
+    assert len(encode_geometry(line)) < len(json.dumps(line)) // 2
+
+
+def test_route_store_expires_on_disk_and_caps_by_lru(tmp_path):
+    store = RouteStore(tmp_path / "routes.sqlite3", max_entries=2)
+    now = time.time()
+    with patch.object(cache.settings, "ors_cache_ttl_days", 1):
+        store.put("old", _route(3), now=now - 2 * 86400)
+        store.put("a", _route(4), now=now - 3 * 3600)
+        store.put("b", _route(5), now=now - 2 * 3600)
+        store.get("a", 86400, now=now)  # refresh a → b is least recently used
+        store.put("c", _route(6), now=now)
+        assert store.maintain(now) == (1, 1)
+    assert set(store.get_many(["old", "a", "b", "c"], 86400, now)) == {"a", "c"}
+
+
+def test_route_store_migrates_legacy_json_files(tmp_path):
+    now = time.time()
+    fresh = "driving-car|50.06|19.93|50.05|19.94"
+    (tmp_path / f"{fresh}.json").write_text(
+        json.dumps({"_ts": now, "payload": _route(9)}), encoding="utf-8",
+    )
+    (tmp_path / "broken.json").write_text("{", encoding="utf-8")
+    (tmp_path / "no-payload.json").write_text(json.dumps({"_ts": now}), encoding="utf-8")
+    store = RouteStore(tmp_path / "routes.sqlite3")
+    assert store.get(fresh, 3600)[1]["duration_min"] == 9
+    # only the imported file is deleted; unreadable ones are kept for inspection
+    assert sorted(p.name for p in tmp_path.glob("*.json")) == ["broken.json", "no-payload.json"]
+    assert RouteStore(tmp_path / "routes.sqlite3").migrate_json_files(tmp_path) == 0
+
+
+def test_get_cached_many_reads_memory_then_store():
+    cache.clear_memory_cache()
+    cache.set_cached_many({"k1": _route(4), "k2": _route(8)})
+    cache.clear_memory_cache()
+    assert cache.get_cached_many(["k1", "k2", "k3"], 3600).keys() == {"k1", "k2"}
+    assert cache.memory_cache_size() == 2
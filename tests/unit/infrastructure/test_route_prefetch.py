@@ -0,0 +1,158 @@
+"""Tests dla batched route prefetch (ORS Matrix) against a local ORS stand-in"""
+import json
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest.mock import patch
+
+import pytest
+
+from app.infrastructure.config.settings import settings
+from app.infrastructure.routing import ors_client, provider
+from app.infrastructure.routing.provider import (
+    MATRIX_SOURCE,
+    get_travel_route,
+    prefetch_route_durations,
+    prefetch_route_geometry,
+    route_session,
+)
+
+# Krakow stops ~1-3 km apart, all driving with has_car.
+STOPS = [
+    {"name": "Rynek", "lat": 50.0617, "lng": 19.9373},
+    {"name": "Wawel", "lat": 50.0540, "lng": 19.9354},
+    {"name": "Kazimierz", "lat": 50.0510, "lng": 19.9460},
+    {"name": "Podgorze", "lat": 50.0440, "lng": 19.9590},
+    {"name": "Nowa Huta", "lat": 50.0720, "lng": 20.0380},
+]
+CTX = {"has_car": True}
+
+
+class _StubORS(BaseHTTPRequestHandler):
+    calls: list = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        kind = self.path.split("/")[2]
+        self.calls.append((kind, body))
+        if kind == "matrix":
+            n = len(body["locations"])
+            data = {
+                "durations": [[600.0 * (i != j) for j in range(n)] for i in range(n)],
+                "distances": [[4.0 * (i != j) for j in range(n)] for i in range(n)],
+            }
+        else:
+            coords = body["coordinates"]
+            # ~100 m off the straight line, so simplification keeps the bend.
+            mid = [(coords[0][0] + coords[1][0]) / 2 + 0.0015, (coords[0][1] + coords[1][1]) / 2]
+            data = {"routes": [{
+                "summary": {"duration": 900.0, "distance": 5000.0},
+                "geometry": {"type": "LineString", "coordinates": [coords[0], mid, coords[1]]},
+            }]}
+        payload = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@contextmanager
+def _local_ors(**overrides):
+    server = HTTPServer(("127.0.0.1", 0), _StubORS)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    _StubORS.calls = []
+    conf = {
+        "ors_base_url": f"http://127.0.0.1:{server.server_port}",
+        "ors_enabled": True,
+        "ors_routing_enabled": True,
+        "ors_matrix_enabled": True,
+        "ors_api_key": "test-key",
+        "ors_matrix_max_locations": 8,
+        **overrides,
+    }
+    try:
+        with patch.multiple(settings, **conf), \
+             patch.object(ors_client, "_ors_client", None), \
+             patch.object(provider, "get_cached", return_value=None), \
+             patch.object(provider, "get_cached_many", return_value={}), \
+             patch.object(provider, "set_cached"):
+            try:
+                yield _StubORS.calls
+            finally:
+                ors_client.get_ors_client().close()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _legs():
+    return list(zip(STOPS, STOPS[1:]))
+
+
+def _kinds(calls):
+    return [k for k, _ in calls]
+
+
+def test_prefetch_resolves_day_with_one_matrix_call():
+    with _local_ors() as calls, route_session() as session:
+        assert prefetch_route_durations(_legs(), CTX) == 4
+        routes = [get_travel_route(a, b, CTX, with_geometry=False) for a, b in _legs()]
+        assert _kinds(calls) == ["matrix"]
+        assert calls[0][1]["metrics"] == ["duration", "distance"]
+        assert all(r.source == MATRIX_SOURCE and r.duration_min == 10 for r in routes)
+        assert len(session.durations) == 4 and not session.routes
+
+
+def test_prefetch_splits_batches_by_max_locations():
+    with _local_ors(ors_matrix_max_locations=3) as calls, route_session():
+        assert prefetch_route_durations(_legs(), CTX) == 4
+        assert _kinds(calls) == ["matrix", "matrix"]
+        assert all(len(body["locations"]) <= 3 for _, body in calls)
+
+
+def test_rendered_leg_gets_directions_geometry():
+    a, b = STOPS[0], STOPS[1]
+    with _local_ors() as calls, route_session():
+        prefetch_route_durations([(a, b)], CTX)
+        timing = get_travel_route(a, b, CTX, with_geometry=False)
+        rendered = get_travel_route(a, b, CTX)
+        assert _kinds(calls) == ["matrix", "directions"]
+        assert timing.source == MATRIX_SOURCE and len(timing.geometry) == 2
+        assert rendered.source == "ors" and len(rendered.geometry) == 3
+        assert get_travel_route(a, b, CTX, with_geometry=False) is rendered
+
+
+def test_geometry_prefetch_sends_rendered_legs_together():
+    with _local_ors() as calls, route_session() as session, \
+         patch.object(ors_client.ORSClient, "directions", side_effect=AssertionError("per-leg call")):
+        assert prefetch_route_geometry(_legs() + [(STOPS[0], STOPS[1]), (STOPS[0], None)], CTX) == 4
+        routes = [get_travel_route(a, b, CTX) for a, b in _legs()]
+        assert _kinds(calls) == ["directions"] * 4
+        assert all(r.source == "ors" and len(r.geometry) == 3 for r in routes)
+        assert prefetch_route_geometry(_legs(), CTX) == 0 and len(session.routes) == 4
+
+
+def test_budget_exhaustion_falls_back_to_haversine_per_leg():
+    with _local_ors(ors_daily_budget_matrix=0) as calls, route_session():
+        assert prefetch_route_durations(_legs(), CTX) == 0
+        routes = [get_travel_route(a, b, CTX, with_geometry=False) for a, b in _legs()]
+        assert calls == []
+        assert all(r.source in ("haversine", "estimated_road") for r in routes)
+
+
+@pytest.mark.parametrize("source, enabled, expected", [
+    (MATRIX_SOURCE, False, True),
+    ("estimated_road", True, True),
+    ("estimated_road", False, False),
+    ("ors", True, False),
+    (None, True, False),
+])
+def test_needs_route_geometry(source, enabled, expected):
+    with patch.multiple(settings, ors_enabled=enabled, ors_api_key="k"), \
+         patch.object(ors_client, "_ors_client", None):
+        assert provider.needs_route_geometry(source) is expected
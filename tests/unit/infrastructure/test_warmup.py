@@ -0,0 +1,56 @@
+"""Tests dla startup warm-up (steps, readiness gate, ORS off for synthetic plans)"""
+import time
+
+from app.api.health import HealthMonitor
+from app.api.warmup import Warmup, synthetic_trip
+from app.domain.models.trip_input import TripInput
+from app.infrastructure.config.settings import settings
+from app.infrastructure.routing.ors_client import ORSClient, is_ors_offline, ors_offline
+
+
+def test_runs_steps_once_and_records_failures():
+    calls = []
+
+    def broken():
+        calls.append("plan")
+        raise RuntimeError("no POIs for city")
+
+    warmup = Warmup(steps=[("catalogs", lambda: calls.append("catalogs") or {"pois": 3}), ("plan:X", broken)], enabled=True)
+    state = warmup.run()
+    warmup.run()  # idempotent
+    assert calls == ["catalogs", "plan"]
+    assert state["status"] == "done" and state["seconds"] is not None
+    assert state["steps"]["catalogs"]["result"] == {"pois": 3}
+    assert state["steps"]["plan:X"] == {"ok": False, "error": "RuntimeError: no POIs for city", "seconds": state["steps"]["plan:X"]["seconds"]}
+    assert warmup.blocker() is None  # a failed step does not keep the worker out of rotation
+
+    assert Warmup(steps=[], enabled=False).state()["status"] == "disabled"
+
+
+def test_readiness_waits_for_background_warmup():
+    release = []
+    warmup = Warmup(steps=[("slow", lambda: release and None)], enabled=True)
+    monitor = HealthMonitor(checks={"catalog": lambda: {"ok": True}}, interval_s=30, warmup=warmup.blocker)
+    monitor.run_checks()
+    ready, reasons = monitor.readiness()
+    assert not ready and reasons == ["warmup: pending (0 steps done)"]
+
+    warmup.start()
+    deadline = time.time() + 5
+    while warmup.state()["status"] != "done" and time.time() < deadline:
+        time.sleep(0.01)
+    assert monitor.readiness() == (True, [])
+
+
+def test_synthetic_plans_never_call_ors(monkeypatch):
+    monkeypatch.setattr(settings, "ors_enabled", True)
+    monkeypatch.setattr(settings, "ors_routing_enabled", True)
+    monkeypatch.setattr(settings, "ors_api_key", "key")
+    client = ORSClient()
+    assert client.enabled()
+    with ors_offline():
+        assert is_ors_offline() and not client.enabled() and not client.matrix_enabled()
+    assert client.enabled() and not is_ors_offline()
+
+    trip = TripInput(**synthetic_trip("Trójmiasto", 2))
+    assert trip.location.is_cluster and trip.trip_length.days == 2